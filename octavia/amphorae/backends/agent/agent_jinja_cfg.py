@@ -54,6 +54,13 @@ class AgentJinjaTemplater:
              'heartbeat_key': CONF.health_manager.heartbeat_key,
              'amphora_udp_driver': CONF.amphora_agent.amphora_udp_driver,
              'agent_tls_protocol': CONF.amphora_agent.agent_tls_protocol,
+             'prometheus_cache_ttl':
+                 CONF.amphora_agent.prometheus_cache_ttl,
+             'prometheus_exclude_members':
+                 CONF.amphora_agent.prometheus_exclude_members,
+             'vrrp_check_daemon': CONF.amphora_agent.vrrp_check_daemon,
+             'vrrp_check_daemon_interval':
+                 CONF.amphora_agent.vrrp_check_daemon_interval,
              'topology': topology,
              'administrative_log_facility':
                  CONF.amphora_agent.administrative_log_facility,
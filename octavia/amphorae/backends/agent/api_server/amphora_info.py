@@ -16,7 +16,9 @@ import os
 import re
 import socket
 import subprocess
+import threading
 
+from oslo_config import cfg
 from oslo_log import log as logging
 import pyroute2
 import webob
@@ -24,17 +26,33 @@ import webob
 from octavia.amphorae.backends.agent import api_server
 from octavia.amphorae.backends.agent.api_server import util
 from octavia.amphorae.backends.utils import network_utils
+from octavia.common import cache
 from octavia.common import constants as consts
 from octavia.common import exceptions
 
+CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
+# The resource usage of the amphora, shared by the details requests
+HOST_FACTS_CACHE = cache.TTLCache(
+    'amphora_host_facts', lambda: CONF.amphora_agent.host_facts_cache_ttl)
+
 
 class AmphoraInfo:
     def __init__(self, osutils):
         self._osutils = osutils
+        # The installed packages only change with a new amphora image
+        self._package_versions = {}
+        self._package_versions_lock = threading.Lock()
+        # The subprocesses started by the request of each thread
+        self._request = threading.local()
+
+    def _count_subprocess(self):
+        self._request.subprocess_count = (
+            getattr(self._request, 'subprocess_count', 0) + 1)
 
     def compile_amphora_info(self, extend_lvs_driver=None):
+        self._request.subprocess_count = 0
         extend_body = {}
         if extend_lvs_driver:
             extend_body = self._get_extend_body_from_lvs_driver(
@@ -45,9 +63,12 @@ class AmphoraInfo:
                 'api_version': api_server.VERSION}
         if extend_body:
             body.update(extend_body)
+        LOG.debug('Compiled the amphora info with %d subprocesses.',
+                  self._request.subprocess_count)
         return webob.Response(json=body)
 
     def compile_amphora_details(self, extend_lvs_driver=None):
+        self._request.subprocess_count = 0
         haproxy_loadbalancer_list = sorted(util.get_loadbalancers())
         haproxy_listener_list = sorted(util.get_listeners())
         extend_body = {}
@@ -61,9 +82,6 @@ class AmphoraInfo:
                 lvs_listener_list)
             extend_body['lvs_listener_process_count'] = lvs_count
             extend_body.update(extend_data)
-        meminfo = self._get_meminfo()
-        cpu = self._cpu()
-        st = os.statvfs('/')
         listeners = (
             sorted(set(haproxy_listener_list + lvs_listener_list))
             if lvs_listener_list else haproxy_listener_list)
@@ -71,41 +89,55 @@ class AmphoraInfo:
                 'haproxy_version':
                     self._get_version_of_installed_package('haproxy'),
                 'api_version': api_server.VERSION,
-                'networks': self._get_networks(),
                 'active': True,
                 'haproxy_count':
                     self._count_haproxy_processes(haproxy_loadbalancer_list),
                 'cpu_count': os.cpu_count(),
-                'cpu': {
-                    'total': cpu['total'],
-                    'user': cpu['user'],
-                    'system': cpu['system'],
-                    'soft_irq': cpu['softirq'], },
-                'memory': {
-                    'total': meminfo['MemTotal'],
-                    'free': meminfo['MemFree'],
-                    'buffers': meminfo['Buffers'],
-                    'cached': meminfo['Cached'],
-                    'swap_used': meminfo['SwapCached'],
-                    'shared': meminfo['Shmem'],
-                    'slab': meminfo['Slab'], },
-                'disk': {
-                    'used': (st.f_blocks - st.f_bfree) * st.f_frsize,
-                    'available': st.f_bavail * st.f_frsize},
-                'load': self._load(),
-                'active_tuned_profiles': self._get_active_tuned_profiles(),
                 'topology': consts.TOPOLOGY_SINGLE,
                 'topology_status': consts.TOPOLOGY_STATUS_OK,
                 'listeners': listeners,
                 'packages': {}}
+        body.update(HOST_FACTS_CACHE.get('host_facts', self._get_host_facts))
         if extend_body:
             body.update(extend_body)
+        LOG.debug('Compiled the amphora details with %d subprocesses.',
+                  self._request.subprocess_count)
         return webob.Response(json=body)
 
-    def _get_version_of_installed_package(self, name):
+    def _get_host_facts(self):
+        meminfo = self._get_meminfo()
+        cpu = self._cpu()
+        st = os.statvfs('/')
+        return {
+            'networks': self._get_networks(),
+            'cpu': {
+                'total': cpu['total'],
+                'user': cpu['user'],
+                'system': cpu['system'],
+                'soft_irq': cpu['softirq'], },
+            'memory': {
+                'total': meminfo['MemTotal'],
+                'free': meminfo['MemFree'],
+                'buffers': meminfo['Buffers'],
+                'cached': meminfo['Cached'],
+                'swap_used': meminfo['SwapCached'],
+                'shared': meminfo['Shmem'],
+                'slab': meminfo['Slab'], },
+            'disk': {
+                'used': (st.f_blocks - st.f_bfree) * st.f_frsize,
+                'available': st.f_bavail * st.f_frsize},
+            'load': self._load(),
+            'active_tuned_profiles': self._get_active_tuned_profiles()}
 
-        cmd = self._osutils.cmd_get_version_of_installed_package(name)
-        version = subprocess.check_output(cmd.split(), encoding='utf-8')
+    def _get_version_of_installed_package(self, name):
+        with self._package_versions_lock:
+            version = self._package_versions.get(name)
+            if version is None:
+                cmd = self._osutils.cmd_get_version_of_installed_package(name)
+                self._count_subprocess()
+                version = subprocess.check_output(cmd.split(),
+                                                  encoding='utf-8')
+                self._package_versions[name] = version
         return version
 
     def _count_haproxy_processes(self, lb_list):
@@ -167,6 +199,8 @@ class AmphoraInfo:
 
     def _get_networks(self):
         networks = {}
+        # NetNS runs the netlink requests in a child process
+        self._count_subprocess()
         with pyroute2.NetNS(consts.AMPHORA_NAMESPACE) as netns:
             for interface in netns.get_links():
                 interface_name = None
@@ -0,0 +1,145 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from concurrent import futures
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from octavia.common import cache
+from octavia.common import constants as consts
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+# The digests of the configurations which passed the validation
+VALID_CONFIGS = cache.TTLCache(
+    'haproxy_valid_configs',
+    lambda: CONF.amphora_agent.haproxy_validation_cache_ttl)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = futures.ThreadPoolExecutor(
+                max_workers=CONF.amphora_agent.haproxy_validation_workers,
+                thread_name_prefix='haproxy-validation')
+        return _executor
+
+
+def _update_file_digest(digest, path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        digest.update(f'{path}:missing\n'.encode())
+    else:
+        digest.update(f'{path}:{st.st_ino}:{st.st_size}:'
+                      f'{st.st_mtime_ns}\n'.encode())
+
+
+def get_haproxy_path():
+    """Returns the path of the haproxy binary validating the configurations.
+
+    The configurations are checked with the haproxy found in the PATH of
+    the agent.
+    """
+    return shutil.which('haproxy') or 'haproxy'
+
+
+def get_config_digest(config, peer_name, cert_dir, haproxy_path):
+    """Returns the digest identifying the validation of a configuration.
+
+    Besides the configuration, the result of the validation depends on the
+    haproxy binary, the user and group configuration and the certificates of
+    the load balancer, so their metadata are part of the digest.
+
+    :param config: The content of the haproxy configuration.
+    :param peer_name: The local peer name of haproxy.
+    :param cert_dir: The directory of the certificates of the load balancer.
+    :param haproxy_path: The path of the haproxy binary checking the
+                         configuration.
+    """
+    digest = hashlib.sha256()
+    digest.update(config.encode('utf-8'))
+    digest.update(f'\n{peer_name}\n'.encode('utf-8'))
+    _update_file_digest(digest, haproxy_path)
+    _update_file_digest(digest, consts.HAPROXY_USER_GROUP_CFG)
+    try:
+        cert_files = sorted(entry.path for entry in os.scandir(cert_dir))
+    except OSError:
+        cert_files = []
+    for path in cert_files:
+        _update_file_digest(digest, path)
+    return digest.hexdigest()
+
+
+def _run_check(cmd, deadline):
+    timeout = None
+    if deadline is not None:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            # The validation waited for a worker for too long
+            raise subprocess.TimeoutExpired(
+                cmd, CONF.amphora_agent.haproxy_validation_timeout)
+    subprocess.check_output(cmd, stderr=subprocess.STDOUT, encoding='utf-8',
+                            timeout=timeout)
+    return True
+
+
+def validate_config(config_path, config, peer_name, cert_dir):
+    """Validates a haproxy configuration with haproxy -c.
+
+    The validations run in a bounded pool of workers. The configurations
+    which passed the validation are cached, so uploading an identical
+    configuration again does not run haproxy.
+
+    :param config_path: The path of the configuration file to check.
+    :param config: The content of the configuration file.
+    :param peer_name: The local peer name of haproxy.
+    :param cert_dir: The directory of the certificates of the load balancer.
+    :raises subprocess.CalledProcessError: The configuration is invalid.
+    :raises subprocess.TimeoutExpired: The validation did not complete in
+                                       time.
+    :returns: A tuple of the duration of the validation in seconds and
+              whether the configuration already passed the validation.
+    """
+    start = time.monotonic()
+    deadline = None
+    if CONF.amphora_agent.haproxy_validation_timeout:
+        deadline = start + CONF.amphora_agent.haproxy_validation_timeout
+    haproxy_path = get_haproxy_path()
+    cmd = [haproxy_path, '-c', '-L', peer_name, '-f', config_path, '-f',
+           consts.HAPROXY_USER_GROUP_CFG]
+    digest = get_config_digest(config, peer_name, cert_dir, haproxy_path)
+    checked = []
+
+    def _validate():
+        checked.append(True)
+        return _get_executor().submit(_run_check, cmd, deadline).result()
+
+    VALID_CONFIGS.get(digest, _validate)
+    duration = time.monotonic() - start
+    cached = not checked
+    LOG.debug('Validated haproxy configuration %(path)s in %(duration).3f '
+              'seconds (cached: %(cached)s).',
+              {'path': config_path, 'duration': duration, 'cached': cached})
+    return duration, cached
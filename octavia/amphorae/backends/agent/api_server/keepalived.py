@@ -12,6 +12,7 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import math
 import os
 import stat
 import subprocess
@@ -89,9 +90,18 @@ class Keepalived:
             mode = (stat.S_IRWXU | stat.S_IRGRP | stat.S_IXGRP |
                     stat.S_IROTH | stat.S_IXOTH)
             open_obj = os.open(keepalived_path, flags, mode)
+            if CONF.amphora_agent.vrrp_check_daemon:
+                # The status of the daemon is stale after three intervals
+                check_args = {
+                    'vrrp_check_status_path': util.vrrp_check_status_path(),
+                    'vrrp_check_max_age': math.ceil(
+                        3 * CONF.amphora_agent.vrrp_check_daemon_interval)}
+            else:
+                check_args = {}
             with os.fdopen(open_obj, 'w') as text_file:
                 text = check_script_template.render(
-                    check_scripts_dir=util.keepalived_check_scripts_dir()
+                    check_scripts_dir=util.keepalived_check_scripts_dir(),
+                    **check_args
                 )
                 text_file.write(text)
 
@@ -33,7 +33,7 @@ from octavia.common import constants as consts
 BUFFER = 100
 CHECK_SCRIPT_NAME = 'udp_check.sh'
 CONF = cfg.CONF
-KEEPALIVED_CHECK_SCRIPT_NAME = 'lvs_udp_check.sh'
+KEEPALIVED_CHECK_SCRIPT_NAME = util.LVS_CHECK_SCRIPT_NAME
 LOG = logging.getLogger(__name__)
 
 j2_env = jinja2.Environment(autoescape=True, loader=jinja2.FileSystemLoader(
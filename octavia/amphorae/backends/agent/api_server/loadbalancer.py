@@ -29,6 +29,7 @@ import webob
 from werkzeug import exceptions
 
 from octavia.amphorae.backends.agent.api_server import haproxy_compatibility
+from octavia.amphorae.backends.agent.api_server import haproxy_validation
 from octavia.amphorae.backends.agent.api_server import util
 from octavia.amphorae.backends.utils import haproxy_query
 from octavia.common import constants as consts
@@ -42,6 +43,8 @@ HAPROXY_QUERY_RETRIES = 5
 CONF = cfg.CONF
 
 SYSTEMD_CONF = 'systemd.conf.j2'
+ALLOY_SERVICE = 'alloy'
+METRICS_PROXY_SERVICE = 'haproxy-metrics-proxy'
 
 JINJA_ENV = jinja2.Environment(
     autoescape=True,
@@ -124,13 +127,11 @@ class Loadbalancer:
         with os.fdopen(os.open(name, flags, mode), 'w') as file:
             file.write(new_config)
 
-        # use haproxy to check the config
-        cmd = (f"haproxy -c -L {peer_name} -f {name} -f "
-               f"{consts.HAPROXY_USER_GROUP_CFG}")
-
+        # use haproxy to check the config, unless it already passed
         try:
-            subprocess.check_output(cmd.split(), stderr=subprocess.STDOUT,
-                                    encoding='utf-8')
+            validation_time, validation_cached = (
+                haproxy_validation.validate_config(
+                    name, new_config, peer_name, self._cert_dir(lb_id)))
         except subprocess.CalledProcessError as e:
             LOG.error("Failed to verify haproxy file: %s %s", e, e.output)
             # Save the last config that failed validation for debugging
@@ -138,6 +139,12 @@ class Loadbalancer:
             return webob.Response(
                 json={'message': "Invalid request", 'details': e.output},
                 status=400)
+        except subprocess.TimeoutExpired as e:
+            LOG.error("Timed out verifying haproxy file: %s", e)
+            return webob.Response(
+                json={'message': "Timed out validating the configuration",
+                      'details': str(e)},
+                status=503)
 
         # file ok - move it
         os.rename(name, util.config_path(lb_id))
@@ -146,9 +153,7 @@ class Loadbalancer:
 
         template = SYSTEMD_TEMPLATE
         # Render and install the network namespace systemd service
-        util.install_netns_systemd_service()
-        util.run_systemctl_command(
-            consts.ENABLE, consts.AMP_NETNS_SVC_PREFIX + '.service', False)
+        units_changed = util.install_netns_systemd_service()
 
         # mode 00644
         mode = stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP | stat.S_IROTH
@@ -171,36 +176,42 @@ class Loadbalancer:
                     haproxy_minor_version=hap_minor
                 )
                 text_file.write(text)
+            units_changed = True
 
-        # Make sure the new service is enabled on boot
-        try:
-            util.run_systemctl_command(
-                consts.ENABLE, consts.LOADBALANCER_SYSTEMD % lb_id)
-        except subprocess.CalledProcessError as e:
-            return webob.Response(json={
-                'message': "Error enabling octavia-keepalived service",
-                'details': e.output}, status=500)
-
-        # Update the alloy configuration
-        util.update_alloy_configuration(
+        # Update the alloy configuration and service file
+        alloy_changed, override_changed = util.update_alloy_configuration(
             lb_id,
             flask.request.headers.get('X-Octavia-Cloud-FQDN'))
 
-        # Update the alloy service file
-        with open('/etc/systemd/system/alloy.service.d/override.conf', 'r') as f:
-            service_file = f.read()
-        service_file = service_file.replace('%LB_ID%', lb_id)
-        with open('/etc/systemd/system/alloy.service.d/override.conf', 'w') as f:
-            f.write(service_file)
+        # The files and the units are only updated when they change, so an
+        # update of the configuration of a load balancer only runs systemctl
+        # once.
+        if units_changed or override_changed:
+            util.run_systemctl_command('daemon-reload', '', False)
+
+        # Make sure the new service is enabled on boot
+        lb_unit = consts.LOADBALANCER_SYSTEMD % lb_id
+        failed_units = util.enable_systemd_units(
+            [consts.AMP_NETNS_SVC_PREFIX + '.service', lb_unit,
+             ALLOY_SERVICE, METRICS_PROXY_SERVICE])
+        if lb_unit in failed_units:
+            return webob.Response(json={
+                'message': "Error enabling octavia-keepalived service",
+                'details': failed_units[lb_unit]}, status=500)
 
-        util.run_systemctl_command('daemon-reload', '', False)
-        util.run_systemctl_command('enable alloy', '', False)
-        util.run_systemctl_command('enable haproxy-metrics-proxy', '', False)
-        util.run_systemctl_command('start haproxy-metrics-proxy', '', False)
-        util.run_systemctl_command('start alloy', '', False)
+        if alloy_changed or override_changed:
+            util.run_systemctl_command(consts.START, METRICS_PROXY_SERVICE,
+                                       False)
+            util.run_systemctl_command(consts.RESTART, ALLOY_SERVICE, False)
+        else:
+            util.run_systemctl_command(
+                consts.START, f'{METRICS_PROXY_SERVICE} {ALLOY_SERVICE}',
+                False)
 
         res = webob.Response(json={'message': 'OK'}, status=202)
         res.headers['ETag'] = stream.get_md5()
+        res.headers[consts.VALIDATION_TIME_HEADER] = f'{validation_time:.3f}'
+        res.headers[consts.VALIDATION_CACHED_HEADER] = str(validation_cached)
 
         return res
 
@@ -358,6 +369,7 @@ class Loadbalancer:
 
         util.run_systemctl_command(
             consts.DISABLE, consts.LOADBALANCER_SYSTEMD % lb_id, False)
+        util.forget_enabled_systemd_unit(consts.LOADBALANCER_SYSTEMD % lb_id)
 
         # delete the directory + init script for that listener
         shutil.rmtree(util.haproxy_dir(lb_id))
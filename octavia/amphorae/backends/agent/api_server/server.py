@@ -144,11 +144,17 @@ class Server:
                               view_func=self.set_interface_rules,
                               methods=['PUT'])
 
+    # The operations on a load balancer or a LVS listener are serialized,
+    # the operations on different ones run concurrently.
     def upload_haproxy_config(self, amphora_id, lb_id):
-        return self._loadbalancer.upload_haproxy_config(amphora_id, lb_id)
+        with util.lock(lb_id):
+            return self._loadbalancer.upload_haproxy_config(amphora_id,
+                                                            lb_id)
 
     def upload_lvs_listener_config(self, amphora_id, listener_id):
-        return self._lvs_listener.upload_lvs_listener_config(listener_id)
+        with util.lock(listener_id):
+            return self._lvs_listener.upload_lvs_listener_config(
+                listener_id)
 
     def get_haproxy_config(self, lb_id):
         return self._loadbalancer.get_haproxy_config(lb_id)
@@ -157,17 +163,20 @@ class Server:
         return self._lvs_listener.get_lvs_listener_config(listener_id)
 
     def start_stop_lb_object(self, object_id, action):
-        backend = util.get_backend_for_lb_object(object_id)
-        if backend == consts.LVS_BACKEND:
-            return self._lvs_listener.manage_lvs_listener(
-                listener_id=object_id, action=action)
-        return self._loadbalancer.start_stop_lb(lb_id=object_id, action=action)
+        with util.lock(object_id):
+            backend = util.get_backend_for_lb_object(object_id)
+            if backend == consts.LVS_BACKEND:
+                return self._lvs_listener.manage_lvs_listener(
+                    listener_id=object_id, action=action)
+            return self._loadbalancer.start_stop_lb(lb_id=object_id,
+                                                    action=action)
 
     def delete_lb_object(self, object_id):
-        backend = util.get_backend_for_lb_object(object_id)
-        if backend == consts.LVS_BACKEND:
-            return self._lvs_listener.delete_lvs_listener(object_id)
-        return self._loadbalancer.delete_lb(object_id)
+        with util.lock(object_id):
+            backend = util.get_backend_for_lb_object(object_id)
+            if backend == consts.LVS_BACKEND:
+                return self._lvs_listener.delete_lvs_listener(object_id)
+            return self._loadbalancer.delete_lb(object_id)
 
     def get_details(self):
         return self._amphora_info.compile_amphora_details(
@@ -183,13 +192,15 @@ class Server:
             other_listeners=lvs_listeners)
 
     def upload_certificate(self, lb_id, filename):
-        return self._loadbalancer.upload_certificate(lb_id, filename)
+        with util.lock(lb_id):
+            return self._loadbalancer.upload_certificate(lb_id, filename)
 
     def get_certificate_md5(self, lb_id, filename):
         return self._loadbalancer.get_certificate_md5(lb_id, filename)
 
     def delete_certificate(self, lb_id, filename):
-        return self._loadbalancer.delete_certificate(lb_id, filename)
+        with util.lock(lb_id):
+            return self._loadbalancer.delete_certificate(lb_id, filename)
 
     def plug_vip(self, vip):
         # Catch any issues with the subnet info json
@@ -202,15 +213,16 @@ class Server:
         except Exception as e:
             raise exceptions.BadRequest(
                 description='Invalid subnet information') from e
-        return self._plug.plug_vip(vip,
-                                   net_info['subnet_cidr'],
-                                   net_info['gateway'],
-                                   net_info['mac_address'],
-                                   net_info.get('mtu'),
-                                   net_info.get('vrrp_ip'),
-                                   net_info.get('host_routes', ()),
-                                   net_info.get('additional_vips', ()),
-                                   net_info.get('is_sriov', False))
+        with util.lock(util.NETWORK_LOCK):
+            return self._plug.plug_vip(vip,
+                                       net_info['subnet_cidr'],
+                                       net_info['gateway'],
+                                       net_info['mac_address'],
+                                       net_info.get('mtu'),
+                                       net_info.get('vrrp_ip'),
+                                       net_info.get('host_routes', ()),
+                                       net_info.get('additional_vips', ()),
+                                       net_info.get('is_sriov', False))
 
     def plug_network(self):
         try:
@@ -220,25 +232,33 @@ class Server:
         except Exception as e:
             raise exceptions.BadRequest(
                 description='Invalid port information') from e
-        return self._plug.plug_network(port_info['mac_address'],
-                                       port_info.get('fixed_ips'),
-                                       port_info.get('mtu'),
-                                       port_info.get('vip_net_info'),
-                                       port_info.get('is_sriov'))
+        with util.lock(util.NETWORK_LOCK):
+            return self._plug.plug_network(port_info['mac_address'],
+                                           port_info.get('fixed_ips'),
+                                           port_info.get('mtu'),
+                                           port_info.get('vip_net_info'),
+                                           port_info.get('is_sriov'))
 
     def upload_cert(self):
-        return certificate_update.upload_server_cert()
+        with util.lock(util.AGENT_LOCK):
+            return certificate_update.upload_server_cert()
 
     def upload_vrrp_config(self):
-        return self._keepalived.upload_keepalived_config()
+        with util.lock(util.VRRP_LOCK):
+            return self._keepalived.upload_keepalived_config()
 
     def manage_service_vrrp(self, action):
-        return self._keepalived.manager_keepalived_service(action)
+        with util.lock(util.VRRP_LOCK):
+            return self._keepalived.manager_keepalived_service(action)
 
     def get_interface(self, ip_addr):
         return self._amphora_info.get_interface(ip_addr)
 
     def upload_config(self):
+        with util.lock(util.AGENT_LOCK):
+            return self._upload_config()
+
+    def _upload_config(self):
         try:
             stream = flask.request.stream
             file_path = cfg.find_config_files(project=CONF.project,
@@ -279,8 +299,7 @@ class Server:
             raise exceptions.BadRequest(
                 description='Invalid rules information') from e
 
-        nftable_utils.write_nftable_rules_file(interface, rules_info)
-
-        nftable_utils.load_nftables_file()
+        with util.lock(util.NETWORK_LOCK):
+            nftable_utils.apply_nftable_rules(interface, rules_info)
 
         return webob.Response(json={'message': 'OK'}, status=200)
@@ -13,11 +13,16 @@
 #    under the License.
 
 
+import contextlib
+import fcntl
+import json
 import os
 import re
 import stat
 import subprocess
+import threading
 import typing as tp
+import urllib.request
 
 import jinja2
 from oslo_config import cfg
@@ -26,16 +31,39 @@ from oslo_log import log as logging
 from octavia.amphorae.backends.utils import ip_advertisement
 from octavia.amphorae.backends.utils import network_utils
 from octavia.common import constants as consts
+from octavia.i18n import _
 
 CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
+METADATA_URL = "http://169.254.169.254/openstack/2025-04-04/meta_data.json"
+ALLOY_CONFIG_PATH = '/etc/alloy/config.alloy'
+ALLOY_ENVIRONMENT_PATH = '/etc/alloy/environment'
+ALLOY_OVERRIDE_PATH = '/etc/systemd/system/alloy.service.d/override.conf'
+LVS_CHECK_SCRIPT_NAME = 'lvs_udp_check.sh'
+
+_PROJECT_ID = None
+_PROJECT_ID_LOCK = threading.Lock()
+# The systemd units enabled by this agent
+_ENABLED_UNITS = set()
+_ENABLED_UNITS_LOCK = threading.Lock()
+
 FRONTEND_BACKEND_PATTERN = re.compile(r'\n(frontend|backend)\s+(\S+)\n')
 LISTENER_MODE_PATTERN = re.compile(r'^\s+mode\s+(.*)$', re.MULTILINE)
 TLS_CERT_PATTERN = re.compile(r'^\s+bind\s+\S+\s+ssl crt-list\s+(\S*)',
                               re.MULTILINE)
 STATS_SOCKET_PATTERN = re.compile(r'stats socket\s+(\S+)')
 
+# The names of the locks of the resources shared by the load balancers
+AGENT_LOCK = 'agent'
+NETWORK_LOCK = 'network'
+VRRP_LOCK = 'vrrp'
+# The flock of a file conflicts with the flocks of the other open files, even
+# in the same process, so a thread only flocks the first time it takes a lock.
+_THREAD_LOCKS = {}
+_THREAD_LOCKS_LOCK = threading.Lock()
+_HELD_LOCKS = threading.local()
+
 
 class ParsingError(Exception):
     pass
@@ -45,6 +73,48 @@ def init_path(lb_id):
     return os.path.join(consts.SYSTEMD_DIR, f'haproxy-{lb_id}.service')
 
 
+def lock_path(name):
+    return os.path.join(CONF.haproxy_amphora.base_path, 'locks',
+                        f'{name}.lock')
+
+
+@contextlib.contextmanager
+def lock(name):
+    """Serializes the operations on a resource of the amphora.
+
+    The lock is an exclusive lock on a file, so it serializes the threads
+    and the processes of the amphora agent. The operations on the other
+    resources run concurrently. A thread which holds the lock can take it
+    again.
+
+    :param name: The name of the resource, a load balancer or listener ID or
+                 one of the *_LOCK names.
+    """
+    with _THREAD_LOCKS_LOCK:
+        thread_lock = _THREAD_LOCKS.setdefault(name, threading.RLock())
+    if not hasattr(_HELD_LOCKS, 'depths'):
+        _HELD_LOCKS.depths = {}
+    depths = _HELD_LOCKS.depths
+
+    with thread_lock:
+        depth = depths.get(name, 0)
+        fd = None
+        try:
+            if depth == 0:
+                path = lock_path(name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd = os.open(path, os.O_RDWR | os.O_CREAT,
+                             stat.S_IRUSR | stat.S_IWUSR)
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            depths[name] = depth + 1
+            yield
+        finally:
+            depths[name] = depth
+            # Closing the file releases the lock
+            if fd is not None:
+                os.close(fd)
+
+
 def keepalived_lvs_dir():
     return os.path.join(CONF.haproxy_amphora.base_path, 'lvs')
 
@@ -115,6 +185,11 @@ def haproxy_check_script_path():
                         'haproxy_check_script.sh')
 
 
+def lvs_check_script_path():
+    return os.path.join(keepalived_check_scripts_dir(),
+                        LVS_CHECK_SCRIPT_NAME)
+
+
 def keepalived_dir():
     return os.path.join(CONF.haproxy_amphora.base_path, 'vrrp')
 
@@ -148,6 +223,16 @@ def keepalived_check_script_path():
                         'vrrp/check_script.sh')
 
 
+def vrrp_check_targets_path():
+    return os.path.join(CONF.haproxy_amphora.base_path,
+                        'vrrp/check_targets.json')
+
+
+def vrrp_check_status_path():
+    return os.path.join(CONF.haproxy_amphora.base_path,
+                        'vrrp/check_status')
+
+
 def get_listeners():
     """Get Listeners
 
@@ -197,6 +282,10 @@ def is_lvs_listener_running(listener_id):
 
 
 def install_netns_systemd_service():
+    """Installs the systemd unit of the network namespace.
+
+    :returns: True if the unit file was installed.
+    """
     flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
     # mode 00644
     mode = stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP | stat.S_IROTH
@@ -217,6 +306,8 @@ def install_netns_systemd_service():
                 consts.AMP_NETNS_SVC_PREFIX + '.systemd.j2').render(
                     amphora_nsname=consts.AMPHORA_NAMESPACE)
             text_file.write(text)
+        return True
+    return False
 
 
 def run_systemctl_command(command, service, raise_error=True):
@@ -294,6 +385,12 @@ def parse_haproxy_file(lb_id):
 
 
 def vrrp_check_script_update(lb_id, action):
+    # The check script is shared by all the load balancers
+    with lock(VRRP_LOCK):
+        _vrrp_check_script_update(lb_id, action)
+
+
+def _vrrp_check_script_update(lb_id, action):
     os.makedirs(keepalived_dir(), exist_ok=True)
     os.makedirs(keepalived_check_scripts_dir(), exist_ok=True)
 
@@ -305,6 +402,7 @@ def vrrp_check_script_update(lb_id, action):
             with open(haproxy_check_script_path(),
                       'w', encoding='utf-8') as text_file:
                 text_file.write('exit 1')
+            _write_vrrp_check_targets(None)
         else:
             try:
                 LOG.debug("Attempting to remove old haproxy check script...")
@@ -322,6 +420,19 @@ def vrrp_check_script_update(lb_id, action):
     cmd = f"haproxy-vrrp-check {' '.join(args)}; exit $?"
     with open(haproxy_check_script_path(), 'w', encoding='utf-8') as text_file:
         text_file.write(cmd)
+    _write_vrrp_check_targets(args)
+
+
+def _write_vrrp_check_targets(sockets):
+    """Writes the stats sockets checked by the amphora-vrrp-check daemon.
+
+    :param sockets: The list of the stats sockets, or None when haproxy
+                    must be reported down.
+    """
+    path = vrrp_check_targets_path()
+    with open(path + '.new', 'w', encoding='utf-8') as targets_file:
+        json.dump({'haproxy_sockets': sockets}, targets_file)
+    os.replace(path + '.new', path)
 
 
 def get_haproxy_vip_addresses(lb_id):
@@ -421,51 +532,111 @@ def send_member_advertisements(fixed_ips: tp.Iterable[tp.Dict[str, str]]):
         LOG.debug('Send member advertisement failed due to: %s', str(e))
 
 
-import json
-import urllib.request
+def get_project_id():
+    """Returns the project ID of the amphora.
+
+    The project of an amphora never changes, so the metadata service is only
+    queried once.
+    """
+    global _PROJECT_ID
+    with _PROJECT_ID_LOCK:
+        if _PROJECT_ID is None:
+            with urllib.request.urlopen(METADATA_URL) as response:  # nosec
+                project_id = json.load(response).get("project_id")
+            if project_id is None:
+                raise ValueError(_("project_id is missing in metadata "
+                                   "service response"))
+            _PROJECT_ID = str(project_id)
+        return _PROJECT_ID
+
+
+def write_file_if_changed(path, content):
+    """Writes a file unless it already has this content.
+
+    :returns: True if the file was written.
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
 
 def update_alloy_configuration(loadbalancer_id, cloud_fqdn):
-    # Fetch project_id from metadata service
-    with urllib.request.urlopen("http://169.254.169.254/openstack/2025-04-04/meta_data.json") as response:
-        metadata = json.load(response)
-        project_id = metadata.get("project_id")
-        if project_id is None:
-            raise ValueError("project_id is missing in metadata service response")
+    """Fills in the placeholders of the alloy configuration files.
 
-    project_id = str(project_id)
+    The files are only rewritten when their content changes, and the
+    metadata service is only queried while the project ID is missing.
 
-    with open('/etc/alloy/environment', 'r') as env_file:
+    :returns: A tuple of whether the alloy configuration and whether its
+              systemd override changed.
+    """
+    with open(ALLOY_ENVIRONMENT_PATH, encoding='utf-8') as env_file:
         environment = env_file.read().strip()
 
-    # Update /etc/alloy/config.alloy
-    with open('/etc/alloy/config.alloy', 'r') as f:
+    with open(ALLOY_CONFIG_PATH, encoding='utf-8') as f:
         config = f.read()
 
-    if project_id is None or not isinstance(project_id, str):
-        raise ValueError("project_id must be a non-None string before replacing in config")
-
     if loadbalancer_id is None or not isinstance(loadbalancer_id, str):
-        raise ValueError("loadbalancer_id must be a non-None string before replacing in config")
-
-    if environment is None or not isinstance(environment, str):
-        raise ValueError("environment must be a non-None string before replacing in config")
+        raise ValueError(_("loadbalancer_id must be a non-None string "
+                           "before replacing in config"))
 
     if cloud_fqdn is None or not isinstance(cloud_fqdn, str):
-        raise ValueError("cloud_fqdn must be a non-None string before replacing in config")
+        raise ValueError(_("cloud_fqdn must be a non-None string before "
+                           "replacing in config"))
 
-    config = config.replace('%PROJECT_ID%', project_id)
+    if '%PROJECT_ID%' in config:
+        config = config.replace('%PROJECT_ID%', get_project_id())
     config = config.replace('%LB_ID%', loadbalancer_id)
     config = config.replace('%ENV%', environment)
     config = config.replace('%CLOUD_FQDN%', cloud_fqdn)
-    with open('/etc/alloy/config.alloy', 'w') as f:
-        f.write(config)
+    config_changed = write_file_if_changed(ALLOY_CONFIG_PATH, config)
 
-    # Update /etc/systemd/system/alloy.service.d/override.conf
+    override_changed = False
     try:
-        with open('/etc/systemd/system/alloy.service.d/override.conf', 'r') as f:
+        with open(ALLOY_OVERRIDE_PATH, encoding='utf-8') as f:
             override_conf = f.read()
         override_conf = override_conf.replace('%LB_ID%', loadbalancer_id)
-        with open('/etc/systemd/system/alloy.service.d/override.conf', 'w') as f:
-            f.write(override_conf)
+        override_changed = write_file_if_changed(ALLOY_OVERRIDE_PATH,
+                                                 override_conf)
     except Exception as e:
-        LOG.error(f"Failed to update override.conf: {e}")
+        LOG.error("Failed to update override.conf: %s", e)
+    return config_changed, override_changed
+
+
+def enable_systemd_units(units):
+    """Enables systemd units with a single systemctl call.
+
+    The units enabled by this agent are skipped. When the call fails, each
+    unit is enabled separately.
+
+    :param units: A list of the units.
+    :returns: A dictionary of the units that failed to be enabled to the
+              output of systemctl.
+    """
+    with _ENABLED_UNITS_LOCK:
+        units = [unit for unit in units if unit not in _ENABLED_UNITS]
+    if not units:
+        return {}
+    failed = {}
+    try:
+        run_systemctl_command(consts.ENABLE, ' '.join(units))
+    except subprocess.CalledProcessError:
+        for unit in units:
+            try:
+                run_systemctl_command(consts.ENABLE, unit)
+            except subprocess.CalledProcessError as e:
+                failed[unit] = e.output
+    with _ENABLED_UNITS_LOCK:
+        _ENABLED_UNITS.update(unit for unit in units if unit not in failed)
+    return failed
+
+
+def forget_enabled_systemd_unit(unit):
+    """Makes enable_systemd_units enable the unit again."""
+    with _ENABLED_UNITS_LOCK:
+        _ENABLED_UNITS.discard(unit)
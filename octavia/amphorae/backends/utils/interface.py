@@ -15,6 +15,7 @@
 import errno
 import ipaddress
 import os
+import select
 import socket
 import subprocess
 import time
@@ -23,6 +24,8 @@ from oslo_config import cfg
 from oslo_log import log as logging
 import pyroute2
 # pylint: disable=no-name-in-module
+from pyroute2.netlink import rtnl
+# pylint: disable=no-name-in-module
 from pyroute2.netlink.rtnl import ifaddrmsg
 # pylint: disable=no-name-in-module
 from pyroute2.netlink.rtnl import rt_proto
@@ -43,7 +46,6 @@ class InterfaceController:
     SET = 'set'
     FLUSH = 'flush'
 
-    TENTATIVE_WAIT_INTERVAL = .2
     TENTATIVE_WAIT_TIMEOUT = 30
 
     def interface_file_list(self):
@@ -145,20 +147,30 @@ class InterfaceController:
             LOG.debug("Running '%s'", cmd)
             subprocess.check_output(cmd, stderr=subprocess.STDOUT)
 
-    def _wait_tentative(self, ipr, idx):
-        start = time.time()
-        while time.time() - start < self.TENTATIVE_WAIT_TIMEOUT:
-            addrs = ipr.get_addr(idx)
-            has_tentative = [
-                True
-                for addr in addrs
-                if (addr[consts.FAMILY] == socket.AF_INET6 and
-                    addr['flags'] & ifaddrmsg.IFA_F_TENTATIVE)]
-            if not has_tentative:
+    def _has_tentative(self, ipr, indexes):
+        return any(
+            addr['index'] in indexes and
+            addr['flags'] & ifaddrmsg.IFA_F_TENTATIVE
+            for addr in ipr.get_addr(family=socket.AF_INET6))
+
+    def _wait_tentative(self, ipr, monitor, indexes):
+        """Waits for the duplicate address detection of the IPv6 addresses.
+
+        The monitor socket is bound to the IPv6 address notifications before
+        the addresses are added, the addresses are checked again each time
+        the kernel notifies a change.
+        """
+        deadline = time.monotonic() + self.TENTATIVE_WAIT_TIMEOUT
+        while self._has_tentative(ipr, indexes):
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                LOG.warning("Some IPV6 addresses remain still in 'tentative' "
+                            "state after %d seconds.",
+                            self.TENTATIVE_WAIT_TIMEOUT)
                 return
-            time.sleep(self.TENTATIVE_WAIT_INTERVAL)
-        LOG.warning("Some IPV6 addresses remain still in 'tentative' state "
-                    "after %d seconds.", self.TENTATIVE_WAIT_TIMEOUT)
+            readable, _, _ = select.select([monitor], [], [], timeout)
+            if readable:
+                monitor.get()
 
     def _normalize_ip_address(self, address):
         if not address:
@@ -173,41 +185,107 @@ class InterfaceController:
         return ip_network.compressed
 
     def up(self, interface):
-        LOG.info("Setting interface %s up", interface.name)
-
-        if interface.is_sriov:
-            nftable_utils.write_nftable_rules_file(interface.name, [])
-            nftable_utils.load_nftables_file()
-
-        with pyroute2.IPRoute() as ipr:
-            idx = ipr.link_lookup(ifname=interface.name)[0]
-
-            # Workaround for https://github.com/PyCQA/pylint/issues/8497
-            # pylint: disable=E1136, E1121
-            link = ipr.get_links(idx)[0]
-            current_state = link.get(consts.STATE)
-
-            if current_state == consts.IFACE_DOWN:
-                self._ipr_command(ipr.link, self.SET, index=idx,
-                                  state=consts.IFACE_UP, mtu=interface.mtu)
-                for address in interface.addresses:
-                    if address.get(consts.DHCP):
-                        self._dhclient_up(interface.name)
-                    if address.get(consts.IPV6AUTO):
-                        self._ipv6auto_up(interface.name)
-
-            self._addresses_up(interface, ipr, idx)
-            self._routes_up(interface, ipr, idx)
+        errors = self.up_all([interface])
+        if errors:
+            raise errors[interface.name]
+
+    def _for_each(self, links, errors, method, *args):
+        for link in links:
+            interface = link[0]
+            if interface.name in errors:
+                continue
+            try:
+                method(*link, *args)
+            except Exception as e:
+                LOG.error("Failed to set interface %s up: %s",
+                          interface.name, e)
+                errors[interface.name] = e
+
+    def up_all(self, interfaces):
+        """Sets interfaces up in a single netlink session.
+
+        The addresses, routes and rules are dumped once for all the
+        interfaces, and the duplicate address detection of the new IPv6
+        addresses of all the interfaces is awaited once.
+
+        :param interfaces: The interface files of the interfaces.
+        :returns: A dict of the exceptions of the interfaces which failed,
+                  by interface name.
+        """
+        errors = {}
+        interfaces = list(interfaces)
+        for interface in interfaces:
+            LOG.info("Setting interface %s up", interface.name)
+
+        sriov_interfaces = [interface for interface in interfaces
+                            if interface.is_sriov]
+        if sriov_interfaces:
+            # The base rules do not depend on the interface, they are loaded
+            # once for all the SR-IOV interfaces
+            try:
+                nftable_utils.write_nftable_rules_file(
+                    sriov_interfaces[0].name, [])
+                nftable_utils.load_nftables_file()
+            except Exception as e:
+                LOG.error("Failed to load the nftables rules of %s: %s",
+                          ', '.join(i.name for i in sriov_interfaces), e)
+                for interface in sriov_interfaces:
+                    errors[interface.name] = e
+
+        with pyroute2.IPRoute() as ipr, pyroute2.IPRoute() as monitor:
+            monitor.bind(groups=rtnl.RTMGRP_IPV6_IFADDR)
+
+            links = []
+            self._for_each([(interface,) for interface in interfaces],
+                           errors, self._link_up, ipr, links)
+
+            addrs = ipr.get_addr()
+            unused_addresses = {}
+            self._for_each(links, errors, self._addresses_up, ipr, addrs,
+                           unused_addresses)
+            self._wait_tentative(ipr, monitor,
+                                 {link[1] for link in links})
+            self._for_each(links, errors, self._addresses_cleanup, ipr,
+                           unused_addresses)
+
+            routes = ipr.get_routes()
+            self._for_each(links, errors, self._routes_up, ipr, routes)
             # only the vip port updates the rules
-            if interface.if_type == consts.VIP:
-                self._rules_up(interface, ipr, idx)
-
-            self._scripts_up(interface, current_state)
-
-    def _addresses_up(self, interface, ipr, idx):
+            vip_links = [link for link in links
+                         if link[0].if_type == consts.VIP]
+            if vip_links:
+                rules = ipr.get_rules()
+                self._for_each(vip_links, errors, self._rules_up, ipr, rules)
+
+        self._for_each(links, errors, self._scripts_up)
+        return errors
+
+    def _link_up(self, interface, ipr, links):
+        idx = ipr.link_lookup(ifname=interface.name)[0]
+
+        # Workaround for https://github.com/PyCQA/pylint/issues/8497
+        # pylint: disable=E1136, E1121
+        link = ipr.get_links(idx)[0]
+        current_state = link.get(consts.STATE)
+
+        if current_state == consts.IFACE_DOWN:
+            self._ipr_command(ipr.link, self.SET, index=idx,
+                              state=consts.IFACE_UP, mtu=interface.mtu)
+            for address in interface.addresses:
+                if address.get(consts.DHCP):
+                    self._dhclient_up(interface.name)
+                if address.get(consts.IPV6AUTO):
+                    self._ipv6auto_up(interface.name)
+
+        links.append((interface, idx, current_state))
+
+    def _addresses_up(self, interface, idx, current_state, ipr, addrs,
+                      unused_addresses):
         # Get existing addresses, this list is used to delete removed addresses
         current_addresses = []
-        for addr in ipr.get_addr(index=idx):
+        for addr in addrs:
+            if addr['index'] != idx:
+                continue
             attrs = dict(addr['attrs'])
             # Skip non-static (ex: dynamic) addresses
             if not attrs['IFA_FLAGS'] & ifaddrmsg.IFA_F_PERMANENT:
@@ -235,10 +313,14 @@ class InterfaceController:
                           address)
                 self._ipr_command(ipr.addr, self.ADD, index=idx, **address)
 
-        self._wait_tentative(ipr, idx)
+        # They are removed after the duplicate address detection of the new
+        # addresses
+        unused_addresses[interface.name] = current_addresses
 
+    def _addresses_cleanup(self, interface, idx, current_state, ipr,
+                           unused_addresses):
         # Remove unused addresses
-        for addr, prefixlen in current_addresses:
+        for addr, prefixlen in unused_addresses[interface.name]:
             address = {
                 consts.ADDRESS: addr,
                 consts.PREFIXLEN: prefixlen,
@@ -249,17 +331,19 @@ class InterfaceController:
             self._ipr_command(ipr.addr, self.DELETE, index=idx,
                               **address)
 
-    def _routes_up(self, interface, ipr, idx):
+    def _routes_up(self, interface, idx, current_state, ipr, routes):
         # Get existing routes, this list will be used to remove old/unused
         # routes
         current_routes = []
-        for route in ipr.get_routes(oif=idx):
+        for route in routes:
             # We only consider 'static' routes (routes that are added by
             # octavia-interface), we don't update kernel or ra routes.
             if route['proto'] != rt_proto['static']:
                 continue
 
             attrs = dict(route['attrs'])
+            if attrs.get('RTA_OIF') != idx:
+                continue
             family = route[consts.FAMILY]
             # Disabling B104: hardcoded_bind_all_interfaces
             dst = attrs.get(
@@ -311,10 +395,10 @@ class InterfaceController:
                               raise_on_error=False,
                               oif=idx, **route)
 
-    def _rules_up(self, interface, ipr, idx):
+    def _rules_up(self, interface, idx, current_state, ipr, rules):
         # Get existing rules
         current_rules = []
-        for rule in ipr.get_rules():
+        for rule in rules:
             attrs = dict(rule['attrs'])
             if not attrs.get('FRA_SRC'):
                 continue
@@ -356,7 +440,7 @@ class InterfaceController:
                               retry_on_invalid_argument=True,
                               **rule)
 
-    def _scripts_up(self, interface, current_state):
+    def _scripts_up(self, interface, idx, current_state):
         for script in interface.scripts[consts.IFACE_UP]:
             LOG.debug("%s: Running command '%s'",
                       interface.name, script[consts.COMMAND])
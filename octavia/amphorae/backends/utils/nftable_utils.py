@@ -11,6 +11,7 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import ipaddress
 import os
 import stat
 import subprocess
@@ -25,6 +26,81 @@ from octavia.common import utils
 
 LOG = logging.getLogger(__name__)
 
+# The protocols of the rules which are elements of the allowed sets
+SET_PROTOCOLS = (lib_consts.PROTOCOL_TCP, lib_consts.PROTOCOL_UDP,
+                 lib_consts.PROTOCOL_SCTP)
+# The nftables address type and match of the allowed sets by IP version
+SET_FAMILIES = {4: ('ipv4_addr', 'ip'), 6: ('ipv6_addr', 'ip6')}
+
+# The allowed sets and the other rules which are loaded in the kernel, the
+# stat of the rules file they were written to and the number of updates
+# appended to it.
+_applied_rules = None
+# The set updates appended to the rules file before it is rewritten
+MAX_APPENDED_UPDATES = 100
+
+
+def _allowed_set_name(protocol, version):
+    return f'{consts.NFT_ALLOWED_SET}_{protocol.lower()}_ipv{version}'
+
+
+def _build_allowed_sets(rules):
+    """Returns the elements of the allowed sets and the other rules.
+
+    The TCP, UDP and SCTP rules are elements of a set per protocol and IP
+    version, which the VIP chain matches with a single lookup. The CIDRs of
+    a port are merged, the kernel rejects overlapping elements.
+    """
+    networks = {}
+    other_rules = []
+    for rule in rules:
+        protocol = rule[consts.PROTOCOL]
+        if protocol not in SET_PROTOCOLS:
+            other_rules.append(_build_rule_cmd(rule))
+            continue
+        cidr = rule[consts.CIDR]
+        if not cidr or cidr == '0.0.0.0/0':
+            # Any IPv4 or IPv6 source
+            cidr_networks = (ipaddress.ip_network('0.0.0.0/0'),
+                             ipaddress.ip_network('::/0'))
+        else:
+            try:
+                cidr_networks = (ipaddress.ip_network(cidr, strict=False),)
+            except ValueError as e:
+                raise exc.HTTPBadRequest(
+                    explanation='Unknown ip version') from e
+        for network in cidr_networks:
+            key = (protocol, network.version, rule[consts.PORT])
+            networks.setdefault(key, []).append(network)
+
+    allowed_sets = {_allowed_set_name(protocol, version): set()
+                    for protocol in SET_PROTOCOLS for version in SET_FAMILIES}
+    for (protocol, version, port), port_networks in networks.items():
+        allowed_sets[_allowed_set_name(protocol, version)].update(
+            f'{network} . {port}'
+            for network in ipaddress.collapse_addresses(port_networks))
+    return allowed_sets, other_rules
+
+
+def _write_allowed_sets(file, allowed_sets):
+    for protocol in SET_PROTOCOLS:
+        for version, (addr_type, _) in SET_FAMILIES.items():
+            set_name = _allowed_set_name(protocol, version)
+            file.write(f'  set {set_name} {{\n')
+            file.write(f'    type {addr_type} . inet_service\n')
+            file.write('    flags interval\n')
+            if allowed_sets[set_name]:
+                elements = ', '.join(sorted(allowed_sets[set_name]))
+                file.write(f'    elements = {{ {elements} }}\n')
+            file.write('  }\n')
+
+
+def _write_allowed_rules(file):
+    for protocol in SET_PROTOCOLS:
+        for version, (_, match) in SET_FAMILIES.items():
+            file.write(f'      {match} saddr . {protocol.lower()} dport '
+                       f'@{_allowed_set_name(protocol, version)} accept\n')
+
 
 def write_nftable_rules_file(interface_name, rules):
     flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
@@ -69,6 +145,7 @@ def write_nftable_rules_file(interface_name, rules):
     if os.path.isfile(consts.NFT_RULES_FILE):
         if not rules:
             return
+        allowed_sets, other_rules = _build_allowed_sets(rules)
         with os.fdopen(
                 os.open(consts.NFT_RULES_FILE, flags, mode), 'w') as file:
             # Clear the existing rules in the kernel
@@ -81,6 +158,7 @@ def write_nftable_rules_file(interface_name, rules):
             file.write(f'delete table {consts.NFT_FAMILY} '
                        f'{consts.NFT_TABLE}\n')
             file.write(table_string)
+            _write_allowed_sets(file, allowed_sets)
             file.write(chain_string)
             file.write(hook_string)
             file.write(conntrack_string)
@@ -94,8 +172,9 @@ def write_nftable_rules_file(interface_name, rules):
             file.write(vip_interface_goto_string)
             file.write('  }\n')  # close the chain
             file.write(vip_chain_string)
-            for rule in rules:
-                file.write(f'      {_build_rule_cmd(rule)}\n')
+            _write_allowed_rules(file)
+            for rule_cmd in other_rules:
+                file.write(f'      {rule_cmd}\n')
             file.write('  }\n')  # close the chain
             file.write('}\n')  # close the table
     else:  # No existing rules, create the "drop all" base rules
@@ -145,3 +224,96 @@ def load_nftables_file():
         else:
             LOG.error(e)
         raise
+
+
+def _load_nft_commands(commands):
+    # The commands are applied in a single transaction
+    cmd = [consts.NFT_CMD, '-f', '/dev/stdin']
+    with network_namespace.NetworkNamespace(consts.AMPHORA_NAMESPACE):
+        subprocess.check_output(cmd, input='\n'.join(commands) + '\n',
+                                stderr=subprocess.STDOUT, encoding='utf-8')
+
+
+def _allowed_sets_commands(old_sets, new_sets):
+    commands = []
+    # The removed elements are deleted first, the kernel would reject the
+    # new elements which overlap them.
+    for action, sets, other_sets in (('delete', old_sets, new_sets),
+                                     ('add', new_sets, old_sets)):
+        for set_name in sorted(sets):
+            elements = sets[set_name] - other_sets[set_name]
+            if elements:
+                commands.append(
+                    f'{action} element {consts.NFT_FAMILY} '
+                    f'{consts.NFT_TABLE} {set_name} '
+                    f'{{ {", ".join(sorted(elements))} }}')
+    return commands
+
+
+def _append_nft_commands(commands):
+    # The rules file is loaded with a single "nft -f", the commands appended
+    # to it are applied in the same transaction as the rules.
+    with os.fdopen(os.open(consts.NFT_RULES_FILE, os.O_WRONLY | os.O_APPEND),
+                   'a') as file:
+        file.write('\n'.join(commands) + '\n')
+
+
+def _rules_file_stat():
+    st = os.stat(consts.NFT_RULES_FILE)
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def apply_nftable_rules(interface_name, rules):
+    """Writes the rules file and applies the rules in the kernel.
+
+    When only the elements of the allowed sets changed since the last
+    update, the added and the removed elements are applied in a single
+    transaction instead of reloading the whole rules file, and they are
+    appended to the rules file instead of rewriting it. The rules file is
+    rewritten once MAX_APPENDED_UPDATES updates were appended to it.
+
+    :param interface_name: The name of the VIP interface.
+    :param rules: The rules of the VIP interface.
+    """
+    global _applied_rules
+    allowed_sets, other_rules = _build_allowed_sets(rules)
+    applied_rules = _applied_rules
+    _applied_rules = None
+
+    file_exists = os.path.isfile(consts.NFT_RULES_FILE)
+    # The rules in the kernel are the applied rules unless another process
+    # wrote the rules file since the last update.
+    incremental = (bool(rules) and file_exists and
+                   applied_rules is not None and
+                   applied_rules['file_stat'] == _rules_file_stat() and
+                   applied_rules['other_rules'] == other_rules)
+
+    appended_updates = 0
+    if incremental:
+        commands = _allowed_sets_commands(applied_rules['allowed_sets'],
+                                          allowed_sets)
+        try:
+            if commands:
+                _load_nft_commands(commands)
+        except Exception as e:
+            LOG.warning('Failed to update the nftables sets, reloading the '
+                        'rules file: %s', getattr(e, 'output', e))
+            incremental = False
+        else:
+            appended_updates = applied_rules['appended_updates']
+            if commands and appended_updates < MAX_APPENDED_UPDATES:
+                _append_nft_commands(commands)
+                appended_updates += 1
+            elif commands:
+                write_nftable_rules_file(interface_name, rules)
+                appended_updates = 0
+    if not incremental:
+        write_nftable_rules_file(interface_name, rules)
+        load_nftables_file()
+
+    # The rules file is not updated when it is missing or without rules
+    if rules and file_exists:
+        _applied_rules = {'allowed_sets': allowed_sets,
+                          'other_rules': other_rules,
+                          'file_stat': _rules_file_stat(),
+                          'appended_updates': appended_updates}
@@ -12,11 +12,13 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import collections
 import functools
 import hashlib
 import json
 import os
 import ssl
+import threading
 import time
 from typing import Optional
 import warnings
@@ -26,6 +28,7 @@ from oslo_context import context as oslo_context
 from oslo_log import log as logging
 import requests
 from stevedore import driver as stevedore_driver
+import urllib3
 
 from octavia.amphorae.driver_exceptions import exceptions as driver_except
 from octavia.amphorae.drivers import driver_base
@@ -45,6 +48,9 @@ from octavia.db import repositories as repo
 LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
 
+# Number of amphorae the connection statistics are kept for
+_MAX_CONNECTION_STATS = 4096
+
 
 class HaproxyAmphoraLoadBalancerDriver(
     driver_base.AmphoraLoadBalancerDriver,
@@ -623,8 +629,102 @@ class HaproxyAmphoraLoadBalancerDriver(
             raise driver_except.AmpDriverNotImplementedError() from e
 
 
+class AmphoraConnectionStats:
+    """Statistics of the REST API connections to the amphorae.
+
+    For each amphora, counts the requests sent and the connections opened,
+    that is the TLS handshakes, and their duration. They are logged at
+    debug level when a connection is opened. The statistics of the least
+    recently used amphorae are dropped beyond _MAX_CONNECTION_STATS
+    amphorae.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = collections.OrderedDict()
+
+    def _get(self, amphora_id):
+        stats = self._stats.get(amphora_id)
+        if stats is None:
+            stats = {'requests': 0, 'connections': 0, 'handshake_time': 0.0}
+            self._stats[amphora_id] = stats
+            if len(self._stats) > _MAX_CONNECTION_STATS:
+                self._stats.popitem(last=False)
+        else:
+            self._stats.move_to_end(amphora_id)
+        return stats
+
+    def record_request(self, amphora_id):
+        with self._lock:
+            self._get(amphora_id)['requests'] += 1
+
+    def record_connection(self, amphora_id, handshake_time):
+        with self._lock:
+            stats = self._get(amphora_id)
+            stats['connections'] += 1
+            stats['handshake_time'] += handshake_time
+            return dict(stats)
+
+
+_CONNECTION_STATS = AmphoraConnectionStats()
+
+
+class _AmphoraHTTPSConnection(urllib3.connection.HTTPSConnection):
+    def connect(self):
+        start = time.monotonic()
+        super().connect()
+        # The pools check the hostname of the amphora certificates against
+        # the amphora ID
+        stats = _CONNECTION_STATS.record_connection(
+            self.assert_hostname, time.monotonic() - start)
+        LOG.debug('Connected to amphora %(amp)s in %(time).3f seconds '
+                  '(%(conns)d connections for %(reqs)d requests).',
+                  {'amp': self.assert_hostname,
+                   'time': time.monotonic() - start,
+                   'conns': stats['connections'], 'reqs': stats['requests']})
+
+
+class _AmphoraHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    """Keeps the connections to an amphora alive while they are used.
+
+    The connections idle for longer than
+    [haproxy_amphora] rest_pool_idle_timeout are closed before being reused,
+    so that the agent does not close them while a request is being sent.
+    """
+
+    ConnectionCls = _AmphoraHTTPSConnection
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout=timeout)
+        idle_since = getattr(conn, 'idle_since', None)
+        if (idle_since is not None and time.monotonic() - idle_since >
+                CONF.haproxy_amphora.rest_pool_idle_timeout):
+            conn.close()
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn.idle_since = time.monotonic()
+        super()._put_conn(conn)
+
+
 # Check a custom hostname
 class CustomHostNameCheckingAdapter(requests.adapters.HTTPAdapter):
+    def __init__(self):
+        # The ID of the amphora each thread sends requests to
+        self._local = threading.local()
+        super().__init__(
+            pool_connections=CONF.haproxy_amphora.rest_pool_connections,
+            pool_maxsize=CONF.haproxy_amphora.rest_pool_maxsize)
+
+    @property
+    def uuid(self):
+        return getattr(self._local, 'uuid', None)
+
+    @uuid.setter
+    def uuid(self, uuid):
+        self._local.uuid = uuid
+
     def cert_verify(self, conn, url, verify, cert):
         conn.assert_hostname = self.uuid
         return super().cert_verify(conn, url, verify, cert)
@@ -632,7 +732,10 @@ class CustomHostNameCheckingAdapter(requests.adapters.HTTPAdapter):
     def init_poolmanager(self, *pool_args, **pool_kwargs):
         proto = CONF.amphora_agent.agent_tls_protocol.replace('.', '_')
         pool_kwargs['ssl_version'] = getattr(ssl, f"PROTOCOL_{proto}")
-        return super().init_poolmanager(*pool_args, **pool_kwargs)
+        super().init_poolmanager(*pool_args, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = dict(
+            self.poolmanager.pool_classes_by_scheme,
+            https=_AmphoraHTTPSConnectionPool)
 
 
 class AmphoraAPIClientBase:
@@ -700,6 +803,7 @@ class AmphoraAPIClientBase:
                         "ignore",
                         message="A true SSLContext object is not available"
                     )
+                    _CONNECTION_STATS.record_request(amp.id)
                     r = _request(**reqargs)
                 LOG.debug('Connected to amphora. Response: %(resp)s',
                           {'resp': r})
@@ -787,7 +891,17 @@ class AmphoraAPIClient1_0(AmphoraAPIClientBase):
             amp,
             f'loadbalancer/{amp.id}/{loadbalancer_id}/haproxy',
             timeout_dict, data=config, headers=headers)
-        return exc.check_exception(r)
+        exc.check_exception(r)
+        validation_time = r.headers.get(consts.VALIDATION_TIME_HEADER)
+        if validation_time is not None:
+            LOG.debug('Amphora %(amp)s validated the configuration of load '
+                      'balancer %(lb)s in %(time)s seconds (cached: '
+                      '%(cached)s).',
+                      {'amp': amp.id, 'lb': loadbalancer_id,
+                       'time': validation_time,
+                       'cached': r.headers.get(
+                           consts.VALIDATION_CACHED_HEADER)})
+        return r
 
     def get_listener_status(self, amp, listener_id):
         r = self.get(
@@ -24,6 +24,7 @@ from oslo_middleware import sizelimit
 from pecan import configuration as pecan_configuration
 from pecan import make_app as pecan_make_app
 
+from octavia.api.common import renderers
 from octavia.api import config as app_config
 from octavia.api.drivers import driver_factory
 from octavia.common import constants
@@ -60,12 +61,17 @@ def setup_app(pecan_config=None, debug=False, argv=None):
         pecan_config = get_pecan_config()
     pecan_configuration.set_config(dict(pecan_config), overwrite=True)
 
+    custom_renderers = {}
+    if CONF.api_settings.fast_json_responses:
+        custom_renderers['wsmejson'] = renderers.FastJSONRenderer
+
     return pecan_make_app(
         pecan_config.app.root,
         wrap_app=_wrap_app,
         debug=debug,
         hooks=pecan_config.app.hooks,
-        wsme=pecan_config.wsme
+        wsme=pecan_config.wsme,
+        custom_renderers=custom_renderers
     )
 
 
@@ -12,6 +12,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import threading
+
 from oslo_config import cfg
 from oslo_log import log as logging
 from stevedore import driver as stevedore_driver
@@ -23,6 +25,39 @@ CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
 
+# One driver instance per provider name, shared by all the requests
+_DRIVERS = {}
+_DRIVERS_LOCK = threading.Lock()
+
+
+def clear_driver_cache(*args, **kwargs):
+    """Drops the cached provider driver instances.
+
+    This is registered as a configuration mutate hook, so the drivers are
+    loaded again with the new settings when the configuration is reloaded
+    (SIGHUP).
+    """
+    with _DRIVERS_LOCK:
+        _DRIVERS.clear()
+
+
+CONF.register_mutate_hook(clear_driver_cache)
+
+
+def _load_driver(provider):
+    try:
+        driver = stevedore_driver.DriverManager(
+            namespace='octavia.api.drivers',
+            name=provider,
+            invoke_on_load=True).driver
+        driver.name = provider
+    except Exception as e:
+        LOG.error('Unable to load provider driver %s due to: %s',
+                  provider, str(e))
+        raise exceptions.ProviderNotFound(prov=provider)
+    return driver
+
+
 def get_driver(provider):
     # If this came in None it must be a load balancer that existed before
     # provider support was added. These must be of type 'amphora' and not
@@ -37,14 +72,11 @@ def get_driver(provider):
                     "configuration file.", provider)
         raise exceptions.ProviderNotEnabled(prov=provider)
 
-    try:
-        driver = stevedore_driver.DriverManager(
-            namespace='octavia.api.drivers',
-            name=provider,
-            invoke_on_load=True).driver
-        driver.name = provider
-    except Exception as e:
-        LOG.error('Unable to load provider driver %s due to: %s',
-                  provider, str(e))
-        raise exceptions.ProviderNotFound(prov=provider)
+    driver = _DRIVERS.get(provider)
+    if driver is None:
+        with _DRIVERS_LOCK:
+            driver = _DRIVERS.get(provider)
+            if driver is None:
+                driver = _load_driver(provider)
+                _DRIVERS[provider] = driver
     return driver
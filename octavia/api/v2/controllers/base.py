@@ -263,6 +263,24 @@ class BaseController(pecan_rest.RestController):
                         setattr(obj, member, wtypes.Unset)
         return object_list
 
+    @staticmethod
+    def _get_projected_fields(fields, to_type):
+        """Translates the requested API fields to data model attributes.
+
+        :param fields: fields requested with the ?fields= query parameter
+        :param to_type: the Octavia WSME type of the response
+        :returns: The set of data model attributes to load, or None when
+                  the full data model needs to be loaded.
+        """
+        if fields is None or not CONF.api_settings.allow_field_selection:
+            return None
+        projection = set()
+        for field in fields:
+            if field == 'tenant_id':
+                field = 'project_id'
+            projection.add(to_type.translate_key_to_data_model(field))
+        return projection
+
     @staticmethod
     def _get_attrs(obj):
         attrs = [attr for attr in dir(obj) if not callable(
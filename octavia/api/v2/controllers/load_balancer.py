@@ -91,6 +91,8 @@ class LoadBalancersController(base.BaseController):
                     context.session, show_deleted=False,
                     pagination_helper=pcontext.get(
                         constants.PAGINATION_HELPER),
+                    fields=self._get_projected_fields(
+                        fields, lb_types.LoadBalancerResponse),
                     **query_filter))
         result = self._convert_db_to_type(
             load_balancers, [lb_types.LoadBalancerResponse])
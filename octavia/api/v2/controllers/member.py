@@ -83,7 +83,9 @@ class MemberController(base.BaseController):
                 context.session, show_deleted=False,
                 pool_id=self.pool_id,
                 pagination_helper=pcontext.get(constants.PAGINATION_HELPER),
-                limited_graph=True)
+                limited_graph=True,
+                fields=self._get_projected_fields(
+                    fields, member_types.MemberResponse))
         result = self._convert_db_to_type(
             db_members, [member_types.MemberResponse])
         if fields is not None:
@@ -375,6 +377,80 @@ class MembersController(MemberController):
     def __init__(self, pool_id):
         super().__init__(pool_id)
 
+    def _find_duplicate_member(self, member_dicts, value):
+        """Returns the member of a batch reported by a duplicate entry.
+
+        MySQL reports the values of the (pool_id, ip_address, protocol_port)
+        unique constraint joined with '-', PostgreSQL joined with ', ',
+        SQLite does not report them.
+        """
+        if not value:
+            return None
+        for member_dict in member_dicts:
+            values = [self.pool_id, member_dict.get('ip_address'),
+                      str(member_dict.get('protocol_port'))]
+            if value in ('-'.join(values), ', '.join(values)):
+                return member_dict
+        return None
+
+    def _graph_create_batch(self, lock_session, db_pool, member_dicts):
+        """Creates the new members of a batch update with bulk INSERTs."""
+        flavor_dict = {}
+        if db_pool.load_balancer.flavor_id and any(
+                m.get('request_sriov') for m in member_dicts):
+            try:
+                flavor_dict = (
+                    self.repositories.flavor.get_flavor_metadata_dict(
+                        lock_session, db_pool.load_balancer.flavor_id))
+            except sa_exception.NoResultFound:
+                LOG.error("load balancer has a flavor ID: %s that was not "
+                          "found in the database. Assuming no flavor.",
+                          db_pool.load_balancer.flavor_id)
+
+        member_uniques = set()
+        for member_dict in member_dicts:
+            # Validate and store port SR-IOV vnic_type
+            request_sriov = member_dict.pop('request_sriov')
+            if (request_sriov and not
+                    flavor_dict.get(constants.ALLOW_MEMBER_SRIOV, False)):
+                raise exceptions.MemberSRIOVDisabled
+
+            if request_sriov:
+                member_dict[constants.VNIC_TYPE] = constants.VNIC_TYPE_DIRECT
+            else:
+                member_dict[constants.VNIC_TYPE] = constants.VNIC_TYPE_NORMAL
+
+            key = (member_dict.get('ip_address'),
+                   member_dict.get('protocol_port'))
+            if key in member_uniques:
+                raise exceptions.DuplicateMemberEntry(
+                    ip_address=key[0], port=key[1])
+            member_uniques.add(key)
+
+            db_prepare.create_member(
+                member_dict, self.pool_id, bool(db_pool.health_monitor))
+
+        try:
+            db_members = self.repositories.member.create_batch(
+                lock_session, member_dicts)
+            lock_session.flush()
+        except odb_exceptions.DBDuplicateEntry as e:
+            # A concurrent request created one of the members
+            member_dict = self._find_duplicate_member(member_dicts, e.value)
+            if member_dict is None:
+                raise exceptions.DuplicateMemberBatchEntry() from e
+            raise exceptions.DuplicateMemberEntry(
+                ip_address=member_dict.get('ip_address'),
+                port=member_dict.get('protocol_port')) from e
+        except odb_exceptions.DBReferenceError as e:
+            values = sorted({str(m[e.key]) for m in member_dicts
+                             if m.get(e.key) is not None})
+            raise exceptions.InvalidOption(value=', '.join(values),
+                                           option=e.key) from e
+        except odb_exceptions.DBError as e:
+            raise exceptions.APIException() from e
+        return db_members
+
     @wsme_pecan.wsexpose(None, wtypes.text,
                          body=member_types.MembersRootPUT, status_code=202)
     def put(self, additive_only=False, members_=None):
@@ -419,7 +495,6 @@ class MembersController(MemberController):
             for m in members:
                 key = (m.address, m.protocol_port)
                 if key not in old_member_uniques:
-                    validate.ip_not_reserved(m.address)
                     new_members.append(m)
                 else:
                     m.id = old_member_uniques[key]
@@ -431,6 +506,7 @@ class MembersController(MemberController):
                                      "same request."))
                     updated_member_uniques.add(key)
                     updated_members.append(m)
+            validate.ips_not_reserved(m.address for m in new_members)
 
             # Find members that are deleted
             deleted_members = []
@@ -457,6 +533,7 @@ class MembersController(MemberController):
             provider_members = []
             valid_subnets = set()
             # Create new members
+            new_member_dicts = []
             for m in new_members:
                 # NOTE(mnaser): In order to avoid hitting the Neutron API hard
                 # when creating many new members, we cache the
@@ -478,11 +555,15 @@ class MembersController(MemberController):
 
                 m = m.to_dict(render_unsets=False)
                 m['project_id'] = db_pool.project_id
-                created_member = self._graph_create(context.session, m)
-                provider_member = driver_utils.db_member_to_provider_member(
-                    created_member)
-                provider_members.append(provider_member)
+                new_member_dicts.append(m)
+            if new_member_dicts:
+                created_members = self._graph_create_batch(
+                    context.session, db_pool, new_member_dicts)
+                provider_members.extend(
+                    driver_utils.db_member_to_provider_member(m)
+                    for m in created_members)
             # Update old members
+            updated_member_dicts = {}
             for m in updated_members:
                 m.provisioning_status = constants.PENDING_UPDATE
                 m.project_id = db_pool.project_id
@@ -493,27 +574,26 @@ class MembersController(MemberController):
                 #               wsme type for batch member update to not use
                 #               the MemberPOST type
                 db_member_dict.pop(constants.REQUEST_SRIOV)
-                self.repositories.member.update(
-                    context.session, m.id, **db_member_dict)
+                updated_member_dicts[m.id] = db_member_dict
 
                 m.pool_id = self.pool_id
                 provider_members.append(
                     driver_utils.db_member_to_provider_member(m))
+            self.repositories.member.update_batch(context.session,
+                                                  updated_member_dicts)
             # Delete old members
-            for m in deleted_members:
-                if additive_only:
-                    # Members are appended to the dict and their status remains
-                    # unchanged, because they are logically "untouched".
-                    db_member_dict = m.to_dict(render_unsets=False)
-                    db_member_dict.pop('id')
+            if additive_only:
+                # Members are appended to the dict and their status remains
+                # unchanged, because they are logically "untouched".
+                for m in deleted_members:
                     m.pool_id = self.pool_id
                     provider_members.append(
                         driver_utils.db_member_to_provider_member(m))
-                else:
-                    # Members are changed to PENDING_DELETE and not passed.
-                    self.repositories.member.update(
-                        context.session, m.id,
-                        provisioning_status=constants.PENDING_DELETE)
+            else:
+                # Members are changed to PENDING_DELETE and not passed.
+                self.repositories.member.update_members_by_ids(
+                    context.session, [m.id for m in deleted_members],
+                    provisioning_status=constants.PENDING_DELETE)
 
             # Dispatch to the driver
             LOG.info("Sending Pool %s batch member update to provider %s",
@@ -86,4 +86,11 @@ def main():
         'syslog_addr': 'unix://run/rsyslog/octavia/log#dgram',
 
     }
+    options.update({
+        # The threads serve concurrent requests, and keep the connections of
+        # the controllers alive unlike the sync workers.
+        'worker_class': 'gthread',
+        'threads': CONF.amphora_agent.agent_worker_threads,
+        'keepalive': CONF.amphora_agent.agent_keepalive_timeout,
+    })
     AmphoraAgent(server_instance.app, options).run()
@@ -0,0 +1,221 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+# A resident health checker for the keepalived MISC_CHECKs of the amphora.
+#
+# keepalived runs amphora-health-checker for each check of each member, the
+# amphora-health-checker wrapper of the amphora image forwards its arguments
+# to this service instead of starting a new python process. The service
+# probes the members concurrently and shares one raw socket per address
+# family between the probes.
+#
+# Protocol: one check per line, with the arguments of amphora-health-checker
+# (for instance "sctp -t 3 192.0.2.10 80"), the service replies with the
+# exit code of the check on a line.
+
+import asyncio
+import ipaddress
+import random
+import signal
+import socket
+import sys
+
+from octavia.amphorae.backends.utils import network_namespace
+from octavia.cmd import health_checker
+from octavia.common import constants as consts
+
+HOST = '127.0.0.1'
+PORT = 9103
+
+# The exit codes of the checks and whether the association is aborted, per
+# type of the first chunk of the reply
+SCTP_RESULTS = {
+    2: (0, True),  # INIT ACK
+    6: (1, False),  # ABORT
+}
+# Others: unknown error
+SCTP_UNKNOWN_RESULT = (3, True)
+SCTP_TIMEOUT = 2
+# The replies are dropped when the receive buffer of the shared raw socket is
+# full, the kernel caps the buffer size to net.core.rmem_max.
+SCTP_RCVBUF = 1 << 20
+MAX_CONCURRENT_PROBES = 128
+
+
+def _normalize_address(address):
+    # The IPv6 addresses of recvfrom may have a scope
+    return str(ipaddress.ip_address(address.split('%')[0]))
+
+
+class SCTPProber:
+    """Sends SCTP INIT probes with shared raw sockets.
+
+    The replies are dispatched to the pending probes by source address and
+    verification tag.
+    """
+
+    def __init__(self, loop):
+        self._loop = loop
+        self._sockets = {}
+        self._probes = {}
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_PROBES)
+        self._sctp_support = health_checker.has_sctp_support()
+
+    def close(self):
+        for s in self._sockets.values():
+            self._loop.remove_reader(s.fileno())
+            s.close()
+        self._sockets.clear()
+
+    def _get_socket(self, family):
+        s = self._sockets.get(family)
+        if s is None:
+            s = socket.socket(family, socket.SOCK_RAW, socket.IPPROTO_SCTP)
+            s.setblocking(False)
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SCTP_RCVBUF)
+            self._loop.add_reader(s.fileno(), self._read, s, family)
+            self._sockets[family] = s
+        return s
+
+    def _read(self, s, family):
+        while True:
+            try:
+                buf, addr = s.recvfrom(1500)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                print(f"Failed to receive SCTP packets: {e}")
+                return
+
+            packet = health_checker._sctp_parse_packet(buf, family)
+            if packet is None:
+                continue
+            tag, response_type = packet
+            probe = self._probes.get((_normalize_address(addr[0]), tag))
+            if probe is not None and not probe.done():
+                probe.set_result(response_type)
+
+    async def probe(self, ip_address, port, timeout=2):
+        """Returns the exit code of amphora-health-checker for a member."""
+        async with self._semaphore:
+            return await self._probe(ip_address, port, timeout)
+
+    async def _probe(self, ip_address, port, timeout):
+        family = socket.AF_INET6 if ':' in ip_address else socket.AF_INET
+        s = self._get_socket(family)
+        # The port of raw IPv6 sockets is the protocol, or 0
+        destination = (ip_address, 0)
+
+        tag = random.randint(1, 4294967295)
+        src_port = random.randint(1024, 65535)
+        key = (_normalize_address(ip_address), tag)
+        probe = self._loop.create_future()
+        self._probes[key] = probe
+
+        try:
+            s.sendto(health_checker._sctp_build_init_packet(
+                src_port, port, tag), destination)
+            response_type = await asyncio.wait_for(probe, timeout)
+        except asyncio.TimeoutError:
+            return SCTP_TIMEOUT
+        except OSError as e:
+            print(f"Failed to send INIT packet to {ip_address}:{port}: {e}")
+            return 1
+        finally:
+            del self._probes[key]
+
+        ret, send_abort = SCTP_RESULTS.get(response_type,
+                                           SCTP_UNKNOWN_RESULT)
+        # if SCTP support is not included in the kernel, the kernel does not
+        # abort the association, we need to craft the ABORT packet.
+        if send_abort and not self._sctp_support:
+            try:
+                s.sendto(health_checker._sctp_build_abort_packet(
+                    src_port, port, tag), destination)
+            except OSError as e:
+                print(f"Failed to send ABORT packet to {ip_address}:{port}: "
+                      f"{e}")
+        return ret
+
+
+class HealthCheckerService:
+
+    def __init__(self, loop):
+        self.sctp_prober = SCTPProber(loop)
+
+    async def check(self, line):
+        try:
+            protocol, timeout, destination, port = health_checker.parse_args(
+                line.split())
+        except (IndexError, ValueError):
+            print(f"Invalid health check '{line}'")
+            return 1
+
+        if protocol.lower() == 'sctp':
+            return await self.sctp_prober.probe(destination, port,
+                                                timeout=timeout)
+        print(f"Unsupported protocol '{protocol}'")
+        return 1
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                ret = await self.check(line.decode('utf-8').strip())
+                writer.write(f'{ret}\n'.encode('utf-8'))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def close(self):
+        self.sctp_prober.close()
+
+
+async def serve(stop):
+    loop = asyncio.get_running_loop()
+    service = HealthCheckerService(loop)
+    server = await asyncio.start_server(service.handle, HOST, PORT)
+    print(f"Now serving on port {PORT}")
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        service.close()
+
+
+async def _main():
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    loop.add_signal_handler(signal.SIGINT, stop.set)
+    loop.add_signal_handler(signal.SIGTERM, stop.set)
+
+    while not stop.is_set():
+        # The amphora-haproxy network namespace may not be present, so handle
+        # it gracefully.
+        try:
+            with network_namespace.NetworkNamespace(consts.AMPHORA_NAMESPACE):
+                await serve(stop)
+        except Exception as e:
+            print(f"Failed to start the health checker service: {e}",
+                  file=sys.stderr)
+            await asyncio.sleep(1)
+
+
+def main():
+    if not health_checker.load_crc32c_extension():
+        print("google-crc32c is not available, using the python "
+              "implementation of CRC32C")
+    asyncio.run(_main())
@@ -38,34 +38,43 @@ def interfaces_find(interface_controller, name):
     raise InterfaceException(msg=msg)
 
 
+def _raise_errors(errors, action_str):
+    if errors:
+        raise InterfaceException(msg=", ".join(
+            f"Error on action '{action_str}' for interface {name}: {e}."
+            for name, e in errors.items()))
+
+
 def interfaces_update(interfaces, action_fn, action_str):
-    errors = []
+    errors = {}
 
     for iface in interfaces:
         try:
             action_fn(iface)
         except Exception as e:
-            errors.append("Error on action '{}' for interface {}: {}.".format(
-                action_str, iface.name, e))
+            errors[iface.name] = e
+
+    _raise_errors(errors, action_str)
 
-    if errors:
-        raise InterfaceException(msg=", ".join(errors))
+
+def interfaces_up(interface_controller, interfaces):
+    # All the interfaces are set up in a single netlink session
+    _raise_errors(interface_controller.up_all(interfaces), "up")
 
 
 def interface_cmd(interface_name, action):
     interface_controller = interface.InterfaceController()
 
-    if action == "up":
-        action_fn = interface_controller.up
-    elif action == "down":
-        action_fn = interface_controller.down
-    else:
+    if action not in ("up", "down"):
         raise InterfaceException(
             msg=f"Unknown action '{action}'")
 
     interfaces = interfaces_find(interface_controller,
                                  interface_name)
-    interfaces_update(interfaces, action_fn, action)
+    if action == "up":
+        interfaces_up(interface_controller, interfaces)
+    else:
+        interfaces_update(interfaces, interface_controller.down, action)
 
 
 def main():
@@ -21,21 +21,33 @@
 from http.server import SimpleHTTPRequestHandler
 from http.server import ThreadingHTTPServer
 import os
+import re
 import signal
 import sys
 import threading
 import time
 import traceback
+import urllib.parse
 import urllib.request
 
+from oslo_config import cfg
 import psutil
 
 from octavia.amphorae.backends.utils import network_namespace
+from octavia.common import cache
+from octavia.common import config
 from octavia.common import constants as consts
 
+CONF = cfg.CONF
+
 METRICS_URL = "http://127.0.0.1:9101/metrics"
 PRINT_REJECTED = False
 EXIT_EVENT = threading.Event()
+# Size of the chunks of the responses, in characters
+CHUNK_SIZE = 65536
+# The converted haproxy metrics, shared by the scrapes
+METRICS_CACHE = cache.TTLCache(
+    'prometheus_metrics', lambda: CONF.amphora_agent.prometheus_cache_ttl)
 
 # A dictionary of prometheus metrics mappings.
 # Key: The metric string to match
@@ -693,6 +705,130 @@ METRIC_MAP = {
 }
 METRIC_KEYS = METRIC_MAP.keys()
 
+# The metric name of a line followed by the space or the opening brace of
+# its labels, as in the METRIC_MAP keys
+METRIC_KEY_RE = re.compile(r'[^ {]+[ {]')
+COMMENT_PREFIXES = ("# HELP ", "# TYPE ")
+COMMENT_PREFIX_LEN = len(COMMENT_PREFIXES[0])
+
+
+def _compile_metric_map(metric_map):
+    """Precompiles the METRIC_MAP substitutions.
+
+    :returns: A dictionary of the METRIC_MAP keys to tuples of the
+              replacement key, the replacement HELP line and the tuple of
+              the (old, new) label substitutions.
+    """
+    return {key: (value[0], value[1],
+                  tuple(value[2].items()) if value[2] else ())
+            for key, value in metric_map.items()}
+
+
+COMPILED_METRIC_MAP = _compile_metric_map(METRIC_MAP)
+
+
+def convert_metric_line(line):
+    """Converts a line of the haproxy metrics to the Octavia metrics.
+
+    :param line: A line of the haproxy prometheus exporter, with its line
+                 feed.
+    :returns: The converted line, or None if the line is not exposed.
+    """
+    # Don't report metrics for the internal prometheus proxy loop. The
+    # user facing listener will still be reported.
+    if "prometheus-exporter" in line:
+        return None
+    if line.startswith("#"):
+        if not line.startswith(COMMENT_PREFIXES):
+            return None
+        match = METRIC_KEY_RE.match(line, COMMENT_PREFIX_LEN)
+        mapping = match and COMPILED_METRIC_MAP.get(match.group())
+        if not mapping:
+            return None
+        if mapping[1] and line.startswith("# HELP "):
+            return mapping[1]
+        return line[:COMMENT_PREFIX_LEN] + mapping[0] + line[match.end():]
+
+    match = METRIC_KEY_RE.match(line)
+    mapping = match and COMPILED_METRIC_MAP.get(match.group())
+    if not mapping:
+        return None
+    rest = line[match.end():]
+    for old, new in mapping[2]:
+        rest = rest.replace(old, new)
+    return mapping[0] + rest
+
+
+def convert_metrics(source):
+    """Converts the haproxy metrics to the Octavia metrics.
+
+    :param source: An iterable of the lines of the haproxy prometheus
+                   exporter, as bytes.
+    :returns: A generator of the converted lines.
+    """
+    for line in source:
+        line = line.decode("utf-8")
+        octavia_line = convert_metric_line(line)
+        if octavia_line is None:
+            if PRINT_REJECTED:
+                print(f"REJECTED: {line}")
+            continue
+        yield octavia_line
+
+
+def fetch_metrics():
+    """Returns the converted haproxy metrics, encoded in UTF-8."""
+    with urllib.request.urlopen(METRICS_URL) as source:  # nosec
+        return "".join(convert_metrics(source)).encode("utf-8")
+
+
+LISTENER_LABEL_RE = re.compile(rb'[{,]listener="([^"]*)"')
+POOL_LABEL_RE = re.compile(rb'[{,]pool="([^"]*)"')
+
+
+def filter_metrics(metrics, exclude_members=False, listeners=None,
+                   pools=None):
+    """Filters the converted metrics.
+
+    When listeners or pools are selected, the series of the other listeners
+    and pools are dropped. The series of a pool are kept when either the pool
+    or the listener the pool belongs to is selected. The load balancer series
+    are always kept.
+
+    :param metrics: The converted metrics, encoded in UTF-8.
+    :param exclude_members: Whether the member series are dropped.
+    :param listeners: A set of the IDs of the selected listeners, as bytes.
+    :param pools: A set of the IDs of the selected pools, as bytes.
+    :returns: The filtered metrics, encoded in UTF-8.
+    """
+    listeners = listeners or set()
+    pools = pools or set()
+    restricted = bool(listeners or pools)
+    if not exclude_members and not restricted:
+        return metrics
+
+    kept = []
+    for line in metrics.splitlines(keepends=True):
+        # The HELP and TYPE lines and the load balancer series have no labels
+        if line.startswith(b"#") or b"{" not in line:
+            kept.append(line)
+            continue
+        if exclude_members and b'member="' in line:
+            continue
+        if restricted:
+            match = POOL_LABEL_RE.search(line)
+            if match:
+                # The haproxy backends are named <pool ID>:<listener ID>
+                pool_id, _, listener_id = match.group(1).partition(b":")
+                if pool_id not in pools and listener_id not in listeners:
+                    continue
+            else:
+                match = LISTENER_LABEL_RE.search(line)
+                if match and match.group(1) not in listeners:
+                    continue
+        kept.append(line)
+    return b"".join(kept)
+
 
 class PrometheusProxy(SimpleHTTPRequestHandler):
 
@@ -720,50 +856,100 @@ class PrometheusProxy(SimpleHTTPRequestHandler):
         metrics_buffer += mem_metric_string
         return metrics_buffer
 
+    def _get_filters(self):
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        exclude_members = CONF.amphora_agent.prometheus_exclude_members
+        if "exclude_members" in query:
+            exclude_members = query["exclude_members"][-1].lower() in (
+                "1", "true", "yes")
+        # The IDs may also be comma separated
+        listeners = {listener_id.strip().encode("utf-8")
+                     for value in query.get("listener", [])
+                     for listener_id in value.split(",")
+                     if listener_id.strip()}
+        pools = {pool_id.strip().encode("utf-8")
+                 for value in query.get("pool", [])
+                 for pool_id in value.split(",") if pool_id.strip()}
+        return exclude_members, listeners, pools
+
+    def _send_error(self, e):
+        print(str(e), flush=True)
+        traceback.print_tb(e.__traceback__)
+        self.send_response(502)
+        self.send_header("connection", "close")
+        self.end_headers()
+
+    def _send_headers(self):
+        self.send_response(200)
+        self.send_header("cache-control", "no-cache")
+        self.send_header("content-type", "text/plain; version=0.0.4")
+        self.send_header("transfer-encoding", "chunked")
+        self.send_header("connection", "close")
+        self.end_headers()
+
+    def _write_chunk(self, data):
+        self.wfile.write(b"%X\r\n%s\r\n" % (len(data), data))
+
     def do_GET(self):
         metrics_buffer = ""
 
         metrics_buffer = self._add_cpu_utilization(metrics_buffer)
         metrics_buffer = self._add_memory_utilization(metrics_buffer)
 
+        exclude_members, listeners, pools = self._get_filters()
+        if (CONF.amphora_agent.prometheus_cache_ttl > 0 or
+                exclude_members or listeners or pools):
+            self._send_cached_metrics(metrics_buffer, exclude_members,
+                                      listeners, pools)
+        else:
+            self._stream_metrics(metrics_buffer)
+
+    def _send_cached_metrics(self, metrics_buffer, exclude_members,
+                             listeners, pools):
         try:
-            with urllib.request.urlopen(METRICS_URL) as source:  # nosec
-                lines = source.readlines()
-                for line in lines:
-                    line = line.decode("utf-8")
-                    # Don't report metrics for the internal prometheus
-                    # proxy loop. The user facing listener will still be
-                    # reported.
-                    if "prometheus-exporter" in line:
-                        continue
-                    match = next((x for x in METRIC_KEYS if x in line), False)
-                    if match:
-                        map_tuple = METRIC_MAP[match]
-                        if map_tuple[1] and "HELP" in line:
-                            metrics_buffer += map_tuple[1]
-                        else:
-                            if map_tuple[2] and not line.startswith("#"):
-                                for key in map_tuple[2].keys():
-                                    line = line.replace(key,
-                                                        map_tuple[2][key])
-                            metrics_buffer += line.replace(match,
-                                                           map_tuple[0])
-                    elif PRINT_REJECTED:
-                        print(f"REJECTED: {line}")
+            # Concurrent scrapes share a single read of the haproxy metrics
+            metrics = METRICS_CACHE.get(METRICS_URL, fetch_metrics)
         except Exception as e:
-            print(str(e), flush=True)
-            traceback.print_tb(e.__traceback__)
-            self.send_response(502)
-            self.send_header("connection", "close")
-            self.end_headers()
+            self._send_error(e)
             return
+        metrics = filter_metrics(metrics, exclude_members=exclude_members,
+                                 listeners=listeners, pools=pools)
 
-        self.send_response(200)
-        self.send_header("cache-control", "no-cache")
-        self.send_header("content-type", "text/plain; version=0.0.4")
-        self.send_header("connection", "close")
-        self.end_headers()
-        self.wfile.write(metrics_buffer.encode("utf-8"))
+        self._send_headers()
+        self._write_chunk(metrics_buffer.encode("utf-8"))
+        for start in range(0, len(metrics), CHUNK_SIZE):
+            self._write_chunk(metrics[start:start + CHUNK_SIZE])
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _stream_metrics(self, metrics_buffer):
+        try:
+            source = urllib.request.urlopen(METRICS_URL)  # nosec
+        except Exception as e:
+            self._send_error(e)
+            return
+
+        with source:
+            # The metrics are converted and sent as they are read
+            self._send_headers()
+
+            chunk = [metrics_buffer]
+            chunk_size = len(metrics_buffer)
+            try:
+                for octavia_line in convert_metrics(source):
+                    chunk.append(octavia_line)
+                    chunk_size += len(octavia_line)
+                    if chunk_size >= CHUNK_SIZE:
+                        self._write_chunk("".join(chunk).encode("utf-8"))
+                        chunk = []
+                        chunk_size = 0
+                if chunk:
+                    self._write_chunk("".join(chunk).encode("utf-8"))
+                self.wfile.write(b"0\r\n\r\n")
+            except Exception as e:
+                # The response is left incomplete so that the scrape fails
+                print(str(e), flush=True)
+                traceback.print_tb(e.__traceback__)
+                self.close_connection = True
 
 
 class SignalHandler:
@@ -783,11 +969,10 @@ def shutdown_thread(http):
 
 def main():
     global PRINT_REJECTED
-    try:
-        if sys.argv[1] == "--rejected":
-            PRINT_REJECTED = True
-    except Exception:
-        pass
+    if "--rejected" in sys.argv[1:]:
+        PRINT_REJECTED = True
+    # The cache and the filters are set in the amphora agent configuration
+    config.init([arg for arg in sys.argv[1:] if arg != "--rejected"])
 
     SignalHandler()
 
@@ -0,0 +1,233 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from octavia.amphorae.backends.agent.api_server import util
+from octavia.common import config
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+SOCKET_TIMEOUT = 5
+# haproxy prints this prompt after each command in interactive mode
+PROMPT = b'\n> '
+# keepalived only checks whether the status is 0, but bash truncates it
+MAX_STATUS = 255
+EXIT_EVENT = threading.Event()
+
+
+class StatsSocket:
+    """A persistent connection to the stats socket of a haproxy process.
+
+    The connection stays in interactive mode between the checks. It is
+    reopened when haproxy closed it, or when a reload of haproxy replaced
+    the socket.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._sock = None
+        self._inode = None
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _command(self, command):
+        self._sock.sendall(command)
+        data = b''
+        while not data.endswith(PROMPT):
+            chunk = self._sock.recv(4096)
+            if not chunk:
+                raise ConnectionError(f'{self.path} closed the connection')
+            data += chunk
+        return data[:-len(PROMPT)]
+
+    def _connect(self):
+        self._inode = os.stat(self.path).st_ino
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(SOCKET_TIMEOUT)
+        self._sock.connect(self.path)
+        self._command(b'prompt\n')
+
+    def check(self):
+        """Returns whether haproxy answers on its stats socket.
+
+        Only VRRP fail over if the stats socket is not responding.
+        """
+        # Retry once on a new connection, haproxy closes idle connections
+        for _ in range(2):
+            try:
+                if (self._sock is not None and
+                        os.stat(self.path).st_ino != self._inode):
+                    self.close()
+                if self._sock is None:
+                    self._connect()
+                if self._command(b'show info\n'):
+                    return True
+            except OSError as e:
+                LOG.debug('Failed to query the stats socket %s: %s',
+                          self.path, e)
+            self.close()
+        return False
+
+
+class VRRPCheck:
+    """Runs the keepalived check scripts of the amphora without forking.
+
+    The haproxy and LVS check scripts written by the amphora agent are
+    replaced by native checks, the other scripts are run with bash.
+    """
+
+    def __init__(self):
+        self._sockets = {}
+        self._targets = None
+        self._targets_key = None
+
+    def close(self):
+        for stats_socket in self._sockets.values():
+            stats_socket.close()
+        self._sockets.clear()
+
+    def _get_haproxy_sockets(self):
+        path = util.vrrp_check_targets_path()
+        st = os.stat(path)
+        # The agent replaces the file on each update
+        key = (st.st_ino, st.st_mtime_ns)
+        if key != self._targets_key:
+            with open(path, encoding='utf-8') as targets_file:
+                self._targets = json.load(targets_file)['haproxy_sockets']
+            self._targets_key = key
+        return self._targets
+
+    def check_haproxy(self, script_path):
+        try:
+            sock_paths = self._get_haproxy_sockets()
+        except (OSError, ValueError, KeyError):
+            LOG.warning('Cannot read the haproxy check targets, running %s.',
+                        script_path)
+            return self.run_script(script_path)
+        if sock_paths is None:
+            # No load balancer, haproxy is down
+            return 1
+
+        for sock_path in set(self._sockets) - set(sock_paths):
+            self._sockets.pop(sock_path).close()
+        status = 0
+        for sock_path in sock_paths:
+            stats_socket = self._sockets.get(sock_path)
+            if stats_socket is None:
+                stats_socket = self._sockets[sock_path] = StatsSocket(
+                    sock_path)
+            if not stats_socket.check():
+                status += 1
+        return status
+
+    @staticmethod
+    def check_lvs():
+        status = 0
+        try:
+            entries = list(os.scandir(util.keepalived_lvs_dir()))
+        except FileNotFoundError:
+            return status
+        for entry in entries:
+            # Only the pid files of the keepalived processes, not the
+            # vrrp.pid and check.pid files of their children
+            if entry.name.partition('.')[2] != 'pid':
+                continue
+            try:
+                with open(entry.path, encoding='utf-8') as pid_file:
+                    pid = int(pid_file.readline())
+                running = os.path.exists(f'/proc/{pid}')
+            except (OSError, ValueError):
+                running = False
+            if not running:
+                LOG.debug('The process of %s is not running.', entry.path)
+                status += 1
+        return status
+
+    @staticmethod
+    def run_script(script_path):
+        return subprocess.call(['bash', script_path],
+                               stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+
+    def check(self):
+        """Returns the number of failed checks."""
+        try:
+            entries = sorted(os.scandir(util.keepalived_check_scripts_dir()),
+                             key=lambda entry: entry.name)
+        except FileNotFoundError:
+            entries = []
+        status = 0
+        for entry in entries:
+            if entry.path == util.haproxy_check_script_path():
+                status += self.check_haproxy(entry.path)
+            elif entry.path == util.lvs_check_script_path():
+                status += self.check_lvs()
+            else:
+                status += self.run_script(entry.path)
+        return status
+
+
+def write_status(status):
+    path = util.vrrp_check_status_path()
+    with open(path + '.new', 'w', encoding='utf-8') as status_file:
+        status_file.write(f'{min(status, MAX_STATUS)} {int(time.time())}\n')
+    os.replace(path + '.new', path)
+
+
+def run(checker):
+    while not EXIT_EVENT.is_set():
+        start = time.monotonic()
+        # Nothing to check until keepalived is configured
+        if os.path.exists(util.keepalived_check_script_path()):
+            try:
+                status = checker.check()
+            except Exception:
+                LOG.exception('The VRRP check failed.')
+                status = 1
+            write_status(status)
+        EXIT_EVENT.wait(max(0, CONF.amphora_agent.vrrp_check_daemon_interval -
+                            (time.monotonic() - start)))
+    checker.close()
+
+
+def _handle_signal(signum, frame):
+    EXIT_EVENT.set()
+
+
+def main():
+    config.init(sys.argv[1:])
+    config.setup_logging(CONF)
+
+    signal.signal(signal.SIGTERM, _handle_signal)
+    signal.signal(signal.SIGINT, _handle_signal)
+
+    if not CONF.amphora_agent.vrrp_check_daemon:
+        LOG.info('The VRRP check daemon is disabled, the keepalived check '
+                 'script runs the checks.')
+        EXIT_EVENT.wait()
+        return
+    run(VRRPCheck())
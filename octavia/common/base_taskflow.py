@@ -13,9 +13,12 @@
 # under the License.
 #
 
+import collections
 import concurrent.futures
+import contextlib
 import datetime
 import functools
+import threading
 import time
 
 from oslo_config import cfg
@@ -32,6 +35,7 @@ from taskflow import states
 
 from octavia.amphorae.driver_exceptions import exceptions as drv_exceptions
 from octavia.common import exceptions
+from octavia.controller.worker import lb_graph_snapshot
 
 LOG = log.getLogger(__name__)
 
@@ -116,6 +120,67 @@ class BaseTaskFlowEngine:
         return eng
 
 
+class FlowTemplates:
+    """Pool of prebuilt flows reused between the operations.
+
+    Building a flow instantiates dozens of tasks, each of them loading its
+    drivers and repositories. The flows built by the template factories only
+    depend on the arguments of the factory, so an instance is built once per
+    set of arguments and reused by the following operations. An instance is
+    only used by one engine at a time, a new one is built when all the
+    instances of a template are in use.
+
+    :param factories: The flow factories that can be used as templates.
+    """
+
+    def __init__(self, factories):
+        self._factories = frozenset(factories)
+        self._lock = threading.Lock()
+        self._idle_flows = collections.defaultdict(list)
+
+    @staticmethod
+    def _freeze(value):
+        if isinstance(value, dict):
+            return tuple(sorted((k, FlowTemplates._freeze(v))
+                                for k, v in value.items()))
+        if isinstance(value, (list, tuple)):
+            return tuple(FlowTemplates._freeze(v) for v in value)
+        return value
+
+    def _get_key(self, factory, args, kwargs):
+        if factory not in self._factories:
+            return None
+        key = (factory, self._freeze(args), self._freeze(kwargs))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    @contextlib.contextmanager
+    def get_flow(self, factory, *args, **kwargs):
+        """Returns a flow built by factory(*args, **kwargs).
+
+        The flow is returned to the pool when the context exits.
+        """
+        key = self._get_key(factory, args, kwargs)
+        flow = None
+        if key is not None:
+            with self._lock:
+                if self._idle_flows[key]:
+                    flow = self._idle_flows[key].pop()
+        if flow is None:
+            flow = factory(*args, **kwargs)
+        try:
+            yield flow
+        finally:
+            if key is not None:
+                with self._lock:
+                    if (len(self._idle_flows[key]) <
+                            CONF.task_flow.max_workers):
+                        self._idle_flows[key].append(flow)
+
+
 class ExtendExpiryListener(base.Listener):
 
     def __init__(self, engine, job):
@@ -138,6 +203,8 @@ class DynamicLoggingConductor(impl_blocking.BlockingConductor):
         listeners = super()._listeners_from_job(
             job, engine)
         listeners.append(logging.DynamicLoggingListener(engine, log=LOG))
+        listeners.append(
+            lb_graph_snapshot.LoadBalancerGraphSnapshotListener(engine))
 
         return listeners
 
@@ -0,0 +1,121 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from concurrent import futures
+import copy
+import threading
+import time
+import weakref
+
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+_CACHES = weakref.WeakValueDictionary()
+
+
+class _Entry:
+    def __init__(self):
+        self.future = futures.Future()
+        # None while the value is being loaded
+        self.expires = None
+
+
+class TTLCache:
+    """Process-wide cache of values expiring after a time to live.
+
+    Concurrent misses on the same key wait for a single call of the loader,
+    so a thundering herd makes one backend call. Loader failures are raised
+    to all the waiting callers but are not cached. The callers get a copy of
+    the cached values, they are free to modify it.
+
+    :param name: The name of the cache, used in the logs.
+    :param ttl: The time to live of the values in seconds, or a function
+                returning it. A time to live of 0 disables the cache.
+    """
+
+    def __init__(self, name, ttl):
+        self.name = name
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        _CACHES[name] = self
+
+    @property
+    def ttl(self):
+        return self._ttl() if callable(self._ttl) else self._ttl
+
+    def _prune(self, now):
+        for key, entry in list(self._entries.items()):
+            if entry.expires is not None and entry.expires <= now:
+                del self._entries[key]
+
+    def get(self, key, loader, *args, **kwargs):
+        """Returns the cached value of key, loading it if needed.
+
+        :param key: A hashable identifying the value.
+        :param loader: The function loading the value, called with args
+                       and kwargs on a miss.
+        :returns: A copy of the value.
+        """
+        ttl = self.ttl
+        if ttl <= 0:
+            return loader(*args, **kwargs)
+
+        with self._lock:
+            self._prune(time.monotonic())
+            entry = self._entries.get(key)
+            owner = entry is None
+            if owner:
+                self.misses += 1
+                entry = _Entry()
+                self._entries[key] = entry
+            else:
+                self.hits += 1
+
+        if not owner:
+            return copy.deepcopy(entry.future.result())
+
+        LOG.debug('%(name)s cache miss for %(key)s (%(hits)d hits, '
+                  '%(misses)d misses).',
+                  {'name': self.name, 'key': key, 'hits': self.hits,
+                   'misses': self.misses})
+        try:
+            value = loader(*args, **kwargs)
+        except Exception as e:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            entry.future.set_exception(e)
+            raise
+        with self._lock:
+            entry.expires = time.monotonic() + ttl
+        entry.future.set_result(value)
+        return copy.deepcopy(value)
+
+    def invalidate(self, key):
+        """Removes a key from the cache."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Removes all the keys from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+
+def clear_all():
+    """Removes all the keys from all the caches of this process."""
+    for cache in list(_CACHES.values()):
+        cache.clear()
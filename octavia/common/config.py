@@ -63,6 +63,12 @@ api_opts = [
                 help=_("Allow the usage of filtering")),
     cfg.BoolOpt('allow_field_selection', default=True,
                 help=_("Allow the usage of field selection")),
+    cfg.BoolOpt('fast_json_responses', default=False,
+                help=_("When True, the responses of the GET API calls are "
+                       "serialized to JSON with precompiled serializers "
+                       "instead of the generic WSME serializer. The "
+                       "responses are identical, but rendering large lists "
+                       "uses less CPU.")),
     cfg.StrOpt('pagination_max_limit',
                default=str(constants.DEFAULT_PAGE_SIZE),
                help=_("The maximum number of items returned in a single "
@@ -155,6 +161,59 @@ amphora_agent_opts = [
                help=_("Minimum TLS protocol for communication with the "
                       "amphora agent."),
                choices=constants.TLS_ALL_VERSIONS),
+    cfg.IntOpt('agent_keepalive_timeout', default=30, min=0,
+               help=_("The time in seconds the agent keeps an idle "
+                      "connection from the controller open for the next "
+                      "request. Set to 0 to close the connection after each "
+                      "request.")),
+    cfg.FloatOpt('host_facts_cache_ttl', default=5.0, min=0,
+                 help=_("The time in seconds the amphora agent reuses the "
+                        "CPU, memory, disk and network usage of the amphora "
+                        "for the next details requests. Set to 0 to read "
+                        "them for each request.")),
+    cfg.IntOpt('agent_worker_threads', default=4, min=1,
+               help=_("The number of threads of the amphora agent serving "
+                      "the requests of the controllers. The operations on "
+                      "different load balancers run concurrently, the "
+                      "operations on a load balancer are serialized.")),
+    cfg.FloatOpt('haproxy_validation_cache_ttl', default=3600.0, min=0,
+                 help=_("The time in seconds the amphora agent remembers "
+                        "that a haproxy configuration passed the validation, "
+                        "so an identical configuration uploaded again is not "
+                        "checked with haproxy. Set to 0 to check every "
+                        "configuration.")),
+    cfg.IntOpt('haproxy_validation_workers', default=2, min=1,
+               help=_("The maximum number of haproxy configurations the "
+                      "amphora agent validates concurrently.")),
+    cfg.IntOpt('haproxy_validation_timeout', min=1,
+               help=_("The time in seconds the amphora agent allows the "
+                      "validation of a haproxy configuration to take, "
+                      "including the time waiting for a validation "
+                      "worker. The validation of a large configuration can "
+                      "take long, by default it is not limited in time.")),
+    cfg.BoolOpt('vrrp_check_daemon', default=False,
+                help=_("When True, the keepalived check script of the "
+                       "amphora reads the health of haproxy and of the LVS "
+                       "listeners reported by the amphora-vrrp-check daemon "
+                       "instead of running the check scripts. The daemon "
+                       "keeps its connections to the haproxy stats sockets "
+                       "open between the checks.")),
+    cfg.FloatOpt('vrrp_check_daemon_interval', default=1.0, min=0.1,
+                 help=_("The time in seconds between two checks of the "
+                        "amphora-vrrp-check daemon. The keepalived check "
+                        "script considers the amphora unhealthy when the "
+                        "daemon did not report for three intervals.")),
+    cfg.FloatOpt('prometheus_cache_ttl', default=0, min=0,
+                 help=_("The time in seconds the Prometheus proxy of the "
+                        "amphora reuses the haproxy metrics for the next "
+                        "scrapes. Concurrent scrapes share a single read of "
+                        "the metrics. When 0, the metrics are read for each "
+                        "scrape and streamed as they are converted.")),
+    cfg.BoolOpt('prometheus_exclude_members', default=False,
+                help=_("When True, the Prometheus proxy of the amphora does "
+                       "not report the member metrics unless a scrape "
+                       "requests them with the exclude_members=false query "
+                       "parameter.")),
 
     # Logging setup
     cfg.ListOpt('admin_log_targets',
@@ -261,6 +320,12 @@ networking_opts = [
                        "this True may allow users to access resources on "
                        "subnets they do not normally have access to via "
                        "neutron RBAC policies.")),
+    cfg.IntOpt('security_group_id_cache_ttl',
+               default=300, min=0,
+               help=_('Seconds the ID of the VIP security group of a load '
+                      'balancer is cached by each Octavia process instead of '
+                      'being looked up by name. Set to 0 to look up the '
+                      'security group on every use.')),
 ]
 
 health_manager_opts = [
@@ -413,6 +478,20 @@ haproxy_amphora_opts = [
                help=_("The client certificate to talk to the agent")),
     cfg.StrOpt('server_ca', default='/etc/octavia/certs/server_ca.pem',
                help=_("The ca which signed the server certificates")),
+    cfg.IntOpt('rest_pool_connections', default=100, min=1,
+               help=_("The number of amphorae each controller process keeps "
+                      "REST API connections to. Connections to the least "
+                      "recently used amphorae are closed beyond this "
+                      "number.")),
+    cfg.IntOpt('rest_pool_maxsize', default=4, min=1,
+               help=_("The maximum number of idle REST API connections kept "
+                      "to each amphora.")),
+    cfg.FloatOpt('rest_pool_idle_timeout', default=20, min=0,
+                 help=_("The time in seconds after which an idle REST API "
+                        "connection to an amphora is closed instead of being "
+                        "reused. It must be lower than the "
+                        "[amphora_agent] agent_keepalive_timeout of the "
+                        "amphorae.")),
     cfg.IntOpt('api_db_commit_retry_attempts', default=15,
                help=_('The number of times the database action will be '
                       'attempted.')),
@@ -441,6 +520,40 @@ controller_worker_opts = [
                default=10,
                help=_('Seconds to wait between checks on whether an Amphora '
                       'has become active')),
+    cfg.BoolOpt('amp_active_batch_polling',
+                default=True,
+                help=_('Wait for the amphorae to become active with a status '
+                       'watcher shared by the worker process. The watcher '
+                       'checks all the amphorae being built with a single '
+                       'compute request, backing off up to '
+                       'amp_active_wait_sec between checks.')),
+    cfg.IntOpt('metadata_cache_ttl',
+               default=10, min=0,
+               help=_('Seconds the flavor and availability zone metadata '
+                      'are cached by each Octavia process. Deleting a '
+                      'flavor or an availability zone only invalidates the '
+                      'cache of the process deleting it, the other '
+                      'processes may use the old metadata until it '
+                      'expires, for instance when an availability zone is '
+                      'recreated with the same name. Set to 0 to read them '
+                      'from the database on every use.')),
+    cfg.FloatOpt('failover_lookup_window',
+                 default=10, min=0,
+                 help=_('Seconds during which the failovers running in the '
+                        'same worker process share the result of identical '
+                        'security group lookups. Set to 0 to disable '
+                        'sharing.')),
+    cfg.FloatOpt('failover_port_batch_window',
+                 default=0, min=0,
+                 help=_('Seconds during which the VIP base ports requested '
+                        'by concurrent failovers are collected and then '
+                        'created with a single bulk networking request. '
+                        'Every failover waits for the window, even when it '
+                        'is the only one running, so it should only be set '
+                        'where compute host failures trigger many failovers '
+                        'at once. The ports of the load balancer creates are '
+                        'not delayed. Set to 0 to create each port with its '
+                        'own request.')),
     cfg.StrOpt('amp_flavor_id',
                default='',
                help=_('Nova instance flavor id for the Amphora')),
@@ -664,7 +777,34 @@ house_keeping_opts = [
     cfg.IntOpt('cert_rotate_threads',
                default=10,
                help=_('Number of threads performing amphora certificate'
-                      ' rotation'))
+                      ' rotation')),
+    cfg.IntOpt('spare_check_interval',
+               default=30,
+               help=_('Spare amphora pool check interval in seconds')),
+    cfg.IntOpt('spare_amphora_pool_size',
+               default=0, min=0,
+               help=_('Number of spare amphorae to keep booted, per '
+                      'availability zone, with the default amphora compute '
+                      'flavor ([controller_worker] amp_flavor_id). Spare '
+                      'amphorae are used by the load balancer create and '
+                      'failover flows instead of booting a new amphora. '
+                      'Spare amphorae are only used by load balancers with '
+                      'the default image tag and management network, and '
+                      'without anti-affinity.')),
+    cfg.DictOpt('spare_amphora_flavor_pool_sizes',
+                default={},
+                help=_('Number of spare amphorae to keep booted, per '
+                       'availability zone, for other compute flavors, as a '
+                       'dict of compute flavor ID to pool size.')),
+    cfg.ListOpt('spare_amphora_availability_zones',
+                default=[],
+                help=_('List of compute availability zones in which spare '
+                       'amphorae are kept. When empty, the spare amphorae '
+                       'are booted without an availability zone.')),
+    cfg.IntOpt('spare_amphora_build_rate',
+               default=2, min=1,
+               help=_('Maximum number of spare amphorae booted during a '
+                      'spare amphora pool check.')),
 ]
 
 keepalived_vrrp_opts = [
@@ -796,6 +936,12 @@ glance_opts = [
     cfg.BoolOpt('insecure',
                 default=False,
                 help=_('Disable certificate validation on SSL connections ')),
+    cfg.IntOpt('image_id_cache_ttl',
+               default=60, min=0,
+               help=_('Seconds the ID of the amphora image found by tag is '
+                      'cached by each Octavia process. A failed amphora '
+                      'build invalidates the cached ID. Set to 0 to look '
+                      'up the image on every build.')),
 ]
 
 quota_opts = [
@@ -820,6 +966,16 @@ quota_opts = [
     cfg.IntOpt('default_l7rule_quota',
                default=constants.QUOTA_UNLIMITED,
                help=_('Default per project l7rule quota.')),
+    cfg.BoolOpt('optimistic_quota_accounting', default=False,
+                help=_('When True, the quota usage of a project is updated '
+                       'with conditional atomic UPDATE statements committed '
+                       'in their own short transaction instead of locking '
+                       'the quota record of the project until the end of '
+                       'the API request. The usage is restored if the '
+                       'request transaction is rolled back.')),
+    cfg.IntOpt('optimistic_quota_max_retries', default=5, min=0,
+               help=_('Number of times an optimistic quota update is '
+                      'retried when it hits a database deadlock.')),
 ]
 
 audit_opts = [
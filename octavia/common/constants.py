@@ -622,6 +622,7 @@ RPC_NAMESPACE_CONTROLLER_AGENT = 'controller'
 # Build Type Priority
 LB_CREATE_FAILOVER_PRIORITY = 20
 LB_CREATE_NORMAL_PRIORITY = 40
+LB_CREATE_SPARES_POOL_PRIORITY = 60
 LB_CREATE_ADMIN_FAILOVER_PRIORITY = 80
 BUILD_TYPE_PRIORITY = 'build_type_priority'
 
@@ -707,6 +708,10 @@ PLUGGED_INTERFACES = '/var/lib/octavia/plugged_interfaces'
 HAPROXY_USER_GROUP_CFG = '/var/lib/octavia/haproxy-default-user-group.conf'
 AMPHORA_NAMESPACE = 'amphora-haproxy'
 
+# Headers of the haproxy configuration upload responses
+VALIDATION_TIME_HEADER = 'X-Octavia-Validation-Time'
+VALIDATION_CACHED_HEADER = 'X-Octavia-Validation-Cached'
+
 FLOW_DOC_TITLES = {'AmphoraFlows': 'Amphora Flows',
                    'LoadBalancerFlows': 'Load Balancer Flows',
                    'ListenerFlows': 'Listener Flows',
@@ -982,4 +987,5 @@ NFT_RULES_FILE = '/var/lib/octavia/nftables-vip.rules'
 NFT_TABLE = 'amphora_table'
 NFT_CHAIN = 'amphora_chain'
 NFT_VIP_CHAIN = 'amphora_vip_chain'
+NFT_ALLOWED_SET = 'amphora_allowed'
 PROTOCOL = 'protocol'
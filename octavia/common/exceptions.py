@@ -169,6 +169,12 @@ class DuplicateMemberEntry(APIException):
     code = 409
 
 
+class DuplicateMemberBatchEntry(APIException):
+    msg = _("Another member on this pool is already using the ip and "
+            "protocol_port of a member of the batch")
+    code = 409
+
+
 class DuplicateHealthMonitor(APIException):
     msg = _("This pool already has a health monitor")
     code = 409
@@ -449,6 +449,23 @@ def ip_not_reserved(ip_address):
                                        option='member address')
 
 
+def ips_not_reserved(ip_addresses):
+    """Validates that none of the IP addresses is a reserved address.
+
+    The reserved addresses are parsed once for all the addresses, this is
+    meant for validating the members of a batch request.
+    """
+    reserved_ips = {ipaddress.ip_address(ip)
+                    for ip in CONF.networking.reserved_ips}
+    if not reserved_ips:
+        return
+    for ip_address in ip_addresses:
+        ip_address = ipaddress.ip_address(ip_address)
+        if ip_address in reserved_ips:
+            raise exceptions.InvalidOption(
+                value=ip_address.exploded.upper(), option='member address')
+
+
 def check_cipher_prohibit_list(cipherstring):
     ciphers = cipherstring.split(':')
     prohibit_list = CONF.api_settings.tls_cipher_prohibit_list.split(':')
@@ -73,6 +73,24 @@ class ComputeBase(metaclass=abc.ABCMeta):
         :returns: fault message or None
         """
 
+    def get_server_statuses(self, compute_ids, changes_since=None):
+        """Retrieve the compute status of several amphorae
+
+        Drivers should override this to query the status of all the
+        amphorae with a single request.
+
+        :param compute_ids: the compute ids of the desired amphorae
+        :param changes_since: only the amphorae changed since this
+                              datetime need to be returned
+        :returns: dict of compute id to compute status, the amphorae that
+                  were not returned by the compute service are omitted
+        """
+        statuses = {}
+        for compute_id in compute_ids:
+            amphora, fault = self.get_amphora(compute_id)
+            statuses[compute_id] = amphora.status
+        return statuses
+
     @abc.abstractmethod
     def create_server_group(self, name, policy):
         """Create a server group object
@@ -97,6 +97,13 @@ class NoopManager:
             lb_network_ip='192.0.2.1'
         ), None
 
+    def get_server_statuses(self, compute_ids, changes_since=None):
+        LOG.debug("Compute %s no-op, compute_ids %s, changes_since %s",
+                  self.__class__.__name__, compute_ids, changes_since)
+        self.computeconfig[(tuple(compute_ids), changes_since)] = (
+            compute_ids, changes_since, 'get_server_statuses')
+        return {compute_id: constants.ACTIVE for compute_id in compute_ids}
+
     def create_server_group(self, name, policy):
         LOG.debug("Create Server Group %s no-op, name %s, policy %s ",
                   self.__class__.__name__, name, policy)
@@ -179,6 +186,9 @@ class NoopComputeDriver(driver_base.ComputeBase):
     def get_amphora(self, compute_id, management_network_id=None):
         return self.driver.get_amphora(compute_id, management_network_id)
 
+    def get_server_statuses(self, compute_ids, changes_since=None):
+        return self.driver.get_server_statuses(compute_ids, changes_since)
+
     def create_server_group(self, name, policy):
         return self.driver.create_server_group(name, policy)
 
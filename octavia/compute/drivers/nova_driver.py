@@ -153,6 +153,8 @@ class VirtualMachineManager(compute_base.ComputeBase):
             if (CONF.controller_worker.volume_driver !=
                     constants.VOLUME_NOOP_DRIVER):
                 self.volume_driver.delete_volume(volume_id)
+            # The cached image may have been deleted
+            self.image_driver.invalidate_image_id(image_tag, image_owner)
             LOG.exception("Nova failed to build the instance due to: %s",
                           str(e))
             raise exceptions.ComputeBuildException(fault=e)
@@ -202,6 +204,28 @@ class VirtualMachineManager(compute_base.ComputeBase):
         amphora = self.manager.get(compute_id)
         return self._translate_amphora(amphora, management_network_id)
 
+    @tenacity.retry(retry=tenacity.retry_if_exception_type(),
+                    stop=tenacity.stop_after_attempt(CONF.compute.max_retries),
+                    retry_error_callback=_raise_compute_exception,
+                    wait=tenacity.wait_fixed(CONF.compute.retry_interval))
+    def get_server_statuses(self, compute_ids, changes_since=None):
+        '''Retrieve the status of several virtual machines in one request.
+
+        :param compute_ids: virtual machine UUIDs
+        :param changes_since: only the virtual machines changed since this
+                              datetime are returned by nova
+        :returns: dict of virtual machine UUID to nova status
+        '''
+        compute_ids = set(compute_ids)
+        if not compute_ids:
+            return {}
+        search_opts = {}
+        if changes_since:
+            search_opts['changes-since'] = changes_since.isoformat()
+        servers = self.manager.list(search_opts=search_opts)
+        return {server.id: server.status for server in servers
+                if server.id in compute_ids}
+
     def _translate_amphora(self, nova_response, management_network_id=None):
         '''Convert a nova virtual machine into an amphora object.
 
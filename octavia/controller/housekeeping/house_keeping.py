@@ -27,6 +27,92 @@ LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
 
 
+class SpareAmphora:
+    def __init__(self):
+        self.amp_repo = repo.AmphoraRepository()
+        self.spares_repo = repo.SparesPoolRepository()
+        self.cw = cw2.ControllerWorker()
+
+    @staticmethod
+    def get_spare_pool_sizes():
+        """Returns the configured size of each spare amphora pool.
+
+        :returns: A dict of (compute flavor, compute zone) to pool size.
+        """
+        flavor_sizes = {}
+        if CONF.house_keeping.spare_amphora_pool_size:
+            flavor_sizes[CONF.controller_worker.amp_flavor_id] = (
+                CONF.house_keeping.spare_amphora_pool_size)
+        for flavor, size in (
+                CONF.house_keeping.spare_amphora_flavor_pool_sizes.items()):
+            if int(size) > 0:
+                flavor_sizes[flavor] = int(size)
+        zones = CONF.house_keeping.spare_amphora_availability_zones or [None]
+        return {(flavor, zone): size
+                for flavor, size in flavor_sizes.items() for zone in zones}
+
+    def spare_check(self):
+        """Checks the DB for the spare amphora count of each pool.
+
+        If a pool is below its size, starts new amphorae, up to
+        spare_amphora_build_rate amphorae per check.
+        """
+        pool_sizes = self.get_spare_pool_sizes()
+        if not pool_sizes:
+            return
+
+        now = datetime.datetime.utcnow()
+        session = db_api.get_session()
+        with session.begin():
+            # The spares pool row serializes the checks of the housekeeping
+            # processes, another process may have just done this check.
+            spares_pool = self.spares_repo.get_for_update(session)
+            check_age = now - datetime.timedelta(
+                seconds=CONF.house_keeping.spare_check_interval)
+            if spares_pool.updated_at > check_age:
+                LOG.debug("Spare amphora pools were checked at %s, "
+                          "skipping.", spares_pool.updated_at)
+                return
+
+            # Nova sets the zone of the amphorae even when the pools have no
+            # zone.
+            spare_counts = self.amp_repo.get_spare_amphora_counts(
+                session, by_zone=bool(
+                    CONF.house_keeping.spare_amphora_availability_zones))
+            deficits = {}
+            for (flavor, zone), size in pool_sizes.items():
+                count = spare_counts.get((flavor, zone), 0)
+                log = LOG.info if count < size else LOG.debug
+                log("Spare amphora pool (flavor %(flavor)s, zone %(zone)s) "
+                    "has %(count)d of %(size)d amphorae.",
+                    {'flavor': flavor, 'zone': zone, 'count': count,
+                     'size': size})
+                if count < size:
+                    deficits[(flavor, zone)] = size - count
+            spares_pool.updated_at = now
+
+        # Spread the builds allowed for this check over the pools
+        builds = []
+        build_rate = CONF.house_keeping.spare_amphora_build_rate
+        while deficits and len(builds) < build_rate:
+            for pool in list(deficits):
+                if len(builds) >= build_rate:
+                    break
+                builds.append(pool)
+                deficits[pool] -= 1
+                if not deficits[pool]:
+                    del deficits[pool]
+        if not builds:
+            return
+
+        LOG.info("Initiating creation of %d spare amphora.", len(builds))
+        with futures.ThreadPoolExecutor(max_workers=len(builds)) as executor:
+            for flavor, zone in builds:
+                executor.submit(self.cw.create_amphora,
+                                availability_zone=zone, compute_flavor=flavor)
+        LOG.debug("Finished creating %d spare amphora.", len(builds))
+
+
 class DatabaseCleanup:
     def __init__(self):
         self.amp_repo = repo.AmphoraRepository()
@@ -13,11 +13,15 @@
 # under the License.
 #
 
+import heapq
+import itertools
+import threading
 import time
 
 from oslo_config import cfg
 from oslo_log import log as logging
 
+from octavia.common import constants
 from octavia.common import exceptions
 from octavia.db import api as db_apis
 from octavia.db import repositories as repo
@@ -28,6 +32,46 @@ CONF = cfg.CONF
 CONF.import_group('haproxy_amphora', 'octavia.common.config')
 
 
+class _LocalBuildQueue:
+    """The build requests waiting in this process, ordered by priority.
+
+    Only the request at the head of the queue checks the database for a
+    build slot, the other requests wait on the condition until they reach
+    the head or a build slot of this process is released. The generation
+    is bumped on each of these events so that a request checking the
+    database without the condition does not miss them.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.generation = 0
+        self._heap = []
+        self._counter = itertools.count()
+
+    def add(self, amphora_id, priority):
+        heapq.heappush(self._heap,
+                       (priority, next(self._counter), amphora_id))
+
+    def remove(self, amphora_id):
+        self._heap = [entry for entry in self._heap
+                      if entry[2] != amphora_id]
+        heapq.heapify(self._heap)
+        self.notify()
+
+    def notify(self):
+        self.generation += 1
+        self.condition.notify_all()
+
+    def head(self):
+        return self._heap[0][2] if self._heap else None
+
+    def __contains__(self, amphora_id):
+        return any(entry[2] == amphora_id for entry in self._heap)
+
+
+_BUILD_QUEUE = _LocalBuildQueue()
+
+
 class AmphoraBuildRateLimit:
 
     def __init__(self):
@@ -42,34 +86,45 @@ class AmphoraBuildRateLimit:
                 priority=build_priority)
         LOG.debug("Added build request for amphora %s to the queue",
                   amphora_id)
-        self.wait_for_build_slot(amphora_id)
+        self.wait_for_build_slot(amphora_id, build_priority)
         LOG.info("Build slot for amphora %s is ready", amphora_id)
 
-    def has_build_slot(self):
+    def acquire_build_slot(self, amphora_id):
+        """Takes a build slot if amphora_id may build next.
+
+        The build slots and the build requests are shared by all the
+        controller workers through the database. The slot count row is
+        locked so that two workers cannot take the last slot.
+
+        :param amphora_id: The amphora at the head of the local queue.
+        :returns: True if a build slot was taken for amphora_id.
+        """
         build_rate_limit = CONF.haproxy_amphora.build_rate_limit
         session = db_apis.get_session()
         with session.begin():
             used_build_slots = (self.amp_build_slots_repo
-                                .get_used_build_slots_count(session))
-            available_build_slots = build_rate_limit - used_build_slots
-            LOG.debug("Available build slots %d", available_build_slots)
-            return available_build_slots > 0
-
-    def has_highest_priority(self, amphora_id):
-        session = db_apis.get_session()
-        with session.begin():
+                                .get_used_build_slots_count(session,
+                                                            lock=True))
+            LOG.debug("Available build slots %d",
+                      build_rate_limit - used_build_slots)
+            if used_build_slots >= build_rate_limit:
+                return False
             highest_priority_build_req = (
                 self.amp_build_req_repo.get_highest_priority_build_req(
                     session))
             LOG.debug("Highest priority req: %s, Current req: %s",
                       highest_priority_build_req, amphora_id)
-            return amphora_id == highest_priority_build_req
-
-    def update_build_status_and_available_build_slots(self, amphora_id):
-        session = db_apis.get_session()
-        with session.begin():
+            # Requests of this process with the same priority may be
+            # ordered differently by the database, any of them stands for
+            # the local head.
+            with _BUILD_QUEUE.condition:
+                if (_BUILD_QUEUE.head() != amphora_id or
+                        (highest_priority_build_req != amphora_id and
+                         highest_priority_build_req not in _BUILD_QUEUE)):
+                    return False
             self.amp_build_slots_repo.update_count(session, action='increment')
             self.amp_build_req_repo.update_req_status(session, amphora_id)
+        return True
 
     def remove_from_build_req_queue(self, amphora_id):
         session = db_apis.get_session()
@@ -78,6 +133,9 @@ class AmphoraBuildRateLimit:
             self.amp_build_slots_repo.update_count(session, action='decrement')
             LOG.debug("Removed request for %s from queue"
                       " and released the build slot", amphora_id)
+        # Let the local head take the released slot right away
+        with _BUILD_QUEUE.condition:
+            _BUILD_QUEUE.notify()
 
     def remove_all_from_build_req_queue(self):
         session = db_apis.get_session()
@@ -87,13 +145,36 @@ class AmphoraBuildRateLimit:
             LOG.debug("Removed all the build requests and "
                       "released the build slots")
 
-    def wait_for_build_slot(self, amphora_id):
+    def wait_for_build_slot(
+            self, amphora_id,
+            build_priority=constants.LB_CREATE_NORMAL_PRIORITY):
         LOG.debug("Waiting for a build slot")
-        for i in range(CONF.haproxy_amphora.build_active_retries):
-            if (self.has_build_slot() and
-                    self.has_highest_priority(amphora_id)):
-                self.update_build_status_and_available_build_slots(amphora_id)
-                return
-            time.sleep(CONF.haproxy_amphora.build_retry_interval)
+        retry_interval = CONF.haproxy_amphora.build_retry_interval
+        deadline = time.monotonic() + (
+            CONF.haproxy_amphora.build_active_retries * retry_interval)
+        with _BUILD_QUEUE.condition:
+            _BUILD_QUEUE.add(amphora_id, build_priority)
+        try:
+            while True:
+                with _BUILD_QUEUE.condition:
+                    is_head = _BUILD_QUEUE.head() == amphora_id
+                    generation = _BUILD_QUEUE.generation
+                # The database transaction locks the build slots row, the
+                # condition is not held meanwhile so that the other requests
+                # of this process are not blocked behind it.
+                if is_head and self.acquire_build_slot(amphora_id):
+                    return
+                with _BUILD_QUEUE.condition:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    # Check again right away if a slot was released or the
+                    # head changed during the database transaction
+                    if _BUILD_QUEUE.generation == generation:
+                        _BUILD_QUEUE.condition.wait(
+                            min(remaining, retry_interval))
+        finally:
+            with _BUILD_QUEUE.condition:
+                _BUILD_QUEUE.remove(amphora_id)
         self.remove_all_from_build_req_queue()
         raise exceptions.ComputeBuildQueueTimeoutException()
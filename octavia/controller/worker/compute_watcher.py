@@ -0,0 +1,159 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from concurrent import futures
+import datetime
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_utils import timeutils
+from stevedore import driver as stevedore_driver
+
+from octavia.common import constants
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+# Compute statuses after which a server will not become ACTIVE by itself
+TERMINAL_STATUSES = (constants.ACTIVE, constants.ERROR, constants.DELETED)
+
+# Poll interval, in seconds, right after a server is added to the watcher
+MIN_POLL_INTERVAL = 1
+
+_WATCHER = None
+_WATCHER_LOCK = threading.Lock()
+
+
+class _Watch:
+    def __init__(self, since):
+        self.future = futures.Future()
+        self.since = since
+
+
+class ComputeStatusWatcher:
+    """Waits for the compute servers being built by this process.
+
+    A single thread polls the status of all the servers being watched
+    with one compute request, backing off exponentially up to
+    [controller_worker] amp_active_wait_sec while nothing changes. The
+    callers are notified through futures once their server reaches a
+    terminal status.
+    """
+
+    def __init__(self, compute):
+        self.compute = compute
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._watches = {}
+        self._thread = None
+
+    def get_watch(self, compute_id):
+        """Returns the future of a watched server, or None."""
+        with self._lock:
+            watch = self._watches.get(compute_id)
+        return watch.future if watch else None
+
+    def watch(self, compute_id, since):
+        """Watches a server until it reaches a terminal status.
+
+        :param compute_id: The compute id of the server.
+        :param since: The datetime of the last known status of the server.
+        :returns: A future resolved with the terminal compute status.
+        """
+        with self._lock:
+            watch = self._watches.get(compute_id)
+            if watch is None:
+                watch = _Watch(since)
+                self._watches[compute_id] = watch
+                self._wakeup.set()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='compute-status-watcher',
+                    daemon=True)
+                self._thread.start()
+        return watch.future
+
+    def _expire_watches(self):
+        # Nobody waits for the servers anymore once the ComputeWait retries
+        # are exhausted.
+        max_age = datetime.timedelta(
+            seconds=(CONF.controller_worker.amp_active_wait_sec *
+                     (CONF.controller_worker.amp_active_retries + 1)))
+        expiry = timeutils.utcnow() - max_age
+        with self._lock:
+            for compute_id, watch in list(self._watches.items()):
+                if watch.since < expiry:
+                    LOG.debug("Stopped watching compute %s.", compute_id)
+                    watch.future.cancel()
+                    del self._watches[compute_id]
+
+    def poll(self):
+        """Checks the status of all the watched servers at once."""
+        self._expire_watches()
+        with self._lock:
+            if not self._watches:
+                return
+            compute_ids = list(self._watches)
+            # Allow for some clock skew between the controller and nova
+            changes_since = (
+                min(watch.since for watch in self._watches.values()) -
+                datetime.timedelta(
+                    seconds=CONF.controller_worker.amp_active_wait_sec))
+
+        statuses = self.compute.get_server_statuses(
+            compute_ids, changes_since=changes_since)
+
+        with self._lock:
+            for compute_id, status in statuses.items():
+                if status not in TERMINAL_STATUSES:
+                    continue
+                watch = self._watches.pop(compute_id, None)
+                if watch is not None:
+                    watch.future.set_result(status)
+
+    def _run(self):
+        interval = MIN_POLL_INTERVAL
+        while True:
+            self._wakeup.clear()
+            try:
+                self.poll()
+            except Exception as e:
+                LOG.warning('Failed to poll the compute status of the '
+                            'amphorae being built: %s', str(e))
+            with self._lock:
+                if not self._watches:
+                    self._thread = None
+                    return
+            if self._wakeup.wait(interval - MIN_POLL_INTERVAL):
+                # New servers are watched, check them soon
+                interval = MIN_POLL_INTERVAL
+            else:
+                interval = min(interval * 2,
+                               CONF.controller_worker.amp_active_wait_sec)
+            time.sleep(MIN_POLL_INTERVAL)
+
+
+def get_compute_watcher():
+    """Returns the compute status watcher of this process."""
+    global _WATCHER
+    if _WATCHER is None:
+        with _WATCHER_LOCK:
+            if _WATCHER is None:
+                compute = stevedore_driver.DriverManager(
+                    namespace='octavia.compute.drivers',
+                    name=CONF.controller_worker.compute_driver,
+                    invoke_on_load=True
+                ).driver
+                _WATCHER = ComputeStatusWatcher(compute)
+    return _WATCHER
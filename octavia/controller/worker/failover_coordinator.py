@@ -0,0 +1,166 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from concurrent import futures
+import copy
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+_COORDINATOR = None
+_COORDINATOR_LOCK = threading.Lock()
+
+
+class _Lookup:
+    def __init__(self):
+        self.future = futures.Future()
+        # None while the lookup is in progress
+        self.expires = None
+
+
+class _PortRequest:
+    def __init__(self, port_spec):
+        self.port_spec = port_spec
+        self.future = futures.Future()
+
+
+class FailoverCoordinator:
+    """Shares work between the failovers running in a worker process.
+
+    When a compute host fails, the health manager starts many failovers at
+    once. The amphorae of a load balancer look up the same VIP security
+    group and each failover creates a VIP base port. The coordinator runs
+    an identical lookup only once per [controller_worker]
+    failover_lookup_window and creates the ports requested within
+    [controller_worker] failover_port_batch_window with a single bulk
+    request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lookups = {}
+        self._port_requests = None
+
+    def clear_lookups(self):
+        with self._lock:
+            self._lookups.clear()
+
+    def _prune_lookups(self, now):
+        for key, lookup in list(self._lookups.items()):
+            if lookup.expires is not None and lookup.expires <= now:
+                del self._lookups[key]
+
+    def lookup(self, key, func, *args, **kwargs):
+        """Returns func(*args, **kwargs), shared with identical lookups.
+
+        Concurrent callers with the same key wait for a single call of
+        func, and its result is reused until the lookup window expires.
+        Failures are returned to the waiting callers but are not kept.
+
+        :param key: A hashable identifying the lookup.
+        :param func: The function performing the lookup.
+        :returns: A copy of the result of func.
+        """
+        window = CONF.controller_worker.failover_lookup_window
+        if window <= 0:
+            return func(*args, **kwargs)
+
+        with self._lock:
+            self._prune_lookups(time.monotonic())
+            lookup = self._lookups.get(key)
+            owner = lookup is None
+            if owner:
+                lookup = _Lookup()
+                self._lookups[key] = lookup
+
+        if not owner:
+            return copy.deepcopy(lookup.future.result())
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            with self._lock:
+                self._lookups.pop(key, None)
+            lookup.future.set_exception(e)
+            raise
+        with self._lock:
+            lookup.expires = time.monotonic() + window
+        lookup.future.set_result(result)
+        return copy.deepcopy(result)
+
+    def create_port(self, network_driver, network_id, **kwargs):
+        """Creates a port, batched with the concurrent port creations.
+
+        The first caller waits for the batch window, then creates all the
+        ports requested in the meantime with one bulk request. If the bulk
+        request fails, every caller creates its own port so that the
+        errors are reported to the right failover.
+
+        :param network_driver: The network driver creating the ports.
+        :param network_id: The network the port should be created on.
+        :param kwargs: The other create_port arguments of the network driver.
+        :returns port: A port data model object.
+        """
+        window = CONF.controller_worker.failover_port_batch_window
+        if window <= 0:
+            return network_driver.create_port(network_id, **kwargs)
+
+        request = _PortRequest(dict(kwargs, network_id=network_id))
+        with self._lock:
+            leader = self._port_requests is None
+            if leader:
+                self._port_requests = []
+            self._port_requests.append(request)
+
+        if leader:
+            time.sleep(window)
+            with self._lock:
+                requests = self._port_requests
+                self._port_requests = None
+            self._create_ports(network_driver, requests)
+
+        port = request.future.result()
+        if port is None:
+            port = network_driver.create_port(network_id, **kwargs)
+        return port
+
+    @staticmethod
+    def _create_ports(network_driver, requests):
+        ports = [None] * len(requests)
+        try:
+            if len(requests) > 1:
+                ports = network_driver.create_ports(
+                    [request.port_spec for request in requests])
+                LOG.debug('Created %d ports with a bulk request.',
+                          len(requests))
+        except Exception as e:
+            LOG.warning('Failed to create %d ports with a bulk request, '
+                        'creating them one by one: %s',
+                        len(requests), str(e))
+        finally:
+            for request, port in zip(requests, ports):
+                request.future.set_result(port)
+
+
+def get_failover_coordinator():
+    """Returns the failover coordinator of this process."""
+    global _COORDINATOR
+    if _COORDINATOR is None:
+        with _COORDINATOR_LOCK:
+            if _COORDINATOR is None:
+                _COORDINATOR = FailoverCoordinator()
+    return _COORDINATOR
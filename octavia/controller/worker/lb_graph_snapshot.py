@@ -0,0 +1,174 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+from oslo_log import log as logging
+from taskflow import exceptions as taskflow_exc
+from taskflow.listeners import base
+from taskflow import states
+
+from octavia.common import constants
+from octavia.db import repositories as repo
+
+LOG = logging.getLogger(__name__)
+
+_SNAPSHOTS = None
+_SNAPSHOTS_LOCK = threading.Lock()
+
+_TASK_DONE_STATES = (states.SUCCESS, states.FAILURE, states.REVERTED)
+_FLOW_DONE_STATES = (states.SUCCESS, states.FAILURE, states.REVERTED,
+                     states.SUSPENDED)
+
+
+class _Scope:
+    def __init__(self):
+        self.flows = 0
+        self.snapshot = None
+        self.generation = 0
+        self.loads = 0
+        self.hits = 0
+
+
+class LoadBalancerGraphSnapshots:
+    """Shares the load balancer graphs loaded by the tasks of a flow.
+
+    Loading a load balancer with its listeners, pools, members and amphorae
+    runs to_data_model over the whole graph, and the amphora driver tasks
+    of a flow used to load it again for each configuration they render.
+    While a flow of a load balancer runs, its graph is loaded once and
+    shared by the tasks until a task that may update the database
+    completes.
+
+    The snapshots are shared between the tasks, they must not be modified.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._scopes = {}
+        self.loadbalancer_repo = repo.LoadBalancerRepository()
+
+    def start(self, loadbalancer_id):
+        """Enables the snapshots of a load balancer while a flow runs."""
+        with self._lock:
+            scope = self._scopes.setdefault(loadbalancer_id, _Scope())
+            scope.flows += 1
+            # The graph may have been updated by the API before the flow
+            scope.snapshot = None
+            scope.generation += 1
+
+    def stop(self, loadbalancer_id):
+        """Ends a flow started with start().
+
+        :returns: A tuple of the number of times the graph was loaded from
+                  the database and the number of snapshot hits since the
+                  first flow of the load balancer started.
+        """
+        with self._lock:
+            scope = self._scopes[loadbalancer_id]
+            scope.flows -= 1
+            if scope.flows == 0:
+                del self._scopes[loadbalancer_id]
+            return scope.loads, scope.hits
+
+    def get(self, session, loadbalancer_id):
+        """Returns the load balancer graph, from the snapshot if possible.
+
+        :param session: A Sql Alchemy database session.
+        :param loadbalancer_id: The load balancer ID.
+        :returns: octavia.common.data_models.LoadBalancer
+        """
+        with self._lock:
+            scope = self._scopes.get(loadbalancer_id)
+            if scope is not None:
+                if scope.snapshot is not None:
+                    scope.hits += 1
+                    return scope.snapshot
+                generation = scope.generation
+
+        db_lb = self.loadbalancer_repo.get(session, id=loadbalancer_id)
+
+        if scope is not None:
+            with self._lock:
+                scope.loads += 1
+                # Do not keep a graph loaded before an invalidation
+                if scope.generation == generation:
+                    scope.snapshot = db_lb
+        return db_lb
+
+    def invalidate(self, loadbalancer_id):
+        """Drops the snapshot of a load balancer after a database update."""
+        with self._lock:
+            scope = self._scopes.get(loadbalancer_id)
+            if scope is not None:
+                scope.snapshot = None
+                scope.generation += 1
+
+
+class LoadBalancerGraphSnapshotListener(base.Listener):
+    """Scopes the load balancer graph snapshots to a flow run.
+
+    The snapshot of the load balancer of the flow is invalidated when a
+    task completes, unless the task succeeded and sets the lb_graph_readonly
+    attribute to declare that it does not update the database.
+    """
+
+    def __init__(self, engine):
+        super().__init__(engine)
+        self._snapshots = get_lb_graph_snapshots()
+        self._loadbalancer_id = None
+        self._readonly_tasks = None
+
+    def _get_loadbalancer_id(self):
+        try:
+            return self._engine.storage.fetch(constants.LOADBALANCER_ID)
+        except taskflow_exc.NotFound:
+            return None
+
+    def _is_readonly(self, task_name):
+        if self._readonly_tasks is None:
+            self._readonly_tasks = {
+                atom.name for atom in self._engine.compilation.execution_graph
+                if getattr(atom, 'lb_graph_readonly', False)}
+        return task_name in self._readonly_tasks
+
+    def _flow_receiver(self, state, details):
+        if state == states.RUNNING and self._loadbalancer_id is None:
+            self._loadbalancer_id = self._get_loadbalancer_id()
+            if self._loadbalancer_id is not None:
+                self._snapshots.start(self._loadbalancer_id)
+        elif state in _FLOW_DONE_STATES and self._loadbalancer_id is not None:
+            loads, hits = self._snapshots.stop(self._loadbalancer_id)
+            LOG.debug('Flow %(flow)s loaded the graph of load balancer '
+                      '%(lb)s %(loads)d times and reused it %(hits)d times.',
+                      {'flow': details.get('flow_name'),
+                       'lb': self._loadbalancer_id, 'loads': loads,
+                       'hits': hits})
+            self._loadbalancer_id = None
+
+    def _task_receiver(self, state, details):
+        if state not in _TASK_DONE_STATES or self._loadbalancer_id is None:
+            return
+        # Failed and reverted tasks may have updated the database
+        if state == states.SUCCESS and self._is_readonly(details['task_name']):
+            return
+        self._snapshots.invalidate(self._loadbalancer_id)
+
+
+def get_lb_graph_snapshots():
+    """Returns the load balancer graph snapshots of this process."""
+    global _SNAPSHOTS
+    if _SNAPSHOTS is None:
+        with _SNAPSHOTS_LOCK:
+            if _SNAPSHOTS is None:
+                _SNAPSHOTS = LoadBalancerGraphSnapshots()
+    return _SNAPSHOTS
@@ -28,6 +28,7 @@ from octavia.common import base_taskflow
 from octavia.common import constants
 from octavia.common import exceptions
 from octavia.common import utils
+from octavia.controller.worker import lb_graph_snapshot
 from octavia.controller.worker.v2.flows import flow_utils
 from octavia.controller.worker.v2 import taskflow_jobboard_driver as tsk_driver
 from octavia.db import api as db_apis
@@ -81,6 +82,8 @@ class ControllerWorker:
                 invoke_on_load=True).driver
         else:
             self.tf_engine = base_taskflow.BaseTaskFlowEngine()
+            self.flow_templates = base_taskflow.FlowTemplates(
+                flow_utils.TEMPLATE_FLOWS)
 
     @tenacity.retry(
         retry=(
@@ -107,10 +110,39 @@ class ControllerWorker:
             self.services_controller.run_poster(func, *args, **kwargs)
         else:
             store = kwargs.pop('store', None)
-            tf = self.tf_engine.taskflow_load(
-                func(*args, **kwargs), store=store)
-            with tf_logging.DynamicLoggingListener(tf, log=LOG):
-                tf.run()
+            with self.flow_templates.get_flow(func, *args, **kwargs) as flow:
+                tf = self.tf_engine.taskflow_load(flow, store=store)
+                with tf_logging.DynamicLoggingListener(tf, log=LOG):
+                    with lb_graph_snapshot.LoadBalancerGraphSnapshotListener(
+                            tf):
+                        tf.run()
+
+    def create_amphora(self, availability_zone=None, compute_flavor=None):
+        """Creates an Amphora.
+
+        This is used to create spare amphora.
+
+        :param availability_zone: The compute zone of the amphora
+        :param compute_flavor: The compute flavor of the amphora
+        :returns: None
+        """
+        try:
+            store = {constants.BUILD_TYPE_PRIORITY:
+                     constants.LB_CREATE_SPARES_POOL_PRIORITY,
+                     constants.FLAVOR: {
+                         constants.COMPUTE_FLAVOR: (
+                             compute_flavor or
+                             CONF.controller_worker.amp_flavor_id)},
+                     constants.SERVER_GROUP_ID: None,
+                     constants.AVAILABILITY_ZONE: None}
+            if availability_zone:
+                store[constants.AVAILABILITY_ZONE] = {
+                    constants.COMPUTE_ZONE: availability_zone}
+            self.run_flow(
+                flow_utils.get_create_amphora_flow,
+                store=store)
+        except Exception as e:
+            LOG.error('Failed to create an amphora due to: %s', str(e))
 
     def delete_amphora(self, amphora_id):
         """Deletes an existing Amphora.
@@ -569,28 +601,28 @@ class ControllerWorker:
                              updated_members):
         session = db_apis.get_session()
         with session.begin():
-            db_new_members = [
-                self._member_repo.get(
-                    session, id=member[constants.MEMBER_ID])
-                for member in new_members]
+            db_new_members = self._member_repo.get_members_by_ids(
+                session, [m[constants.MEMBER_ID] for m in new_members])
         # The API may not have committed all of the new member records yet.
         # Make sure we retry looking them up.
-        if None in db_new_members or len(db_new_members) != len(new_members):
+        if len(db_new_members) != len(new_members):
             LOG.warning('Failed to fetch one of the new members from DB. '
                         'Retrying for up to 60 seconds.')
             raise db_exceptions.NoResultFound
 
         with session.begin():
+            db_members = {
+                db_member.id: db_member
+                for db_member in self._member_repo.get_members_by_ids(
+                    session, [m.get(constants.ID)
+                              for m in updated_members + old_members])}
             updated_members = [
                 (provider_utils.db_member_to_provider_member(
-                    self._member_repo.get(session,
-                                          id=m.get(constants.ID))).to_dict(),
-                 m)
+                    db_members[m.get(constants.ID)]).to_dict(), m)
                 for m in updated_members]
             provider_old_members = [
                 provider_utils.db_member_to_provider_member(
-                    self._member_repo.get(session,
-                                          id=m.get(constants.ID))).to_dict()
+                    db_members[m.get(constants.ID)]).to_dict()
                 for m in old_members]
             if old_members:
                 pool = self._pool_repo.get(
@@ -16,6 +16,7 @@
 
 from oslo_config import cfg
 from oslo_log import log as logging
+from taskflow.patterns import graph_flow
 from taskflow.patterns import linear_flow
 from taskflow.patterns import unordered_flow
 
@@ -43,6 +44,8 @@ class AmphoraFlows:
         """
         create_amphora_flow = linear_flow.Flow(constants.CREATE_AMPHORA_FLOW)
         create_amphora_flow.add(database_tasks.CreateAmphoraInDB(
+                                requires=(constants.FLAVOR,
+                                          constants.AVAILABILITY_ZONE),
                                 provides=constants.AMPHORA_ID))
         create_amphora_flow.add(lifecycle_tasks.AmphoraIDToErrorOnRevertTask(
             requires=constants.AMPHORA_ID))
@@ -54,7 +57,8 @@ class AmphoraFlows:
         create_amphora_flow.add(compute_tasks.CertComputeCreate(
             requires=(constants.AMPHORA_ID, constants.SERVER_PEM,
                       constants.SERVER_GROUP_ID,
-                      constants.BUILD_TYPE_PRIORITY, constants.FLAVOR),
+                      constants.BUILD_TYPE_PRIORITY, constants.FLAVOR,
+                      constants.AVAILABILITY_ZONE),
             provides=constants.COMPUTE_ID))
         create_amphora_flow.add(database_tasks.MarkAmphoraBootingInDB(
             requires=(constants.AMPHORA_ID, constants.COMPUTE_ID)))
@@ -87,7 +91,7 @@ class AmphoraFlows:
 
         return create_amphora_flow
 
-    def get_amphora_for_lb_subflow(self, prefix, role):
+    def _get_create_amp_for_lb_subflow(self, prefix, role):
         """Create a new amphora for lb."""
 
         sf_name = prefix + '-' + constants.CREATE_AMP_FOR_LB_SUBFLOW
@@ -148,6 +152,91 @@ class AmphoraFlows:
 
         return create_amp_for_lb_subflow
 
+    def _get_post_map_lb_subflow(self, prefix, role):
+        """Set amphora type"""
+
+        sf_name = prefix + '-' + constants.POST_MAP_AMP_TO_LB_SUBFLOW
+        post_map_amp_to_lb = linear_flow.Flow(sf_name)
+
+        post_map_amp_to_lb.add(database_tasks.GetAmphoraByID(
+            name=sf_name + '-' + constants.RELOAD_AMPHORA,
+            requires=constants.AMPHORA_ID,
+            provides=constants.AMPHORA))
+
+        # The spare amphora was booted with the default agent configuration
+        post_map_amp_to_lb.add(amphora_driver_tasks.AmphoraConfigUpdate(
+            name=sf_name + '-' + constants.AMPHORA_CONFIG_UPDATE_TASK,
+            requires=(constants.AMPHORA, constants.FLAVOR)))
+
+        if role == constants.ROLE_MASTER:
+            post_map_amp_to_lb.add(database_tasks.MarkAmphoraMasterInDB(
+                name=sf_name + '-' + constants.MARK_AMP_MASTER_INDB,
+                requires=constants.AMPHORA))
+        elif role == constants.ROLE_BACKUP:
+            post_map_amp_to_lb.add(database_tasks.MarkAmphoraBackupInDB(
+                name=sf_name + '-' + constants.MARK_AMP_BACKUP_INDB,
+                requires=constants.AMPHORA))
+        elif role == constants.ROLE_STANDALONE:
+            post_map_amp_to_lb.add(database_tasks.MarkAmphoraStandAloneInDB(
+                name=sf_name + '-' + constants.MARK_AMP_STANDALONE_INDB,
+                requires=constants.AMPHORA))
+
+        return post_map_amp_to_lb
+
+    def get_amphora_for_lb_subflow(self, prefix, role):
+        """Allocate a spare amphora for lb or create a new one.
+
+        :param prefix: The flow name prefix to use on the flow and tasks.
+        :param role: The role this amphora will have in the topology.
+        :returns: The subflow providing the amphora and amphora_id.
+        """
+
+        sf_name = prefix + '-' + constants.AMP_PLUG_NET_SUBFLOW
+        amp_for_lb_flow = graph_flow.Flow(sf_name)
+
+        # Try to allocate a spare amphora first
+        allocate_and_associate_amp = database_tasks.MapLoadbalancerToAmphora(
+            name=sf_name + '-' + constants.MAP_LOADBALANCER_TO_AMPHORA,
+            requires=(constants.LOADBALANCER_ID, constants.SERVER_GROUP_ID,
+                      constants.FLAVOR, constants.AVAILABILITY_ZONE),
+            provides=constants.AMPHORA_ID)
+
+        # Define a subflow for if we successfully map an amphora
+        map_lb_to_amp = self._get_post_map_lb_subflow(prefix, role)
+        # Define a subflow for if we can't map an amphora
+        create_amp = self._get_create_amp_for_lb_subflow(prefix, role)
+
+        amp_for_lb_flow.add(allocate_and_associate_amp)
+        amp_for_lb_flow.add(map_lb_to_amp)
+        amp_for_lb_flow.add(create_amp)
+
+        # Link the mapping task to the subflows, only one of them is run
+        # depending on whether a spare amphora was allocated.
+        amp_for_lb_flow.link(allocate_and_associate_amp, map_lb_to_amp,
+                             decider=self._allocate_amp_to_data_decider,
+                             decider_depth='flow')
+        amp_for_lb_flow.link(allocate_and_associate_amp, create_amp,
+                             decider=self._create_new_amp_for_lb_decider,
+                             decider_depth='flow')
+
+        return amp_for_lb_flow
+
+    def _allocate_amp_to_data_decider(self, history):
+        """decides if the lb shall be mapped to a spare amphora
+
+        :return: True if a spare amphora exists in DB
+        """
+
+        return list(history.values())[0] is not None
+
+    def _create_new_amp_for_lb_decider(self, history):
+        """decides if a new amphora must be created for the lb
+
+        :return: True if there is no spare amphora
+        """
+
+        return list(history.values())[0] is None
+
     def _retry_compute_wait_flow(self, sf_name):
         retry_task = sf_name + '-' + constants.COMPUTE_WAIT
         retry_subflow = linear_flow.Flow(
@@ -439,7 +528,8 @@ class AmphoraFlows:
                 name=prefix + '-' + constants.CREATE_VIP_BASE_PORT,
                 requires=(constants.VIP, constants.VIP_SG_ID,
                           constants.AMPHORA_ID,
-                          constants.ADDITIONAL_VIPS),
+                          constants.ADDITIONAL_VIPS,
+                          constants.BUILD_TYPE_PRIORITY),
                 provides=constants.BASE_PORT))
 
         # Attach the VIP base (aka VRRP) port to the amphora.
@@ -184,3 +184,29 @@ def get_delete_pool_flow():
 
 def get_update_pool_flow():
     return P_FLOWS.get_update_pool_flow()
+
+
+# The flows only depending on the arguments of their factory, they are
+# prebuilt and reused between the operations, see
+# base_taskflow.FlowTemplates.
+TEMPLATE_FLOWS = (
+    get_update_load_balancer_flow,
+    get_create_health_monitor_flow,
+    get_delete_health_monitor_flow,
+    get_update_health_monitor_flow,
+    get_create_l7policy_flow,
+    get_delete_l7policy_flow,
+    get_update_l7policy_flow,
+    get_create_l7rule_flow,
+    get_delete_l7rule_flow,
+    get_update_l7rule_flow,
+    get_create_listener_flow,
+    get_delete_listener_flow,
+    get_update_listener_flow,
+    get_create_member_flow,
+    get_delete_member_flow,
+    get_update_member_flow,
+    get_create_pool_flow,
+    get_delete_pool_flow,
+    get_update_pool_flow,
+)
@@ -29,6 +29,7 @@ from octavia.amphorae.backends.agent import agent_jinja_cfg
 from octavia.amphorae.driver_exceptions import exceptions as driver_except
 from octavia.common import constants
 from octavia.common import utils
+from octavia.controller.worker import lb_graph_snapshot
 from octavia.controller.worker import task_utils as task_utilities
 from octavia.db import api as db_apis
 from octavia.db import repositories as repo
@@ -41,6 +42,10 @@ LOG = logging.getLogger(__name__)
 class BaseAmphoraTask(task.Task):
     """Base task to load drivers common to the tasks."""
 
+    # Set by the tasks that do not update the database when they succeed, so
+    # that they keep the load balancer graph snapshot of the flow.
+    lb_graph_readonly = False
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.amphora_driver = stevedore_driver.DriverManager(
@@ -51,6 +56,7 @@ class BaseAmphoraTask(task.Task):
         self.amphora_repo = repo.AmphoraRepository()
         self.listener_repo = repo.ListenerRepository()
         self.loadbalancer_repo = repo.LoadBalancerRepository()
+        self.lb_graph_snapshots = lb_graph_snapshot.get_lb_graph_snapshots()
         self.task_utils = task_utilities.TaskUtils()
 
 
@@ -77,20 +83,19 @@ class AmpRetry(retry.Times):
 class AmpListenersUpdate(BaseAmphoraTask):
     """Task to update the listeners on one amphora."""
 
+    lb_graph_readonly = True
+
     def execute(self, loadbalancer, amphora, timeout_dict=None):
         # Note, we don't want this to cause a revert as it may be used
         # in a failover flow with both amps failing. Skip it and let
         # health manager fix it.
-        # TODO(johnsom) Optimize this to use the dicts and not need the
-        #               DB lookups
         try:
             session = db_apis.get_session()
             with session.begin():
                 db_amp = self.amphora_repo.get(session,
                                                id=amphora[constants.ID])
-                db_lb = self.loadbalancer_repo.get(
-                    session,
-                    id=loadbalancer[constants.LOADBALANCER_ID])
+                db_lb = self.lb_graph_snapshots.get(
+                    session, loadbalancer[constants.LOADBALANCER_ID])
             self.amphora_driver.update_amphora_listeners(
                 db_lb, db_amp, timeout_dict)
         except Exception as e:
@@ -100,11 +105,15 @@ class AmpListenersUpdate(BaseAmphoraTask):
             with session.begin():
                 self.amphora_repo.update(session, db_amp.id,
                                          status=constants.ERROR)
+            self.lb_graph_snapshots.invalidate(
+                loadbalancer[constants.LOADBALANCER_ID])
 
 
 class AmphoraIndexListenerUpdate(BaseAmphoraTask):
     """Task to update the listeners on one amphora."""
 
+    lb_graph_readonly = True
+
     def execute(self, loadbalancer, amphora_index, amphorae,
                 amphorae_status: dict, new_amphora_id: str, timeout_dict=()):
         # Note, we don't want this to cause a revert as it may be used
@@ -119,16 +128,13 @@ class AmphoraIndexListenerUpdate(BaseAmphoraTask):
             return
 
         try:
-            # TODO(johnsom) Optimize this to use the dicts and not need the
-            #               DB lookups
             session = db_apis.get_session()
             with session.begin():
                 db_amp = self.amphora_repo.get(
                     session,
                     id=amphorae[amphora_index][constants.ID])
-                db_lb = self.loadbalancer_repo.get(
-                    session,
-                    id=loadbalancer[constants.LOADBALANCER_ID])
+                db_lb = self.lb_graph_snapshots.get(
+                    session, loadbalancer[constants.LOADBALANCER_ID])
             self.amphora_driver.update_amphora_listeners(
                 db_lb, db_amp, timeout_dict)
         except Exception as e:
@@ -142,17 +148,21 @@ class AmphoraIndexListenerUpdate(BaseAmphoraTask):
                 with session.begin():
                     self.amphora_repo.update(session, amphora_id,
                                              status=constants.ERROR)
+                self.lb_graph_snapshots.invalidate(
+                    loadbalancer[constants.LOADBALANCER_ID])
 
 
 class ListenersUpdate(BaseAmphoraTask):
     """Task to update amphora with all specified listeners' configurations."""
 
+    lb_graph_readonly = True
+
     def execute(self, loadbalancer_id):
         """Execute updates per listener for an amphora."""
         session = db_apis.get_session()
         with session.begin():
-            loadbalancer = self.loadbalancer_repo.get(session,
-                                                      id=loadbalancer_id)
+            loadbalancer = self.lb_graph_snapshots.get(session,
+                                                       loadbalancer_id)
         if loadbalancer:
             self.amphora_driver.update(loadbalancer)
         else:
@@ -175,12 +185,14 @@ class ListenersUpdate(BaseAmphoraTask):
 class ListenersStart(BaseAmphoraTask):
     """Task to start all listeners on the vip."""
 
+    lb_graph_readonly = True
+
     def execute(self, loadbalancer, amphora=None):
         """Execute listener start routines for listeners on an amphora."""
         session = db_apis.get_session()
         with session.begin():
-            db_lb = self.loadbalancer_repo.get(
-                session, id=loadbalancer[constants.LOADBALANCER_ID])
+            db_lb = self.lb_graph_snapshots.get(
+                session, loadbalancer[constants.LOADBALANCER_ID])
         if db_lb.listeners:
             if amphora is not None:
                 with session.begin():
@@ -206,6 +218,8 @@ class ListenersStart(BaseAmphoraTask):
 class AmphoraIndexListenersReload(BaseAmphoraTask):
     """Task to reload all listeners on an amphora."""
 
+    lb_graph_readonly = True
+
     def execute(self, loadbalancer, amphora_index, amphorae,
                 amphorae_status: dict, new_amphora_id: str, timeout_dict=None):
         """Execute listener reload routines for listeners on an amphora."""
@@ -219,15 +233,12 @@ class AmphoraIndexListenersReload(BaseAmphoraTask):
                         "is not reachable.", amphora_id)
             return
 
-        # TODO(johnsom) Optimize this to use the dicts and not need the
-        #               DB lookups
         session = db_apis.get_session()
         with session.begin():
             db_amp = self.amphora_repo.get(
                 session, id=amphorae[amphora_index][constants.ID])
-            db_lb = self.loadbalancer_repo.get(
-                session,
-                id=loadbalancer[constants.LOADBALANCER_ID])
+            db_lb = self.lb_graph_snapshots.get(
+                session, loadbalancer[constants.LOADBALANCER_ID])
         if db_lb.listeners:
             try:
                 self.amphora_driver.reload(db_lb, db_amp, timeout_dict)
@@ -241,6 +252,8 @@ class AmphoraIndexListenersReload(BaseAmphoraTask):
                     with session.begin():
                         self.amphora_repo.update(session, amphora_id,
                                                  status=constants.ERROR)
+                    self.lb_graph_snapshots.invalidate(
+                        loadbalancer[constants.LOADBALANCER_ID])
 
 
 class ListenerDelete(BaseAmphoraTask):
@@ -267,6 +280,8 @@ class ListenerDelete(BaseAmphoraTask):
 class AmphoraGetInfo(BaseAmphoraTask):
     """Task to get information on an amphora."""
 
+    lb_graph_readonly = True
+
     def execute(self, amphora):
         """Execute get_info routine for an amphora."""
         session = db_apis.get_session()
@@ -279,6 +294,8 @@ class AmphoraGetInfo(BaseAmphoraTask):
 class AmphoraGetDiagnostics(BaseAmphoraTask):
     """Task to get diagnostics on the amphora and the loadbalancers."""
 
+    lb_graph_readonly = True
+
     def execute(self, amphora):
         """Execute get_diagnostic routine for an amphora."""
         self.amphora_driver.get_diagnostics(amphora)
@@ -350,13 +367,15 @@ class AmphoraPostNetworkPlug(BaseAmphoraTask):
 class AmphoraePostNetworkPlug(BaseAmphoraTask):
     """Task to notify the amphorae post network plug."""
 
+    lb_graph_readonly = True
+
     def execute(self, loadbalancer, updated_ports, amphorae_network_config):
         """Execute post_network_plug routine."""
         amp_post_plug = AmphoraPostNetworkPlug()
         session = db_apis.get_session()
         with session.begin():
-            db_lb = self.loadbalancer_repo.get(
-                session, id=loadbalancer[constants.LOADBALANCER_ID])
+            db_lb = self.lb_graph_snapshots.get(
+                session, loadbalancer[constants.LOADBALANCER_ID])
         for amphora in db_lb.amphorae:
             if amphora.id in updated_ports:
                 amp_post_plug.execute(amphora.to_dict(),
@@ -382,14 +401,16 @@ class AmphoraePostNetworkPlug(BaseAmphoraTask):
 class AmphoraPostVIPPlug(BaseAmphoraTask):
     """Task to notify the amphora post VIP plug."""
 
+    lb_graph_readonly = True
+
     def execute(self, amphora, loadbalancer, amphorae_network_config):
         """Execute post_vip_routine."""
         session = db_apis.get_session()
         with session.begin():
             db_amp = self.amphora_repo.get(session,
                                            id=amphora.get(constants.ID))
-            db_lb = self.loadbalancer_repo.get(
-                session, id=loadbalancer[constants.LOADBALANCER_ID])
+            db_lb = self.lb_graph_snapshots.get(
+                session, loadbalancer[constants.LOADBALANCER_ID])
         vrrp_port = data_models.Port(
             **amphorae_network_config[
                 amphora.get(constants.ID)][constants.VRRP_PORT])
@@ -439,13 +460,15 @@ class AmphoraPostVIPPlug(BaseAmphoraTask):
 class AmphoraePostVIPPlug(BaseAmphoraTask):
     """Task to notify the amphorae post VIP plug."""
 
+    lb_graph_readonly = True
+
     def execute(self, loadbalancer, amphorae_network_config):
         """Execute post_vip_plug across the amphorae."""
         amp_post_vip_plug = AmphoraPostVIPPlug()
         session = db_apis.get_session()
         with session.begin():
-            db_lb = self.loadbalancer_repo.get(
-                session, id=loadbalancer[constants.LOADBALANCER_ID])
+            db_lb = self.lb_graph_snapshots.get(
+                session, loadbalancer[constants.LOADBALANCER_ID])
         for amphora in db_lb.amphorae:
             amp_post_vip_plug.execute(amphora.to_dict(),
                                       loadbalancer,
@@ -455,6 +478,8 @@ class AmphoraePostVIPPlug(BaseAmphoraTask):
 class AmphoraCertUpload(BaseAmphoraTask):
     """Upload a certificate to the amphora."""
 
+    lb_graph_readonly = True
+
     def execute(self, amphora, server_pem):
         """Execute cert_update_amphora routine."""
         LOG.debug("Upload cert in amphora REST driver")
@@ -542,6 +567,8 @@ class AmphoraIndexUpdateVRRPInterface(BaseAmphoraTask):
 class AmphoraVRRPUpdate(BaseAmphoraTask):
     """Task to update the VRRP configuration of an amphora."""
 
+    lb_graph_readonly = True
+
     def execute(self, loadbalancer_id, amphorae_network_config, amphora,
                 amp_vrrp_int, timeout_dict=None):
         """Execute update_vrrp_conf."""
@@ -550,14 +577,12 @@ class AmphoraVRRPUpdate(BaseAmphoraTask):
         # health manager fix it.
         amphora_id = amphora[constants.ID]
         try:
-            # TODO(johnsom) Optimize this to use the dicts and not need the
-            #               DB lookups
             session = db_apis.get_session()
             with session.begin():
                 db_amp = self.amphora_repo.get(session,
                                                id=amphora_id)
-                loadbalancer = self.loadbalancer_repo.get(session,
-                                                          id=loadbalancer_id)
+                loadbalancer = self.lb_graph_snapshots.get(session,
+                                                           loadbalancer_id)
             db_amp.vrrp_interface = amp_vrrp_int
             self.amphora_driver.update_vrrp_conf(
                 loadbalancer, amphorae_network_config, db_amp, timeout_dict)
@@ -568,6 +593,7 @@ class AmphoraVRRPUpdate(BaseAmphoraTask):
             with session.begin():
                 self.amphora_repo.update(session, amphora_id,
                                          status=constants.ERROR)
+            self.lb_graph_snapshots.invalidate(loadbalancer_id)
 
         LOG.debug("Uploaded VRRP configuration of amphora %s.", amphora_id)
 
@@ -575,6 +601,8 @@ class AmphoraVRRPUpdate(BaseAmphoraTask):
 class AmphoraIndexVRRPUpdate(BaseAmphoraTask):
     """Task to update the VRRP configuration of an amphora."""
 
+    lb_graph_readonly = True
+
     def execute(self, loadbalancer_id, amphorae_network_config, amphora_index,
                 amphorae, amphorae_status: dict, amp_vrrp_int: Optional[str],
                 new_amphora_id: str, timeout_dict=None):
@@ -590,14 +618,12 @@ class AmphoraIndexVRRPUpdate(BaseAmphoraTask):
             return
 
         try:
-            # TODO(johnsom) Optimize this to use the dicts and not need the
-            #               DB lookups
             session = db_apis.get_session()
             with session.begin():
                 db_amp = self.amphora_repo.get(session,
                                                id=amphora_id)
-                loadbalancer = self.loadbalancer_repo.get(session,
-                                                          id=loadbalancer_id)
+                loadbalancer = self.lb_graph_snapshots.get(session,
+                                                           loadbalancer_id)
             db_amp.vrrp_interface = amp_vrrp_int
             self.amphora_driver.update_vrrp_conf(
                 loadbalancer, amphorae_network_config, db_amp, timeout_dict)
@@ -611,6 +637,7 @@ class AmphoraIndexVRRPUpdate(BaseAmphoraTask):
                 with session.begin():
                     self.amphora_repo.update(session, amphora_id,
                                              status=constants.ERROR)
+                self.lb_graph_snapshots.invalidate(loadbalancer_id)
             return
         LOG.debug("Uploaded VRRP configuration of amphora %s.", amphora_id)
 
@@ -621,6 +648,8 @@ class AmphoraVRRPStart(BaseAmphoraTask):
     This will reload keepalived if it is already running.
     """
 
+    lb_graph_readonly = True
+
     def execute(self, amphora, timeout_dict=None):
         # TODO(johnsom) Optimize this to use the dicts and not need the
         #               DB lookups
@@ -698,6 +727,8 @@ class AmphoraComputeConnectivityWait(BaseAmphoraTask):
 class AmphoraConfigUpdate(BaseAmphoraTask):
     """Task to push a new amphora agent configuration to the amphora."""
 
+    lb_graph_readonly = True
+
     def execute(self, amphora, flavor):
         # Extract any flavor based settings
         if flavor:
@@ -732,6 +763,8 @@ class AmphoraeGetConnectivityStatus(BaseAmphoraTask):
     load balancers
     """
 
+    lb_graph_readonly = True
+
     def execute(self, amphorae: List[dict], new_amphora_id: str,
                 timeout_dict=None):
         amphorae_status = {}
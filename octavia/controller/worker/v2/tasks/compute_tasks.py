@@ -13,11 +13,13 @@
 # under the License.
 #
 
+from concurrent import futures
 import time
 
 from cryptography import fernet
 from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_utils import timeutils
 from stevedore import driver as stevedore_driver
 from taskflow import retry
 from taskflow import task
@@ -31,6 +33,7 @@ from octavia.common.jinja.logging import logging_jinja_cfg
 from octavia.common.jinja import user_data_jinja_cfg
 from octavia.common import utils
 from octavia.controller.worker import amphora_rate_limit
+from octavia.controller.worker import compute_watcher
 from octavia.db import api as db_apis
 from octavia.db import repositories as repo
 
@@ -296,6 +299,43 @@ class ComputeWait(BaseComputeTask):
         else:
             amp_network = None
 
+        if not CONF.controller_worker.amp_active_batch_polling:
+            amp = self._get_active_amphora(compute_id, amphora_id,
+                                           amp_network)
+            if amp:
+                return amp
+            time.sleep(CONF.controller_worker.amp_active_wait_sec)
+            raise exceptions.ComputeWaitTimeoutException(id=compute_id)
+
+        # On retries, keep waiting for the status watcher instead of
+        # querying the compute service again.
+        watcher = compute_watcher.get_compute_watcher()
+        status_future = watcher.get_watch(compute_id)
+        if status_future is None:
+            since = timeutils.utcnow()
+            amp = self._get_active_amphora(compute_id, amphora_id,
+                                           amp_network)
+            if amp:
+                return amp
+            status_future = watcher.watch(compute_id, since)
+
+        try:
+            status_future.result(
+                timeout=CONF.controller_worker.amp_active_wait_sec)
+        except (futures.TimeoutError, futures.CancelledError) as e:
+            raise exceptions.ComputeWaitTimeoutException(
+                id=compute_id) from e
+
+        amp = self._get_active_amphora(compute_id, amphora_id, amp_network)
+        if amp:
+            return amp
+        raise exceptions.ComputeWaitTimeoutException(id=compute_id)
+
+    def _get_active_amphora(self, compute_id, amphora_id, amp_network):
+        """Returns the amphora dict if it is active, None if it is not.
+
+        :raises: ComputeBuildException if the amphora build failed
+        """
         amp, fault = self.compute.get_amphora(compute_id, amp_network)
         if amp.status == constants.ACTIVE:
             if CONF.haproxy_amphora.build_rate_limit != -1:
@@ -303,9 +343,7 @@ class ComputeWait(BaseComputeTask):
             return amp.to_dict()
         if amp.status == constants.ERROR:
             raise exceptions.ComputeBuildException(fault=fault)
-
-        time.sleep(CONF.controller_worker.amp_active_wait_sec)
-        raise exceptions.ComputeWaitTimeoutException(id=compute_id)
+        return None
 
 
 class NovaServerGroupCreate(BaseComputeTask):
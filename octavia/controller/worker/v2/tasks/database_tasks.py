@@ -31,6 +31,7 @@ from octavia.common import data_models
 from octavia.common import exceptions
 from octavia.common.tls_utils import cert_parser
 from octavia.common import utils
+from octavia.controller.worker import lb_graph_snapshot
 from octavia.controller.worker import task_utils as task_utilities
 from octavia.db import api as db_apis
 from octavia.db import repositories as repo
@@ -48,6 +49,7 @@ class BaseDatabaseTask(task.Task):
         self.health_mon_repo = repo.HealthMonitorRepository()
         self.listener_repo = repo.ListenerRepository()
         self.loadbalancer_repo = repo.LoadBalancerRepository()
+        self.lb_graph_snapshots = lb_graph_snapshot.get_lb_graph_snapshots()
         self.vip_repo = repo.VipRepository()
         self.member_repo = repo.MemberRepository()
         self.pool_repo = repo.PoolRepository()
@@ -91,19 +93,31 @@ class BaseDatabaseTask(task.Task):
 class CreateAmphoraInDB(BaseDatabaseTask):
     """Task to create an initial amphora in the Database."""
 
-    def execute(self, *args, loadbalancer_id=None, **kwargs):
+    def execute(self, *args, loadbalancer_id=None, flavor=None,
+                availability_zone=None, **kwargs):
         """Creates an pending create amphora record in the database.
 
+        The compute flavor and zone of the amphora are recorded when the
+        flavor and availability zone are provided, so the spare amphorae
+        being built are accounted for in their spare pool.
+
         :returns: The created amphora object
         """
 
+        amphora_kwargs = {}
+        if flavor is not None:
+            amphora_kwargs['compute_flavor'] = flavor.get(
+                constants.COMPUTE_FLAVOR, CONF.controller_worker.amp_flavor_id)
+        if availability_zone:
+            amphora_kwargs['cached_zone'] = availability_zone.get(
+                constants.COMPUTE_ZONE)
         with db_apis.session().begin() as session:
             amphora = self.amphora_repo.create(
                 session,
                 id=uuidutils.generate_uuid(),
                 load_balancer_id=loadbalancer_id,
                 status=constants.PENDING_CREATE,
-                cert_busy=False)
+                cert_busy=False, **amphora_kwargs)
         if loadbalancer_id:
             LOG.info("Created Amphora %s in DB for load balancer %s",
                      amphora.id, loadbalancer_id)
@@ -146,6 +160,84 @@ class CreateAmphoraInDB(BaseDatabaseTask):
                 pass
 
 
+class MapLoadbalancerToAmphora(BaseDatabaseTask):
+    """Maps and assigns a load balancer to a spare amphora in the database."""
+
+    def _spare_pool_key(self, server_group_id, flavor, availability_zone):
+        """Returns the spare pool a load balancer can use, if any."""
+        compute_flavor = flavor.get(constants.COMPUTE_FLAVOR,
+                                    CONF.controller_worker.amp_flavor_id)
+        if compute_flavor == CONF.controller_worker.amp_flavor_id:
+            pool_size = CONF.house_keeping.spare_amphora_pool_size
+        else:
+            pool_size = int(
+                CONF.house_keeping.spare_amphora_flavor_pool_sizes.get(
+                    compute_flavor, 0))
+        if not pool_size:
+            return None
+        # The spare amphorae are booted outside of any server group, with
+        # the default image and management network.
+        if server_group_id:
+            return None
+        if (flavor.get(constants.AMP_IMAGE_TAG,
+                       CONF.controller_worker.amp_image_tag) !=
+                CONF.controller_worker.amp_image_tag):
+            return None
+        if availability_zone.get(constants.MANAGEMENT_NETWORK):
+            return None
+        return compute_flavor, availability_zone.get(constants.COMPUTE_ZONE)
+
+    def execute(self, loadbalancer_id, server_group_id=None, flavor=None,
+                availability_zone=None):
+        """Allocates a spare amphora for the load balancer in the database.
+
+        :param loadbalancer_id: The load balancer id to map to an amphora
+        :param server_group_id: The server group of the load balancer
+        :param flavor: The load balancer flavor metadata dictionary
+        :param availability_zone: The availability zone metadata dictionary
+        :returns: Amphora ID if one was allocated, None if it was
+                  unable to allocate an Amphora
+        """
+        spare_pool = self._spare_pool_key(server_group_id, flavor or {},
+                                          availability_zone or {})
+        if spare_pool is None:
+            return None
+        compute_flavor, compute_zone = spare_pool
+
+        with db_apis.session().begin() as session:
+            amp = self.amphora_repo.allocate_and_associate(
+                session, loadbalancer_id, availability_zone=compute_zone,
+                compute_flavor=compute_flavor)
+        if amp is None:
+            LOG.info("No spare amphora available in pool (flavor %(flavor)s, "
+                     "zone %(zone)s) for load balancer %(lb)s, a new amphora "
+                     "will be built.",
+                     {'flavor': compute_flavor, 'zone': compute_zone,
+                      'lb': loadbalancer_id})
+            return None
+
+        LOG.info("Allocated spare amphora %(amp)s from pool (flavor "
+                 "%(flavor)s, zone %(zone)s) to load balancer %(lb)s",
+                 {'amp': amp.id, 'flavor': compute_flavor,
+                  'zone': compute_zone, 'lb': loadbalancer_id})
+        return amp.id
+
+    def revert(self, result, loadbalancer_id, *args, **kwargs):
+        if isinstance(result, failure.Failure) or result is None:
+            return
+        LOG.warning("Reverting spare amphora %(amp)s allocation for load "
+                    "balancer %(lb)s in the database.",
+                    {'amp': result, 'lb': loadbalancer_id})
+        try:
+            with db_apis.session().begin() as session:
+                self.amphora_repo.update(session, result,
+                                         status=constants.ERROR)
+        except Exception as e:
+            LOG.error("Failed to update amphora %(amp)s "
+                      "status to ERROR due to: "
+                      "%(except)s", {'amp': result, 'except': str(e)})
+
+
 class MarkLBAmphoraeDeletedInDB(BaseDatabaseTask):
     """Task to mark a list of amphora deleted in the Database."""
 
@@ -453,6 +545,23 @@ class ReloadAmphora(BaseDatabaseTask):
                 session, id=amphora[constants.ID]).to_dict()
 
 
+class GetAmphoraByID(BaseDatabaseTask):
+    """Get an amphora object from the database by its ID."""
+
+    lb_graph_readonly = True
+
+    def execute(self, amphora_id):
+        """Get an amphora object from the database.
+
+        :param amphora_id: The amphora ID to lookup
+        :returns: The amphora object
+        """
+
+        LOG.debug("Get amphora from DB for amphora id: %s ", amphora_id)
+        with db_apis.session().begin() as session:
+            return self.amphora_repo.get(session, id=amphora_id).to_dict()
+
+
 class ReloadLoadBalancer(BaseDatabaseTask):
     """Get an load balancer object from the database."""
 
@@ -1709,6 +1818,8 @@ class GetAmphoraDetails(BaseDatabaseTask):
 class GetAmphoraeFromLoadbalancer(BaseDatabaseTask):
     """Task to pull the amphorae from a loadbalancer."""
 
+    lb_graph_readonly = True
+
     def execute(self, loadbalancer_id):
         """Pull the amphorae from a loadbalancer.
 
@@ -1717,8 +1828,7 @@ class GetAmphoraeFromLoadbalancer(BaseDatabaseTask):
         """
         amphorae = []
         with db_apis.session().begin() as session:
-            db_lb = self.repos.load_balancer.get(session,
-                                                 id=loadbalancer_id)
+            db_lb = self.lb_graph_snapshots.get(session, loadbalancer_id)
             for amp in db_lb.amphorae:
                 a = self.amphora_repo.get(session, id=amp.id,
                                           show_deleted=False)
@@ -1768,6 +1878,8 @@ class GetVipFromLoadbalancer(BaseDatabaseTask):
 class GetLoadBalancer(BaseDatabaseTask):
     """Get an load balancer object from the database."""
 
+    lb_graph_readonly = True
+
     def execute(self, loadbalancer_id, *args, **kwargs):
         """Get an load balancer object from the database.
 
@@ -1778,8 +1890,7 @@ class GetLoadBalancer(BaseDatabaseTask):
         LOG.debug("Get load balancer from DB for load balancer id: %s",
                   loadbalancer_id)
         with db_apis.session().begin() as session:
-            db_lb = self.loadbalancer_repo.get(session,
-                                               id=loadbalancer_id)
+            db_lb = self.lb_graph_snapshots.get(session, loadbalancer_id)
             provider_lb = (
                 provider_utils.db_loadbalancer_to_provider_loadbalancer(
                     db_lb))
@@ -26,6 +26,8 @@ from octavia.common import constants
 from octavia.common import data_models
 from octavia.common import exceptions
 from octavia.common import utils
+from octavia.controller.worker import failover_coordinator
+from octavia.controller.worker import lb_graph_snapshot
 from octavia.controller.worker import task_utils
 from octavia.db import api as db_apis
 from octavia.db import repositories as repo
@@ -45,6 +47,7 @@ class BaseNetworkTask(task.Task):
         self._network_driver = None
         self.task_utils = task_utils.TaskUtils()
         self.loadbalancer_repo = repo.LoadBalancerRepository()
+        self.lb_graph_snapshots = lb_graph_snapshot.get_lb_graph_snapshots()
         self.amphora_repo = repo.AmphoraRepository()
         self.amphora_member_port_repo = repo.AmphoraMemberPortRepository()
 
@@ -58,6 +61,7 @@ class BaseNetworkTask(task.Task):
 class CalculateAmphoraDelta(BaseNetworkTask):
 
     default_provides = constants.DELTA
+    lb_graph_readonly = True
 
     def execute(self, loadbalancer, amphora, availability_zone):
         LOG.debug("Calculating network delta for amphora id: %s",
@@ -74,8 +78,8 @@ class CalculateAmphoraDelta(BaseNetworkTask):
 
         session = db_apis.get_session()
         with session.begin():
-            db_lb = self.loadbalancer_repo.get(
-                session, id=loadbalancer[constants.LOADBALANCER_ID])
+            db_lb = self.lb_graph_snapshots.get(
+                session, loadbalancer[constants.LOADBALANCER_ID])
 
         desired_subnet_to_net_map = {
             loadbalancer[constants.VIP_SUBNET_ID]:
@@ -716,14 +720,16 @@ class UpdateVIPForDelete(BaseNetworkTask):
 class GetAmphoraNetworkConfigs(BaseNetworkTask):
     """Task to retrieve amphora network details."""
 
+    lb_graph_readonly = True
+
     def execute(self, loadbalancer, amphora=None):
         LOG.debug("Retrieving vip network details.")
         session = db_apis.get_session()
         with session.begin():
             db_amp = self.amphora_repo.get(session,
                                            id=amphora.get(constants.ID))
-            db_lb = self.loadbalancer_repo.get(
-                session, id=loadbalancer[constants.LOADBALANCER_ID])
+            db_lb = self.lb_graph_snapshots.get(
+                session, loadbalancer[constants.LOADBALANCER_ID])
         db_configs = self.network_driver.get_network_configs(
             db_lb, amphora=db_amp)
         provider_dict = {}
@@ -739,12 +745,14 @@ class GetAmphoraNetworkConfigs(BaseNetworkTask):
 class GetAmphoraNetworkConfigsByID(BaseNetworkTask):
     """Task to retrieve amphora network details."""
 
+    lb_graph_readonly = True
+
     def execute(self, loadbalancer_id, amphora_id=None):
         LOG.debug("Retrieving vip network details.")
         session = db_apis.get_session()
         with session.begin():
-            loadbalancer = self.loadbalancer_repo.get(session,
-                                                      id=loadbalancer_id)
+            loadbalancer = self.lb_graph_snapshots.get(session,
+                                                       loadbalancer_id)
             amphora = self.amphora_repo.get(session, id=amphora_id)
         db_configs = self.network_driver.get_network_configs(loadbalancer,
                                                              amphora=amphora)
@@ -761,12 +769,13 @@ class GetAmphoraNetworkConfigsByID(BaseNetworkTask):
 class GetAmphoraeNetworkConfigs(BaseNetworkTask):
     """Task to retrieve amphorae network details."""
 
+    lb_graph_readonly = True
+
     def execute(self, loadbalancer_id):
         LOG.debug("Retrieving vip network details.")
         session = db_apis.get_session()
         with session.begin():
-            db_lb = self.loadbalancer_repo.get(
-                session, id=loadbalancer_id)
+            db_lb = self.lb_graph_snapshots.get(session, loadbalancer_id)
         db_configs = self.network_driver.get_network_configs(db_lb)
         provider_dict = {}
         for amp_id, amp_conf in db_configs.items():
@@ -1015,7 +1024,8 @@ class CreateVIPBasePort(BaseNetworkTask):
                         multiplier=CONF.networking.retry_backoff,
                         min=CONF.networking.retry_interval,
                         max=CONF.networking.retry_max), reraise=True)
-    def execute(self, vip, vip_sg_id, amphora_id, additional_vips):
+    def execute(self, vip, vip_sg_id, amphora_id, additional_vips,
+                build_type_priority=None):
         port_name = constants.AMP_BASE_PORT_PREFIX + amphora_id
         fixed_ips = [{constants.SUBNET_ID: vip[constants.SUBNET_ID]}]
         sg_ids = []
@@ -1029,11 +1039,19 @@ class CreateVIPBasePort(BaseNetworkTask):
         secondary_ips = [vip[constants.IP_ADDRESS]]
         for add_vip in additional_vips:
             secondary_ips.append(add_vip[constants.IP_ADDRESS])
-        port = self.network_driver.create_port(
-            vip[constants.NETWORK_ID], name=port_name, fixed_ips=fixed_ips,
-            secondary_ips=secondary_ips,
-            security_group_ids=sg_ids,
-            qos_policy_id=vip[constants.QOS_POLICY_ID])
+        port_kwargs = {'name': port_name, 'fixed_ips': fixed_ips,
+                       'secondary_ips': secondary_ips,
+                       'security_group_ids': sg_ids,
+                       'qos_policy_id': vip[constants.QOS_POLICY_ID]}
+        if build_type_priority == constants.LB_CREATE_FAILOVER_PRIORITY:
+            # The base ports of concurrent failovers are created in bulk,
+            # the other requests do not wait for the batch window.
+            coordinator = failover_coordinator.get_failover_coordinator()
+            port = coordinator.create_port(
+                self.network_driver, vip[constants.NETWORK_ID], **port_kwargs)
+        else:
+            port = self.network_driver.create_port(
+                vip[constants.NETWORK_ID], **port_kwargs)
         LOG.info('Created port %s with ID %s for amphora %s',
                  port_name, port.id, amphora_id)
         return port.to_dict(recurse=True)
@@ -1087,7 +1105,12 @@ class GetVIPSecurityGroupID(BaseNetworkTask):
     def execute(self, loadbalancer_id):
         sg_name = utils.get_vip_security_group_name(loadbalancer_id)
         try:
-            security_group = self.network_driver.get_security_group(sg_name)
+            # Both amphorae of an active/standby load balancer may be
+            # failed over at the same time
+            security_group = (
+                failover_coordinator.get_failover_coordinator().lookup(
+                    (constants.SECURITY_GROUPS, sg_name),
+                    self.network_driver.get_security_group, sg_name))
             if security_group:
                 return security_group.id
         except base.SecurityGroupNotFound:
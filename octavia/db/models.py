@@ -121,6 +121,14 @@ class AmphoraBuildRequest(base_models.BASE):
     status = sa.Column(sa.String(16), default='WAITING', nullable=False)
 
 
+class SparesPool(base_models.BASE):
+
+    __tablename__ = "spares_pool"
+
+    updated_at = sa.Column(sa.DateTime, primary_key=True,
+                           server_default=func.current_timestamp())
+
+
 class SessionPersistence(base_models.BASE):
 
     __data_model__ = data_models.SessionPersistence
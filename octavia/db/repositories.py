@@ -27,6 +27,10 @@ from oslo_db import exception as db_exception
 from oslo_log import log as logging
 from oslo_serialization import jsonutils
 from oslo_utils import uuidutils
+from sqlalchemy import event
+from sqlalchemy import insert as sa_insert
+from sqlalchemy import or_
+from sqlalchemy.orm import load_only
 from sqlalchemy.orm import noload
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import subqueryload
@@ -36,21 +40,43 @@ from sqlalchemy.sql import func
 from sqlalchemy import text
 from sqlalchemy import update
 
+from octavia.common import cache
 from octavia.common import constants as consts
 from octavia.common import data_models
 from octavia.common import exceptions
 from octavia.common import utils
 from octavia.common import validate
 from octavia.db import api as db_api
+from octavia.db import base_models
 from octavia.db import models
 
 CONF = cfg.CONF
 
 LOG = logging.getLogger(__name__)
 
+_FLAVOR_METADATA_CACHE = cache.TTLCache(
+    'flavor_metadata', lambda: CONF.controller_worker.metadata_cache_ttl)
+_AZ_METADATA_CACHE = cache.TTLCache(
+    'availability_zone_metadata',
+    lambda: CONF.controller_worker.metadata_cache_ttl)
+
+
+def _invalidate_on_commit(session, metadata_cache, key):
+    """Invalidates the cached metadata of key once session is committed.
+
+    Invalidating it earlier would let a concurrent lookup cache the
+    metadata of the row being deleted again. Only the cache of this process
+    is invalidated, the other processes keep it until it expires.
+    """
+    event.listen(session, 'after_commit',
+                 lambda session: metadata_cache.invalidate(key), once=True)
+
 
 class BaseRepository:
     model_class = None
+    # Query options needed to load a relationship when it is requested in
+    # a projected list, see get_all_projected.
+    projection_loaders = {}
 
     def count(self, session, **filters):
         """Retrieves a count of entities from the database.
@@ -170,6 +196,72 @@ class BaseRepository:
         :param filters: Filters to decide which entities should be retrieved.
         :returns: [octavia.common.data_model]
         """
+        model_list, links = self._get_all_models(
+            session, pagination_helper=pagination_helper,
+            query_options=query_options, **filters)
+        recursion_depth = 1 if limited_graph else None
+        data_model_list = [
+            model.to_data_model(recursion_depth=recursion_depth)
+            for model in model_list
+        ]
+        return data_model_list, links
+
+    def get_all_projected(self, session, fields, pagination_helper=None,
+                          **filters):
+        """Retrieves a list of partially loaded entities from the database.
+
+        Only the columns named in fields are loaded, and relationships are
+        loaded only when they are requested and listed in
+        projection_loaders. The data models are built directly from the
+        rows, without walking the graph with to_data_model, and the
+        attributes that were not requested keep their default values.
+
+        :param session: A Sql Alchemy database session.
+        :param fields: Data model attribute names to load. Nested names
+                       (e.g. vip.ip_address) load the parent relationship.
+        :param pagination_helper: Helper to apply pagination and sorting.
+        :param filters: Filters to decide which entities should be retrieved.
+        :returns: [octavia.common.data_model]
+        """
+        column_names = {column.name
+                        for column in self.model_class.__table__.columns}
+        columns = {'id'} & column_names
+        relationships = set()
+        for field in fields:
+            name = field.split('.')[0]
+            if name in column_names:
+                columns.add(name)
+            elif name in self.projection_loaders:
+                relationships.add(name)
+
+        query_options = [load_only(*[getattr(self.model_class, name)
+                                     for name in sorted(columns)])]
+        for name in relationships:
+            query_options.extend(self.projection_loaders[name])
+        query_options.append(noload('*'))
+
+        model_list, links = self._get_all_models(
+            session, pagination_helper=pagination_helper,
+            query_options=query_options, **filters)
+
+        data_model_list = []
+        for model in model_list:
+            dm_kwargs = {name: getattr(model, name) for name in columns}
+            for name in relationships:
+                attr = getattr(model, name)
+                if isinstance(attr, base_models.OctaviaBase):
+                    attr = attr.to_data_model(recursion_depth=0)
+                elif isinstance(attr, list):
+                    attr = [item.to_data_model(recursion_depth=0)
+                            if isinstance(item, base_models.OctaviaBase)
+                            else item for item in attr]
+                dm_kwargs[name] = attr
+            data_model_list.append(
+                self.model_class.__data_model__(**dm_kwargs))
+        return data_model_list, links
+
+    def _get_all_models(self, session, pagination_helper=None,
+                        query_options=None, **filters):
         deleted = filters.pop('show_deleted', True)
         query = session.query(self.model_class).filter_by(**filters)
         if query_options:
@@ -189,12 +281,7 @@ class BaseRepository:
         else:
             links = None
             model_list = query.all()
-        recursion_depth = 1 if limited_graph else None
-        data_model_list = [
-            model.to_data_model(recursion_depth=recursion_depth)
-            for model in model_list
-        ]
-        return data_model_list, links
+        return model_list, links
 
     def exists(self, session, id):
         """Determines whether an entity exists in the database by its id.
@@ -397,6 +484,105 @@ class Repositories:
                                  provisioning_status=lb_prov_status)
         return success
 
+    # Quota column name and resource model of the quota enforced classes
+    _QUOTA_RESOURCES = {
+        data_models.LoadBalancer: ('load_balancer', models.LoadBalancer),
+        data_models.Listener: ('listener', models.Listener),
+        data_models.Pool: ('pool', models.Pool),
+        data_models.HealthMonitor: ('health_monitor', models.HealthMonitor),
+        data_models.Member: ('member', models.Member),
+        data_models.L7Policy: ('l7policy', models.L7Policy),
+        data_models.L7Rule: ('l7rule', models.L7Rule),
+    }
+
+    def _execute_quota_update(self, project_id, statements):
+        """Runs quota UPDATE statements in their own short transaction.
+
+        :returns: The rowcount of the last statement
+        """
+        @oslo_db_api.wrap_db_retry(
+            max_retries=CONF.quotas.optimistic_quota_max_retries,
+            retry_on_deadlock=True)
+        def _execute():
+            with db_api.session().begin() as quota_session:
+                for statement in statements:
+                    result = quota_session.execute(statement)
+            return result.rowcount
+
+        try:
+            return _execute()
+        except db_exception.DBDeadlock as e:
+            LOG.warning('Quota update timed out for project: %(proj)s',
+                        {'proj': project_id})
+            raise exceptions.ProjectBusyException() from e
+
+    def _adjust_quota_usage(self, _class, project_id, delta):
+        """Adds delta to the in use count of a quota, unconditionally."""
+        name, _model = self._QUOTA_RESOURCES[_class]
+        in_use = getattr(models.Quotas, f'in_use_{name}')
+        self._execute_quota_update(project_id, [
+            update(models.Quotas)
+            .where(models.Quotas.project_id == project_id)
+            .values({in_use: func.coalesce(in_use, 0) + delta})])
+
+    def _track_quota_usage(self, session, _class, project_id, delta):
+        """Reverts an optimistic quota update if session is rolled back.
+
+        The optimistic quota updates are committed before the transaction
+        of the session, they are reverted when the session is rolled back
+        and forgotten when it is committed.
+        """
+        if 'quota_usage' not in session.info:
+            session.info['quota_usage'] = []
+
+            def _forget(session):
+                session.info['quota_usage'] = []
+
+            def _revert(session):
+                usage = session.info['quota_usage']
+                session.info['quota_usage'] = []
+                for _class, project_id, delta in usage:
+                    try:
+                        self._adjust_quota_usage(_class, project_id, -delta)
+                    except Exception:
+                        LOG.exception('Failed to revert the quota usage of '
+                                      '%(clss)s for project %(proj)s.',
+                                      {'clss': _class, 'proj': project_id})
+
+            event.listen(session, 'after_commit', _forget)
+            event.listen(session, 'after_rollback', _revert)
+        session.info['quota_usage'].append((_class, project_id, delta))
+
+    def _check_quota_met_optimistic(self, session, _class, project_id,
+                                    count):
+        name, model = self._QUOTA_RESOURCES[_class]
+        in_use = getattr(models.Quotas, f'in_use_{name}')
+        # func.coalesce() is not assigned to a variable, pylint infers that
+        # it returns None (assignment-from-no-return)
+        quota_args = (getattr(models.Quotas, name),
+                      getattr(CONF.quotas, f'default_{name}_quota'))
+        project_filter = models.Quotas.project_id == project_id
+        # This is to handle the upgrade case, the in use count is only
+        # computed from the resource table the first time
+        seed = (update(models.Quotas)
+                .where(project_filter, in_use.is_(None))
+                .values({in_use: select(func.count())
+                         .select_from(model)
+                         .where(model.project_id == project_id,
+                                model.provisioning_status != consts.DELETED)
+                         .scalar_subquery()}))
+        reserve = (update(models.Quotas)
+                   .where(project_filter,
+                          or_(func.coalesce(*quota_args) ==
+                              consts.QUOTA_UNLIMITED,
+                              func.coalesce(in_use, 0) + count <=
+                              func.coalesce(*quota_args)))
+                   .values({in_use: func.coalesce(in_use, 0) + count}))
+        if not self._execute_quota_update(project_id, [seed, reserve]):
+            return True
+        self._track_quota_usage(session, _class, project_id, count)
+        return False
+
     def check_quota_met(self, session: Session, _class, project_id, count=1):
         """Checks and updates object quotas.
 
@@ -423,6 +609,12 @@ class Repositories:
 
         self.quotas.ensure_project_exists(project_id)
 
+        if CONF.quotas.optimistic_quota_accounting:
+            if _class not in self._QUOTA_RESOURCES:
+                return False
+            return self._check_quota_met_optimistic(session, _class,
+                                                    project_id, count)
+
         # Lock the project record in the database to block other quota checks
         #
         # Note: You cannot just use the current count as the in-use
@@ -585,6 +777,25 @@ class Repositories:
             raise exceptions.ProjectBusyException() from e
         return False
 
+    def _decrement_quota_optimistic(self, session, _class, project_id,
+                                    quantity):
+        if _class not in self._QUOTA_RESOURCES:
+            return
+        name, _model = self._QUOTA_RESOURCES[_class]
+        in_use = getattr(models.Quotas, f'in_use_{name}')
+        decrement = (update(models.Quotas)
+                     .where(models.Quotas.project_id == project_id,
+                            in_use >= quantity)
+                     .values({in_use: in_use - quantity}))
+        if self._execute_quota_update(project_id, [decrement]):
+            self._track_quota_usage(session, _class, project_id, -quantity)
+        elif not CONF.api_settings.auth_strategy == consts.NOAUTH:
+            LOG.warning('Quota decrement of %(quant)s on %(clss)s called on '
+                        'project: %(proj)s that would cause a negative '
+                        'quota.',
+                        {'quant': quantity, 'clss': _class,
+                         'proj': project_id})
+
     def decrement_quota(self, lock_session, _class, project_id, quantity=1):
         """Decrements the object quota for a project
 
@@ -598,6 +809,11 @@ class Repositories:
                   'object: %(obj)s',
                   {'quant': quantity, 'proj': project_id, 'obj': _class})
 
+        if CONF.quotas.optimistic_quota_accounting:
+            self._decrement_quota_optimistic(lock_session, _class, project_id,
+                                             quantity)
+            return
+
         # Lock the project record in the database to block other quota checks
         try:
             quotas = (lock_session.query(models.Quotas)
@@ -724,8 +940,19 @@ class Repositories:
 
 class LoadBalancerRepository(BaseRepository):
     model_class = models.LoadBalancer
-
-    def get_all_API_list(self, session, pagination_helper=None, **filters):
+    projection_loaders = {
+        'vip': ((subqueryload(models.LoadBalancer.vip).
+                 subqueryload(models.Vip.sgs)),),
+        'additional_vips': (
+            subqueryload(models.LoadBalancer.additional_vips),),
+        'listeners': (
+            subqueryload(models.LoadBalancer.listeners).noload('*'),),
+        'pools': (subqueryload(models.LoadBalancer.pools).noload('*'),),
+        'tags': (subqueryload(models.LoadBalancer._tags),),
+    }
+
+    def get_all_API_list(self, session, pagination_helper=None, fields=None,
+                         **filters):
         """Get a list of load balancers for the API list call.
 
         This get_all returns a data set that is only one level deep
@@ -734,9 +961,15 @@ class LoadBalancerRepository(BaseRepository):
 
         :param session: A Sql Alchemy database session.
         :param pagination_helper: Helper to apply pagination and sorting.
+        :param fields: Optional data model attributes to load, when set only
+                       these attributes are loaded from the database.
         :param filters: Filters to decide which entities should be retrieved.
         :returns: [octavia.common.data_model]
         """
+        if fields is not None:
+            return self.get_all_projected(
+                session, fields, pagination_helper=pagination_helper,
+                **filters)
 
         # sub-query load the tables we need
         # no-load (blank) the tables we don't need
@@ -964,9 +1197,12 @@ class PoolRepository(BaseRepository):
 
 class MemberRepository(BaseRepository):
     model_class = models.Member
+    projection_loaders = {
+        'tags': (subqueryload(models.Member._tags),),
+    }
 
     def get_all_API_list(self, session, pagination_helper=None,
-                         limited_graph=False, **filters):
+                         limited_graph=False, fields=None, **filters):
         """Get a list of members for the API list call.
 
         This get_all returns a data set that is only one level deep
@@ -977,9 +1213,15 @@ class MemberRepository(BaseRepository):
         :param pagination_helper: Helper to apply pagination and sorting.
         :param limited_graph: Option to avoid recursion iteration through all
                               nodes in the graph via to_data_model
+        :param fields: Optional data model attributes to load, when set only
+                       these attributes are loaded from the database.
         :param filters: Filters to decide which entities should be retrieved.
         :returns: [octavia.common.data_model]
         """
+        if fields is not None:
+            return self.get_all_projected(
+                session, fields, pagination_helper=pagination_helper,
+                **filters)
 
         # sub-query load the tables we need
         # no-load (blank) the tables we don't need
@@ -993,9 +1235,101 @@ class MemberRepository(BaseRepository):
             query_options=query_options, limited_graph=limited_graph,
             **filters)
 
+    # Maximum number of IDs in a single "IN" clause of the batch operations
+    BATCH_SIZE = 1000
+
+    def _batches(self, items):
+        items = list(items)
+        for i in range(0, len(items), self.BATCH_SIZE):
+            yield items[i:i + self.BATCH_SIZE]
+
+    def get_members_by_ids(self, session, member_ids):
+        """Retrieves members by their IDs without loading their graph.
+
+        :param session: A Sql Alchemy database session.
+        :param member_ids: IDs of the members to retrieve.
+        :returns: [octavia.common.data_model]
+        """
+        members = []
+        for ids in self._batches(member_ids):
+            query = session.query(self.model_class).filter(
+                self.model_class.id.in_(ids)).options(
+                subqueryload(models.Member._tags), noload('*'))
+            members.extend(model.to_data_model(recursion_depth=0)
+                           for model in query.all())
+        return members
+
+    def create_batch(self, session, member_dicts):
+        """Creates members in the database with bulk INSERT statements.
+
+        :param session: A Sql Alchemy database session.
+        :param member_dicts: Attributes of the members to insert, each dict
+                             must include the member id.
+        :returns: [octavia.common.data_model]
+        """
+        rows = []
+        tag_rows = []
+        for member_dict in member_dicts:
+            row = dict(member_dict)
+            for tag in row.pop('tags', None) or []:
+                tag_rows.append({'resource_id': row['id'], 'tag': tag})
+            rows.append(row)
+        for batch in self._batches(rows):
+            session.execute(sa_insert(self.model_class), batch)
+        for batch in self._batches(tag_rows):
+            session.execute(sa_insert(base_models.Tags), batch)
+        return [data_models.Member(**member_dict)
+                for member_dict in member_dicts]
+
+    def update_batch(self, session, members):
+        """Updates members in the database with bulk UPDATE statements.
+
+        :param session: A Sql Alchemy database session.
+        :param members: Dict of member ID to the attributes to update.
+        :returns: None
+        """
+        rows = []
+        tags = {}
+        for member_id, model_kwargs in members.items():
+            row = dict(model_kwargs)
+            member_tags = row.pop('tags', None)
+            if member_tags is not None:
+                tags[member_id] = member_tags
+            row['id'] = member_id
+            rows.append(row)
+        for batch in self._batches(rows):
+            session.execute(update(self.model_class), batch)
+        for ids in self._batches(tags):
+            session.query(base_models.Tags).filter(
+                base_models.Tags.resource_id.in_(ids)).delete(
+                synchronize_session=False)
+            tag_rows = [{'resource_id': member_id, 'tag': tag}
+                        for member_id in ids for tag in tags[member_id]]
+            if tag_rows:
+                session.execute(sa_insert(base_models.Tags), tag_rows)
+
+    def update_members_by_ids(self, session, member_ids, **model_kwargs):
+        """Sets the same attributes on many members.
+
+        :param session: A Sql Alchemy database session.
+        :param member_ids: IDs of the members to update.
+        :param model_kwargs: Entity attributes that should be updated.
+        :returns: None
+        """
+        for ids in self._batches(member_ids):
+            session.query(self.model_class).filter(
+                self.model_class.id.in_(ids)).update(
+                model_kwargs, synchronize_session=False)
+
     def delete_members(self, session, member_ids):
         """Batch deletes members from a pool."""
-        self.delete_batch(session, member_ids)
+        for ids in self._batches(member_ids):
+            session.query(base_models.Tags).filter(
+                base_models.Tags.resource_id.in_(ids)).delete(
+                synchronize_session=False)
+            session.query(self.model_class).filter(
+                self.model_class.id.in_(ids)).delete(
+                synchronize_session=False)
 
     def update_pool_members(self, session, pool_id, **model_kwargs):
         """Updates all of the members of a pool.
@@ -1267,28 +1601,31 @@ class AmphoraRepository(BaseRepository):
 
     @oslo_db_api.wrap_db_retry(max_retries=5, retry_on_deadlock=True)
     def allocate_and_associate(self, session, load_balancer_id,
-                               availability_zone=None):
-        """Allocate an amphora for a load balancer.
+                               availability_zone=None, compute_flavor=None):
+        """Allocate a spare amphora for a load balancer.
 
-        For v0.5 this is simple, find a free amp and
-        associate the lb.  In the future this needs to be
-        enhanced.
+        The spare amphora rows locked by concurrent allocations are skipped,
+        so concurrent allocations do not wait for each other.
 
         :param session: A Sql Alchemy database session.
         :param load_balancer_id: The load balancer id to associate
+        :param availability_zone: The compute zone of the amphora
+        :param compute_flavor: The compute flavor of the amphora
         :returns: The amphora ID for the load balancer or None
         """
         filters = {
-            'status': 'READY',
+            'status': consts.AMPHORA_READY,
             'load_balancer_id': None
         }
         if availability_zone:
             LOG.debug("Filtering amps by zone: %s", availability_zone)
             filters['cached_zone'] = availability_zone
+        if compute_flavor:
+            filters['compute_flavor'] = compute_flavor
 
         amp = (session.query(self.model_class)
                .populate_existing()
-               .with_for_update()
+               .with_for_update(skip_locked=True)
                .filter_by(**filters).first())
 
         if amp is None:
@@ -1296,11 +1633,33 @@ class AmphoraRepository(BaseRepository):
 
         if availability_zone:
             LOG.debug("Found amp: %s in %s", amp.id, amp.cached_zone)
-        amp.status = 'ALLOCATED'
+        amp.status = consts.AMPHORA_ALLOCATED
         amp.load_balancer_id = load_balancer_id
 
         return amp.to_data_model()
 
+    def get_spare_amphora_counts(self, session, by_zone=True):
+        """Counts the spare amphorae, including the ones being built.
+
+        :param session: A Sql Alchemy database session.
+        :param by_zone: Whether to count the spare amphorae per compute zone,
+                        the zone of the counts is None otherwise.
+        :returns: A dict of (compute flavor, compute zone) to the number of
+                  spare amphorae.
+        """
+        columns = [self.model_class.compute_flavor]
+        if by_zone:
+            columns.append(self.model_class.cached_zone)
+        rows = (session.query(*columns, func.count(self.model_class.id))
+                .filter(self.model_class.load_balancer_id.is_(None),
+                        self.model_class.status.in_(
+                            [consts.PENDING_CREATE, consts.AMPHORA_BOOTING,
+                             consts.AMPHORA_READY]))
+                .group_by(*columns))
+        if not by_zone:
+            return {(flavor, None): count for flavor, count in rows}
+        return {(flavor, zone): count for flavor, zone, count in rows}
+
     @staticmethod
     def get_lb_for_amphora(session, amphora_id):
         """Get all of the load balancers on an amphora.
@@ -1507,12 +1866,16 @@ class AmphoraBuildReqRepository(BaseRepository):
 class AmphoraBuildSlotsRepository(BaseRepository):
     model_class = models.AmphoraBuildSlots
 
-    def get_used_build_slots_count(self, session):
+    def get_used_build_slots_count(self, session, lock=False):
         """Gets the number of build slots in use.
 
+             :param lock: Lock the row until the end of the transaction.
              :returns: Number of current build slots.
         """
-        count = session.query(self.model_class.slots_used).one()
+        query = session.query(self.model_class.slots_used)
+        if lock:
+            query = query.with_for_update()
+        count = query.one()
         return count[0]
 
     def update_count(self, session, action='increment'):
@@ -1530,6 +1893,26 @@ class AmphoraBuildSlotsRepository(BaseRepository):
                 {self.model_class.slots_used: 0})
 
 
+class SparesPoolRepository(BaseRepository):
+    model_class = models.SparesPool
+
+    def get_for_update(self, lock_session):
+        """Queries and locks the SparesPool record.
+
+        This call will query for the SparesPool table record and lock it
+        so that other processes cannot read or write it.
+
+        :returns: The SparesPool record
+        """
+        row = (lock_session.query(self.model_class)
+               .with_for_update().first())
+        if row is None:
+            row = self.model_class(updated_at=datetime.datetime.utcnow())
+            lock_session.add(row)
+            lock_session.flush()
+        return row
+
+
 class SNIRepository(BaseRepository):
     model_class = models.SNI
 
@@ -2049,6 +2432,12 @@ class FlavorRepository(_GetALLExceptDELETEDIdMixin, BaseRepository):
     model_class = models.Flavor
 
     def get_flavor_metadata_dict(self, session, flavor_id):
+        # The metadata of a flavor cannot change while it exists, a flavor
+        # profile in use cannot be updated.
+        return _FLAVOR_METADATA_CACHE.get(
+            flavor_id, self._get_flavor_metadata_dict, session, flavor_id)
+
+    def _get_flavor_metadata_dict(self, session, flavor_id):
         flavor_metadata_json = (
             session.query(models.FlavorProfile.flavor_data)
             .filter(models.Flavor.id == flavor_id)
@@ -2082,6 +2471,8 @@ class FlavorRepository(_GetALLExceptDELETEDIdMixin, BaseRepository):
         flavor = (serial_session.query(self.model_class).
                   filter_by(**filters).one())
         serial_session.delete(flavor)
+        _invalidate_on_commit(serial_session, _FLAVOR_METADATA_CACHE,
+                              flavor.id)
 
 
 class FlavorProfileRepository(_GetALLExceptDELETEDIdMixin, BaseRepository):
@@ -2093,6 +2484,12 @@ class AvailabilityZoneRepository(_GetALLExceptDELETEDIdMixin, BaseRepository):
 
     def get_availability_zone_metadata_dict(self, session,
                                             availability_zone_name):
+        return _AZ_METADATA_CACHE.get(
+            availability_zone_name, self._get_availability_zone_metadata_dict,
+            session, availability_zone_name)
+
+    def _get_availability_zone_metadata_dict(self, session,
+                                             availability_zone_name):
         availability_zone_metadata_json = (
             session.query(
                 models.AvailabilityZoneProfile.availability_zone_data)
@@ -2143,6 +2540,9 @@ class AvailabilityZoneRepository(_GetALLExceptDELETEDIdMixin, BaseRepository):
         availability_zone = (
             serial_session.query(self.model_class).filter_by(**filters).one())
         serial_session.delete(availability_zone)
+        # The name of the availability zone can be reused
+        _invalidate_on_commit(serial_session, _AZ_METADATA_CACHE,
+                              availability_zone.name)
 
 
 class AvailabilityZoneProfileRepository(_GetALLExceptDELETEDIdMixin,
@@ -15,6 +15,7 @@
 from oslo_config import cfg
 from oslo_log import log as logging
 
+from octavia.common import cache
 from octavia.common import clients
 from octavia.common import constants
 from octavia.common import exceptions
@@ -24,6 +25,9 @@ LOG = logging.getLogger(__name__)
 
 CONF = cfg.CONF
 
+_IMAGE_ID_CACHE = cache.TTLCache(
+    'image_id_by_tag', lambda: CONF.glance.image_id_cache_ttl)
+
 
 class ImageManager(image_base.ImageBase):
     '''Image implementation of virtual machines via Glance.'''
@@ -49,6 +53,14 @@ class ImageManager(image_base.ImageBase):
         :raises: ImageGetException if no images found with given tag
         :return: image id
         """
+        return _IMAGE_ID_CACHE.get((image_tag, image_owner),
+                                   self._get_image_id_by_tag,
+                                   image_tag, image_owner)
+
+    def invalidate_image_id(self, image_tag, image_owner=None):
+        _IMAGE_ID_CACHE.invalidate((image_tag, image_owner))
+
+    def _get_image_id_by_tag(self, image_tag, image_owner=None):
         filters = {'tag': [image_tag],
                    'status': constants.GLANCE_IMAGE_ACTIVE}
         if image_owner:
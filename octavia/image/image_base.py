@@ -26,3 +26,13 @@ class ImageBase(metaclass=abc.ABCMeta):
         :raises: ImageGetException if no images found with given tag
         :return: image id
         """
+
+    def invalidate_image_id(self, image_tag, image_owner=None):
+        """Forget the image ID cached for an image tag and owner.
+
+        Drivers caching the result of get_image_id_by_tag should override
+        this.
+
+        :param image_tag: image tag
+        :param image_owner: optional image owner
+        """
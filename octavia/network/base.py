@@ -132,6 +132,18 @@ class AbstractNetworkDriver(metaclass=abc.ABCMeta):
         :returns port: A port data model object.
         """
 
+    def create_ports(self, ports):
+        """Creates several network ports.
+
+        Drivers should override this to create all the ports with a single
+        request.
+
+        :param ports: A list of dicts of create_port arguments.
+        :returns ports: A list of port data model objects, in the same order
+                        as the requested ports.
+        """
+        return [self.create_port(**port) for port in ports]
+
     @abc.abstractmethod
     def deallocate_vip(self, vip):
         """Removes any resources that reserved this virtual ip.
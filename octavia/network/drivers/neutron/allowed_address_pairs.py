@@ -21,6 +21,7 @@ from oslo_config import cfg
 from oslo_log import log as logging
 from stevedore import driver as stevedore_driver
 
+from octavia.common import cache
 from octavia.common import constants
 from octavia.common import data_models
 from octavia.common import exceptions
@@ -37,6 +38,10 @@ PROJECT_ID_ALIAS = 'project-id'
 
 CONF = cfg.CONF
 
+_SEC_GRP_ID_CACHE = cache.TTLCache(
+    'vip_security_group_id',
+    lambda: CONF.networking.security_group_id_cache_ttl)
+
 
 class AllowedAddressPairsDriver(neutron_base.BaseNeutronDriver):
 
@@ -143,6 +148,20 @@ class AllowedAddressPairsDriver(neutron_base.BaseNeutronDriver):
         sec_grp = self.network_proxy.find_security_group(sec_grp_name)
         return sec_grp
 
+    def _find_lb_security_group_id(self, load_balancer_id):
+        sec_grp = self._get_lb_security_group(load_balancer_id)
+        return sec_grp.get(constants.ID) if sec_grp else None
+
+    def _get_lb_security_group_id(self, load_balancer_id):
+        sec_grp_id = _SEC_GRP_ID_CACHE.get(
+            load_balancer_id, self._find_lb_security_group_id,
+            load_balancer_id)
+        if sec_grp_id is None:
+            # The security group may be created later on, do not cache that
+            # it is missing
+            _SEC_GRP_ID_CACHE.invalidate(load_balancer_id)
+        return sec_grp_id
+
     def _get_ethertype_for_ip(self, ip):
         address = ipaddress.ip_address(ip)
         return 'IPv6' if address.version == 6 else 'IPv4'
@@ -233,49 +252,61 @@ class AllowedAddressPairsDriver(neutron_base.BaseNeutronDriver):
         ethertypes.add(primary_ethertype)
         for add_vip in load_balancer.additional_vips:
             ethertypes.add(self._get_ethertype_for_ip(add_vip.ip_address))
+        new_rules = []
         for port_protocol in add_ports:
             for ethertype in ethertypes:
                 cidr = port_protocol[2]
                 if not cidr or self._get_ethertype_for_cidr(cidr) == ethertype:
-                    self._create_security_group_rule(
+                    new_rules.append(self._get_security_group_rule_body(
                         sec_grp_id, port_protocol[1],
                         port_min=port_protocol[0],
                         port_max=port_protocol[0],
                         ethertype=ethertype,
                         cidr=cidr,
-                    )
+                    ))
 
         # Currently we are using the VIP network for VRRP
         # so we need to open up the protocols for it
         if load_balancer.topology == constants.TOPOLOGY_ACTIVE_STANDBY:
-            try:
-                self._create_security_group_rule(
-                    sec_grp_id,
-                    constants.VRRP_PROTOCOL_NUM,
-                    direction='ingress',
-                    ethertype=primary_ethertype)
-            except os_exceptions.ConflictException:
-                # It's ok if this rule already exists
-                pass
-            except Exception as e:
-                raise base.PlugVIPException(str(e))
-
-            try:
-                self._create_security_group_rule(
-                    sec_grp_id, constants.AUTH_HEADER_PROTOCOL_NUMBER,
-                    direction='ingress', ethertype=primary_ethertype)
-            except os_exceptions.ConflictException:
-                # It's ok if this rule already exists
-                pass
-            except Exception as e:
-                raise base.PlugVIPException(str(e))
+            old_protocols = {
+                str(rule.get('protocol')) for rule in rules
+                if (rule.get('direction') == 'ingress' and
+                    rule.get('ethertype') == primary_ethertype)}
+            for protocol in (constants.VRRP_PROTOCOL_NUM,
+                             constants.AUTH_HEADER_PROTOCOL_NUMBER):
+                if str(protocol) not in old_protocols:
+                    new_rules.append(self._get_security_group_rule_body(
+                        sec_grp_id, protocol, direction='ingress',
+                        ethertype=primary_ethertype))
+
+        if new_rules:
+            self._add_security_group_rules(load_balancer.id, new_rules)
+
+    def _add_security_group_rules(self, load_balancer_id, rules):
+        try:
+            self._create_security_group_rules(rules)
+        except os_exceptions.ConflictException:
+            # A rule was created by a concurrent update, the bulk request
+            # created none of them
+            LOG.debug('Security group rules of load balancer %s already '
+                      'exist, creating the rules one by one.',
+                      load_balancer_id)
+            for rule in rules:
+                try:
+                    self.network_proxy.create_security_group_rule(**rule)
+                except os_exceptions.ConflictException:
+                    # It's ok if this rule already exists
+                    pass
+        except os_exceptions.ResourceNotFound:
+            # The security group was deleted behind our back
+            _SEC_GRP_ID_CACHE.invalidate(load_balancer_id)
+            raise
 
     def _add_vip_security_group_to_port(self, load_balancer_id, port_id,
                                         sec_grp_id: str = None,
                                         vip_sg_ids: list[str] = None):
         sec_grp_ids = [sec_grp_id or
-                       self._get_lb_security_group(load_balancer_id).get(
-                           constants.ID)]
+                       self._get_lb_security_group_id(load_balancer_id)]
         if vip_sg_ids:
             sec_grp_ids += vip_sg_ids
         try:
@@ -320,6 +351,7 @@ class AllowedAddressPairsDriver(neutron_base.BaseNeutronDriver):
                 sec_grp = None
             else:
                 sec_grp = self._get_lb_security_group(lb_id)
+                _SEC_GRP_ID_CACHE.invalidate(lb_id)
             if sec_grp:
                 sec_grp_id = sec_grp.id
                 LOG.info(
@@ -413,17 +445,17 @@ class AllowedAddressPairsDriver(neutron_base.BaseNeutronDriver):
 
     def update_vip_sg(self, load_balancer, vip):
         if self.sec_grp_enabled:
-            sec_grp = self._get_lb_security_group(load_balancer.id)
-            if not sec_grp:
+            sec_grp_id = self._get_lb_security_group_id(load_balancer.id)
+            if not sec_grp_id:
                 sec_grp_name = common_utils.get_vip_security_group_name(
                     load_balancer.id)
-                sec_grp = self._create_security_group(sec_grp_name)
-            self._update_security_group_rules(load_balancer,
-                                              sec_grp.get(constants.ID))
+                sec_grp_id = self._create_security_group(sec_grp_name).get(
+                    constants.ID)
+            self._update_security_group_rules(load_balancer, sec_grp_id)
             self._add_vip_security_group_to_port(load_balancer.id, vip.port_id,
-                                                 sec_grp.get(constants.ID),
+                                                 sec_grp_id,
                                                  vip_sg_ids=vip.sg_ids)
-            return sec_grp.get(constants.ID)
+            return sec_grp_id
         return None
 
     def update_aap_port_sg(self,
@@ -431,11 +463,11 @@ class AllowedAddressPairsDriver(neutron_base.BaseNeutronDriver):
                            amphora: data_models.Amphora,
                            vip: data_models.Vip):
         if self.sec_grp_enabled:
-            sec_grp = self._get_lb_security_group(load_balancer.id)
-            if sec_grp:
+            sec_grp_id = self._get_lb_security_group_id(load_balancer.id)
+            if sec_grp_id:
                 self._add_vip_security_group_to_port(load_balancer.id,
                                                      amphora.vrrp_port_id,
-                                                     sec_grp.get(constants.ID),
+                                                     sec_grp_id,
                                                      vip_sg_ids=vip.sg_ids)
 
     def plug_aap_port(self, load_balancer, vip, amphora, subnet):
@@ -685,10 +717,9 @@ class AllowedAddressPairsDriver(neutron_base.BaseNeutronDriver):
                         compute_id, port_detach_timeout)
 
     def update_vip(self, load_balancer, for_delete=False):
-        sec_grp = self._get_lb_security_group(load_balancer.id)
-        if sec_grp:
-            self._update_security_group_rules(load_balancer,
-                                              sec_grp.get(constants.ID))
+        sec_grp_id = self._get_lb_security_group_id(load_balancer.id)
+        if sec_grp_id:
+            self._update_security_group_rules(load_balancer, sec_grp_id)
         elif not for_delete:
             raise exceptions.MissingVIPSecurityGroup(lb_id=load_balancer.id)
         else:
@@ -854,23 +885,12 @@ class AllowedAddressPairsDriver(neutron_base.BaseNeutronDriver):
         :returns port: A port data model object.
         """
         try:
-            aap_list = []
-            for ip in secondary_ips:
-                aap_list.append({constants.IP_ADDRESS: ip})
-            port = {constants.NETWORK_ID: network_id,
-                    constants.ADMIN_STATE_UP: admin_state_up,
-                    constants.DEVICE_OWNER: constants.OCTAVIA_OWNER,
-                    constants.BINDING_VNIC_TYPE: vnic_type}
-            if aap_list:
-                port[constants.ALLOWED_ADDRESS_PAIRS] = aap_list
-            if fixed_ips:
-                port[constants.FIXED_IPS] = fixed_ips
-            if name:
-                port[constants.NAME] = name
-            if qos_policy_id:
-                port[constants.QOS_POLICY_ID] = qos_policy_id
-            if security_group_ids:
-                port[constants.SECURITY_GROUPS] = security_group_ids
+            port = self._get_port_body(
+                network_id, name=name, fixed_ips=fixed_ips,
+                secondary_ips=secondary_ips,
+                security_group_ids=security_group_ids,
+                admin_state_up=admin_state_up, qos_policy_id=qos_policy_id,
+                vnic_type=vnic_type)
 
             new_port = self.network_proxy.create_port(**port)
 
@@ -884,6 +904,53 @@ class AllowedAddressPairsDriver(neutron_base.BaseNeutronDriver):
             LOG.exception(message)
             raise base.CreatePortException(message)
 
+    def create_ports(self, ports):
+        """Creates several network ports with a single bulk request.
+
+        Neutron creates either all or none of the ports.
+
+        :param ports: A list of dicts of create_port arguments.
+        :returns ports: A list of port data model objects, in the same order
+                        as the requested ports.
+        """
+        try:
+            new_ports = list(self.network_proxy.create_ports(
+                [self._get_port_body(**port) for port in ports]))
+
+            LOG.debug('Created ports: %(ports)s', {'ports': new_ports})
+
+            return [utils.convert_port_to_model(new_port)
+                    for new_port in new_ports]
+        except Exception as e:
+            message = _('Error creating {count} ports due to '
+                        '{error}.').format(count=len(ports), error=str(e))
+            LOG.exception(message)
+            raise base.CreatePortException(message)
+
+    @staticmethod
+    def _get_port_body(network_id, name=None, fixed_ips=(),
+                       secondary_ips=(), security_group_ids=(),
+                       admin_state_up=True, qos_policy_id=None,
+                       vnic_type=constants.VNIC_TYPE_NORMAL):
+        aap_list = []
+        for ip in secondary_ips:
+            aap_list.append({constants.IP_ADDRESS: ip})
+        port = {constants.NETWORK_ID: network_id,
+                constants.ADMIN_STATE_UP: admin_state_up,
+                constants.DEVICE_OWNER: constants.OCTAVIA_OWNER,
+                constants.BINDING_VNIC_TYPE: vnic_type}
+        if aap_list:
+            port[constants.ALLOWED_ADDRESS_PAIRS] = aap_list
+        if fixed_ips:
+            port[constants.FIXED_IPS] = fixed_ips
+        if name:
+            port[constants.NAME] = name
+        if qos_policy_id:
+            port[constants.QOS_POLICY_ID] = qos_policy_id
+        if security_group_ids:
+            port[constants.SECURITY_GROUPS] = security_group_ids
+        return port
+
     def get_security_group(self, sg_name):
         """Retrieves the security group by its name.
 
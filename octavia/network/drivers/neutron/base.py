@@ -151,11 +151,12 @@ class BaseNeutronDriver(base.AbstractNetworkDriver):
         sec_grp = self.network_proxy.create_security_group(name=name)
         return sec_grp
 
-    def _create_security_group_rule(self, sec_grp_id, protocol,
-                                    direction='ingress', port_min=None,
-                                    port_max=None, ethertype='IPv6',
-                                    cidr=None):
-        rule = {
+    @staticmethod
+    def _get_security_group_rule_body(sec_grp_id, protocol,
+                                      direction='ingress', port_min=None,
+                                      port_max=None, ethertype='IPv6',
+                                      cidr=None):
+        return {
             'security_group_id': sec_grp_id,
             'direction': direction,
             'protocol': protocol,
@@ -165,8 +166,26 @@ class BaseNeutronDriver(base.AbstractNetworkDriver):
             'remote_ip_prefix': cidr,
         }
 
+    def _create_security_group_rule(self, sec_grp_id, protocol,
+                                    direction='ingress', port_min=None,
+                                    port_max=None, ethertype='IPv6',
+                                    cidr=None):
+        rule = self._get_security_group_rule_body(
+            sec_grp_id, protocol, direction=direction, port_min=port_min,
+            port_max=port_max, ethertype=ethertype, cidr=cidr)
+
         self.network_proxy.create_security_group_rule(**rule)
 
+    def _create_security_group_rules(self, rules):
+        """Creates security group rules with a single bulk request.
+
+        Neutron creates either all or none of the rules.
+
+        :param rules: A list of security group rule bodies, as returned by
+                      _get_security_group_rule_body.
+        """
+        list(self.network_proxy.create_security_group_rules(rules))
+
     def apply_qos_on_port(self, qos_id, port_id):
         try:
             self.network_proxy.update_port(port_id, qos_policy_id=qos_id)
@@ -531,6 +531,13 @@ class NoopManager:
             qos_policy_id=qos_policy_id, security_group_ids=security_group_ids,
             vnic_type=vnic_type)
 
+    def create_ports(self, ports):
+        LOG.debug("Network %s no-op, create_ports count %s",
+                  self.__class__.__name__, len(ports))
+        self.networkconfigconfig[(len(ports), 'create_ports')] = (
+            ports, 'create_ports')
+        return [self.create_port(**port) for port in ports]
+
     def plug_fixed_ip(self, port_id, subnet_id, ip_address=None):
         LOG.debug("Network %s no-op, plug_fixed_ip port_id %s, subnet_id "
                   "%s, ip_address %s", self.__class__.__name__, port_id,
@@ -655,6 +662,9 @@ class NoopNetworkDriver(driver_base.AbstractNetworkDriver):
             network_id, name, fixed_ips, secondary_ips, security_group_ids,
             admin_state_up, qos_policy_id, vnic_type)
 
+    def create_ports(self, ports):
+        return self.driver.create_ports(ports)
+
     def plug_fixed_ip(self, port_id, subnet_id, ip_address=None):
         return self.driver.plug_fixed_ip(port_id, subnet_id, ip_address)
 
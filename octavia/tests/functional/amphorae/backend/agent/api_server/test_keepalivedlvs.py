@@ -17,6 +17,7 @@ import stat
 import subprocess
 from unittest import mock
 
+import fixtures
 import flask
 
 from oslo_config import cfg
@@ -102,6 +103,9 @@ class KeepalivedLvsTestCase(base.TestCase):
         self.client = self.app.test_client()
         self._ctx = self.app.test_request_context()
         self._ctx.push()
+        # The lock files would interfere with the mocks of the os module
+        self.useFixture(fixtures.MockPatch(
+            'octavia.amphorae.backends.agent.api_server.util.lock'))
         self.test_keepalivedlvs = keepalivedlvs.KeepalivedLvs()
         self.app.add_url_rule(
             rule=self.TEST_URL % ('<amphora_id>', '<listener_id>'),
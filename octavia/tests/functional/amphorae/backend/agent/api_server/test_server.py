@@ -28,6 +28,7 @@ import webob
 
 from octavia.amphorae.backends.agent import api_server
 from octavia.amphorae.backends.agent.api_server import certificate_update
+from octavia.amphorae.backends.agent.api_server import haproxy_validation
 from octavia.amphorae.backends.agent.api_server import server
 from octavia.amphorae.backends.agent.api_server import util
 from octavia.common import config
@@ -57,6 +58,12 @@ class TestServerTestCase(base.TestCase):
         self.useFixture(fixtures.MockPatch(
             'oslo_config.cfg.find_config_files',
             return_value=[AMP_AGENT_CONF_PATH]))
+        # The lock files would interfere with the mocks of the os module
+        self.mock_lock = self.useFixture(fixtures.MockPatch(
+            'octavia.amphorae.backends.agent.api_server.util.lock')).mock
+        # The configurations are checked with the haproxy of the PATH
+        self.useFixture(fixtures.MockPatchObject(
+            haproxy_validation, 'get_haproxy_path', return_value='haproxy'))
         with mock.patch('distro.id', return_value='ubuntu'), mock.patch(
                 'octavia.amphorae.backends.agent.api_server.plug.'
                 'Plug.plug_lo'):
@@ -75,6 +82,10 @@ class TestServerTestCase(base.TestCase):
     def test_centos_haproxy(self):
         self._test_haproxy(consts.CENTOS)
 
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                '_ENABLED_UNITS', new_callable=set)
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                'update_alloy_configuration', return_value=(False, False))
     @mock.patch('octavia.amphorae.backends.agent.api_server.'
                 'haproxy_compatibility.get_haproxy_versions')
     @mock.patch('os.path.exists')
@@ -83,7 +94,8 @@ class TestServerTestCase(base.TestCase):
     @mock.patch('subprocess.check_output')
     def _test_haproxy(self, distro,
                       mock_subprocess, mock_rename,
-                      mock_makedirs, mock_exists, mock_get_version):
+                      mock_makedirs, mock_exists, mock_get_version,
+                      mock_update_alloy, mock_enabled_units):
 
         self.assertIn(distro, [consts.UBUNTU, consts.CENTOS])
 
@@ -119,15 +131,27 @@ class TestServerTestCase(base.TestCase):
                     haproxy_ug=consts.HAPROXY_USER_GROUP_CFG,
                     peer=(octavia_utils.
                           base64_sha1_string('amp_123').rstrip('='))).split(),
-                stderr=subprocess.STDOUT, encoding='utf-8')
+                stderr=subprocess.STDOUT, encoding='utf-8',
+                timeout=mock.ANY)
             mock_rename.assert_called_with(
                 '/var/lib/octavia/123/haproxy.cfg.new',
                 '/var/lib/octavia/123/haproxy.cfg')
+            self.assertIn(consts.VALIDATION_TIME_HEADER, rv.headers)
+            self.assertEqual('False',
+                             rv.headers[consts.VALIDATION_CACHED_HEADER])
 
+        # The units are enabled with a single call
         mock_subprocess.assert_any_call(
-            ['systemctl', 'enable', 'haproxy-123.service'],
+            ['systemctl', 'enable', 'amphora-netns.service',
+             'haproxy-123.service', 'alloy', 'haproxy-metrics-proxy'],
             stderr=subprocess.STDOUT,
             encoding='utf-8')
+        mock_update_alloy.assert_called_once_with('123', None)
+        # Nothing changed, systemd is not reloaded
+        self.assertNotIn(
+            mock.call(['systemctl', 'daemon-reload'],
+                      stderr=subprocess.STDOUT, encoding='utf-8'),
+            mock_subprocess.call_args_list)
 
         # exception writing
         m = self.useFixture(test_utils.OpenFixture(file_name)).mock_open
@@ -167,6 +191,9 @@ class TestServerTestCase(base.TestCase):
                                          data='test')
 
             self.assertEqual(202, rv.status_code)
+            # The configuration already passed the validation
+            self.assertEqual('True',
+                             rv.headers[consts.VALIDATION_CACHED_HEADER])
             mode = (stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP |
                     stat.S_IROTH)
             mock_open.assert_called_with(init_path, flags, mode)
@@ -177,6 +204,7 @@ class TestServerTestCase(base.TestCase):
             mock_makedirs.assert_called_with('/var/lib/octavia/123')
 
         # unhappy case haproxy check fails
+        haproxy_validation.VALID_CONFIGS.clear()
         mock_exists.return_value = True
         mock_subprocess.side_effect = [subprocess.CalledProcessError(
             7, 'test', RANDOM_ERROR)]
@@ -208,7 +236,8 @@ class TestServerTestCase(base.TestCase):
                     haproxy_ug=consts.HAPROXY_USER_GROUP_CFG,
                     peer=(octavia_utils.
                           base64_sha1_string('amp_123').rstrip('='))).split(),
-                stderr=subprocess.STDOUT, encoding='utf-8')
+                stderr=subprocess.STDOUT, encoding='utf-8',
+                timeout=mock.ANY)
             mock_rename.assert_called_with(
                 '/var/lib/octavia/123/haproxy.cfg.new',
                 '/var/lib/octavia/123/haproxy.cfg.new-failed')
@@ -658,6 +687,8 @@ class TestServerTestCase(base.TestCase):
         self.assertEqual(OK, jsonutils.loads(rv.data.decode('utf-8')))
         mock_exists.assert_called_once_with(
             '/var/lib/octavia/certs/123/test.pem')
+        # The operations on the load balancer are serialized
+        self.mock_lock.assert_called_once_with('123')
 
         # wrong file name
         mock_exists.side_effect = [True]
@@ -2646,6 +2677,34 @@ class TestServerTestCase(base.TestCase):
             mock_vrrp_check.assert_called_once_with(None,
                                                     consts.AMP_ACTION_START)
 
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                'vrrp_check_script_update')
+    @mock.patch('os.path.exists', return_value=False)
+    @mock.patch('os.makedirs')
+    @mock.patch('subprocess.check_output')
+    def test_upload_keepalived_config_vrrp_check_daemon(
+            self, mock_subprocess, mock_makedirs, mock_exists,
+            mock_vrrp_check):
+        self.conf.config(group='amphora_agent', vrrp_check_daemon=True)
+        self.conf.config(group='amphora_agent',
+                         vrrp_check_daemon_interval=0.5)
+        script_path = util.keepalived_check_script_path()
+        m = self.useFixture(test_utils.OpenFixture(script_path)).mock_open
+
+        with mock.patch('os.open'), mock.patch.object(os, 'fdopen', m):
+            rv = self.ubuntu_app.put('/' + api_server.VERSION +
+                                     '/vrrp/upload', data='test')
+
+        self.assertEqual(200, rv.status_code)
+        # The check script reads the status written by the daemon
+        scripts = [args[0] for args, kwargs in m().write.call_args_list
+                   if isinstance(args[0], str) and
+                   args[0].startswith('#!/bin/bash')]
+        self.assertEqual(1, len(scripts))
+        self.assertIn(f'< {util.vrrp_check_status_path()} ', scripts[0])
+        self.assertIn('if (( now - timestamp > 2 )); then', scripts[0])
+        self.assertNotIn(util.keepalived_check_scripts_dir(), scripts[0])
+
     def test_ubuntu_manage_service_vrrp(self):
         self._test_manage_service_vrrp(consts.UBUNTU)
 
@@ -2898,13 +2957,10 @@ class TestServerTestCase(base.TestCase):
                          jsonutils.loads(rv.data.decode('utf-8')))
 
     @mock.patch('octavia.amphorae.backends.utils.nftable_utils.'
-                'load_nftables_file')
-    @mock.patch('octavia.amphorae.backends.utils.nftable_utils.'
-                'write_nftable_rules_file')
+                'apply_nftable_rules')
     @mock.patch('octavia.amphorae.backends.agent.api_server.amphora_info.'
                 'AmphoraInfo.get_interface')
-    def test_set_interface_rules(self, mock_get_int, mock_write_rules,
-                                 mock_load_rules):
+    def test_set_interface_rules(self, mock_get_int, mock_apply_rules):
         mock_get_int.side_effect = [
             webob.Response(status=400),
             webob.Response(status=200, json={'interface': 'fake1'}),
@@ -2914,7 +2970,7 @@ class TestServerTestCase(base.TestCase):
         rv = self.ubuntu_app.put('/' + api_server.VERSION +
                                  '/interface/192.0.2.10/rules', data='fake')
         self.assertEqual(400, rv.status_code)
-        mock_write_rules.assert_not_called()
+        mock_apply_rules.assert_not_called()
 
         # Test schema validation failure
         rv = self.ubuntu_app.put('/' + api_server.VERSION +
@@ -2929,6 +2985,5 @@ class TestServerTestCase(base.TestCase):
                                  data=rules_json,
                                  content_type='application/json')
         self.assertEqual('200 OK', rv.status)
-        mock_write_rules.assert_called_once_with('fake1',
+        mock_apply_rules.assert_called_once_with('fake1',
                                                  jsonutils.loads(rules_json))
-        mock_load_rules.assert_called_once()
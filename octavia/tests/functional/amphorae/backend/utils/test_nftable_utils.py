@@ -0,0 +1,118 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import os
+import subprocess
+from unittest import mock
+
+import fixtures
+from octavia_lib.common import constants as lib_consts
+from oslotest import base
+
+from octavia.amphorae.backends.utils import nftable_utils
+from octavia.common import constants as consts
+
+
+def _rule(protocol, cidr, port):
+    return {consts.PROTOCOL: protocol, consts.CIDR: cidr, consts.PORT: port}
+
+
+class TestNFTableRules(base.BaseTestCase):
+    """Checks the generated rules with nft, without loading them.
+
+    The allowed sets are concatenated interval sets, which require nft
+    0.9.4 and Linux 5.6 or later. nft needs CAP_NET_ADMIN even to check the
+    rules, the unprivileged test runs get it in a new user and network
+    namespace.
+    """
+
+    UNSHARE_CMD = ['unshare', '--user', '--map-root-user', '--net']
+
+    OLD_RULES = [
+        _rule(lib_consts.PROTOCOL_TCP, '192.0.2.0/25', 80),
+        _rule(lib_consts.PROTOCOL_TCP, '192.0.2.128/25', 80),
+        _rule(lib_consts.PROTOCOL_TCP, '2001:db8::/64', 443),
+        _rule(lib_consts.PROTOCOL_UDP, None, 53),
+        _rule(consts.VRRP, '198.51.100.0/24', None)]
+    NEW_RULES = [
+        _rule(lib_consts.PROTOCOL_TCP, '192.0.2.0/24', 80),
+        _rule(lib_consts.PROTOCOL_TCP, '192.0.2.10/32', 8080),
+        _rule(lib_consts.PROTOCOL_SCTP, '2001:db8:1::/48', 9000),
+        _rule(consts.VRRP, '198.51.100.0/24', None)]
+
+    def setUp(self):
+        super().setUp()
+        if not os.path.exists(consts.NFT_CMD):
+            self.skipTest(f'{consts.NFT_CMD} is not installed')
+        self.cmd_prefix = []
+        if os.geteuid() != 0:
+            self.cmd_prefix = self.UNSHARE_CMD
+            try:
+                subprocess.run(self.cmd_prefix + ['true'], check=True,
+                               capture_output=True)
+            except (OSError, subprocess.CalledProcessError):
+                self.skipTest('nft needs CAP_NET_ADMIN to check the rules '
+                              'and user namespaces are not available')
+        self.rules_file = os.path.join(
+            self.useFixture(fixtures.TempDir()).path, 'nftables-vip.rules')
+        self.useFixture(fixtures.MockPatchObject(
+            consts, 'NFT_RULES_FILE', self.rules_file))
+
+    def _write_rules_file(self, rules):
+        nftable_utils.write_nftable_rules_file('eth1', rules)
+        with open(self.rules_file, encoding='utf-8') as rules_file:
+            return rules_file.read()
+
+    def _check(self, ruleset):
+        # --check runs the transaction without committing it
+        result = subprocess.run(
+            self.cmd_prefix + [consts.NFT_CMD, '--check', '-f', '-'],
+            input=ruleset, capture_output=True, encoding='utf-8',
+            check=False)
+        self.assertEqual(0, result.returncode, result.stderr)
+
+    def test_rules_file(self):
+        # The "drop all" base rules
+        self._check(self._write_rules_file([]))
+
+        self._check(self._write_rules_file(self.OLD_RULES))
+        self._check(self._write_rules_file(self.NEW_RULES))
+
+    def test_allowed_sets_update(self):
+        self._write_rules_file([])
+        ruleset = self._write_rules_file(self.OLD_RULES)
+        old_sets, _ = nftable_utils._build_allowed_sets(self.OLD_RULES)
+        new_sets, _ = nftable_utils._build_allowed_sets(self.NEW_RULES)
+
+        commands = nftable_utils._allowed_sets_commands(old_sets, new_sets)
+
+        # The elements are updated in the transaction which creates the sets
+        self.assertTrue(commands)
+        self._check(ruleset + '\n'.join(commands) + '\n')
+
+    @mock.patch.object(nftable_utils, 'load_nftables_file')
+    @mock.patch.object(nftable_utils, '_load_nft_commands')
+    def test_apply_nftable_rules(self, mock_load_commands, mock_load_file):
+        self._write_rules_file([])
+        self.addCleanup(setattr, nftable_utils, '_applied_rules', None)
+
+        nftable_utils.apply_nftable_rules('eth1', self.OLD_RULES)
+        nftable_utils.apply_nftable_rules('eth1', self.NEW_RULES)
+        nftable_utils.apply_nftable_rules('eth1', self.OLD_RULES)
+
+        # The set updates are appended to the rules file loaded on boot
+        self.assertEqual(2, mock_load_commands.call_count)
+        mock_load_file.assert_called_once_with()
+        with open(self.rules_file, encoding='utf-8') as rules_file:
+            ruleset = rules_file.read()
+        self.assertEqual(1, ruleset.count('delete table'))
+        self.assertIn('\ndelete element', ruleset)
+        self._check(ruleset)
@@ -21,6 +21,7 @@ import pecan
 import pecan.testing
 
 from octavia.api import config as pconfig
+from octavia.api.drivers import driver_factory
 from octavia.common import constants
 from octavia.common import exceptions
 from octavia.db import api as db_api
@@ -132,12 +133,16 @@ class BaseAPITest(base_db_test.OctaviaDBTestBase):
                               'BarbicanCertManager')
         self.cert_manager_mock = patcher2.start()
         self.app = self._make_app()
+        # Drop the provider drivers loaded by the app setup, the tests mock
+        # the RPC clients created when the drivers are loaded.
+        driver_factory.clear_driver_cache()
         self.project_id = uuidutils.generate_uuid()
 
         def reset_pecan():
             pecan.set_config({}, overwrite=True)
 
         self.addCleanup(reset_pecan)
+        self.addCleanup(driver_factory.clear_driver_cache)
 
     def start_quota_mock(self, object_type):
         def mock_quota(session, _class, project_id, count=1):
@@ -0,0 +1,107 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from oslo_utils import uuidutils
+from wsme.rest import json as wsme_json
+
+from octavia.api.common import renderers
+from octavia.common import constants
+from octavia.tests.functional.api.v2 import base
+
+
+class TestFastJSONResponses(base.BaseAPITest):
+    """Checks that the fast JSON responses match the WSME responses."""
+
+    def setUp(self):
+        super().setUp()
+        lb = self.create_load_balancer(
+            uuidutils.generate_uuid(), name='lb1', tags=['tag1'],
+            description=None).get('loadbalancer')
+        self.lb_id = lb.get('id')
+        self.set_lb_status(self.lb_id)
+        self.listener_id = self.create_listener(
+            constants.PROTOCOL_HTTP, 80, self.lb_id,
+            allowed_cidrs=['192.0.2.0/24']).get('listener').get('id')
+        self.set_lb_status(self.lb_id)
+        self.pool_id = self.create_pool(
+            self.lb_id, constants.PROTOCOL_HTTP,
+            constants.LB_ALGORITHM_ROUND_ROBIN,
+            listener_id=self.listener_id).get('pool').get('id')
+        self.set_lb_status(self.lb_id)
+        self.member_id = self.create_member(
+            self.pool_id, '192.0.2.20', 80,
+            monitor_address='192.0.2.21').get('member').get('id')
+        self.set_lb_status(self.lb_id)
+        self.amphora_id = uuidutils.generate_uuid()
+        self.create_amphora(self.amphora_id, self.lb_id,
+                            lb_network_ip='198.51.100.2')
+        self.session.commit()
+
+    def _make_app(self):
+        self.conf.config(group='api_settings', fast_json_responses=True)
+        return super()._make_app()
+
+    def _get_responses(self, path, params=None, status=200):
+        full_path = self._get_full_path(path)
+        with mock.patch.object(renderers, 'encode_result',
+                               wraps=renderers.encode_result) as mock_enc:
+            fast_response = self.app.get(full_path, params=params,
+                                         status=status)
+        with mock.patch.object(renderers, 'encode_result',
+                               wsme_json.encode_result):
+            wsme_response = self.app.get(full_path, params=params,
+                                         status=status)
+        return wsme_response, fast_response, mock_enc
+
+    def _assert_same_response(self, path, params=None):
+        wsme_response, fast_response, mock_enc = self._get_responses(
+            path, params=params)
+        mock_enc.assert_called_once()
+        self.assertEqual(wsme_response.content_type,
+                         fast_response.content_type)
+        self.assertEqual(wsme_response.body, fast_response.body)
+
+    def test_load_balancers(self):
+        self._assert_same_response(self.LBS_PATH)
+        self._assert_same_response(self.LB_PATH.format(lb_id=self.lb_id))
+        self._assert_same_response(self.LBS_PATH, params={'limit': 1})
+        self._assert_same_response(
+            self.LBS_PATH, params={'fields': ['id', 'vip_address', 'tags']})
+
+    def test_listeners(self):
+        self._assert_same_response(self.LISTENERS_PATH)
+        self._assert_same_response(
+            self.LISTENER_PATH.format(listener_id=self.listener_id))
+
+    def test_pools(self):
+        self._assert_same_response(self.POOLS_PATH)
+        self._assert_same_response(self.POOL_PATH.format(pool_id=self.pool_id))
+
+    def test_members(self):
+        self._assert_same_response(
+            self.MEMBERS_PATH.format(pool_id=self.pool_id))
+        self._assert_same_response(self.MEMBER_PATH.format(
+            pool_id=self.pool_id, member_id=self.member_id))
+
+    def test_amphorae(self):
+        self._assert_same_response(self.AMPHORAE_PATH)
+        self._assert_same_response(
+            self.AMPHORA_PATH.format(amphora_id=self.amphora_id))
+
+    def test_errors(self):
+        wsme_response, fast_response, mock_enc = self._get_responses(
+            self.LB_PATH.format(lb_id=uuidutils.generate_uuid()),
+            status=404)
+        mock_enc.assert_not_called()
+        self.assertEqual(wsme_response.body, fast_response.body)
@@ -1571,6 +1571,25 @@ class TestLoadBalancer(base.BaseAPITest):
             self.assertIn('project_id', lb)
             self.assertNotIn('description', lb)
 
+    def test_get_all_fields_filter_child_fields(self):
+        lb1 = self.create_load_balancer(uuidutils.generate_uuid(),
+                                        name='lb1',
+                                        project_id=self.project_id,
+                                        tags=['test_tag']).get(self.root_tag)
+
+        lbs = self.get(self.LBS_PATH, params={
+            'fields': ['id', 'vip_address', 'admin_state_up', 'tags',
+                       'listeners']}).json
+        self.assertEqual(1, len(lbs['loadbalancers']))
+        lb = lbs['loadbalancers'][0]
+        self.assertEqual(lb1['id'], lb['id'])
+        self.assertEqual(lb1['vip_address'], lb['vip_address'])
+        self.assertTrue(lb['admin_state_up'])
+        self.assertEqual(['test_tag'], lb['tags'])
+        self.assertEqual([], lb['listeners'])
+        self.assertNotIn('vip_subnet_id', lb)
+        self.assertNotIn('name', lb)
+
     def test_get_one_fields_filter(self):
         lb1 = self.create_load_balancer(
             uuidutils.generate_uuid(),
@@ -17,6 +17,7 @@ from unittest import mock
 from octavia_lib.api.drivers import data_models as driver_dm
 from oslo_config import cfg
 from oslo_config import fixture as oslo_fixture
+from oslo_db import exception as odb_exceptions
 from oslo_utils import uuidutils
 from sqlalchemy.orm import exc as sa_exception
 
@@ -804,6 +805,38 @@ class TestMember(base.BaseAPITest):
             err_msg = 'Subnet ' + subnet_id + ' not found.'
             self.assertEqual(response.get('faultstring'), err_msg)
 
+    def test_create_batch_members_db_errors(self):
+        member5 = {'address': '192.0.2.5', 'protocol_port': 80}
+        member6 = {'address': '192.0.2.6', 'protocol_port': 81}
+        body = {self.root_tag_list: [member5, member6]}
+        path = self.MEMBERS_PATH.format(pool_id=self.pool_id)
+
+        with mock.patch('octavia.db.repositories.MemberRepository.'
+                        'create_batch') as mock_create_batch:
+            # Created by a concurrent request
+            mock_create_batch.side_effect = odb_exceptions.DBDuplicateEntry(
+                value=self.pool_id + '-192.0.2.6-81')
+            response = self.put(path, body, status=409).json
+            self.assertIn('ip 192.0.2.6 on protocol_port 81',
+                          response.get('faultstring'))
+
+            # Only the exact address and port match
+            mock_create_batch.side_effect = odb_exceptions.DBDuplicateEntry(
+                value=self.pool_id + ', 192.0.2.5, 81')
+            response = self.put(path, body, status=409).json
+            self.assertIn('a member of the batch',
+                          response.get('faultstring'))
+
+            mock_create_batch.side_effect = odb_exceptions.DBDuplicateEntry()
+            response = self.put(path, body, status=409).json
+            self.assertIn('a member of the batch',
+                          response.get('faultstring'))
+
+            mock_create_batch.side_effect = odb_exceptions.DBReferenceError(
+                'table', 'constraint', 'pool_id', 'pool')
+            response = self.put(path, body, status=400).json
+            self.assertIn(self.pool_id, response.get('faultstring'))
+
     def test_create_batch_members_with_invalid_address(self):
         # 169.254.169.254 is the default invalid member address
         member5 = {'address': '169.254.169.254',
@@ -18,6 +18,7 @@ from oslo_config import fixture as oslo_fixture
 from oslo_db.sqlalchemy import enginefacade
 from oslotest import base as test_base
 
+from octavia.common import cache
 from octavia.common import config
 from octavia.common import constants
 from octavia.db import api as db_api
@@ -64,6 +65,7 @@ class OctaviaDBTestBase(test_base.BaseTestCase):
                 os.remove(connection_string.replace('sqlite:///', ''))
 
         self.addCleanup(clear_tables)
+        self.addCleanup(cache.clear_all)
 
     def _get_db_engine_session(self):
         # We need to get our own Facade so that the file backed sqlite tests
@@ -662,6 +662,112 @@ class AllRepositoriesTest(base.OctaviaDBTestBase):
                 for fut in futs:
                     fut.result()
 
+    def test_check_quota_met_optimistic(self):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group='api_settings', auth_strategy=constants.TESTING)
+        conf.config(group='quotas', optimistic_quota_accounting=True)
+        conf.config(group='quotas', default_member_quota=2)
+        project_id = uuidutils.generate_uuid()
+
+        self.assertFalse(self.repos.check_quota_met(
+            self.session, data_models.Member, project_id))
+        self.session.commit()
+        self.assertTrue(self.repos.check_quota_met(
+            self.session, data_models.Member, project_id, count=2))
+        self.session.commit()
+        self.assertEqual(1, self.repos.quotas.get(
+            self.session, project_id=project_id).in_use_member)
+
+        # The usage is reverted when the session is rolled back
+        self.assertFalse(self.repos.check_quota_met(
+            self.session, data_models.Member, project_id))
+        self.session.rollback()
+        self.assertEqual(1, self.repos.quotas.get(
+            self.session, project_id=project_id).in_use_member)
+        self.session.commit()
+
+        # Project specific quota and unlimited quota
+        self.repos.quotas.update(self.session, project_id,
+                                 quota={'member': constants.QUOTA_UNLIMITED})
+        self.session.commit()
+        self.assertFalse(self.repos.check_quota_met(
+            self.session, data_models.Member, project_id, count=10))
+        self.session.commit()
+        self.assertEqual(11, self.repos.quotas.get(
+            self.session, project_id=project_id).in_use_member)
+
+        # Non-quota object
+        self.assertFalse(self.repos.check_quota_met(
+            self.session, data_models.SessionPersistence, project_id))
+
+    def test_check_quota_met_optimistic_upgrade(self):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group='api_settings', auth_strategy=constants.TESTING)
+        conf.config(group='quotas', optimistic_quota_accounting=True)
+        conf.config(group='quotas', default_load_balancer_quota=2)
+        project_id = uuidutils.generate_uuid()
+        self.repos.load_balancer.create(
+            self.session, id=uuidutils.generate_uuid(),
+            project_id=project_id, provisioning_status=constants.ACTIVE,
+            operating_status=constants.ONLINE, enabled=True)
+        self.session.commit()
+
+        # The existing load balancer is counted in the seeded usage
+        self.assertFalse(self.repos.check_quota_met(
+            self.session, data_models.LoadBalancer, project_id))
+        self.session.commit()
+        self.assertTrue(self.repos.check_quota_met(
+            self.session, data_models.LoadBalancer, project_id))
+        self.session.commit()
+        self.assertEqual(2, self.repos.quotas.get(
+            self.session, project_id=project_id).in_use_load_balancer)
+
+    def test_check_quota_met_optimistic_deadlock(self):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group='api_settings', auth_strategy=constants.TESTING)
+        conf.config(group='quotas', optimistic_quota_accounting=True)
+        conf.config(group='quotas', optimistic_quota_max_retries=1)
+        project_id = uuidutils.generate_uuid()
+
+        self.repos.quotas.ensure_project_exists(project_id)
+        with mock.patch.object(self.repos.quotas, 'ensure_project_exists'):
+            with mock.patch('octavia.db.api.session') as mock_sessionmaker:
+                mock_begin = mock_sessionmaker.return_value.begin
+                mock_begin.return_value.__enter__.side_effect = (
+                    db_exception.DBDeadlock)
+                self.assertRaises(exceptions.ProjectBusyException,
+                                  self.repos.check_quota_met,
+                                  self.session, data_models.LoadBalancer,
+                                  project_id)
+        self.assertEqual(2, mock_begin.call_count)
+
+    def test_check_quota_met_optimistic_concurrency(self):
+        # Concurrent transactions are not supported by sqlite
+        if 'sqlite://' in self.connection_string:
+            self.skipTest("The test for concurrent quota checks doesn't "
+                          "work with the sqlite backend")
+
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group='api_settings', auth_strategy=constants.TESTING)
+        conf.config(group='quotas', optimistic_quota_accounting=True)
+        conf.config(group='quotas', default_member_quota=50)
+        project_id = uuidutils.generate_uuid()
+
+        def _test_check_quota_met(_):
+            session = self.get_session()
+            session.begin()
+            quota_met = self.repos.check_quota_met(
+                session, data_models.Member, project_id)
+            session.commit()
+            return quota_met
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(_test_check_quota_met, range(100)))
+
+        self.assertEqual(50, results.count(False))
+        self.assertEqual(50, self.repos.quotas.get(
+            self.session, project_id=project_id).in_use_member)
+
     def test_check_quota_met(self):
 
         project_id = uuidutils.generate_uuid()
@@ -2141,6 +2247,49 @@ class AllRepositoriesTest(base.OctaviaDBTestBase):
             self.session, project_id=project_id).in_use_l7rule)
         conf.config(group='api_settings', auth_strategy=constants.TESTING)
 
+    def test_decrement_quota_optimistic(self):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group='api_settings', auth_strategy=constants.TESTING)
+        conf.config(group='quotas', optimistic_quota_accounting=True)
+        project_id = uuidutils.generate_uuid()
+        self.repos.quotas.update(self.session, project_id,
+                                 quota={'in_use_pool': 2})
+        self.session.commit()
+
+        self.repos.decrement_quota(self.session, data_models.Pool,
+                                   project_id)
+        self.session.commit()
+        self.assertEqual(1, self.repos.quotas.get(
+            self.session, project_id=project_id).in_use_pool)
+
+        # The decrement is reverted when the session is rolled back
+        self.repos.decrement_quota(self.session, data_models.Pool,
+                                   project_id)
+        self.session.rollback()
+        self.assertEqual(1, self.repos.quotas.get(
+            self.session, project_id=project_id).in_use_pool)
+        self.session.commit()
+
+        self.repos.decrement_quota(self.session, data_models.Pool,
+                                   project_id)
+        self.session.commit()
+        # Decrementing an unused quota doesn't go negative
+        self.repos.decrement_quota(self.session, data_models.Pool,
+                                   project_id)
+        self.session.commit()
+        self.assertEqual(0, self.repos.quotas.get(
+            self.session, project_id=project_id).in_use_pool)
+
+        # Decrementing more than the used quota doesn't go negative either
+        self.repos.quotas.update(self.session, project_id,
+                                 quota={'in_use_pool': 1})
+        self.session.commit()
+        self.repos.decrement_quota(self.session, data_models.Pool,
+                                   project_id, quantity=3)
+        self.session.commit()
+        self.assertEqual(1, self.repos.quotas.get(
+            self.session, project_id=project_id).in_use_pool)
+
     def test_get_amphora_stats(self):
         listener2_id = uuidutils.generate_uuid()
         self.repos.listener_stats.create(
@@ -2582,6 +2731,77 @@ class MemberRepositoryTest(BaseRepositoryTest):
         self.assertEqual(constants.OFFLINE, new_member1.operating_status)
         self.assertEqual(constants.OFFLINE, new_member2.operating_status)
 
+    def _member_dict(self, member_id, ip_address, **kwargs):
+        member_dict = {'id': member_id, 'project_id': self.FAKE_UUID_2,
+                       'pool_id': self.pool.id, 'ip_address': ip_address,
+                       'protocol_port': 80,
+                       'operating_status': constants.ONLINE,
+                       'provisioning_status': constants.PENDING_CREATE,
+                       'enabled': True, 'backup': False}
+        member_dict.update(kwargs)
+        return member_dict
+
+    def test_create_batch(self):
+        members = self.member_repo.create_batch(
+            self.session,
+            [self._member_dict(self.FAKE_UUID_4, "192.0.2.1",
+                               tags=['tag1', 'tag2']),
+             self._member_dict(self.FAKE_UUID_3, "192.0.2.2", weight=5)])
+        self.session.commit()
+        self.assertEqual([self.FAKE_UUID_4, self.FAKE_UUID_3],
+                         [m.id for m in members])
+        self.assertIsInstance(members[0], data_models.Member)
+        new_member1 = self.member_repo.get(self.session, id=self.FAKE_UUID_4)
+        new_member2 = self.member_repo.get(self.session, id=self.FAKE_UUID_3)
+        self.assertEqual("192.0.2.1", new_member1.ip_address)
+        self.assertCountEqual(['tag1', 'tag2'], new_member1.tags)
+        self.assertEqual(5, new_member2.weight)
+        self.assertEqual([], new_member2.tags)
+
+    def test_update_batch(self):
+        member1 = self.create_member(self.FAKE_UUID_4, self.FAKE_UUID_2,
+                                     self.pool.id, "192.0.2.1")
+        member2 = self.create_member(self.FAKE_UUID_3, self.FAKE_UUID_2,
+                                     self.pool.id, "192.0.2.2")
+        self.member_repo.update_batch(
+            self.session,
+            {member1.id: {'weight': 3, 'tags': ['tag1']},
+             member2.id: {'provisioning_status': constants.PENDING_UPDATE}})
+        self.session.commit()
+        new_member1 = self.member_repo.get(self.session, id=member1.id)
+        new_member2 = self.member_repo.get(self.session, id=member2.id)
+        self.assertEqual(3, new_member1.weight)
+        self.assertEqual(['tag1'], new_member1.tags)
+        self.assertEqual(constants.ACTIVE, new_member1.provisioning_status)
+        self.assertEqual(constants.PENDING_UPDATE,
+                         new_member2.provisioning_status)
+
+    def test_update_members_by_ids(self):
+        member1 = self.create_member(self.FAKE_UUID_1, self.FAKE_UUID_2,
+                                     self.pool.id, "192.0.2.1")
+        member2 = self.create_member(self.FAKE_UUID_3, self.FAKE_UUID_2,
+                                     self.pool.id, "192.0.2.2")
+        self.member_repo.update_members_by_ids(
+            self.session, [member1.id],
+            provisioning_status=constants.PENDING_DELETE)
+        self.session.commit()
+        new_member1 = self.member_repo.get(self.session, id=member1.id)
+        new_member2 = self.member_repo.get(self.session, id=member2.id)
+        self.assertEqual(constants.PENDING_DELETE,
+                         new_member1.provisioning_status)
+        self.assertEqual(constants.ACTIVE, new_member2.provisioning_status)
+
+    def test_get_members_by_ids(self):
+        member1 = self.create_member(self.FAKE_UUID_1, self.FAKE_UUID_2,
+                                     self.pool.id, "192.0.2.1")
+        self.create_member(self.FAKE_UUID_3, self.FAKE_UUID_2,
+                           self.pool.id, "192.0.2.2")
+        members = self.member_repo.get_members_by_ids(self.session,
+                                                      [member1.id])
+        self.assertEqual(1, len(members))
+        self.assertEqual(member1.id, members[0].id)
+        self.assertIsNone(members[0].pool)
+
 
 class SessionPersistenceRepositoryTest(BaseRepositoryTest):
 
@@ -3313,6 +3533,29 @@ class LoadBalancerRepositoryTest(BaseRepositoryTest):
         self.assertEqual(lb_two.id, lb_list[1].id)
         self.assertEqual(lb_two.project_id, lb_list[1].project_id)
 
+    def test_get_all_API_list_fields(self):
+        self.create_loadbalancer(self.FAKE_UUID_1)
+        self.vip_repo.create(self.session, load_balancer_id=self.FAKE_UUID_1,
+                             ip_address='192.0.2.1')
+        self.session.commit()
+
+        lb_list, _ = self.lb_repo.get_all_API_list(
+            self.session, fields={'id', 'provisioning_status', 'tags'},
+            project_id=self.FAKE_UUID_2)
+        self.assertEqual(1, len(lb_list))
+        self.assertEqual(self.FAKE_UUID_1, lb_list[0].id)
+        self.assertEqual(constants.ACTIVE, lb_list[0].provisioning_status)
+        self.assertEqual(['test_tag'], lb_list[0].tags)
+        self.assertIsNone(lb_list[0].name)
+        self.assertIsNone(lb_list[0].vip)
+
+        lb_list, _ = self.lb_repo.get_all_API_list(
+            self.session, fields={'vip.ip_address'},
+            project_id=self.FAKE_UUID_2)
+        self.assertEqual(self.FAKE_UUID_1, lb_list[0].id)
+        self.assertEqual('192.0.2.1', lb_list[0].vip.ip_address)
+        self.assertEqual([], lb_list[0].tags)
+
     def test_create(self):
         lb = self.create_loadbalancer(self.FAKE_UUID_1)
         self.assertEqual(self.FAKE_UUID_1, lb.id)
@@ -3903,6 +4146,52 @@ class AmphoraRepositoryTest(BaseRepositoryTest):
         self.assertIsNotNone(new_amphora)
         self.assertIsInstance(new_amphora, data_models.Amphora)
 
+    def test_allocate_and_associate_flavor_zone(self):
+        self.create_amphora(self.FAKE_UUID_1, status=constants.AMPHORA_READY,
+                            compute_flavor='flavor1', cached_zone='az1')
+        self.create_amphora(self.FAKE_UUID_2, status=constants.AMPHORA_READY,
+                            compute_flavor='flavor2', cached_zone='az1')
+
+        new_amphora = self.amphora_repo.allocate_and_associate(
+            self.session, self.lb.id, availability_zone='az2',
+            compute_flavor='flavor1')
+        self.assertIsNone(new_amphora)
+        new_amphora = self.amphora_repo.allocate_and_associate(
+            self.session, self.lb.id, availability_zone='az1',
+            compute_flavor='flavor2')
+        self.assertEqual(self.FAKE_UUID_2, new_amphora.id)
+        self.assertEqual(self.lb.id, new_amphora.load_balancer_id)
+        self.assertEqual(constants.AMPHORA_ALLOCATED, new_amphora.status)
+
+    def test_get_spare_amphora_counts(self):
+        self.assertEqual({},
+                         self.amphora_repo.get_spare_amphora_counts(
+                             self.session))
+        self.create_amphora(self.FAKE_UUID_1, status=constants.AMPHORA_READY,
+                            compute_flavor='flavor1', cached_zone='az1')
+        self.create_amphora(self.FAKE_UUID_2,
+                            status=constants.PENDING_CREATE,
+                            compute_flavor='flavor1', cached_zone='az1')
+        self.create_amphora(self.FAKE_UUID_3,
+                            status=constants.AMPHORA_BOOTING,
+                            compute_flavor='flavor1')
+        self.create_amphora(self.FAKE_UUID_4, status=constants.ERROR,
+                            compute_flavor='flavor1')
+        self.create_amphora(self.FAKE_UUID_5, status=constants.AMPHORA_READY,
+                            compute_flavor='flavor1', cached_zone='az1',
+                            load_balancer_id=self.lb.id)
+
+        expected_counts = {('flavor1', 'az1'): 2, ('flavor1', None): 1}
+        self.assertEqual(expected_counts,
+                         self.amphora_repo.get_spare_amphora_counts(
+                             self.session))
+
+        # Without zones, a spare in a zone is in the pool of its flavor
+        expected_counts = {('flavor1', None): 3}
+        self.assertEqual(expected_counts,
+                         self.amphora_repo.get_spare_amphora_counts(
+                             self.session, by_zone=False))
+
     def test_get_lb_for_amphora(self):
         amphora = self.create_amphora(self.FAKE_UUID_1)
         self.amphora_repo.associate(self.session, self.lb.id, amphora.id)
@@ -4072,6 +4361,29 @@ class AmphoraRepositoryTest(BaseRepositoryTest):
                           self.session, amphora.id)
 
 
+class SparesPoolRepositoryTest(BaseRepositoryTest):
+
+    def setUp(self):
+        super().setUp()
+        self.spares_pool_repo = repo.SparesPoolRepository()
+
+    def test_get_for_update(self):
+        spares_pool = self.spares_pool_repo.get_for_update(self.session)
+        self.assertIsNotNone(spares_pool.updated_at)
+        updated_at = spares_pool.updated_at
+        self.session.commit()
+
+        spares_pool = self.spares_pool_repo.get_for_update(self.session)
+        self.assertEqual(updated_at, spares_pool.updated_at)
+        spares_pool.updated_at = updated_at + datetime.timedelta(seconds=30)
+        self.session.commit()
+
+        spares_pool = self.spares_pool_repo.get_for_update(self.session)
+        self.assertEqual(updated_at + datetime.timedelta(seconds=30),
+                         spares_pool.updated_at)
+        self.assertEqual(1, self.session.query(db_models.SparesPool).count())
+
+
 class AmphoraHealthRepositoryTest(BaseRepositoryTest):
     def setUp(self):
         super().setUp()
@@ -5292,6 +5604,32 @@ class FlavorRepositoryTest(BaseRepositoryTest):
                           self.flavor_repo.get_flavor_metadata_dict,
                           self.session, self.FAKE_UUID_1)
 
+    def test_get_flavor_metadata_dict_cached(self):
+        flavor = self.create_flavor(flavor_id=self.FAKE_UUID_2, name='fl1')
+        flavor_metadata_dict = self.flavor_repo.get_flavor_metadata_dict(
+            self.session, self.FAKE_UUID_2)
+        self.assertEqual({'image': 'ubuntu'}, flavor_metadata_dict)
+
+        # Callers get their own copy of the metadata
+        flavor_metadata_dict['image'] = 'centos'
+        self.flavor_profile_repo.update(
+            self.session, flavor.flavor_profile_id,
+            flavor_data='{"image": "fedora"}')
+        self.session.commit()
+        flavor_metadata_dict = self.flavor_repo.get_flavor_metadata_dict(
+            self.session, self.FAKE_UUID_2)
+        self.assertEqual({'image': 'ubuntu'}, flavor_metadata_dict)
+
+        # Deleting the flavor invalidates the cached metadata once committed
+        self.flavor_repo.delete(self.session, id=self.FAKE_UUID_2)
+        self.assertEqual({'image': 'ubuntu'},
+                         self.flavor_repo.get_flavor_metadata_dict(
+                             self.session, self.FAKE_UUID_2))
+        self.session.commit()
+        self.assertRaises(sa_exception.NoResultFound,
+                          self.flavor_repo.get_flavor_metadata_dict,
+                          self.session, self.FAKE_UUID_2)
+
     def test_get_flavor_provider(self):
         self.create_flavor(flavor_id=self.FAKE_UUID_2, name='fl1')
         provider_name = self.flavor_repo.get_flavor_provider(self.session,
@@ -11,10 +11,14 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import collections
 import os
 import random
+import subprocess
 from unittest import mock
 
+from oslo_config import cfg
+from oslo_config import fixture as oslo_fixture
 from oslo_utils import uuidutils
 
 from octavia.amphorae.backends.agent import api_server
@@ -448,3 +452,81 @@ class TestAmphoraInfo(base.TestCase):
         result = self.amp_info._get_networks()
 
         self.assertEqual(expected_result, result)
+
+    @mock.patch('subprocess.check_output', return_value='2.8.1')
+    def test__get_version_of_installed_package(self, mock_check_output):
+        self.osutils_mock.cmd_get_version_of_installed_package.return_value = (
+            'dpkg-query -W -f=${Version} haproxy')
+
+        self.assertEqual(
+            '2.8.1', self.amp_info._get_version_of_installed_package(
+                'haproxy'))
+        self.assertEqual(1, self.amp_info._request.subprocess_count)
+        # The installed packages only change with a new amphora image
+        self.assertEqual(
+            '2.8.1', self.amp_info._get_version_of_installed_package(
+                'haproxy'))
+
+        mock_check_output.assert_called_once_with(
+            ['dpkg-query', '-W', '-f=${Version}', 'haproxy'],
+            encoding='utf-8')
+        self.assertEqual(1, self.amp_info._request.subprocess_count)
+
+    @mock.patch('subprocess.check_output')
+    def test__get_version_of_installed_package_error(self,
+                                                     mock_check_output):
+        self.osutils_mock.cmd_get_version_of_installed_package.return_value = (
+            'rpm -q --queryformat %{VERSION} haproxy')
+        mock_check_output.side_effect = [
+            subprocess.CalledProcessError(1, 'rpm'), '2.8.1']
+
+        self.assertRaises(subprocess.CalledProcessError,
+                          self.amp_info._get_version_of_installed_package,
+                          'haproxy')
+        # The failures are not cached
+        self.assertEqual(
+            '2.8.1', self.amp_info._get_version_of_installed_package(
+                'haproxy'))
+
+    @mock.patch('os.statvfs')
+    @mock.patch('octavia.amphorae.backends.agent.api_server.'
+                'amphora_info.AmphoraInfo._get_active_tuned_profiles',
+                return_value='')
+    @mock.patch('octavia.amphorae.backends.agent.api_server.'
+                'amphora_info.AmphoraInfo._load')
+    @mock.patch('octavia.amphorae.backends.agent.api_server.'
+                'amphora_info.AmphoraInfo._get_networks', return_value={})
+    @mock.patch('octavia.amphorae.backends.agent.api_server.'
+                'amphora_info.AmphoraInfo._cpu')
+    @mock.patch('octavia.amphorae.backends.agent.api_server.'
+                'amphora_info.AmphoraInfo._get_meminfo')
+    @mock.patch('octavia.amphorae.backends.agent.api_server.'
+                'amphora_info.AmphoraInfo._get_version_of_installed_package',
+                return_value='2.8.1')
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                'get_listeners', return_value=[])
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                'get_loadbalancers', return_value=[])
+    def test_compile_amphora_details_host_facts_cached(
+            self, mock_get_lbs, mock_get_listeners, mock_pkg_version,
+            mock_meminfo, mock_cpu, mock_networks, mock_load, mock_tuned,
+            mock_statvfs):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        mock_meminfo.return_value = collections.defaultdict(int)
+        mock_cpu.return_value = collections.defaultdict(int)
+        mock_statvfs.return_value = mock.MagicMock(
+            f_blocks=2, f_bfree=1, f_frsize=4096, f_bavail=1)
+        mock_load.side_effect = [['0.09', '0.11', '0.10'],
+                                 ['0.12', '0.11', '0.10']]
+
+        details1 = self.amp_info.compile_amphora_details().json
+        details2 = self.amp_info.compile_amphora_details().json
+
+        self.assertEqual(details1, details2)
+        mock_meminfo.assert_called_once_with()
+        mock_networks.assert_called_once_with()
+
+        # A TTL of 0 disables the cache
+        conf.config(group='amphora_agent', host_facts_cache_ttl=0)
+        details3 = self.amp_info.compile_amphora_details().json
+        self.assertEqual(['0.12', '0.11', '0.10'], details3['load'])
@@ -0,0 +1,134 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import os
+import subprocess
+import time
+
+import fixtures
+from oslo_config import cfg
+from oslo_config import fixture as oslo_fixture
+
+from octavia.amphorae.backends.agent.api_server import haproxy_validation
+from octavia.common import constants as consts
+import octavia.tests.unit.base as base
+
+CONFIG_PATH = '/var/lib/octavia/123/haproxy.cfg.new'
+
+
+class TestHAProxyValidation(base.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        self.cert_dir = self.useFixture(fixtures.TempDir()).path
+        self.mock_check_output = self.useFixture(fixtures.MockPatch(
+            'subprocess.check_output')).mock
+        self.haproxy_path = os.path.join(
+            self.useFixture(fixtures.TempDir()).path, 'haproxy')
+        with open(self.haproxy_path, 'w') as f:
+            f.write('haproxy')
+        self.mock_which = self.useFixture(fixtures.MockPatch(
+            'shutil.which', return_value=self.haproxy_path)).mock
+
+    def _validate(self, config='config', peer_name='peer'):
+        return haproxy_validation.validate_config(
+            CONFIG_PATH, config, peer_name, self.cert_dir)
+
+    def _get_config_digest(self, config='config', peer_name='peer',
+                           cert_dir=None):
+        return haproxy_validation.get_config_digest(
+            config, peer_name, cert_dir or self.cert_dir, self.haproxy_path)
+
+    def test_get_haproxy_path(self):
+        self.assertEqual(self.haproxy_path,
+                         haproxy_validation.get_haproxy_path())
+        self.mock_which.assert_called_once_with('haproxy')
+
+        self.mock_which.return_value = None
+        self.assertEqual('haproxy', haproxy_validation.get_haproxy_path())
+
+    def test_get_config_digest(self):
+        digest = self._get_config_digest()
+
+        self.assertEqual(digest, self._get_config_digest())
+        self.assertNotEqual(digest, self._get_config_digest(config='config2'))
+        self.assertNotEqual(digest, self._get_config_digest(peer_name='peer2'))
+
+        # An updated haproxy binary changes the digest
+        with open(self.haproxy_path, 'w') as f:
+            f.write('new haproxy')
+        self.assertNotEqual(digest, self._get_config_digest())
+        digest = self._get_config_digest()
+
+        # A new or updated certificate changes the digest
+        cert_path = os.path.join(self.cert_dir, 'cert.pem')
+        with open(cert_path, 'w') as f:
+            f.write('cert')
+        digest = self._get_config_digest()
+        self.assertNotEqual(digest, self._get_config_digest(
+            cert_dir=os.path.join(self.cert_dir, 'missing')))
+        with open(cert_path, 'w') as f:
+            f.write('new cert')
+        self.assertNotEqual(digest, self._get_config_digest())
+
+    def test_validate_config(self):
+        duration, cached = self._validate()
+
+        self.assertFalse(cached)
+        self.assertGreaterEqual(duration, 0)
+        # The validation is not limited in time by default
+        self.mock_check_output.assert_called_once_with(
+            [self.haproxy_path, '-c', '-L', 'peer', '-f', CONFIG_PATH, '-f',
+             consts.HAPROXY_USER_GROUP_CFG],
+            stderr=subprocess.STDOUT, encoding='utf-8', timeout=None)
+
+        # An identical configuration is not checked again
+        self.mock_check_output.reset_mock()
+        self.assertTrue(self._validate()[1])
+        self.mock_check_output.assert_not_called()
+
+        self.assertFalse(self._validate(config='config2')[1])
+        self.mock_check_output.assert_called_once()
+
+    def test_validate_config_cache_disabled(self):
+        self.conf.config(group='amphora_agent',
+                         haproxy_validation_cache_ttl=0)
+
+        self.assertFalse(self._validate()[1])
+        self.assertFalse(self._validate()[1])
+        self.assertEqual(2, self.mock_check_output.call_count)
+
+    def test_validate_config_invalid(self):
+        self.mock_check_output.side_effect = subprocess.CalledProcessError(
+            1, 'haproxy', output='error')
+
+        self.assertRaises(subprocess.CalledProcessError, self._validate)
+        # The failures are not cached
+        self.assertRaises(subprocess.CalledProcessError, self._validate)
+        self.assertEqual(2, self.mock_check_output.call_count)
+
+    def test_validate_config_timeout(self):
+        self.conf.config(group='amphora_agent',
+                         haproxy_validation_timeout=30)
+        self.mock_check_output.side_effect = subprocess.TimeoutExpired(
+            'haproxy', 30)
+
+        self.assertRaises(subprocess.TimeoutExpired, self._validate)
+        timeout = self.mock_check_output.call_args[1]['timeout']
+        self.assertGreater(timeout, 0)
+        self.assertLessEqual(timeout, 30)
+
+    def test_run_check_expired(self):
+        self.assertRaises(subprocess.TimeoutExpired,
+                          haproxy_validation._run_check, ['haproxy', '-c'],
+                          time.monotonic() - 1)
+        self.mock_check_output.assert_not_called()
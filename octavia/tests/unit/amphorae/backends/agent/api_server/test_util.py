@@ -11,10 +11,15 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 #    under the License.
+import fcntl
+import io
+import json
 import os
 import subprocess
+import threading
 from unittest import mock
 
+import fixtures
 from oslo_config import cfg
 from oslo_config import fixture as oslo_fixture
 from oslo_utils import uuidutils
@@ -119,7 +124,7 @@ class TestUtil(base.TestCase):
         m = mock.mock_open()
         with mock.patch('os.open'), mock.patch.object(os, 'fdopen', m):
 
-            util.install_netns_systemd_service()
+            self.assertTrue(util.install_netns_systemd_service())
 
         mock_jinja2_env.assert_called_with(autoescape=True,
                                            loader='fake_loader')
@@ -134,7 +139,7 @@ class TestUtil(base.TestCase):
         # Test file exists path we don't over write
         mock_jinja_env.get_template.reset_mock()
         mock_os_path.exists.return_value = True
-        util.install_netns_systemd_service()
+        self.assertFalse(util.install_netns_systemd_service())
         self.assertFalse(mock_jinja_env.get_template.called)
 
     @mock.patch('subprocess.check_output')
@@ -266,6 +271,9 @@ class TestUtil(base.TestCase):
         self.assertRaises(util.ParsingError, util.parse_haproxy_file,
                           LISTENER_ID1)
 
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                '_write_vrrp_check_targets')
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.lock')
     @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
                 'get_lvs_listeners')
     @mock.patch('os.makedirs')
@@ -278,7 +286,8 @@ class TestUtil(base.TestCase):
                 '.haproxy_sock_path')
     def test_vrrp_check_script_update(self, mock_sock_path, mock_get_lbs,
                                       mock_join, mock_listdir, mock_exists,
-                                      mock_makedirs, mock_get_listeners):
+                                      mock_makedirs, mock_get_listeners,
+                                      mock_lock, mock_write_targets):
         mock_get_lbs.return_value = ['abc', LB_ID1]
         mock_sock_path.return_value = 'listener.sock'
         mock_exists.side_effect = [False, False, True]
@@ -294,6 +303,7 @@ class TestUtil(base.TestCase):
 
         handle = m()
         handle.write.assert_called_once_with(cmd)
+        mock_write_targets.assert_called_once_with(['listener.sock'])
 
         # Test the start action path
         cmd = ('haproxy-vrrp-check ' + ' '.join(['listener.sock',
@@ -313,9 +323,116 @@ class TestUtil(base.TestCase):
 
         handle = m()
         handle.write.assert_called_once_with(cmd)
+        mock_write_targets.assert_called_with(None)
         mock_makedirs.assert_has_calls(
             [mock.call(util.keepalived_dir(), exist_ok=True),
              mock.call(util.keepalived_check_scripts_dir(), exist_ok=True)])
+        mock_lock.assert_called_with(util.VRRP_LOCK)
+
+    def test_write_vrrp_check_targets(self):
+        base_path = self.useFixture(fixtures.TempDir()).path
+        self.CONF.config(group="haproxy_amphora", base_path=base_path)
+        os.makedirs(util.keepalived_dir())
+
+        util._write_vrrp_check_targets(['lb1.sock', 'lb2.sock'])
+        with open(util.vrrp_check_targets_path()) as f:
+            self.assertEqual({'haproxy_sockets': ['lb1.sock', 'lb2.sock']},
+                             json.load(f))
+
+        util._write_vrrp_check_targets(None)
+        with open(util.vrrp_check_targets_path()) as f:
+            self.assertEqual({'haproxy_sockets': None}, json.load(f))
+        self.assertEqual(['check_targets.json'],
+                         os.listdir(util.keepalived_dir()))
+
+    def test_lock(self):
+        base_path = self.useFixture(fixtures.TempDir()).path
+        self.CONF.config(group="haproxy_amphora", base_path=base_path)
+        events = []
+
+        def _locked(name, event):
+            with util.lock(name):
+                events.append(f'start {event}')
+                # Let the other thread try to get the lock
+                started.set()
+                done.wait(0.2)
+                events.append(f'end {event}')
+
+        started = threading.Event()
+        done = threading.Event()
+        thread = threading.Thread(target=_locked, args=(LB_ID1, 'thread'))
+        thread.start()
+        started.wait()
+        with util.lock(LB_ID1):
+            events.append('main')
+        thread.join()
+
+        # The operations on a load balancer are serialized
+        self.assertEqual(['start thread', 'end thread', 'main'], events)
+        self.assertTrue(os.path.exists(os.path.join(base_path, 'locks',
+                                                    LB_ID1 + '.lock')))
+
+        # The operations on another load balancer are not
+        events.clear()
+        started.clear()
+        thread = threading.Thread(target=_locked, args=(LB_ID1, 'thread'))
+        thread.start()
+        started.wait()
+        with util.lock('other-lb'):
+            events.append('main')
+        done.set()
+        thread.join()
+        self.assertEqual(['start thread', 'main', 'end thread'], events)
+
+    def test_lock_reentrant(self):
+        base_path = self.useFixture(fixtures.TempDir()).path
+        self.CONF.config(group="haproxy_amphora", base_path=base_path)
+        result = []
+
+        def _nested():
+            with util.lock(util.VRRP_LOCK):
+                with util.lock(util.VRRP_LOCK):
+                    result.append('nested')
+                # The lock is still held by the outer block
+                result.append(self._flock_free(util.VRRP_LOCK))
+            result.append(self._flock_free(util.VRRP_LOCK))
+
+        thread = threading.Thread(target=_nested, daemon=True)
+        thread.start()
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(['nested', False, True], result)
+
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                '_vrrp_check_script_update')
+    def test_vrrp_check_script_update_locked(self, mock_update):
+        base_path = self.useFixture(fixtures.TempDir()).path
+        self.CONF.config(group="haproxy_amphora", base_path=base_path)
+
+        def _update():
+            # As the keepalived config upload of the agent
+            with util.lock(util.VRRP_LOCK):
+                util.vrrp_check_script_update(LB_ID1, 'start')
+
+        thread = threading.Thread(target=_update, daemon=True)
+        thread.start()
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        mock_update.assert_called_once_with(LB_ID1, 'start')
+
+    @staticmethod
+    def _flock_free(name):
+        # Whether another open file can flock the lock file
+        fd = os.open(util.lock_path(name), os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        finally:
+            os.close(fd)
+        return True
 
     @mock.patch('octavia.amphorae.backends.agent.api_server.util.config_path')
     def test_get_haproxy_vip_addresses(self, mock_cfg_path):
@@ -515,3 +632,121 @@ class TestUtil(base.TestCase):
         mock_get_int_name.side_effect = Exception('ERROR')
         util.send_member_advertisements(fixed_ips)
         mock_send_advert.assert_not_called()
+
+    def test_write_file_if_changed(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path, 'file')
+
+        self.assertTrue(util.write_file_if_changed(path, 'data'))
+        self.assertFalse(util.write_file_if_changed(path, 'data'))
+        self.assertTrue(util.write_file_if_changed(path, 'other data'))
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual('other data', f.read())
+
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                '_PROJECT_ID', None)
+    @mock.patch('urllib.request.urlopen')
+    def test_get_project_id(self, mock_urlopen):
+        mock_urlopen.return_value.__enter__.return_value = io.StringIO(
+            '{"project_id": "project1"}')
+
+        self.assertEqual('project1', util.get_project_id())
+        self.assertEqual('project1', util.get_project_id())
+        # The metadata service is only queried once
+        mock_urlopen.assert_called_once_with(util.METADATA_URL)
+
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                '_PROJECT_ID', None)
+    @mock.patch('urllib.request.urlopen')
+    def test_get_project_id_missing(self, mock_urlopen):
+        mock_urlopen.return_value.__enter__.return_value = io.StringIO('{}')
+
+        self.assertRaises(ValueError, util.get_project_id)
+        self.assertIsNone(util._PROJECT_ID)
+
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                'get_project_id', return_value='project1')
+    def test_update_alloy_configuration(self, mock_get_project_id):
+        tmp_dir = self.useFixture(fixtures.TempDir()).path
+        paths = {
+            'ALLOY_CONFIG_PATH': os.path.join(tmp_dir, 'config.alloy'),
+            'ALLOY_ENVIRONMENT_PATH': os.path.join(tmp_dir, 'environment'),
+            'ALLOY_OVERRIDE_PATH': os.path.join(tmp_dir, 'override.conf')}
+        for name, path in paths.items():
+            self.useFixture(fixtures.MockPatchObject(util, name, path))
+        with open(paths['ALLOY_ENVIRONMENT_PATH'], 'w') as f:
+            f.write('prod\n')
+        with open(paths['ALLOY_CONFIG_PATH'], 'w') as f:
+            f.write('%PROJECT_ID% %LB_ID% %ENV% %CLOUD_FQDN%')
+        with open(paths['ALLOY_OVERRIDE_PATH'], 'w') as f:
+            f.write('LB_ID=%LB_ID%')
+
+        self.assertEqual(
+            (True, True),
+            util.update_alloy_configuration(LB_ID1, 'cloud.example.com'))
+        with open(paths['ALLOY_CONFIG_PATH']) as f:
+            self.assertEqual(f'project1 {LB_ID1} prod cloud.example.com',
+                             f.read())
+        with open(paths['ALLOY_OVERRIDE_PATH']) as f:
+            self.assertEqual(f'LB_ID={LB_ID1}', f.read())
+        mock_get_project_id.assert_called_once_with()
+
+        # The placeholders are filled, nothing changes
+        mock_get_project_id.reset_mock()
+        self.assertEqual(
+            (False, False),
+            util.update_alloy_configuration(LB_ID1, 'cloud.example.com'))
+        mock_get_project_id.assert_not_called()
+
+        # A missing override is not fatal
+        os.remove(paths['ALLOY_OVERRIDE_PATH'])
+        self.assertEqual(
+            (False, False),
+            util.update_alloy_configuration(LB_ID1, 'cloud.example.com'))
+
+        self.assertRaises(ValueError, util.update_alloy_configuration,
+                          None, 'cloud.example.com')
+        self.assertRaises(ValueError, util.update_alloy_configuration,
+                          LB_ID1, None)
+
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                '_ENABLED_UNITS', new_callable=set)
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                'run_systemctl_command')
+    def test_enable_systemd_units(self, mock_systemctl, mock_enabled_units):
+        self.assertEqual({}, util.enable_systemd_units(['unit1', 'unit2']))
+        mock_systemctl.assert_called_once_with(consts.ENABLE, 'unit1 unit2')
+
+        # The enabled units are skipped
+        mock_systemctl.reset_mock()
+        self.assertEqual({}, util.enable_systemd_units(['unit1', 'unit2']))
+        self.assertEqual({}, util.enable_systemd_units(['unit2', 'unit3']))
+        mock_systemctl.assert_called_once_with(consts.ENABLE, 'unit3')
+
+        # A forgotten unit is enabled again
+        mock_systemctl.reset_mock()
+        util.forget_enabled_systemd_unit('unit1')
+        util.forget_enabled_systemd_unit('unknown')
+        util.enable_systemd_units(['unit1', 'unit2'])
+        mock_systemctl.assert_called_once_with(consts.ENABLE, 'unit1')
+
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                '_ENABLED_UNITS', new_callable=set)
+    @mock.patch('octavia.amphorae.backends.agent.api_server.util.'
+                'run_systemctl_command')
+    def test_enable_systemd_units_failure(self, mock_systemctl,
+                                          mock_enabled_units):
+        error = subprocess.CalledProcessError(1, 'systemctl', output='boom')
+        mock_systemctl.side_effect = [error, None, error]
+
+        self.assertEqual({'unit2': 'boom'},
+                         util.enable_systemd_units(['unit1', 'unit2']))
+        mock_systemctl.assert_has_calls([
+            mock.call(consts.ENABLE, 'unit1 unit2'),
+            mock.call(consts.ENABLE, 'unit1'),
+            mock.call(consts.ENABLE, 'unit2')])
+
+        # The failed unit is retried
+        mock_systemctl.reset_mock()
+        mock_systemctl.side_effect = None
+        util.enable_systemd_units(['unit1', 'unit2'])
+        mock_systemctl.assert_called_once_with(consts.ENABLE, 'unit2')
@@ -81,7 +81,11 @@ class AgentJinjaTestCase(base.TestCase):
                            'agent_request_read_timeout = 180\n'
                            'amphora_id = ' + AMP_ID + '\n'
                            'amphora_udp_driver = keepalived_lvs\n'
-                           'agent_tls_protocol = TLSv1.2\n\n'
+                           'agent_tls_protocol = TLSv1.2\n'
+                           'prometheus_cache_ttl = 0.0\n'
+                           'prometheus_exclude_members = False\n'
+                           'vrrp_check_daemon = False\n'
+                           'vrrp_check_daemon_interval = 1.0\n\n'
                            '[controller_worker]\n'
                            'loadbalancer_topology = ' +
                            constants.TOPOLOGY_SINGLE)
@@ -119,7 +123,11 @@ class AgentJinjaTestCase(base.TestCase):
                            'agent_request_read_timeout = 180\n'
                            'amphora_id = ' + AMP_ID + '\n'
                            'amphora_udp_driver = keepalived_lvs\n'
-                           'agent_tls_protocol = TLSv1.2\n\n'
+                           'agent_tls_protocol = TLSv1.2\n'
+                           'prometheus_cache_ttl = 0.0\n'
+                           'prometheus_exclude_members = False\n'
+                           'vrrp_check_daemon = False\n'
+                           'vrrp_check_daemon_interval = 1.0\n\n'
                            '[controller_worker]\n'
                            'loadbalancer_topology = ' +
                            constants.TOPOLOGY_ACTIVE_STANDBY)
@@ -160,9 +168,38 @@ class AgentJinjaTestCase(base.TestCase):
                            'agent_request_read_timeout = 180\n'
                            'amphora_id = ' + AMP_ID + '\n'
                            'amphora_udp_driver = new_udp_driver\n'
-                           'agent_tls_protocol = TLSv1.2\n\n'
+                           'agent_tls_protocol = TLSv1.2\n'
+                           'prometheus_cache_ttl = 0.0\n'
+                           'prometheus_exclude_members = False\n'
+                           'vrrp_check_daemon = False\n'
+                           'vrrp_check_daemon_interval = 1.0\n\n'
                            '[controller_worker]\n'
                            'loadbalancer_topology = ' +
                            constants.TOPOLOGY_SINGLE)
         agent_cfg = ajc.build_agent_config(AMP_ID, constants.TOPOLOGY_SINGLE)
         self.assertEqual(expected_config, agent_cfg)
+
+    def test_build_agent_config_with_prometheus_options(self):
+        ajc = agent_jinja_cfg.AgentJinjaTemplater()
+        self.conf.config(group="amphora_agent", prometheus_cache_ttl=5)
+        self.conf.config(group="amphora_agent",
+                         prometheus_exclude_members=True)
+
+        agent_cfg = ajc.build_agent_config(AMP_ID, constants.TOPOLOGY_SINGLE)
+
+        self.assertIn('agent_tls_protocol = TLSv1.2\n'
+                      'prometheus_cache_ttl = 5.0\n'
+                      'prometheus_exclude_members = True\n', agent_cfg)
+
+    def test_build_agent_config_with_vrrp_check_daemon(self):
+        ajc = agent_jinja_cfg.AgentJinjaTemplater()
+        self.conf.config(group="amphora_agent", vrrp_check_daemon=True)
+        self.conf.config(group="amphora_agent",
+                         vrrp_check_daemon_interval=2)
+
+        agent_cfg = ajc.build_agent_config(AMP_ID,
+                                           constants.TOPOLOGY_ACTIVE_STANDBY)
+
+        self.assertIn('vrrp_check_daemon = True\n'
+                      'vrrp_check_daemon_interval = 2.0\n\n'
+                      '[controller_worker]\n', agent_cfg)
@@ -19,6 +19,8 @@ import subprocess
 from unittest import mock
 
 import pyroute2
+# pylint: disable=no-name-in-module
+from pyroute2.netlink import rtnl
 
 from octavia.amphorae.backends.utils import interface
 from octavia.amphorae.backends.utils import interface_file
@@ -733,23 +735,34 @@ class TestInterface(base.TestCase):
         }]
 
         mock_get_addr.return_value = [{
+            'index': idx,
             'prefixlen': 24,
             'attrs': {
                 'IFA_ADDRESS': '2.0.0.1',
                 'IFA_FLAGS': 0x80  # IFA_F_PERMANENT
             }
         }, {
+            'index': idx,
             'prefixlen': 16,
             'attrs': {
                 'IFA_ADDRESS': '10.2.3.4',
                 'IFA_FLAGS': 0x80  # IFA_F_PERMANENT
             }
         }, {
+            'index': idx,
             'prefixlen': 16,
             'attrs': {
                 'IFA_ADDRESS': '10.2.3.5',
                 'IFA_FLAGS': 0x0  # not IFA_F_PERMANENT
             }
+        }, {
+            # Address of another interface
+            'index': 1,
+            'prefixlen': 8,
+            'attrs': {
+                'IFA_ADDRESS': '127.0.0.1',
+                'IFA_FLAGS': 0x80  # IFA_F_PERMANENT
+            }
         }]
 
         mock_get_routes.return_value = [{
@@ -760,7 +773,8 @@ class TestInterface(base.TestCase):
                 'RTA_DST': '24.24.0.0',
                 'RTA_GATEWAY': '2.0.0.254',
                 'RTA_PREFSRC': '2.0.0.1',
-                'RTA_TABLE': 254
+                'RTA_TABLE': 254,
+                'RTA_OIF': idx
             }
         }, {
             'dst_len': 8,
@@ -770,7 +784,19 @@ class TestInterface(base.TestCase):
                 'RTA_DST': '20.0.0.0',
                 'RTA_GATEWAY': '1.0.0.2',
                 'RTA_PREFSRC': '1.2.3.4',
-                'RTA_TABLE': 254
+                'RTA_TABLE': 254,
+                'RTA_OIF': idx
+            }
+        }, {
+            # Route of another interface
+            'dst_len': 8,
+            'family': 2,
+            'proto': 4,  # STATIC
+            'attrs': {
+                'RTA_DST': '30.0.0.0',
+                'RTA_GATEWAY': '3.0.0.1',
+                'RTA_TABLE': 254,
+                'RTA_OIF': 1
             }
         }]
 
@@ -801,6 +827,10 @@ class TestInterface(base.TestCase):
         controller.up(iface)
 
         mock_link.assert_not_called()
+        # The addresses and the routes are dumped once
+        mock_get_addr.assert_called_once_with()
+        mock_get_routes.assert_called_once_with()
+        mock_wait_tentative.assert_called_once_with(mock.ANY, mock.ANY, {idx})
 
         mock_addr.assert_has_calls([
             mock.call(controller.ADD,
@@ -819,6 +849,7 @@ class TestInterface(base.TestCase):
                       prefixlen=24,
                       family=socket.AF_INET)
         ])
+        self.assertEqual(3, mock_addr.call_count)
 
         mock_route.assert_has_calls([
             mock.call(controller.ADD,
@@ -840,6 +871,7 @@ class TestInterface(base.TestCase):
                       prefsrc='2.0.0.1',
                       table=254,
                       family=socket.AF_INET)])
+        self.assertEqual(3, mock_route.call_count)
 
         mock_rule.assert_has_calls([
             mock.call(controller.ADD,
@@ -857,6 +889,123 @@ class TestInterface(base.TestCase):
             mock.call(["post-up", "eth1"])
         ])
 
+    @mock.patch('octavia.amphorae.backends.utils.nftable_utils.'
+                'load_nftables_file')
+    @mock.patch('octavia.amphorae.backends.utils.nftable_utils.'
+                'write_nftable_rules_file')
+    @mock.patch('pyroute2.IPRoute')
+    @mock.patch('subprocess.check_output')
+    @mock.patch('octavia.amphorae.backends.utils.interface.'
+                'InterfaceController._wait_tentative')
+    def test_up_all(self, mock_wait_tentative, mock_check_output,
+                    mock_iproute, mock_write_nftable, mock_load_nftables):
+        interfaces = [
+            interface_file.InterfaceFile(
+                name=name,
+                if_type=if_type,
+                mtu=1450,
+                addresses=[{
+                    consts.ADDRESS: address,
+                    consts.PREFIXLEN: 24
+                }],
+                rules=[{
+                    consts.SRC: address,
+                    consts.SRC_LEN: 32,
+                    consts.TABLE: 1,
+                }],
+                scripts={
+                    consts.IFACE_UP: [{
+                        consts.COMMAND: f"post-up {name}"
+                    }],
+                    consts.IFACE_DOWN: [],
+                },
+                is_sriov=True)
+            for name, if_type, address in (
+                ('eth1', 'vip', '192.0.2.4'),
+                ('eth2', 'backend', '198.51.100.4'),
+                ('eth3', 'backend', '203.0.113.4'))
+        ]
+        ipr = mock_iproute.return_value.__enter__.return_value
+        links = {'eth1': 3, 'eth2': 4}
+        ipr.link_lookup.side_effect = (
+            lambda ifname: [links[ifname]] if ifname in links else [])
+        ipr.get_links.return_value = [{
+            consts.STATE: consts.IFACE_UP
+        }]
+        ipr.get_addr.return_value = []
+        ipr.get_routes.return_value = []
+        ipr.get_rules.return_value = []
+
+        controller = interface.InterfaceController()
+        errors = controller.up_all(interfaces)
+
+        # eth3 does not exist
+        self.assertEqual(['eth3'], list(errors))
+        self.assertIsInstance(errors['eth3'], IndexError)
+
+        # The nftables rules are loaded once
+        mock_write_nftable.assert_called_once_with('eth1', [])
+        mock_load_nftables.assert_called_once_with()
+
+        ipr.bind.assert_called_once_with(groups=rtnl.RTMGRP_IPV6_IFADDR)
+        ipr.get_addr.assert_called_once_with()
+        ipr.get_routes.assert_called_once_with()
+        ipr.get_rules.assert_called_once_with()
+        ipr.addr.assert_has_calls([
+            mock.call(controller.ADD,
+                      index=3,
+                      address='192.0.2.4',
+                      prefixlen=24,
+                      family=socket.AF_INET),
+            mock.call(controller.ADD,
+                      index=4,
+                      address='198.51.100.4',
+                      prefixlen=24,
+                      family=socket.AF_INET)])
+        self.assertEqual(2, ipr.addr.call_count)
+        # The duplicate address detection is awaited once
+        mock_wait_tentative.assert_called_once_with(ipr, ipr, {3, 4})
+        # only the vip port updates the rules
+        ipr.rule.assert_called_once_with(
+            controller.ADD, src='192.0.2.4', src_len=32, table=1,
+            family=socket.AF_INET)
+
+        mock_check_output.assert_has_calls([
+            mock.call(["post-up", "eth1"]),
+            mock.call(["post-up", "eth2"])])
+        self.assertEqual(2, mock_check_output.call_count)
+
+    @mock.patch('octavia.amphorae.backends.utils.nftable_utils.'
+                'load_nftables_file')
+    @mock.patch('octavia.amphorae.backends.utils.nftable_utils.'
+                'write_nftable_rules_file')
+    @mock.patch('pyroute2.IPRoute')
+    def test_up_all_nftables_error(self, mock_iproute, mock_write_nftable,
+                                   mock_load_nftables):
+        interfaces = [
+            interface_file.InterfaceFile(name='eth1', if_type='backend',
+                                         is_sriov=True),
+            interface_file.InterfaceFile(name='eth2', if_type='backend')]
+        ipr = mock_iproute.return_value.__enter__.return_value
+        ipr.link_lookup.return_value = [4]
+        ipr.get_links.return_value = [{
+            consts.STATE: consts.IFACE_UP
+        }]
+        ipr.get_addr.return_value = []
+        ipr.get_routes.return_value = []
+        error = subprocess.CalledProcessError(1, 'nft')
+        mock_load_nftables.side_effect = error
+
+        controller = interface.InterfaceController()
+        errors = controller.up_all(interfaces)
+
+        self.assertEqual({'eth1': error}, errors)
+        ipr.link_lookup.assert_called_once_with(ifname='eth2')
+
+        # up raises the error of the interface
+        self.assertRaises(subprocess.CalledProcessError, controller.up,
+                          interfaces[0])
+
     @mock.patch('pyroute2.IPRoute.rule')
     @mock.patch('pyroute2.IPRoute.route')
     @mock.patch('pyroute2.IPRoute.addr')
@@ -1344,52 +1493,78 @@ class TestInterface(base.TestCase):
             mock.call(["post-down", iface.name])
         ])
 
-    @mock.patch("time.time")
-    @mock.patch("time.sleep")
-    def test__wait_tentative(self, mock_time_sleep, mock_time_time):
+    @mock.patch("select.select")
+    def test__wait_tentative(self, mock_select):
         mock_ipr = mock.MagicMock()
         mock_ipr.get_addr.side_effect = [
-            ({'family': socket.AF_INET,
-              'flags': 0},
-             {'family': socket.AF_INET6,
+            ({'index': 4,
+              'family': socket.AF_INET6,
               'flags': 0x40},  # tentative
-             {'family': socket.AF_INET6,
+             {'index': 4,
+              'family': socket.AF_INET6,
               'flags': 0}),
-            ({'family': socket.AF_INET,
-              'flags': 0},
-             {'family': socket.AF_INET6,
+            ({'index': 4,
+              'family': socket.AF_INET6,
               'flags': 0},
-             {'family': socket.AF_INET6,
+             {'index': 4,
+              'family': socket.AF_INET6,
               'flags': 0})
         ]
+        mock_monitor = mock.MagicMock()
+        mock_select.return_value = ([mock_monitor], [], [])
+
+        controller = interface.InterfaceController()
+
+        controller._wait_tentative(mock_ipr, mock_monitor, {4})
 
-        mock_time_time.return_value = 0
+        mock_ipr.get_addr.assert_called_with(family=socket.AF_INET6)
+        self.assertEqual(2, mock_ipr.get_addr.call_count)
+        # Woken up by the notification of the address update
+        mock_select.assert_called_once_with([mock_monitor], [], [],
+                                            mock.ANY)
+        mock_monitor.get.assert_called_once_with()
+
+    @mock.patch("select.select")
+    def test__wait_tentative_other_interface(self, mock_select):
+        mock_ipr = mock.MagicMock()
+        mock_ipr.get_addr.return_value = (
+            {'index': 5,
+             'family': socket.AF_INET6,
+             'flags': 0x40},  # tentative
+        )
 
         controller = interface.InterfaceController()
-        idx = 4
 
-        controller._wait_tentative(mock_ipr, idx)
-        mock_time_sleep.assert_called_once()
+        controller._wait_tentative(mock_ipr, mock.MagicMock(), {4})
+
+        mock_select.assert_not_called()
 
-    @mock.patch("time.time")
-    @mock.patch("time.sleep")
-    def test__wait_tentative_timeout(self, mock_time_sleep,
-                                     mock_time_time):
+    @mock.patch("time.monotonic")
+    @mock.patch("select.select")
+    def test__wait_tentative_timeout(self, mock_select, mock_monotonic):
         mock_ipr = mock.MagicMock()
         mock_ipr.get_addr.return_value = (
-            {'family': socket.AF_INET6,
+            {'index': 4,
+             'family': socket.AF_INET6,
              'flags': 0x40},  # tentative
-            {'family': socket.AF_INET6,
+            {'index': 4,
+             'family': socket.AF_INET6,
              'flags': 0}
         )
+        mock_monitor = mock.MagicMock()
+        mock_select.return_value = ([], [], [])
 
-        mock_time_time.side_effect = [0, 0, 1, 2, 29, 30, 31]
+        mock_monotonic.side_effect = [0, 0, 29, 30]
 
         controller = interface.InterfaceController()
-        idx = 4
 
-        controller._wait_tentative(mock_ipr, idx)
-        self.assertEqual(4, len(mock_time_sleep.mock_calls))
+        controller._wait_tentative(mock_ipr, mock_monitor, {4})
+
+        mock_select.assert_has_calls([
+            mock.call([mock_monitor], [], [], 30),
+            mock.call([mock_monitor], [], [], 1)])
+        self.assertEqual(2, mock_select.call_count)
+        mock_monitor.get.assert_not_called()
 
     def test__normalize_ip_address(self):
         controller = interface.InterfaceController()
@@ -16,6 +16,7 @@ import stat
 import subprocess
 from unittest import mock
 
+import fixtures
 from octavia_lib.common import constants as lib_consts
 from webob import exc
 
@@ -77,6 +78,32 @@ class TestNFTableUtils(base.TestCase):
                       f'{consts.NFT_TABLE}\n'),
             mock.call(f'table {consts.NFT_FAMILY} {consts.NFT_TABLE} '
                       '{\n'),
+            mock.call('  set amphora_allowed_tcp_ipv4 {\n'),
+            mock.call('    type ipv4_addr . inet_service\n'),
+            mock.call('    flags interval\n'),
+            mock.call('    elements = { 0.0.0.0/0 . 1234 }\n'),
+            mock.call('  }\n'),
+            mock.call('  set amphora_allowed_tcp_ipv6 {\n'),
+            mock.call('    type ipv6_addr . inet_service\n'),
+            mock.call('    flags interval\n'),
+            mock.call('    elements = { ::/0 . 1234 }\n'),
+            mock.call('  }\n'),
+            mock.call('  set amphora_allowed_udp_ipv4 {\n'),
+            mock.call('    type ipv4_addr . inet_service\n'),
+            mock.call('    flags interval\n'),
+            mock.call('  }\n'),
+            mock.call('  set amphora_allowed_udp_ipv6 {\n'),
+            mock.call('    type ipv6_addr . inet_service\n'),
+            mock.call('    flags interval\n'),
+            mock.call('  }\n'),
+            mock.call('  set amphora_allowed_sctp_ipv4 {\n'),
+            mock.call('    type ipv4_addr . inet_service\n'),
+            mock.call('    flags interval\n'),
+            mock.call('  }\n'),
+            mock.call('  set amphora_allowed_sctp_ipv6 {\n'),
+            mock.call('    type ipv6_addr . inet_service\n'),
+            mock.call('    flags interval\n'),
+            mock.call('  }\n'),
             mock.call(f'  chain {consts.NFT_CHAIN} {{\n'),
             mock.call('    type filter hook input priority filter; '
                       'policy drop;\n'),
@@ -94,7 +121,18 @@ class TestNFTableUtils(base.TestCase):
             mock.call('      iifname eth1 goto amphora_vip_chain\n'),
             mock.call('  }\n'),
             mock.call('  chain amphora_vip_chain {\n'),
-            mock.call('      tcp dport 1234 accept\n'),
+            mock.call('      ip saddr . tcp dport @amphora_allowed_tcp_ipv4 '
+                      'accept\n'),
+            mock.call('      ip6 saddr . tcp dport @amphora_allowed_tcp_ipv6 '
+                      'accept\n'),
+            mock.call('      ip saddr . udp dport @amphora_allowed_udp_ipv4 '
+                      'accept\n'),
+            mock.call('      ip6 saddr . udp dport @amphora_allowed_udp_ipv6 '
+                      'accept\n'),
+            mock.call('      ip saddr . sctp dport @amphora_allowed_sctp_ipv4 '
+                      'accept\n'),
+            mock.call('      ip6 saddr . sctp dport '
+                      '@amphora_allowed_sctp_ipv6 accept\n'),
             mock.call('      ip saddr 192.0.2.0/24 ip protocol 112 accept\n'),
             mock.call('  }\n'),
             mock.call('}\n')
@@ -198,3 +236,225 @@ class TestNFTableUtils(base.TestCase):
 
         self.assertRaises(exceptions.AmphoraNetworkConfigException,
                           nftable_utils.load_nftables_file)
+
+    def test__build_allowed_sets(self):
+        allowed_sets, other_rules = nftable_utils._build_allowed_sets([
+            {consts.CIDR: '192.0.2.0/25',
+             consts.PROTOCOL: lib_consts.PROTOCOL_TCP, consts.PORT: 80},
+            # Merged with the overlapping CIDRs of the port
+            {consts.CIDR: '192.0.2.128/25',
+             consts.PROTOCOL: lib_consts.PROTOCOL_TCP, consts.PORT: 80},
+            {consts.CIDR: '192.0.2.10/32',
+             consts.PROTOCOL: lib_consts.PROTOCOL_TCP, consts.PORT: 80},
+            {consts.CIDR: '192.0.2.10/32',
+             consts.PROTOCOL: lib_consts.PROTOCOL_TCP, consts.PORT: 443},
+            {consts.CIDR: '2001:db8::1/64',
+             consts.PROTOCOL: lib_consts.PROTOCOL_UDP, consts.PORT: 53},
+            {consts.CIDR: '0.0.0.0/0',
+             consts.PROTOCOL: lib_consts.PROTOCOL_SCTP, consts.PORT: 9000},
+            {consts.CIDR: None, consts.PROTOCOL: consts.VRRP,
+             consts.PORT: 112}])
+
+        self.assertEqual({
+            'amphora_allowed_tcp_ipv4': {'192.0.2.0/24 . 80',
+                                         '192.0.2.10/32 . 443'},
+            'amphora_allowed_tcp_ipv6': set(),
+            'amphora_allowed_udp_ipv4': set(),
+            'amphora_allowed_udp_ipv6': {'2001:db8::/64 . 53'},
+            'amphora_allowed_sctp_ipv4': {'0.0.0.0/0 . 9000'},
+            'amphora_allowed_sctp_ipv6': {'::/0 . 9000'}}, allowed_sets)
+        self.assertEqual(['ip protocol 112 accept'], other_rules)
+
+        self.assertRaises(exc.HTTPBadRequest,
+                          nftable_utils._build_allowed_sets,
+                          [{consts.CIDR: '192/32',
+                            consts.PROTOCOL: lib_consts.PROTOCOL_TCP,
+                            consts.PORT: 1237}])
+
+    def test__allowed_sets_commands(self):
+        old_sets = {'amphora_allowed_tcp_ipv4': {'192.0.2.0/25 . 80',
+                                                 '192.0.2.10/32 . 443'},
+                    'amphora_allowed_udp_ipv4': {'192.0.2.10/32 . 53'}}
+        new_sets = {'amphora_allowed_tcp_ipv4': {'192.0.2.0/24 . 80',
+                                                 '192.0.2.10/32 . 443'},
+                    'amphora_allowed_udp_ipv4': {'192.0.2.10/32 . 53'}}
+
+        self.assertEqual(
+            ['delete element inet amphora_table amphora_allowed_tcp_ipv4 '
+             '{ 192.0.2.0/25 . 80 }',
+             'add element inet amphora_table amphora_allowed_tcp_ipv4 '
+             '{ 192.0.2.0/24 . 80 }'],
+            nftable_utils._allowed_sets_commands(old_sets, new_sets))
+        self.assertEqual(
+            [], nftable_utils._allowed_sets_commands(new_sets, new_sets))
+
+    @mock.patch('octavia.amphorae.backends.utils.network_namespace.'
+                'NetworkNamespace')
+    @mock.patch('subprocess.check_output')
+    def test__load_nft_commands(self, mock_check_output, mock_netns):
+        nftable_utils._load_nft_commands(['cmd1', 'cmd2'])
+
+        mock_netns.assert_called_once_with(consts.AMPHORA_NAMESPACE)
+        mock_check_output.assert_called_once_with(
+            [consts.NFT_CMD, '-f', '/dev/stdin'], input='cmd1\ncmd2\n',
+            stderr=subprocess.STDOUT, encoding='utf-8')
+
+    def test__append_nft_commands(self):
+        rules_file = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                  'nftables-vip.rules')
+        with open(rules_file, 'w', encoding='utf-8') as file:
+            file.write('table inet amphora_table {}\n')
+
+        with mock.patch.object(consts, 'NFT_RULES_FILE', rules_file):
+            nftable_utils._append_nft_commands(['cmd1', 'cmd2'])
+
+        with open(rules_file, encoding='utf-8') as file:
+            self.assertEqual('table inet amphora_table {}\ncmd1\ncmd2\n',
+                             file.read())
+
+
+class TestApplyNFTableRules(base.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(setattr, nftable_utils, '_applied_rules', None)
+        nftable_utils._applied_rules = None
+        self.mock_isfile = self.useFixture(fixtures.MockPatch(
+            'os.path.isfile', return_value=True)).mock
+        self.mock_stat = self.useFixture(fixtures.MockPatchObject(
+            nftable_utils, '_rules_file_stat', return_value=(1, 10, 100))).mock
+        self.mock_write = self.useFixture(fixtures.MockPatchObject(
+            nftable_utils, 'write_nftable_rules_file')).mock
+        self.mock_load_file = self.useFixture(fixtures.MockPatchObject(
+            nftable_utils, 'load_nftables_file')).mock
+        self.mock_load_commands = self.useFixture(fixtures.MockPatchObject(
+            nftable_utils, '_load_nft_commands')).mock
+        self.mock_append = self.useFixture(fixtures.MockPatchObject(
+            nftable_utils, '_append_nft_commands')).mock
+
+    def _rules(self, *cidrs):
+        return [{consts.CIDR: cidr, consts.PROTOCOL: lib_consts.PROTOCOL_TCP,
+                 consts.PORT: 80} for cidr in cidrs] + [
+            {consts.CIDR: None, consts.PROTOCOL: consts.VRRP,
+             consts.PORT: 112}]
+
+    def test_apply_nftable_rules(self):
+        rules = self._rules('192.0.2.0/24')
+        nftable_utils.apply_nftable_rules('eth1', rules)
+
+        # The first update loads the rules file
+        self.mock_write.assert_called_once_with('eth1', rules)
+        self.mock_load_file.assert_called_once_with()
+        self.mock_load_commands.assert_not_called()
+
+        rules = self._rules('198.51.100.0/24', '203.0.113.0/24')
+        nftable_utils.apply_nftable_rules('eth1', rules)
+
+        # Only the elements are updated and appended to the rules file
+        commands = [
+            'delete element inet amphora_table amphora_allowed_tcp_ipv4 '
+            '{ 192.0.2.0/24 . 80 }',
+            'add element inet amphora_table amphora_allowed_tcp_ipv4 '
+            '{ 198.51.100.0/24 . 80, 203.0.113.0/24 . 80 }']
+        self.mock_write.assert_called_once()
+        self.mock_load_file.assert_called_once_with()
+        self.mock_load_commands.assert_called_once_with(commands)
+        self.mock_append.assert_called_once_with(commands)
+
+        # Nothing to update
+        nftable_utils.apply_nftable_rules('eth1', rules)
+
+        self.mock_write.assert_called_once()
+        self.mock_load_file.assert_called_once_with()
+        self.mock_load_commands.assert_called_once()
+        self.mock_append.assert_called_once()
+
+    @mock.patch.object(nftable_utils, 'MAX_APPENDED_UPDATES', 1)
+    def test_apply_nftable_rules_rewrite_file(self):
+        nftable_utils.apply_nftable_rules('eth1',
+                                          self._rules('192.0.2.0/24'))
+        nftable_utils.apply_nftable_rules('eth1',
+                                          self._rules('198.51.100.0/24'))
+        self.mock_append.assert_called_once()
+
+        # The rules file is rewritten instead of growing, without reloading
+        # the rules
+        rules = self._rules('203.0.113.0/24')
+        nftable_utils.apply_nftable_rules('eth1', rules)
+
+        self.mock_append.assert_called_once()
+        self.assertEqual(2, self.mock_write.call_count)
+        self.mock_write.assert_called_with('eth1', rules)
+        self.assertEqual(2, self.mock_load_commands.call_count)
+        self.mock_load_file.assert_called_once_with()
+
+        # The appended updates start again
+        nftable_utils.apply_nftable_rules('eth1',
+                                          self._rules('192.0.2.0/24'))
+        self.assertEqual(2, self.mock_append.call_count)
+
+    def test_apply_nftable_rules_missing_file(self):
+        self.mock_isfile.return_value = False
+        rules = self._rules('192.0.2.0/24')
+
+        # Only the base rules are written when the rules file is missing
+        nftable_utils.apply_nftable_rules('eth1', rules)
+        self.mock_isfile.return_value = True
+        nftable_utils.apply_nftable_rules('eth1', rules)
+
+        self.assertEqual(2, self.mock_load_file.call_count)
+        self.mock_load_commands.assert_not_called()
+        self.assertIsNotNone(nftable_utils._applied_rules)
+
+    def test_apply_nftable_rules_changed_file(self):
+        nftable_utils.apply_nftable_rules('eth1',
+                                          self._rules('192.0.2.0/24'))
+
+        # Another process wrote the rules file
+        self.mock_stat.side_effect = [(1, 20, 100), (1, 30, 100)]
+        nftable_utils.apply_nftable_rules('eth1',
+                                          self._rules('198.51.100.0/24'))
+
+        self.assertEqual(2, self.mock_load_file.call_count)
+        self.mock_load_commands.assert_not_called()
+
+    def test_apply_nftable_rules_other_rules(self):
+        nftable_utils.apply_nftable_rules('eth1',
+                                          self._rules('192.0.2.0/24'))
+        # Without the VRRP rule
+        nftable_utils.apply_nftable_rules('eth1',
+                                          self._rules('192.0.2.0/24')[:1])
+
+        self.assertEqual(2, self.mock_load_file.call_count)
+        self.mock_load_commands.assert_not_called()
+
+    def test_apply_nftable_rules_update_error(self):
+        nftable_utils.apply_nftable_rules('eth1',
+                                          self._rules('192.0.2.0/24'))
+        self.mock_load_commands.side_effect = subprocess.CalledProcessError(
+            cmd=consts.NFT_CMD, returncode=1, output='error')
+
+        nftable_utils.apply_nftable_rules('eth1',
+                                          self._rules('198.51.100.0/24'))
+
+        # The rules file is rewritten and reloaded
+        self.mock_load_commands.assert_called_once()
+        self.mock_append.assert_not_called()
+        self.assertEqual(2, self.mock_write.call_count)
+        self.assertEqual(2, self.mock_load_file.call_count)
+        self.assertIsNotNone(nftable_utils._applied_rules)
+
+    def test_apply_nftable_rules_load_error(self):
+        nftable_utils.apply_nftable_rules('eth1',
+                                          self._rules('192.0.2.0/24'))
+        self.mock_load_commands.side_effect = subprocess.CalledProcessError(
+            cmd=consts.NFT_CMD, returncode=1)
+        self.mock_load_file.side_effect = subprocess.CalledProcessError(
+            cmd=consts.NFT_CMD, returncode=1)
+
+        self.assertRaises(subprocess.CalledProcessError,
+                          nftable_utils.apply_nftable_rules, 'eth1',
+                          self._rules('198.51.100.0/24'))
+
+        # The state of the kernel is unknown
+        self.assertIsNone(nftable_utils._applied_rules)
@@ -13,6 +13,7 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 import hashlib
+import threading
 from unittest import mock
 
 from oslo_config import cfg
@@ -950,6 +951,68 @@ class TestAmphoraAPIClientTest(base.TestCase):
                           self.driver.request, 'get', self.amp,
                           'unavailableURL', self.timeout_dict)
 
+    def test_ssl_adapter(self):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group='haproxy_amphora', rest_pool_connections=500,
+                    rest_pool_maxsize=2)
+
+        adapter = driver.CustomHostNameCheckingAdapter()
+
+        self.assertEqual(500, adapter._pool_connections)
+        self.assertEqual(2, adapter._pool_maxsize)
+        self.assertIs(driver._AmphoraHTTPSConnectionPool,
+                      adapter.poolmanager.pool_classes_by_scheme['https'])
+
+        # Each thread checks the certificate of its own amphora
+        adapter.uuid = 'amp-1'
+        thread = threading.Thread(target=setattr,
+                                  args=(adapter, 'uuid', 'amp-2'))
+        thread.start()
+        thread.join()
+        pool = mock.Mock()
+        with mock.patch('requests.adapters.HTTPAdapter.cert_verify'):
+            adapter.cert_verify(pool, 'https://192.0.2.77', True, None)
+        self.assertEqual('amp-1', pool.assert_hostname)
+
+    @mock.patch('time.monotonic')
+    def test_connection_pool_idle_timeout(self, mock_monotonic):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group='haproxy_amphora', rest_pool_idle_timeout=20)
+        pool = driver._AmphoraHTTPSConnectionPool('192.0.2.77', maxsize=1)
+        # Take the free slot of the pool
+        pool._get_conn()
+        conn = mock.Mock()
+
+        mock_monotonic.return_value = 100
+        pool._put_conn(conn)
+        mock_monotonic.return_value = 110
+        self.assertIs(conn, pool._get_conn())
+        conn.close.assert_not_called()
+
+        # The agent may close the connections idle for too long
+        pool._put_conn(conn)
+        mock_monotonic.return_value = 131
+        self.assertIs(conn, pool._get_conn())
+        conn.close.assert_called_once_with()
+
+    def test_connection_stats(self):
+        stats = driver.AmphoraConnectionStats()
+        for _ in range(4):
+            stats.record_request('amp-1')
+        stats.record_request('amp-2')
+
+        self.assertEqual(
+            {'requests': 4, 'connections': 1, 'handshake_time': 0.2},
+            stats.record_connection('amp-1', 0.2))
+
+        # The statistics of the least recently used amphorae are dropped
+        with mock.patch.object(driver, '_MAX_CONNECTION_STATS', 2):
+            stats.record_request('amp-1')
+            stats.record_request('amp-3')
+        self.assertEqual(
+            {'requests': 0, 'connections': 1, 'handshake_time': 0.1},
+            stats.record_connection('amp-2', 0.1))
+
     @requests_mock.mock()
     def test_get_api_version(self, mock_requests):
         ref_api_version = {'api_version': '0.1'}
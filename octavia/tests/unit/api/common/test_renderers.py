@@ -0,0 +1,118 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import datetime
+from unittest import mock
+
+from oslo_utils import uuidutils
+from wsme.rest import json as wsme_json
+from wsme import types as wtypes
+
+from octavia.api.common import renderers
+from octavia.api.common import types
+from octavia.api.v2.types import load_balancer as lb_types
+from octavia.tests.unit import base
+
+
+class TestRenderers(base.TestCase):
+
+    def _get_lb(self):
+        return lb_types.LoadBalancerResponse(
+            id=uuidutils.generate_uuid(),
+            name='lb1',
+            description='',
+            provisioning_status='ACTIVE',
+            admin_state_up=True,
+            project_id=uuidutils.generate_uuid(),
+            created_at=datetime.datetime(2024, 1, 2, 3, 4, 5),
+            vip_address='192.0.2.10',
+            vip_sg_ids=[uuidutils.generate_uuid()],
+            additional_vips=[lb_types.AdditionalVipsType(
+                subnet_id=uuidutils.generate_uuid(),
+                ip_address='2001:db8::10')],
+            listeners=[types.IdOnlyType(id=uuidutils.generate_uuid())],
+            pools=[],
+            tags=['tag1', 'tag2'])
+
+    def test_encode_result(self):
+        lbs = lb_types.LoadBalancersRootResponse(
+            loadbalancers=[self._get_lb(), self._get_lb()],
+            loadbalancers_links=[types.PageType(href='http://x', rel='next')])
+        datatype = lb_types.LoadBalancersRootResponse
+
+        self.assertEqual(wsme_json.encode_result(lbs, datatype),
+                         renderers.encode_result(lbs, datatype))
+
+    def test_encode_result_unset_and_none(self):
+        lb = self._get_lb()
+        lb.description = None
+        lb.vip_port_id = wtypes.Unset
+        lb.listeners = None
+        datatype = lb_types.LoadBalancerResponse
+
+        self.assertEqual(wsme_json.encode_result(lb, datatype),
+                         renderers.encode_result(lb, datatype))
+        self.assertEqual(wsme_json.encode_result(None, datatype),
+                         renderers.encode_result(None, datatype))
+
+    def test_get_serializer_cached(self):
+        datatype = lb_types.LoadBalancerResponse
+
+        self.assertIs(renderers.get_serializer(datatype),
+                      renderers.get_serializer(datatype))
+
+    def test_get_serializer_published_when_complete(self):
+        class ChildType(wtypes.Base):
+            name = wtypes.wsattr(wtypes.StringType())
+
+        class ParentType(wtypes.Base):
+            children = wtypes.wsattr([ChildType])
+
+        published = []
+        orig_compile = renderers._compile
+
+        def _compile(datatype):
+            # Neither the parent nor its attributes are visible to the other
+            # threads while the parent is being compiled
+            published.append((ParentType in renderers._SERIALIZERS,
+                              ChildType in renderers._SERIALIZERS))
+            return orig_compile(datatype)
+
+        with mock.patch.object(renderers, '_compile', _compile):
+            serializer = renderers.get_serializer(ParentType)
+
+        self.assertNotIn((True, False), published)
+        self.assertNotIn((False, True), published)
+        self.assertIs(serializer, renderers._SERIALIZERS[ParentType])
+        self.assertIn(ChildType, renderers._SERIALIZERS)
+        self.assertEqual({}, renderers._PENDING_SERIALIZERS)
+        self.assertEqual(
+            {'children': [{'name': 'c1'}]},
+            serializer(ParentType(children=[ChildType(name='c1')])))
+
+    @mock.patch('wsmeext.pecan.JSonRenderer.render')
+    @mock.patch('octavia.api.common.renderers.pecan_request')
+    def test_render(self, mock_request, mock_wsme_render):
+        lb = self._get_lb()
+        namespace = {'result': lb,
+                     'datatype': lb_types.LoadBalancerResponse}
+        renderer = renderers.FastJSONRenderer('path', {})
+
+        mock_request.method = 'GET'
+        self.assertEqual(
+            renderers.encode_result(lb, lb_types.LoadBalancerResponse),
+            renderer.render('', namespace))
+        mock_wsme_render.assert_not_called()
+
+        mock_request.method = 'POST'
+        self.assertEqual(mock_wsme_render.return_value,
+                         renderer.render('', namespace))
+        mock_wsme_render.assert_called_once_with('', namespace)
@@ -12,8 +12,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from concurrent import futures
 from unittest import mock
 
+from oslo_config import cfg
+
 from octavia.api.drivers import driver_factory
 from octavia.common import exceptions
 import octavia.tests.unit.base as base
@@ -46,3 +49,39 @@ class TestDriverFactory(base.TestCase):
         self.assertRaises(exceptions.ProviderNotEnabled,
                           driver_factory.get_driver,
                           'dont-enable-this-fake-driver-name')
+
+    @mock.patch('stevedore.driver.DriverManager')
+    def test_driver_factory_cached(self, mock_drivermgr):
+        mock_drivermgr.side_effect = [mock.MagicMock(), mock.MagicMock()]
+
+        driver = driver_factory.get_driver('amphora')
+        self.assertIs(driver, driver_factory.get_driver('amphora'))
+        self.assertEqual('amphora', driver.name)
+        mock_drivermgr.assert_called_once_with(
+            namespace='octavia.api.drivers', name='amphora',
+            invoke_on_load=True)
+
+        # A configuration reload drops the cached drivers
+        driver_factory.clear_driver_cache(cfg.CONF, {})
+        self.assertIsNot(driver, driver_factory.get_driver('amphora'))
+        self.assertEqual(2, mock_drivermgr.call_count)
+
+    @mock.patch('stevedore.driver.DriverManager')
+    def test_driver_factory_failed_load_not_cached(self, mock_drivermgr):
+        mock_mgr = mock.MagicMock()
+        mock_drivermgr.side_effect = [Exception('boom'), mock_mgr]
+
+        self.assertRaises(exceptions.ProviderNotFound,
+                          driver_factory.get_driver, 'amphora')
+        self.assertEqual(mock_mgr.driver,
+                         driver_factory.get_driver('amphora'))
+
+    @mock.patch('stevedore.driver.DriverManager')
+    def test_driver_factory_concurrent_load(self, mock_drivermgr):
+        with futures.ThreadPoolExecutor(max_workers=8) as executor:
+            drivers = list(executor.map(driver_factory.get_driver,
+                                        ['amphora'] * 32))
+
+        mock_drivermgr.assert_called_once()
+        self.assertEqual({id(mock_drivermgr.return_value.driver)},
+                         {id(driver) for driver in drivers})
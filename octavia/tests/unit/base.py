@@ -19,8 +19,11 @@ import oslo_messaging as messaging
 from oslo_messaging import conffixture as messaging_conffixture
 import testtools
 
+from octavia.api.drivers import driver_factory
+from octavia.common import cache
 from octavia.common import clients
 from octavia.common import rpc
+from octavia.controller.worker import failover_coordinator
 
 # needed for tests to function when run independently:
 from octavia.common import config  # noqa: F401
@@ -42,6 +45,9 @@ class TestCase(testtools.TestCase):
     def clean_caches(self):
         clients.NovaAuth.nova_client = None
         clients.NeutronAuth.neutron_client = None
+        driver_factory.clear_driver_cache()
+        cache.clear_all()
+        failover_coordinator.get_failover_coordinator().clear_lookups()
 
 
 class TestRpc(testtools.TestCase):
@@ -12,6 +12,9 @@
 import ssl
 from unittest import mock
 
+from oslo_config import cfg
+from oslo_config import fixture as oslo_fixture
+
 from octavia.cmd import agent
 from octavia.tests.unit import base
 
@@ -41,6 +44,27 @@ class TestAmphoraAgentCMD(base.TestCase):
         self.assertEqual(
             ssl.CERT_REQUIRED,
             mock_amp.call_args[0][1]['cert_reqs'])
+        # The threads serve concurrent requests and keep the connections of
+        # the controllers alive
+        self.assertEqual('gthread', mock_amp.call_args[0][1]['worker_class'])
+        self.assertEqual(4, mock_amp.call_args[0][1]['threads'])
+        self.assertEqual(30, mock_amp.call_args[0][1]['keepalive'])
 
         mock_health_proc.start.assert_called_once_with()
         mock_amp_instance.run.assert_called_once()
+
+    @mock.patch('octavia.cmd.agent.AmphoraAgent')
+    @mock.patch('octavia.amphorae.backends.agent.api_server.server.Server')
+    @mock.patch('multiprocessing.Process')
+    @mock.patch('octavia.common.service.prepare_service')
+    def test_main_no_keepalive(self, mock_service, mock_process, mock_server,
+                               mock_amp):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group='amphora_agent', agent_keepalive_timeout=0)
+        conf.config(group='amphora_agent', agent_worker_threads=8)
+
+        agent.main()
+
+        self.assertEqual('gthread', mock_amp.call_args[0][1]['worker_class'])
+        self.assertEqual(8, mock_amp.call_args[0][1]['threads'])
+        self.assertEqual(0, mock_amp.call_args[0][1]['keepalive'])
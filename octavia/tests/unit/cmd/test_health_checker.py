@@ -38,6 +38,37 @@ class TestHealthCheckerCMD(base.TestCase):
 
         self.assertEqual(result, 0x30e0e107)
 
+    @mock.patch('octavia.cmd.health_checker._crc32c_extension')
+    def test_crc32c_extension(self, mock_extension):
+        mock_extension.return_value = 0x07e1e030
+
+        result = health_checker.crc32c(bytearray(b'STRING1234'))
+
+        self.assertEqual(result, 0x30e0e107)
+        mock_extension.assert_called_once_with(b'STRING1234')
+
+    @mock.patch('octavia.cmd.health_checker._crc32c_extension', None)
+    def test_load_crc32c_extension(self):
+        google_crc32c = mock.Mock(implementation='c')
+
+        with mock.patch.dict('sys.modules', {'google_crc32c': google_crc32c}):
+            self.assertTrue(health_checker.load_crc32c_extension())
+        self.assertEqual(google_crc32c.value,
+                         health_checker._crc32c_extension)
+
+    @mock.patch('octavia.cmd.health_checker._crc32c_extension', None)
+    def test_load_crc32c_extension_unavailable(self):
+        # Pure python implementation
+        google_crc32c = mock.Mock(implementation='python')
+        with mock.patch.dict('sys.modules', {'google_crc32c': google_crc32c}):
+            self.assertFalse(health_checker.load_crc32c_extension())
+
+        # Not installed
+        with mock.patch.dict('sys.modules', {'google_crc32c': None}):
+            self.assertFalse(health_checker.load_crc32c_extension())
+
+        self.assertIsNone(health_checker._crc32c_extension)
+
     @mock.patch('random.randint', return_value=42424242)
     def test__sctp_build_init_packet(self, mock_randint):
         expected_packet = bytearray(
@@ -326,3 +357,16 @@ class TestHealthCheckerCMD(base.TestCase):
         mock_decode_packet.assert_not_called()
         for call in socket_mock.send.mock_calls:
             self.assertNotEqual(mock.call(abrt_mock), call)
+
+    def test_parse_args(self):
+        self.assertEqual(
+            ('sctp', 5, '192.168.0.27', 1234),
+            health_checker.parse_args(
+                ['sctp', '-t', '5', '192.168.0.27', '1234']))
+        # Default timeout
+        self.assertEqual(
+            ('sctp', 3, '2001:db8::27', 1234),
+            health_checker.parse_args(['sctp', '2001:db8::27', '1234']))
+        self.assertRaises(ValueError, health_checker.parse_args,
+                          ['sctp', '-t', 'foo', '192.168.0.27', '1234'])
+        self.assertRaises(IndexError, health_checker.parse_args, ['sctp'])
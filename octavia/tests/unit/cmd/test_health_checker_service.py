@@ -0,0 +1,220 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import asyncio
+import socket
+import struct
+from unittest import mock
+
+import fixtures
+
+from octavia.cmd import health_checker_service
+from octavia.tests.unit import base
+
+# IPv4 header of the replies
+IPV4_HEADER = b'\x45' + b'\x00' * 19
+
+
+def _reply(init_packet, chunk_type, tag_offset=0):
+    src_port, dest_port = struct.unpack_from('!HH', init_packet, 0)
+    # The initiate tag of the INIT chunk
+    tag = struct.unpack_from('!L', init_packet, 16)[0] + tag_offset
+    return struct.pack('!HHLLBBH', dest_port, src_port, tag, 0, chunk_type,
+                       0, 4)
+
+
+class TestSCTPProber(base.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        # The loop creates its sockets before socket.socket is mocked
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.useFixture(fixtures.MockPatchObject(self.loop, 'add_reader'))
+        self.useFixture(fixtures.MockPatchObject(self.loop, 'remove_reader'))
+        self.mock_socket = self.useFixture(fixtures.MockPatch(
+            'socket.socket')).mock
+        self.sock = self.mock_socket.return_value
+        self.sock.recvfrom.side_effect = BlockingIOError
+        self.useFixture(fixtures.MockPatch(
+            'octavia.cmd.health_checker.has_sctp_support',
+            return_value=True))
+
+    def _probe(self, replies, ip_address='192.0.2.10', sctp_support=True,
+               timeout=1):
+        prober = health_checker_service.SCTPProber(self.loop)
+        prober._sctp_support = sctp_support
+
+        def _sendto(data, destination):
+            if self.sock.sendto.call_count > 1:
+                return
+            family = self.mock_socket.call_args[0][0]
+            self.sock.recvfrom.side_effect = replies(data) + [
+                BlockingIOError()]
+            self.loop.call_soon(prober._read, self.sock, family)
+
+        self.sock.sendto.side_effect = _sendto
+        try:
+            return self.loop.run_until_complete(
+                prober.probe(ip_address, 1234, timeout=timeout))
+        finally:
+            prober.close()
+
+    def test_probe_init_ack(self):
+        ret = self._probe(lambda data: [
+            # Its own INIT packet, a reply to another probe, then the reply
+            (IPV4_HEADER + data, ('192.0.2.10', 0)),
+            (IPV4_HEADER + _reply(data, 2, tag_offset=1),
+             ('192.0.2.10', 0)),
+            (IPV4_HEADER + _reply(data, 2), ('192.0.2.10', 0))])
+
+        self.assertEqual(0, ret)
+        self.mock_socket.assert_called_once_with(
+            socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_SCTP)
+        self.sock.setblocking.assert_called_once_with(False)
+        # The kernel aborts the association
+        self.sock.sendto.assert_called_once_with(mock.ANY,
+                                                 ('192.0.2.10', 0))
+        self.sock.close.assert_called_once_with()
+
+    def test_probe_init_ack_without_sctp_support(self):
+        ret = self._probe(lambda data: [
+            (IPV4_HEADER + _reply(data, 2), ('192.0.2.10', 0))],
+            sctp_support=False)
+
+        self.assertEqual(0, ret)
+        self.assertEqual(2, self.sock.sendto.call_count)
+        abort_packet = self.sock.sendto.call_args[0][0]
+        self.assertEqual(6, abort_packet[12])
+
+    def test_probe_abort(self):
+        ret = self._probe(lambda data: [
+            (IPV4_HEADER + _reply(data, 6), ('192.0.2.10', 0))],
+            sctp_support=False)
+
+        self.assertEqual(1, ret)
+        self.sock.sendto.assert_called_once()
+
+    def test_probe_unknown_chunk(self):
+        ret = self._probe(lambda data: [
+            (IPV4_HEADER + _reply(data, 4), ('192.0.2.10', 0))])
+
+        self.assertEqual(3, ret)
+
+    def test_probe_ipv6(self):
+        ret = self._probe(lambda data: [
+            # From another member
+            (_reply(data, 6), ('2001:db8::11', 0, 0, 0)),
+            (_reply(data, 2), ('2001:db8::10', 0, 0, 0))],
+            ip_address='2001:0db8::10')
+
+        self.assertEqual(0, ret)
+        self.mock_socket.assert_called_once_with(
+            socket.AF_INET6, socket.SOCK_RAW, socket.IPPROTO_SCTP)
+
+    def test_probe_timeout(self):
+        ret = self._probe(lambda data: [], timeout=0.01)
+
+        self.assertEqual(2, ret)
+
+    def test_probe_send_error(self):
+        self.sock.sendto.side_effect = OSError
+
+        prober = health_checker_service.SCTPProber(self.loop)
+
+        ret = self.loop.run_until_complete(prober.probe('192.0.2.10', 1234))
+
+        self.assertEqual(1, ret)
+        self.assertEqual({}, prober._probes)
+
+
+class TestHealthCheckerService(base.TestCase):
+
+    def _check(self, line):
+        async def _run():
+            service = health_checker_service.HealthCheckerService(
+                asyncio.get_running_loop())
+            with mock.patch.object(service.sctp_prober, 'probe',
+                                   new_callable=mock.AsyncMock,
+                                   return_value=0) as mock_probe:
+                return await service.check(line), mock_probe
+
+        return asyncio.run(_run())
+
+    @mock.patch('octavia.cmd.health_checker.has_sctp_support',
+                return_value=True)
+    def test_check(self, mock_has_sctp_support):
+        ret, mock_probe = self._check('sctp -t 5 192.0.2.10 1234')
+
+        self.assertEqual(0, ret)
+        mock_probe.assert_called_once_with('192.0.2.10', 1234, timeout=5)
+
+    @mock.patch('octavia.cmd.health_checker.has_sctp_support',
+                return_value=True)
+    def test_check_invalid(self, mock_has_sctp_support):
+        for line in ('', 'sctp -t 5', 'sctp 192.0.2.10 port',
+                     'udp 192.0.2.10 1234'):
+            ret, mock_probe = self._check(line)
+
+            self.assertEqual(1, ret)
+            mock_probe.assert_not_called()
+
+    @mock.patch('octavia.cmd.health_checker.has_sctp_support',
+                return_value=True)
+    def test_handle(self, mock_has_sctp_support):
+        async def _run():
+            service = health_checker_service.HealthCheckerService(
+                asyncio.get_running_loop())
+            checks = []
+            handled = asyncio.Event()
+
+            async def _check(line):
+                checks.append(line)
+                return len(checks)
+
+            async def _handle(reader, writer):
+                await service.handle(reader, writer)
+                handled.set()
+
+            with mock.patch.object(service, 'check', _check):
+                server = await asyncio.start_server(_handle, '127.0.0.1', 0)
+                async with server:
+                    port = server.sockets[0].getsockname()[1]
+                    reader, writer = await asyncio.open_connection(
+                        '127.0.0.1', port)
+                    # Several checks on a connection
+                    writer.write(b'sctp -t 3 192.0.2.10 1234\n'
+                                 b'sctp 192.0.2.11 1234\n')
+                    replies = [await reader.readline(),
+                               await reader.readline()]
+                    writer.close()
+                    # The connection is closed at the end of the checks
+                    await handled.wait()
+            return checks, replies
+
+        checks, replies = asyncio.run(_run())
+
+        self.assertEqual(['sctp -t 3 192.0.2.10 1234', 'sctp 192.0.2.11 1234'],
+                         checks)
+        self.assertEqual([b'1\n', b'2\n'], replies)
+
+
+class TestHealthCheckerServiceCMD(base.TestCase):
+
+    @mock.patch('asyncio.run')
+    @mock.patch('octavia.cmd.health_checker.load_crc32c_extension')
+    def test_main(self, mock_load_crc32c_extension, mock_run):
+        health_checker_service.main()
+
+        mock_load_crc32c_extension.assert_called_once_with()
+        mock_run.assert_called_once_with(mock.ANY)
+        # Closes the coroutine which was not run
+        mock_run.call_args[0][0].close()
@@ -14,6 +14,9 @@
 
 from unittest import mock
 
+from oslo_config import cfg
+from oslo_config import fixture as oslo_fixture
+
 from octavia.cmd import house_keeping
 from octavia.tests.unit import base
 
@@ -22,6 +25,24 @@ class TestHouseKeepingCMD(base.TestCase):
     def setUp(self):
         super().setUp()
 
+    @mock.patch('octavia.cmd.house_keeping.spare_amp_thread_event')
+    @mock.patch('octavia.controller.housekeeping.'
+                'house_keeping.SpareAmphora')
+    def test_spare_amphora_check(self, mock_SpareAmphora,
+                                 spare_amp_thread_event_mock):
+        spare_amp_mock = mock.MagicMock()
+        spare_amp_mock.spare_check.side_effect = [None, Exception('boom')]
+        mock_SpareAmphora.return_value = spare_amp_mock
+
+        # mock spare_amp_thread_event.is_set() in the while loop
+        spare_amp_thread_event_mock.is_set = mock.MagicMock()
+        spare_amp_thread_event_mock.is_set.side_effect = [False, False, True]
+
+        house_keeping.spare_amphora_check()
+
+        mock_SpareAmphora.assert_called_once_with()
+        self.assertEqual(2, spare_amp_mock.spare_check.call_count)
+
     @mock.patch('octavia.cmd.house_keeping.db_cleanup_thread_event')
     @mock.patch('octavia.controller.housekeeping.'
                 'house_keeping.DatabaseCleanup')
@@ -147,6 +168,40 @@ class TestHouseKeepingCMD(base.TestCase):
         self.assertEqual(2, db_cleanup_thread_mock.join.call_count)
         cert_rotate_thread_mock.join.assert_called_once_with()
 
+    @mock.patch('octavia.cmd.house_keeping.cert_rotate_thread_event')
+    @mock.patch('octavia.cmd.house_keeping.db_cleanup_thread_event')
+    @mock.patch('octavia.cmd.house_keeping.spare_amp_thread_event')
+    @mock.patch('threading.Thread')
+    @mock.patch('octavia.common.service.prepare_service')
+    def test_main_spare_pool(self, mock_service, mock_thread,
+                             spare_amp_thread_event_mock,
+                             db_cleanup_thread_event_mock,
+                             cert_rotate_thread_event_mock):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group="house_keeping", spare_amphora_pool_size=1)
+
+        spare_amp_thread_mock = mock.MagicMock()
+        db_cleanup_thread_mock = mock.MagicMock()
+        cert_rotate_thread_mock = mock.MagicMock()
+
+        mock_thread.side_effect = [spare_amp_thread_mock,
+                                   db_cleanup_thread_mock,
+                                   cert_rotate_thread_mock]
+
+        mock_join = mock.MagicMock()
+        mock_join.side_effect = [KeyboardInterrupt, None]
+        spare_amp_thread_mock.join = mock_join
+
+        house_keeping.main()
+
+        mock_thread.assert_any_call(target=house_keeping.spare_amphora_check)
+        spare_amp_thread_mock.start.assert_called_once_with()
+        self.assertTrue(spare_amp_thread_mock.daemon)
+        spare_amp_thread_event_mock.set.assert_called_once_with()
+        self.assertEqual(2, spare_amp_thread_mock.join.call_count)
+        db_cleanup_thread_mock.join.assert_called_once_with()
+        cert_rotate_thread_mock.join.assert_called_once_with()
+
     @mock.patch('oslo_config.cfg.CONF.mutate_config_files')
     def test_mutate_config(self, mock_mutate):
         house_keeping._mutate_config()
@@ -96,11 +96,31 @@ class TestInterfaceCMD(base.TestCase):
             interfaces, action_fn, action_str)
         self.assertEqual(2, len(action_fn.mock_calls))
 
+    def test_interfaces_up(self):
+        controller = mock.Mock()
+        controller.up_all.return_value = {}
+        interfaces = [self.interface1, self.interface2]
+
+        interface.interfaces_up(controller, interfaces)
+        controller.up_all.assert_called_once_with(interfaces)
+
+    def test_interfaces_up_with_errors(self):
+        controller = mock.Mock()
+        controller.up_all.return_value = {"eth2": Exception("error msg")}
+        interfaces = [self.interface1, self.interface2]
+
+        self.assertRaisesRegex(
+            interface.InterfaceException,
+            "Could not configure interface:.*'up'.*eth2.*error msg",
+            interface.interfaces_up,
+            controller, interfaces)
+
     @mock.patch("octavia.amphorae.backends.utils.interface."
                 "InterfaceController")
     @mock.patch("octavia.cmd.interface.interfaces_find")
+    @mock.patch("octavia.cmd.interface.interfaces_up")
     @mock.patch("octavia.cmd.interface.interfaces_update")
-    def test_interface_cmd(self, mock_interfaces_update,
+    def test_interface_cmd(self, mock_interfaces_update, mock_interfaces_up,
                            mock_interfaces_find, mock_controller):
         controller = mock.Mock()
         controller.up = mock.Mock()
@@ -112,8 +132,9 @@ class TestInterfaceCMD(base.TestCase):
 
         mock_interfaces_find.assert_called_once_with(
             controller, "eth1")
-        mock_interfaces_update.assert_called_once_with(
-            [self.interface1], mock_controller.return_value.up, "up")
+        mock_interfaces_up.assert_called_once_with(
+            controller, [self.interface1])
+        mock_interfaces_update.assert_not_called()
 
         mock_interfaces_find.reset_mock()
         mock_interfaces_update.reset_mock()
@@ -14,12 +14,23 @@
 import signal
 from unittest import mock
 
+from oslo_config import cfg
+from oslo_config import fixture as oslo_fixture
+
 from octavia.cmd import prometheus_proxy
 from octavia.tests.unit import base
 
+LISTENER_ID1 = b"0b248d39-eb90-4180-91aa-5363be7df4db"
+LISTENER_ID2 = b"1a0c13c0-8e69-46c7-a68a-ca4937996d74"
+POOL_ID1 = b"6034884d-ed47-49d5-ade7-8fa2c4501a74"
+
 
 class TestPrometheusProxyCMD(base.TestCase):
 
+    def setUp(self):
+        super().setUp()
+        self.conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+
     @mock.patch('http.server.SimpleHTTPRequestHandler.log_request')
     @mock.patch('http.server.SimpleHTTPRequestHandler.__init__')
     def test_log_request(self, mock_req_handler_init, mock_log_request):
@@ -77,6 +88,7 @@ class TestPrometheusProxyCMD(base.TestCase):
                     mock_getloadavg, mock_cpu_count, mock_urlopen, mock_print):
         mock_req_handler_init.return_value = None
         proxy = prometheus_proxy.PrometheusProxy()
+        proxy.path = "/metrics"
 
         mock_send_response = mock.MagicMock()
         proxy.send_response = mock_send_response
@@ -95,10 +107,220 @@ class TestPrometheusProxyCMD(base.TestCase):
 
             mock_send_response.assert_called_once_with(200)
 
+            mock_send_header.assert_any_call("transfer-encoding", "chunked")
+
             with open("octavia/tests/common/sample_octavia_prometheus",
                       "rb") as file2:
                 octavia_metrics = file2.read()
-                mock_wfile.write.assert_called_once_with(octavia_metrics)
+                self.assertEqual(
+                    octavia_metrics,
+                    self._dechunk(b"".join(
+                        call.args[0]
+                        for call in mock_wfile.write.call_args_list)))
+
+    @staticmethod
+    def _dechunk(data):
+        body = b""
+        while True:
+            size, data = data.split(b"\r\n", 1)
+            size = int(size, 16)
+            if not size:
+                assert data == b"\r\n"
+                return body
+            body += data[:size]
+            assert data[size:size + 2] == b"\r\n"
+            data = data[size + 2:]
+
+    @mock.patch('octavia.cmd.prometheus_proxy.CHUNK_SIZE', 1024)
+    @mock.patch('urllib.request.urlopen')
+    @mock.patch('os.cpu_count', return_value=2)
+    @mock.patch('psutil.getloadavg', return_value=(1, 2, 3))
+    @mock.patch('psutil.virtual_memory', return_value=(1, 2, 23.5))
+    @mock.patch('http.server.SimpleHTTPRequestHandler.__init__')
+    def test_do_get_chunks(self, mock_req_handler_init, mock_virt_mem,
+                           mock_getloadavg, mock_cpu_count, mock_urlopen):
+        mock_req_handler_init.return_value = None
+        proxy = prometheus_proxy.PrometheusProxy()
+        proxy.path = "/metrics"
+        proxy.send_response = mock.MagicMock()
+        proxy.send_header = mock.MagicMock()
+        proxy.end_headers = mock.MagicMock()
+        proxy.wfile = mock.MagicMock()
+
+        with open("octavia/tests/common/sample_haproxy_prometheus",
+                  "rb") as file:
+            mock_urlopen.return_value = file
+
+            proxy.do_GET()
+
+        writes = [call.args[0] for call in proxy.wfile.write.call_args_list]
+        # The metrics are sent as they are converted
+        self.assertGreater(len(writes), 10)
+        self.assertEqual(b"0\r\n\r\n", writes[-1])
+        with open("octavia/tests/common/sample_octavia_prometheus",
+                  "rb") as file2:
+            self.assertEqual(file2.read(), self._dechunk(b"".join(writes)))
+
+    @mock.patch('builtins.print')
+    @mock.patch('urllib.request.urlopen')
+    @mock.patch('os.cpu_count', return_value=2)
+    @mock.patch('psutil.getloadavg', return_value=(1, 2, 3))
+    @mock.patch('psutil.virtual_memory', return_value=(1, 2, 23.5))
+    @mock.patch('http.server.SimpleHTTPRequestHandler.__init__')
+    def test_do_get_read_exception(self, mock_req_handler_init,
+                                   mock_virt_mem, mock_getloadavg,
+                                   mock_cpu_count, mock_urlopen, mock_print):
+        self.conf.config(group="amphora_agent", prometheus_cache_ttl=0)
+        mock_source = mock.MagicMock()
+        mock_source.__enter__.return_value = mock_source
+        mock_source.__iter__.side_effect = Exception('boom')
+        mock_urlopen.return_value = mock_source
+        mock_req_handler_init.return_value = None
+        proxy = prometheus_proxy.PrometheusProxy()
+        proxy.path = "/metrics"
+        proxy.send_response = mock.MagicMock()
+        proxy.send_header = mock.MagicMock()
+        proxy.end_headers = mock.MagicMock()
+        proxy.wfile = mock.MagicMock()
+
+        proxy.do_GET()
+
+        proxy.send_response.assert_called_once_with(200)
+        # The response is not terminated so the scrape fails
+        proxy.wfile.write.assert_not_called()
+        self.assertTrue(proxy.close_connection)
+        mock_source.__exit__.assert_called_once()
+
+    def _get_proxy(self, path="/metrics"):
+        proxy = prometheus_proxy.PrometheusProxy()
+        proxy.path = path
+        proxy.send_response = mock.MagicMock()
+        proxy.send_header = mock.MagicMock()
+        proxy.end_headers = mock.MagicMock()
+        proxy.wfile = mock.MagicMock()
+        return proxy
+
+    def _get_body(self, proxy):
+        return self._dechunk(b"".join(
+            call.args[0] for call in proxy.wfile.write.call_args_list))
+
+    @mock.patch('urllib.request.urlopen')
+    @mock.patch('os.cpu_count', return_value=2)
+    @mock.patch('psutil.getloadavg', return_value=(1, 2, 3))
+    @mock.patch('psutil.virtual_memory', return_value=(1, 2, 23.5))
+    @mock.patch('http.server.SimpleHTTPRequestHandler.__init__',
+                return_value=None)
+    def test_do_get_cached(self, mock_req_handler_init, mock_virt_mem,
+                           mock_getloadavg, mock_cpu_count, mock_urlopen):
+        self.conf.config(group="amphora_agent", prometheus_cache_ttl=1)
+        with open("octavia/tests/common/sample_haproxy_prometheus",
+                  "rb") as file:
+            mock_urlopen.return_value = file
+            proxy1 = self._get_proxy()
+            proxy1.do_GET()
+        proxy2 = self._get_proxy()
+        proxy2.do_GET()
+
+        # The second scrape reuses the metrics of the first one
+        mock_urlopen.assert_called_once_with(prometheus_proxy.METRICS_URL)
+        with open("octavia/tests/common/sample_octavia_prometheus",
+                  "rb") as file2:
+            octavia_metrics = file2.read()
+        self.assertEqual(octavia_metrics, self._get_body(proxy1))
+        self.assertEqual(octavia_metrics, self._get_body(proxy2))
+
+    @mock.patch('urllib.request.urlopen')
+    @mock.patch('os.cpu_count', return_value=2)
+    @mock.patch('psutil.getloadavg', return_value=(1, 2, 3))
+    @mock.patch('psutil.virtual_memory', return_value=(1, 2, 23.5))
+    @mock.patch('http.server.SimpleHTTPRequestHandler.__init__',
+                return_value=None)
+    def test_do_get_filtered(self, mock_req_handler_init, mock_virt_mem,
+                             mock_getloadavg, mock_cpu_count, mock_urlopen):
+        self.conf.config(group="amphora_agent", prometheus_cache_ttl=0)
+        proxy = self._get_proxy(
+            "/metrics?exclude_members=true&listener=" +
+            LISTENER_ID1.decode())
+        with open("octavia/tests/common/sample_haproxy_prometheus",
+                  "rb") as file:
+            mock_urlopen.return_value = file
+            proxy.do_GET()
+
+        proxy.send_response.assert_called_once_with(200)
+        body = self._get_body(proxy)
+        self.assertIn(b"octavia_loadbalancer_cpu 50.0\n", body)
+        self.assertIn(b'listener="' + LISTENER_ID1 + b'"', body)
+        self.assertIn(b'pool="' + POOL_ID1 + b":" + LISTENER_ID1 + b'"',
+                      body)
+        self.assertNotIn(LISTENER_ID2, body)
+        self.assertNotIn(b'member="', body)
+
+    @mock.patch('http.server.SimpleHTTPRequestHandler.__init__',
+                return_value=None)
+    def test_get_filters(self, mock_req_handler_init):
+        self.conf.config(group="amphora_agent",
+                         prometheus_exclude_members=True)
+
+        self.assertEqual((True, set(), set()),
+                         self._get_proxy()._get_filters())
+        # The query parameters override the configuration
+        self.assertEqual(
+            (False, set(), {b"pool2", b"pool3"}),
+            self._get_proxy("/metrics?exclude_members=false&"
+                            "pool=pool2,pool3")._get_filters())
+        self.assertEqual(
+            (True, {b"listener2", b"listener3"}, set()),
+            self._get_proxy("/metrics?listener=listener2&"
+                            "listener=listener3")._get_filters())
+
+    def test_filter_metrics(self):
+        with open("octavia/tests/common/sample_octavia_prometheus",
+                  "rb") as file:
+            metrics = file.read()
+        filter_metrics = prometheus_proxy.filter_metrics
+
+        self.assertIs(metrics, filter_metrics(metrics))
+
+        filtered = filter_metrics(metrics, exclude_members=True)
+        self.assertNotIn(b'member="', filtered)
+        self.assertIn(LISTENER_ID2, filtered)
+        self.assertIn(b"# TYPE octavia_member_status gauge\n", filtered)
+
+        filtered = filter_metrics(metrics, pools={POOL_ID1})
+        self.assertIn(b'pool="' + POOL_ID1 + b":", filtered)
+        self.assertIn(b'member="', filtered)
+        self.assertNotIn(b'listener="', filtered)
+        self.assertIn(b"octavia_loadbalancer_max_connections ", filtered)
+
+        filtered = filter_metrics(metrics, listeners={LISTENER_ID2})
+        self.assertIn(b'listener="' + LISTENER_ID2 + b'"', filtered)
+        self.assertNotIn(LISTENER_ID1, filtered)
+
+    def test_convert_metric_line(self):
+        convert = prometheus_proxy.convert_metric_line
+        self.assertEqual(
+            'octavia_listener_max_sessions{listener="L1"} 50000\n',
+            convert('haproxy_frontend_max_sessions{proxy="L1"} 50000\n'))
+        self.assertEqual(
+            'octavia_member_current_sessions{pool="P1",member="M1"} 0\n',
+            convert('haproxy_server_current_sessions{proxy="P1",'
+                    'server="M1"} 0\n'))
+        self.assertEqual(
+            '# TYPE octavia_listener_max_sessions gauge\n',
+            convert('# TYPE haproxy_frontend_max_sessions gauge\n'))
+        self.assertEqual(
+            'octavia_loadbalancer_max_connections 50000\n',
+            convert('haproxy_process_max_connections 50000\n'))
+
+    def test_convert_metric_line_rejected(self):
+        convert = prometheus_proxy.convert_metric_line
+        self.assertIsNone(convert('haproxy_unknown_metric 1\n'))
+        self.assertIsNone(convert('haproxy_frontend_max_sessions_x 1\n'))
+        self.assertIsNone(convert(
+            'haproxy_frontend_max_sessions{proxy="prometheus-exporter"} '
+            '1\n'))
+        self.assertIsNone(convert('# EOF\n'))
+        self.assertIsNone(convert('\n'))
 
     @mock.patch('urllib.request.urlopen')
     @mock.patch('os.cpu_count', return_value=2)
@@ -110,6 +332,7 @@ class TestPrometheusProxyCMD(base.TestCase):
         mock_urlopen.side_effect = [Exception('boom')]
         mock_req_handler_init.return_value = None
         proxy = prometheus_proxy.PrometheusProxy()
+        proxy.path = "/metrics"
 
         mock_send_response = mock.MagicMock()
         proxy.send_response = mock_send_response
@@ -146,6 +369,9 @@ class TestPrometheusProxyCMD(base.TestCase):
         mock_exit_event.wait.assert_called_once()
         mock_http.shutdown.assert_called_once()
 
+    @mock.patch('sys.argv', ['prometheus-proxy', '--rejected',
+                             '--config-file', 'amphora-agent.conf'])
+    @mock.patch('octavia.common.config.init')
     @mock.patch('threading.Thread')
     @mock.patch('http.server.ThreadingHTTPServer.__init__')
     @mock.patch('http.server.ThreadingHTTPServer.serve_forever')
@@ -157,15 +383,20 @@ class TestPrometheusProxyCMD(base.TestCase):
     @mock.patch('octavia.cmd.prometheus_proxy.SignalHandler')
     def test_main(self, mock_signal_handler, mock_exit_event, mock_netns_enter,
                   mock_netns_exit, mock_serve_forever, mock_server_init,
-                  mock_thread):
+                  mock_thread, mock_config_init):
 
         mock_exit_event.is_set.side_effect = [False, False, True]
         mock_netns_enter.side_effect = [Exception('boom'), True]
 
         mock_server_init.return_value = None
 
-        prometheus_proxy.main()
+        with mock.patch('octavia.cmd.prometheus_proxy.PRINT_REJECTED',
+                        False):
+            prometheus_proxy.main()
+            self.assertTrue(prometheus_proxy.PRINT_REJECTED)
 
+        mock_config_init.assert_called_once_with(
+            ['--config-file', 'amphora-agent.conf'])
         mock_signal_handler.assert_called_once()
         mock_server_init.assert_called_once_with(
             ('127.0.0.1', 9102),
@@ -0,0 +1,250 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import os
+import socket
+import threading
+import time
+from unittest import mock
+
+import fixtures
+from oslo_config import cfg
+from oslo_config import fixture as oslo_fixture
+
+from octavia.amphorae.backends.agent.api_server import util
+from octavia.cmd import vrrp_check
+from octavia.tests.unit import base
+
+
+class FakeStatsSocket:
+    """A haproxy stats socket supporting the interactive mode."""
+
+    def __init__(self, path):
+        self.path = path
+        self.connections = 0
+        self.commands = []
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(path)
+        self._sock.listen(5)
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._handle, args=(conn,),
+                             daemon=True).start()
+
+    def _handle(self, conn):
+        prompt = False
+        with conn, conn.makefile('rb') as lines:
+            for line in lines:
+                command = line.decode().strip()
+                self.commands.append(command)
+                if command == 'prompt':
+                    prompt = True
+                elif command == 'show info':
+                    conn.sendall(b'Name: HAProxy\n\n')
+                if not prompt:
+                    return
+                conn.sendall(b'\n> ')
+
+    def close(self):
+        self._sock.close()
+        os.remove(self.path)
+
+
+class TestVRRPCheck(base.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        self.base_path = self.useFixture(fixtures.TempDir()).path
+        self.conf.config(group='haproxy_amphora', base_path=self.base_path)
+        os.makedirs(util.keepalived_check_scripts_dir())
+        os.makedirs(util.keepalived_lvs_dir())
+        self.checker = vrrp_check.VRRPCheck()
+        self.addCleanup(self.checker.close)
+
+    def _add_stats_socket(self, name):
+        stats_socket = FakeStatsSocket(os.path.join(self.base_path, name))
+        self.addCleanup(stats_socket.close)
+        return stats_socket
+
+    def _write_script(self, path, content='exit 0'):
+        with open(path, 'w') as script:
+            script.write(content)
+
+    def _write_targets(self, sockets):
+        self._write_script(util.haproxy_check_script_path())
+        util._write_vrrp_check_targets(sockets)
+
+    def test_stats_socket_check(self):
+        fake_socket = self._add_stats_socket('lb1.sock')
+        stats_socket = vrrp_check.StatsSocket(fake_socket.path)
+        self.addCleanup(stats_socket.close)
+
+        for _ in range(3):
+            self.assertTrue(stats_socket.check())
+
+        # The connection is kept between the checks
+        self.assertEqual(1, fake_socket.connections)
+        self.assertEqual(['prompt', 'show info', 'show info', 'show info'],
+                         fake_socket.commands)
+
+    def test_stats_socket_check_reload(self):
+        fake_socket = FakeStatsSocket(os.path.join(self.base_path,
+                                                   'lb1.sock'))
+        stats_socket = vrrp_check.StatsSocket(fake_socket.path)
+        self.addCleanup(stats_socket.close)
+        self.assertTrue(stats_socket.check())
+
+        # A reload replaces the socket
+        fake_socket.close()
+        new_socket = FakeStatsSocket(fake_socket.path)
+        self.addCleanup(new_socket.close)
+
+        self.assertTrue(stats_socket.check())
+        self.assertEqual(1, new_socket.connections)
+
+    def test_stats_socket_check_closed(self):
+        fake_socket = self._add_stats_socket('lb1.sock')
+        stats_socket = vrrp_check.StatsSocket(fake_socket.path)
+        self.addCleanup(stats_socket.close)
+        self.assertTrue(stats_socket.check())
+
+        # haproxy closed the idle connection
+        stats_socket._sock.shutdown(socket.SHUT_RD)
+
+        self.assertTrue(stats_socket.check())
+        self.assertEqual(2, fake_socket.connections)
+
+    def test_stats_socket_check_down(self):
+        stats_socket = vrrp_check.StatsSocket(
+            os.path.join(self.base_path, 'missing.sock'))
+
+        self.assertFalse(stats_socket.check())
+
+    def test_check_haproxy(self):
+        lb1 = self._add_stats_socket('lb1.sock')
+        lb2 = self._add_stats_socket('lb2.sock')
+        self._write_targets([lb1.path, lb2.path,
+                             os.path.join(self.base_path, 'lb3.sock')])
+
+        self.assertEqual(1, self.checker.check())
+        self.assertEqual(1, self.checker.check())
+        self.assertEqual(1, lb1.connections)
+
+        # The agent removed the stopped load balancer
+        self._write_targets([lb1.path])
+        self.assertEqual(0, self.checker.check())
+        self.assertEqual([lb1.path], list(self.checker._sockets))
+
+        # No load balancer
+        self._write_targets(None)
+        self.assertEqual(1, self.checker.check())
+
+    @mock.patch('octavia.cmd.vrrp_check.VRRPCheck.run_script',
+                return_value=1)
+    def test_check_haproxy_without_targets(self, mock_run_script):
+        self._write_script(util.haproxy_check_script_path())
+
+        self.assertEqual(1, self.checker.check())
+        mock_run_script.assert_called_once_with(
+            util.haproxy_check_script_path())
+
+    def test_check_lvs(self):
+        self._write_script(util.lvs_check_script_path())
+        lvs_dir = util.keepalived_lvs_dir()
+        # The vrrp.pid and check.pid files are not checked
+        for name, pid in (('octavia-keepalivedlvs-1.pid', os.getpid()),
+                          ('octavia-keepalivedlvs-1.vrrp.pid', 'invalid'),
+                          ('octavia-keepalivedlvs-1.check.pid', 'invalid'),
+                          ('octavia-keepalivedlvs-1.conf', 'invalid')):
+            self._write_script(os.path.join(lvs_dir, name), str(pid))
+
+        self.assertEqual(0, self.checker.check())
+
+        self._write_script(
+            os.path.join(lvs_dir, 'octavia-keepalivedlvs-2.pid'), 'invalid')
+        self.assertEqual(1, self.checker.check())
+
+    def test_check_other_scripts(self):
+        scripts_dir = util.keepalived_check_scripts_dir()
+        self._write_script(os.path.join(scripts_dir, 'ok.sh'))
+        self._write_script(os.path.join(scripts_dir, 'failed.sh'), 'exit 2')
+
+        self.assertEqual(2, self.checker.check())
+
+    def test_check_no_scripts(self):
+        os.rmdir(util.keepalived_check_scripts_dir())
+
+        self.assertEqual(0, self.checker.check())
+
+    def test_write_status(self):
+        os.makedirs(util.keepalived_dir(), exist_ok=True)
+
+        vrrp_check.write_status(1000)
+
+        with open(util.vrrp_check_status_path()) as f:
+            status, timestamp = f.read().split()
+        self.assertEqual(str(vrrp_check.MAX_STATUS), status)
+        self.assertAlmostEqual(time.time(), int(timestamp), delta=2)
+
+    @mock.patch('octavia.cmd.vrrp_check.write_status')
+    def test_run(self, mock_write_status):
+        self.conf.config(group='amphora_agent',
+                         vrrp_check_daemon_interval=0.1)
+        self.addCleanup(vrrp_check.EXIT_EVENT.clear)
+        checker = mock.Mock()
+        checker.check.side_effect = [0, Exception('boom'), 3]
+
+        def _write_status(status):
+            if mock_write_status.call_count == 3:
+                vrrp_check.EXIT_EVENT.set()
+
+        mock_write_status.side_effect = _write_status
+
+        # Nothing is checked until keepalived is configured
+        with mock.patch('os.path.exists', side_effect=[False, True, True,
+                                                       True]):
+            vrrp_check.run(checker)
+
+        mock_write_status.assert_has_calls(
+            [mock.call(0), mock.call(1), mock.call(3)])
+        checker.close.assert_called_once_with()
+
+    @mock.patch('octavia.cmd.vrrp_check.run')
+    @mock.patch('octavia.common.config.setup_logging')
+    @mock.patch('octavia.common.config.init')
+    def test_main(self, mock_init, mock_setup_logging, mock_run):
+        self.conf.config(group='amphora_agent', vrrp_check_daemon=True)
+
+        with mock.patch('signal.signal'):
+            vrrp_check.main()
+
+        mock_run.assert_called_once_with(mock.ANY)
+
+    @mock.patch('octavia.cmd.vrrp_check.run')
+    @mock.patch('octavia.common.config.setup_logging')
+    @mock.patch('octavia.common.config.init')
+    def test_main_disabled(self, mock_init, mock_setup_logging, mock_run):
+        self.addCleanup(vrrp_check.EXIT_EVENT.clear)
+        vrrp_check.EXIT_EVENT.set()
+
+        with mock.patch('signal.signal'):
+            vrrp_check.main()
+
+        mock_run.assert_not_called()
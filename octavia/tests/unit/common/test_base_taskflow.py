@@ -69,6 +69,71 @@ class TestBaseTaskFlowEngine(base.TestCase):
         _engine_mock.prepare.assert_called_once_with()
 
 
+class TestFlowTemplates(base.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group="task_flow", max_workers=2)
+        self.factory = mock.Mock(side_effect=lambda *args, **kwargs: object())
+        self.templates = base_taskflow.FlowTemplates([self.factory])
+
+    def test_get_flow(self):
+        with self.templates.get_flow(self.factory, flavor_dict={'a': 1}) as f1:
+            pass
+        with self.templates.get_flow(self.factory, flavor_dict={'a': 1}) as f2:
+            pass
+
+        self.assertIs(f1, f2)
+        self.factory.assert_called_once_with(flavor_dict={'a': 1})
+
+        # Templates are keyed by the arguments of the factory
+        with self.templates.get_flow(self.factory, flavor_dict={'a': 2}) as f3:
+            pass
+        self.assertIsNot(f1, f3)
+        self.assertEqual(2, self.factory.call_count)
+
+    def test_get_flow_in_use(self):
+        with self.templates.get_flow(self.factory) as f1:
+            with self.templates.get_flow(self.factory) as f2:
+                with self.templates.get_flow(self.factory):
+                    pass
+
+        self.assertIsNot(f1, f2)
+        self.assertEqual(3, self.factory.call_count)
+        # Only max_workers idle flows are kept
+        self.assertEqual(2, len(self.templates._idle_flows[
+            self.templates._get_key(self.factory, (), {})]))
+
+    def test_get_flow_failure(self):
+        def _run():
+            with self.templates.get_flow(self.factory):
+                raise ValueError('boom')
+
+        self.assertRaises(ValueError, _run)
+        with self.templates.get_flow(self.factory):
+            pass
+
+        self.factory.assert_called_once_with()
+
+    def test_get_flow_not_template(self):
+        factory = mock.Mock(side_effect=lambda *args: object())
+
+        with self.templates.get_flow(factory, 'arg') as f1:
+            pass
+        with self.templates.get_flow(factory, 'arg') as f2:
+            pass
+        # Unhashable arguments are not keyed
+        with self.templates.get_flow(self.factory, {'a': {1}}):
+            pass
+        with self.templates.get_flow(self.factory, {'a': {1}}):
+            pass
+
+        self.assertIsNot(f1, f2)
+        self.assertEqual(2, factory.call_count)
+        self.assertEqual(2, self.factory.call_count)
+
+
 class TestTaskFlowServiceController(base.TestCase):
 
     _mock_uuid = '9a2ebc48-cd3e-429e-aa04-e32f5fc5442a'
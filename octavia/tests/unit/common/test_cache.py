@@ -0,0 +1,129 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+from unittest import mock
+
+from octavia.common import cache
+from octavia.common import exceptions
+import octavia.tests.unit.base as base
+
+
+class TestTTLCache(base.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = cache.TTLCache('test', 10)
+
+    @mock.patch('time.monotonic')
+    def test_get(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        loader = mock.Mock(return_value={'a': 1})
+
+        value = self.cache.get('key', loader, 'arg', kwarg='kwarg')
+        self.assertEqual({'a': 1}, value)
+
+        # Callers get their own copy of the value
+        value['b'] = 2
+        self.assertEqual({'a': 1}, self.cache.get('key', loader))
+        loader.assert_called_once_with('arg', kwarg='kwarg')
+
+        # Other keys are loaded separately
+        self.cache.get('other_key', loader)
+        self.assertEqual(2, loader.call_count)
+
+        # The value expires after the TTL
+        mock_monotonic.return_value = 110
+        self.cache.get('key', loader)
+        self.assertEqual(3, loader.call_count)
+
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(3, self.cache.misses)
+
+    def test_get_ttl_function(self):
+        ttl = mock.Mock(return_value=0)
+        ttl_cache = cache.TTLCache('test_ttl_function', ttl)
+        loader = mock.Mock(return_value='value')
+
+        self.assertEqual('value', ttl_cache.get('key', loader))
+        self.assertEqual('value', ttl_cache.get('key', loader))
+        self.assertEqual(2, loader.call_count)
+
+        ttl.return_value = 10
+        ttl_cache.get('key', loader)
+        ttl_cache.get('key', loader)
+        self.assertEqual(3, loader.call_count)
+
+    def test_get_failure(self):
+        loader = mock.Mock(side_effect=[exceptions.OctaviaException('boom'),
+                                        'value'])
+
+        self.assertRaises(exceptions.OctaviaException,
+                          self.cache.get, 'key', loader)
+
+        # Failures are not cached
+        self.assertEqual('value', self.cache.get('key', loader))
+        self.assertEqual(2, loader.call_count)
+
+    def test_get_concurrent(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def _loader():
+            started.set()
+            release.wait(10)
+            return 'value'
+
+        loader = mock.Mock(side_effect=_loader)
+        values = []
+
+        def _get():
+            values.append(self.cache.get('key', loader))
+
+        owner = threading.Thread(target=_get)
+        owner.start()
+        started.wait(10)
+        waiters = [threading.Thread(target=_get) for _ in range(5)]
+        for waiter in waiters:
+            waiter.start()
+        # Wait for the waiters to find the pending entry
+        for _ in range(1000):
+            if self.cache.hits == 5:
+                break
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in [owner] + waiters:
+            thread.join(10)
+
+        self.assertEqual(['value'] * 6, values)
+        loader.assert_called_once_with()
+
+    def test_invalidate(self):
+        loader = mock.Mock(return_value='value')
+        self.cache.get('key', loader)
+        self.cache.get('other_key', loader)
+
+        self.cache.invalidate('key')
+        self.cache.invalidate('missing_key')
+
+        self.cache.get('key', loader)
+        self.cache.get('other_key', loader)
+        self.assertEqual(3, loader.call_count)
+
+    def test_clear_all(self):
+        loader = mock.Mock(return_value='value')
+        self.cache.get('key', loader)
+
+        cache.clear_all()
+
+        self.cache.get('key', loader)
+        self.assertEqual(2, loader.call_count)
@@ -461,6 +461,30 @@ class TestValidations(base.TestCase):
                           validate.ip_not_reserved,
                           '2001:0DB8::5')
 
+    def test_ips_not_reserved(self):
+        self.conf.config(
+            group="networking",
+            reserved_ips=['198.51.100.4',
+                          '2001:0DB8:0000:0000:0000:0000:0000:0005'])
+
+        # Test good addresses
+        validate.ips_not_reserved(['203.0.113.5', '2001:0DB8::9'])
+        validate.ips_not_reserved([])
+
+        # Test IPv4 reserved address
+        self.assertRaises(exceptions.InvalidOption,
+                          validate.ips_not_reserved,
+                          ['203.0.113.5', '198.51.100.4'])
+
+        # Test reserved IPv6 short hand notation
+        self.assertRaises(exceptions.InvalidOption,
+                          validate.ips_not_reserved,
+                          ['2001:0DB8::5'])
+
+        # Test no reserved addresses
+        self.conf.config(group="networking", reserved_ips=[])
+        validate.ips_not_reserved(['198.51.100.4'])
+
     def test_check_default_ciphers_prohibit_list_conflict(self):
         self.conf.config(group='api_settings',
                          tls_cipher_prohibit_list='PSK-AES128-CBC-SHA')
@@ -15,6 +15,7 @@ from unittest import mock
 
 from oslo_utils import uuidutils
 
+from octavia.common import constants
 from octavia.compute.drivers.noop_driver import driver
 import octavia.tests.unit.base as base
 
@@ -101,6 +102,13 @@ class TestNoopComputeDriver(base.TestCase):
             self.driver.driver.computeconfig[
                 self.amphora_id, management_network_id])
 
+    def test_get_server_statuses(self):
+        statuses = self.driver.get_server_statuses([self.amphora_id])
+        self.assertEqual({self.amphora_id: constants.ACTIVE}, statuses)
+        self.assertEqual(
+            ([self.amphora_id], None, 'get_server_statuses'),
+            self.driver.driver.computeconfig[(self.amphora_id,), None])
+
     def test_create_server_group(self):
         self.driver.create_server_group(self.server_group_name,
                                         self.server_group_policy)
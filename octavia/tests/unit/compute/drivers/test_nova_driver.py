@@ -11,6 +11,7 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import datetime
 from unittest import mock
 
 from novaclient import exceptions as nova_exceptions
@@ -257,7 +258,11 @@ class TestNovaClient(base.TestCase):
 
     def test_bad_build(self):
         self.manager.manager.create.side_effect = Exception
-        self.assertRaises(exceptions.ComputeBuildException, self.manager.build)
+        self.manager.image_driver = mock.MagicMock()
+        self.assertRaises(exceptions.ComputeBuildException, self.manager.build,
+                          image_tag='tag', image_owner='owner')
+        self.manager.image_driver.invalidate_image_id.assert_called_once_with(
+            'tag', 'owner')
 
     def test_build_extracts_image_id_by_tag(self):
         self.manager.build(image_tag='tag')
@@ -307,6 +312,30 @@ class TestNovaClient(base.TestCase):
         self.manager.manager.get.assert_has_calls(
             [mock.call(amphora.compute_id)] * 2)
 
+    def test_get_server_statuses(self):
+        other_server = mock.Mock(id=uuidutils.generate_uuid(),
+                                 status='BUILD')
+        self.manager.manager.list.return_value = [self.nova_response,
+                                                  other_server]
+        changes_since = datetime.datetime(2024, 1, 1, 12, 0, 0)
+
+        statuses = self.manager.get_server_statuses(
+            [self.amphora.compute_id], changes_since=changes_since)
+
+        self.assertEqual({self.amphora.compute_id: 'ACTIVE'}, statuses)
+        self.manager.manager.list.assert_called_once_with(
+            search_opts={'changes-since': '2024-01-01T12:00:00'})
+
+        self.manager.manager.list.reset_mock()
+        self.assertEqual({}, self.manager.get_server_statuses([]))
+        self.manager.manager.list.assert_not_called()
+
+    def test_bad_get_server_statuses(self):
+        self.manager.manager.list.side_effect = Exception
+        self.assertRaises(exceptions.ComputeGetException,
+                          self.manager.get_server_statuses,
+                          [self.amphora.compute_id])
+
     def test_translate_amphora(self):
         amphora, fault = self.manager._translate_amphora(self.nova_response)
         self.assertEqual(self.amphora, amphora)
@@ -37,6 +37,131 @@ class TestException(Exception):
         return repr(self.value)
 
 
+class TestSpareCheck(base.TestCase):
+    FAKE_FLAVOR = uuidutils.generate_uuid()
+    FAKE_FLAVOR_2 = uuidutils.generate_uuid()
+
+    def setUp(self):
+        super().setUp()
+        self.CONF = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        self.CONF.config(group="controller_worker",
+                         amp_flavor_id=self.FAKE_FLAVOR)
+        self.spare_amp = house_keeping.SpareAmphora()
+        self.amp_repo = mock.MagicMock()
+        self.spares_repo = mock.MagicMock()
+        self.cw = mock.MagicMock()
+
+        self.spare_amp.amp_repo = self.amp_repo
+        self.spare_amp.spares_repo = self.spares_repo
+        self.spare_amp.cw = self.cw
+        self.spares_pool = mock.MagicMock()
+        self.spares_pool.updated_at = (
+            datetime.datetime.utcnow() - datetime.timedelta(hours=1))
+        self.spares_repo.get_for_update.return_value = self.spares_pool
+
+    def test_get_spare_pool_sizes(self):
+        self.assertEqual({}, self.spare_amp.get_spare_pool_sizes())
+
+        self.CONF.config(group="house_keeping", spare_amphora_pool_size=2)
+        self.CONF.config(group="house_keeping",
+                         spare_amphora_flavor_pool_sizes={
+                             self.FAKE_FLAVOR_2: '1', 'other': '0'})
+        expected_sizes = {(self.FAKE_FLAVOR, None): 2,
+                          (self.FAKE_FLAVOR_2, None): 1}
+        self.assertEqual(expected_sizes,
+                         self.spare_amp.get_spare_pool_sizes())
+
+        self.CONF.config(group="house_keeping",
+                         spare_amphora_availability_zones=['az1', 'az2'])
+        self.assertEqual({(self.FAKE_FLAVOR, 'az1'): 2,
+                          (self.FAKE_FLAVOR, 'az2'): 2,
+                          (self.FAKE_FLAVOR_2, 'az1'): 1,
+                          (self.FAKE_FLAVOR_2, 'az2'): 1},
+                         self.spare_amp.get_spare_pool_sizes())
+
+    @mock.patch('octavia.db.api.get_session')
+    def test_spare_check_disabled(self, session):
+        self.spare_amp.spare_check()
+
+        session.assert_not_called()
+        self.cw.create_amphora.assert_not_called()
+
+    @mock.patch('octavia.db.api.get_session')
+    def test_spare_check_diff_count(self, session):
+        """When the spare amphora count is less than the pool size."""
+        self.CONF.config(group="house_keeping", spare_amphora_pool_size=3)
+        self.amp_repo.get_spare_amphora_counts.return_value = {
+            (self.FAKE_FLAVOR, None): 1}
+
+        self.spare_amp.spare_check()
+
+        self.assertTrue(self.spares_repo.get_for_update.called)
+        self.assertEqual(2, self.cw.create_amphora.call_count)
+        self.cw.create_amphora.assert_called_with(
+            availability_zone=None, compute_flavor=self.FAKE_FLAVOR)
+        self.assertGreater(
+            self.spares_pool.updated_at,
+            datetime.datetime.utcnow() - datetime.timedelta(minutes=1))
+
+    @mock.patch('octavia.db.api.get_session')
+    def test_spare_check_no_diff_count(self, session):
+        """When the spare amphora count is equal to the pool size."""
+        self.CONF.config(group="house_keeping", spare_amphora_pool_size=1)
+        self.amp_repo.get_spare_amphora_counts.return_value = {
+            (self.FAKE_FLAVOR, None): 1}
+
+        self.spare_amp.spare_check()
+
+        self.amp_repo.get_spare_amphora_counts.assert_called_once_with(
+            mock.ANY, by_zone=False)
+        self.cw.create_amphora.assert_not_called()
+
+    @mock.patch('octavia.db.api.get_session')
+    def test_spare_check_zones(self, session):
+        """The spare amphorae are counted per zone of the pools."""
+        self.CONF.config(group="house_keeping", spare_amphora_pool_size=1)
+        self.CONF.config(group="house_keeping",
+                         spare_amphora_availability_zones=['az1', 'az2'])
+        self.amp_repo.get_spare_amphora_counts.return_value = {
+            (self.FAKE_FLAVOR, 'az1'): 1}
+
+        self.spare_amp.spare_check()
+
+        self.amp_repo.get_spare_amphora_counts.assert_called_once_with(
+            mock.ANY, by_zone=True)
+        self.cw.create_amphora.assert_called_once_with(
+            availability_zone='az2', compute_flavor=self.FAKE_FLAVOR)
+
+    @mock.patch('octavia.db.api.get_session')
+    def test_spare_check_recently_checked(self, session):
+        """When another housekeeping process just checked the pools."""
+        self.CONF.config(group="house_keeping", spare_amphora_pool_size=1)
+        self.spares_pool.updated_at = datetime.datetime.utcnow()
+
+        self.spare_amp.spare_check()
+
+        self.amp_repo.get_spare_amphora_counts.assert_not_called()
+        self.cw.create_amphora.assert_not_called()
+
+    @mock.patch('octavia.db.api.get_session')
+    def test_spare_check_build_rate(self, session):
+        """The builds are limited and spread over the pools."""
+        self.CONF.config(group="house_keeping", spare_amphora_pool_size=5)
+        self.CONF.config(group="house_keeping",
+                         spare_amphora_flavor_pool_sizes={
+                             self.FAKE_FLAVOR_2: '5'})
+        self.CONF.config(group="house_keeping", spare_amphora_build_rate=3)
+        self.amp_repo.get_spare_amphora_counts.return_value = {}
+
+        self.spare_amp.spare_check()
+
+        self.assertEqual(3, self.cw.create_amphora.call_count)
+        builds = [call.kwargs['compute_flavor']
+                  for call in self.cw.create_amphora.call_args_list]
+        self.assertEqual(2, builds.count(self.FAKE_FLAVOR))
+        self.assertEqual(1, builds.count(self.FAKE_FLAVOR_2))
+
+
 class TestDatabaseCleanup(base.TestCase):
     FAKE_IP = "10.0.0.1"
     FAKE_UUID_1 = uuidutils.generate_uuid()
@@ -11,12 +11,15 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import threading
 from unittest import mock
 
 from oslo_config import cfg
 from oslo_config import fixture as oslo_fixture
 from oslo_utils import uuidutils
 
+from octavia.common import constants
+from octavia.common import exceptions
 from octavia.controller.worker import amphora_rate_limit
 import octavia.tests.unit.base as base
 
@@ -36,6 +39,16 @@ class TestAmphoraBuildRateLimit(base.TestCase):
         self.amp_build_req_repo = mock.MagicMock()
         self.conf.config(group='haproxy_amphora', build_rate_limit=1)
 
+    def _add_to_build_queue(self, amphora_id, priority):
+        build_queue = amphora_rate_limit._BUILD_QUEUE
+        with build_queue.condition:
+            build_queue.add(amphora_id, priority)
+
+        def _remove():
+            with build_queue.condition:
+                build_queue.remove(amphora_id)
+        self.addCleanup(_remove)
+
     @mock.patch('octavia.db.api.session', mock.MagicMock())
     @mock.patch('octavia.controller.worker.amphora_rate_limit'
                 '.AmphoraBuildRateLimit.wait_for_build_slot')
@@ -50,36 +63,60 @@ class TestAmphoraBuildRateLimit(base.TestCase):
         mock_wait_for_build_slot.assert_called_once()
 
     @mock.patch('octavia.db.api.get_session', mock.MagicMock())
+    @mock.patch('octavia.db.repositories.AmphoraBuildReqRepository'
+                '.update_req_status')
+    @mock.patch('octavia.db.repositories.AmphoraBuildSlotsRepository'
+                '.update_count')
+    @mock.patch('octavia.db.repositories.AmphoraBuildReqRepository'
+                '.get_highest_priority_build_req', return_value=AMP_ID)
     @mock.patch('octavia.db.repositories.AmphoraBuildSlotsRepository'
                 '.get_used_build_slots_count',
                 return_value=USED_BUILD_SLOTS)
-    def test_has_build_slot(self, mock_get_used_build_slots_count):
-        result = self.rate_limit.has_build_slot()
+    def test_acquire_build_slot(self, mock_get_used_build_slots_count,
+                                mock_get_highest_priority_build_req,
+                                mock_update_count, mock_update_status):
+        self._add_to_build_queue(AMP_ID, constants.LB_CREATE_NORMAL_PRIORITY)
+
+        result = self.rate_limit.acquire_build_slot(AMP_ID)
 
-        mock_get_used_build_slots_count.assert_called_once()
         self.assertTrue(result)
+        mock_get_used_build_slots_count.assert_called_once_with(mock.ANY,
+                                                                lock=True)
+        mock_get_highest_priority_build_req.assert_called_once()
+        mock_update_count.assert_called_once_with(mock.ANY,
+                                                  action='increment')
+        mock_update_status.assert_called_once_with(mock.ANY, AMP_ID)
 
-    @mock.patch('octavia.db.api.get_session', mock.MagicMock())
-    @mock.patch('octavia.db.repositories.AmphoraBuildReqRepository'
-                '.get_highest_priority_build_req', return_value=AMP_ID)
-    def test_has_highest_priority(self, mock_get_highest_priority_build_req):
-        result = self.rate_limit.has_highest_priority(AMP_ID)
+        # No build slot left
+        mock_get_highest_priority_build_req.reset_mock()
+        mock_update_count.reset_mock()
+        mock_get_used_build_slots_count.return_value = 1
 
-        mock_get_highest_priority_build_req.assert_called_once()
-        self.assertTrue(result)
+        result = self.rate_limit.acquire_build_slot(AMP_ID)
 
-    @mock.patch('octavia.db.api.get_session', mock.MagicMock())
-    @mock.patch('octavia.db.repositories.AmphoraBuildReqRepository'
-                '.update_req_status')
-    @mock.patch('octavia.db.repositories.AmphoraBuildSlotsRepository'
-                '.update_count')
-    def test_update_build_status_and_available_build_slots(self,
-                                                           mock_update_count,
-                                                           mock_update_status):
-        self.rate_limit.update_build_status_and_available_build_slots(AMP_ID)
+        self.assertFalse(result)
+        mock_get_highest_priority_build_req.assert_not_called()
+        mock_update_count.assert_not_called()
 
-        mock_update_count.assert_called_once()
-        mock_update_status.assert_called_once()
+        # Another controller worker has a higher priority request
+        mock_get_used_build_slots_count.return_value = 0
+        mock_get_highest_priority_build_req.return_value = (
+            uuidutils.generate_uuid())
+
+        result = self.rate_limit.acquire_build_slot(AMP_ID)
+
+        self.assertFalse(result)
+        mock_update_count.assert_not_called()
+
+        # Another request of this process is at the head of the queue
+        mock_get_highest_priority_build_req.return_value = AMP_ID
+        self._add_to_build_queue(uuidutils.generate_uuid(),
+                                 constants.LB_CREATE_FAILOVER_PRIORITY)
+
+        result = self.rate_limit.acquire_build_slot(AMP_ID)
+
+        self.assertFalse(result)
+        mock_update_count.assert_not_called()
 
     @mock.patch('octavia.db.api.get_session', mock.MagicMock())
     @mock.patch('octavia.db.repositories.AmphoraBuildReqRepository.delete')
@@ -107,23 +144,104 @@ class TestAmphoraBuildRateLimit(base.TestCase):
         mock_delete_all.assert_called_once()
 
     @mock.patch('octavia.controller.worker.amphora_rate_limit'
-                '.AmphoraBuildRateLimit.has_build_slot', return_value=True)
+                '.AmphoraBuildRateLimit.acquire_build_slot', return_value=True)
     @mock.patch('octavia.controller.worker.amphora_rate_limit'
-                '.AmphoraBuildRateLimit.has_highest_priority',
-                return_value=True)
+                '.AmphoraBuildRateLimit.remove_all_from_build_req_queue')
+    def test_wait_for_build_slot(self, mock_remove_all, mock_acquire):
+        build_queue = amphora_rate_limit._BUILD_QUEUE
+        condition_free = []
+
+        def _check_condition():
+            if build_queue.condition.acquire(timeout=1):
+                condition_free.append(True)
+                build_queue.condition.release()
+
+        def _acquire(amphora_id):
+            # The database is checked without holding the condition
+            thread = threading.Thread(target=_check_condition)
+            thread.start()
+            thread.join()
+            return True
+        mock_acquire.side_effect = _acquire
+
+        self.rate_limit.wait_for_build_slot(AMP_ID)
+
+        self.assertEqual([True], condition_free)
+
+        mock_acquire.assert_called_once_with(AMP_ID)
+        mock_remove_all.assert_not_called()
+        self.assertIsNone(amphora_rate_limit._BUILD_QUEUE.head())
+
     @mock.patch('octavia.controller.worker.amphora_rate_limit'
-                '.AmphoraBuildRateLimit.'
-                'update_build_status_and_available_build_slots')
+                '.AmphoraBuildRateLimit.acquire_build_slot',
+                return_value=False)
     @mock.patch('octavia.controller.worker.amphora_rate_limit'
                 '.AmphoraBuildRateLimit.remove_all_from_build_req_queue')
-    @mock.patch('time.sleep')
-    def test_wait_for_build_slot(self,
-                                 mock_time_sleep,
-                                 mock_remove_all,
-                                 mock_update_status_and_slots_count,
-                                 mock_has_high_priority,
-                                 mock_has_build_slot):
-        self.rate_limit.wait_for_build_slot(AMP_ID)
+    def test_wait_for_build_slot_timeout(self, mock_remove_all,
+                                         mock_acquire):
+        self.conf.config(group='haproxy_amphora', build_active_retries=2,
+                         build_retry_interval=0)
 
-        self.assertTrue(mock_has_build_slot.called)
-        self.assertTrue(mock_has_high_priority.called)
+        self.assertRaises(exceptions.ComputeBuildQueueTimeoutException,
+                          self.rate_limit.wait_for_build_slot, AMP_ID)
+
+        mock_acquire.assert_called_once_with(AMP_ID)
+        mock_remove_all.assert_called_once_with()
+        self.assertIsNone(amphora_rate_limit._BUILD_QUEUE.head())
+
+    @mock.patch('octavia.db.api.get_session', mock.MagicMock())
+    @mock.patch('octavia.db.repositories.AmphoraBuildReqRepository.delete',
+                mock.MagicMock())
+    @mock.patch('octavia.db.repositories.AmphoraBuildSlotsRepository'
+                '.update_count', mock.MagicMock())
+    def test_wait_for_build_slot_priority(self):
+        build_queue = amphora_rate_limit._BUILD_QUEUE
+        slot_free = threading.Event()
+        acquired = []
+
+        def _acquire(amphora_id):
+            if not slot_free.is_set():
+                return False
+            acquired.append(amphora_id)
+            slot_free.clear()
+            return True
+
+        failover_id = uuidutils.generate_uuid()
+        create_id = uuidutils.generate_uuid()
+        with mock.patch.object(self.rate_limit, 'acquire_build_slot',
+                               side_effect=_acquire) as mock_acquire:
+            threads = [
+                threading.Thread(
+                    target=self.rate_limit.wait_for_build_slot,
+                    args=(create_id, constants.LB_CREATE_NORMAL_PRIORITY)),
+                threading.Thread(
+                    target=self.rate_limit.wait_for_build_slot,
+                    args=(failover_id,
+                          constants.LB_CREATE_FAILOVER_PRIORITY))]
+            threads[0].start()
+            # Wait for the create request to poll the database once
+            for _ in range(1000):
+                if mock_acquire.called:
+                    break
+                threading.Event().wait(0.01)
+            threads[1].start()
+            for _ in range(1000):
+                with build_queue.condition:
+                    if build_queue.head() == failover_id:
+                        break
+                threading.Event().wait(0.01)
+
+            # The failover is served first, then the create
+            slot_free.set()
+            self.rate_limit.remove_from_build_req_queue(AMP_ID)
+            for _ in range(1000):
+                if acquired:
+                    break
+                threading.Event().wait(0.01)
+            slot_free.set()
+            self.rate_limit.remove_from_build_req_queue(AMP_ID)
+            for thread in threads:
+                thread.join(10)
+
+        self.assertEqual([failover_id, create_id], acquired)
+        self.assertIsNone(build_queue.head())
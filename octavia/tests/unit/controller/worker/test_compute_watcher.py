@@ -0,0 +1,142 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+from unittest import mock
+
+from oslo_config import cfg
+from oslo_config import fixture as oslo_fixture
+from oslo_utils import timeutils
+from oslo_utils import uuidutils
+
+from octavia.common import constants
+from octavia.controller.worker import compute_watcher
+import octavia.tests.unit.base as base
+
+
+class TestComputeStatusWatcher(base.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        self.conf.config(group='controller_worker', amp_active_wait_sec=10,
+                         amp_active_retries=3)
+        self.compute = mock.MagicMock()
+        self.watcher = compute_watcher.ComputeStatusWatcher(self.compute)
+        # Do not start the polling thread, the tests call poll() directly
+        self.watcher._thread = mock.MagicMock()
+
+    def test_watch(self):
+        compute_id = uuidutils.generate_uuid()
+        since = timeutils.utcnow()
+
+        self.assertIsNone(self.watcher.get_watch(compute_id))
+        future = self.watcher.watch(compute_id, since)
+
+        self.assertIs(future, self.watcher.get_watch(compute_id))
+        self.assertIs(future, self.watcher.watch(compute_id, since))
+        self.assertTrue(self.watcher._wakeup.is_set())
+        self.assertFalse(future.done())
+
+    @mock.patch('threading.Thread')
+    def test_watch_starts_thread(self, mock_thread):
+        self.watcher._thread = None
+
+        self.watcher.watch(uuidutils.generate_uuid(), timeutils.utcnow())
+
+        mock_thread.assert_called_once_with(
+            target=self.watcher._run, name='compute-status-watcher',
+            daemon=True)
+        mock_thread.return_value.start.assert_called_once_with()
+
+    def test_poll(self):
+        since = timeutils.utcnow()
+        active_id = uuidutils.generate_uuid()
+        error_id = uuidutils.generate_uuid()
+        build_id = uuidutils.generate_uuid()
+        missing_id = uuidutils.generate_uuid()
+        active_future = self.watcher.watch(active_id, since)
+        error_future = self.watcher.watch(error_id, since)
+        build_future = self.watcher.watch(build_id, since)
+        missing_future = self.watcher.watch(missing_id, since)
+        self.compute.get_server_statuses.return_value = {
+            active_id: constants.ACTIVE,
+            error_id: constants.ERROR,
+            build_id: 'BUILD',
+        }
+
+        self.watcher.poll()
+
+        self.compute.get_server_statuses.assert_called_once_with(
+            [active_id, error_id, build_id, missing_id],
+            changes_since=since - datetime.timedelta(seconds=10))
+        self.assertEqual(constants.ACTIVE, active_future.result(timeout=0))
+        self.assertEqual(constants.ERROR, error_future.result(timeout=0))
+        self.assertFalse(build_future.done())
+        self.assertFalse(missing_future.done())
+        self.assertIsNone(self.watcher.get_watch(active_id))
+        self.assertIs(build_future, self.watcher.get_watch(build_id))
+
+    def test_poll_nothing_watched(self):
+        self.watcher.poll()
+        self.compute.get_server_statuses.assert_not_called()
+
+    def test_poll_expired(self):
+        compute_id = uuidutils.generate_uuid()
+        since = timeutils.utcnow() - datetime.timedelta(seconds=41)
+        future = self.watcher.watch(compute_id, since)
+
+        self.watcher.poll()
+
+        self.assertTrue(future.cancelled())
+        self.assertIsNone(self.watcher.get_watch(compute_id))
+        self.compute.get_server_statuses.assert_not_called()
+
+    @mock.patch('time.sleep')
+    def test_run(self, mock_sleep):
+        compute_id = uuidutils.generate_uuid()
+        future = self.watcher.watch(compute_id, timeutils.utcnow())
+        self.compute.get_server_statuses.side_effect = [
+            Exception('boom'),
+            {compute_id: 'BUILD'},
+            {compute_id: constants.ACTIVE}]
+
+        with mock.patch.object(self.watcher, '_wakeup') as mock_wakeup:
+            mock_wakeup.wait.return_value = False
+            self.watcher._run()
+
+        self.assertEqual(constants.ACTIVE, future.result(timeout=0))
+        self.assertEqual(3, self.compute.get_server_statuses.call_count)
+        # The poll interval doubles while nothing changes
+        mock_wakeup.wait.assert_has_calls([mock.call(0), mock.call(1)])
+        self.assertEqual(2, mock_sleep.call_count)
+        self.assertIsNone(self.watcher._thread)
+
+
+class TestGetComputeWatcher(base.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(setattr, compute_watcher, '_WATCHER', None)
+        compute_watcher._WATCHER = None
+
+    @mock.patch('stevedore.driver.DriverManager')
+    def test_get_compute_watcher(self, mock_driver_manager):
+        watcher = compute_watcher.get_compute_watcher()
+
+        self.assertIs(watcher, compute_watcher.get_compute_watcher())
+        self.assertIs(mock_driver_manager.return_value.driver,
+                      watcher.compute)
+        mock_driver_manager.assert_called_once_with(
+            namespace='octavia.compute.drivers',
+            name=cfg.CONF.controller_worker.compute_driver,
+            invoke_on_load=True)
@@ -0,0 +1,200 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+from unittest import mock
+
+from oslo_config import cfg
+from oslo_config import fixture as oslo_fixture
+
+from octavia.common import exceptions
+from octavia.controller.worker import failover_coordinator
+import octavia.tests.unit.base as base
+
+
+class TestFailoverCoordinator(base.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        self.conf.config(group='controller_worker',
+                         failover_port_batch_window=0.5)
+        self.coordinator = failover_coordinator.FailoverCoordinator()
+
+    @mock.patch('time.monotonic')
+    def test_lookup(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        func = mock.Mock(return_value={'a': 1})
+
+        result = self.coordinator.lookup('key', func, 'arg', kwarg='kwarg')
+        self.assertEqual({'a': 1}, result)
+
+        # Callers get their own copy of the result
+        result['b'] = 2
+        self.assertEqual({'a': 1}, self.coordinator.lookup('key', func))
+        func.assert_called_once_with('arg', kwarg='kwarg')
+
+        # Other keys are looked up separately
+        self.coordinator.lookup('other_key', func)
+        self.assertEqual(2, func.call_count)
+
+        # The result expires after the lookup window
+        mock_monotonic.return_value = 110
+        self.coordinator.lookup('key', func)
+        self.assertEqual(3, func.call_count)
+
+    def test_lookup_disabled(self):
+        self.conf.config(group='controller_worker', failover_lookup_window=0)
+        func = mock.Mock(return_value='result')
+
+        self.assertEqual('result', self.coordinator.lookup('key', func))
+        self.assertEqual('result', self.coordinator.lookup('key', func))
+
+        self.assertEqual(2, func.call_count)
+
+    def test_lookup_failure(self):
+        func = mock.Mock(side_effect=[exceptions.OctaviaException('boom'),
+                                      'result'])
+
+        self.assertRaises(exceptions.OctaviaException,
+                          self.coordinator.lookup, 'key', func)
+
+        # Failures are not kept
+        self.assertEqual('result', self.coordinator.lookup('key', func))
+        self.assertEqual(2, func.call_count)
+
+    def test_lookup_concurrent(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def _func():
+            started.set()
+            release.wait(10)
+            return 'result'
+
+        func = mock.Mock(side_effect=_func)
+        results = []
+        owner = threading.Thread(
+            target=lambda: results.append(
+                self.coordinator.lookup('key', func)))
+        owner.start()
+        started.wait(10)
+        waiter = threading.Thread(
+            target=lambda: results.append(
+                self.coordinator.lookup('key', func)))
+        waiter.start()
+        release.set()
+        owner.join(10)
+        waiter.join(10)
+
+        self.assertEqual(['result', 'result'], results)
+        func.assert_called_once_with()
+
+    def test_create_port_disabled(self):
+        self.conf.config(group='controller_worker',
+                         failover_port_batch_window=0)
+        mock_driver = mock.MagicMock()
+
+        port = self.coordinator.create_port(mock_driver, 'net-id',
+                                            name='port')
+
+        self.assertEqual(mock_driver.create_port.return_value, port)
+        mock_driver.create_port.assert_called_once_with('net-id',
+                                                        name='port')
+        mock_driver.create_ports.assert_not_called()
+
+    @mock.patch('time.sleep')
+    def test_create_port_single(self, mock_sleep):
+        mock_driver = mock.MagicMock()
+
+        port = self.coordinator.create_port(mock_driver, 'net-id',
+                                            name='port')
+
+        self.assertEqual(mock_driver.create_port.return_value, port)
+        mock_sleep.assert_called_once_with(0.5)
+        mock_driver.create_port.assert_called_once_with('net-id',
+                                                        name='port')
+        mock_driver.create_ports.assert_not_called()
+        self.assertIsNone(self.coordinator._port_requests)
+
+    def _create_ports_concurrently(self, mock_driver, count):
+        sleeping = threading.Event()
+        resume = threading.Event()
+
+        def _sleep(window):
+            sleeping.set()
+            resume.wait(10)
+
+        results = {}
+
+        def _create_port(i):
+            results[i] = self.coordinator.create_port(
+                mock_driver, 'net-id', name=f'port-{i}')
+
+        with mock.patch('time.sleep', side_effect=_sleep):
+            leader = threading.Thread(target=_create_port, args=(0,))
+            leader.start()
+            sleeping.wait(10)
+            followers = [threading.Thread(target=_create_port, args=(i,))
+                         for i in range(1, count)]
+            for follower in followers:
+                follower.start()
+            # Wait for the followers to join the batch
+            for _ in range(1000):
+                with self.coordinator._lock:
+                    if len(self.coordinator._port_requests) == count:
+                        break
+                threading.Event().wait(0.01)
+            resume.set()
+            for thread in [leader] + followers:
+                thread.join(10)
+        return results
+
+    def test_create_port_batched(self):
+        mock_driver = mock.MagicMock()
+        mock_driver.create_ports.side_effect = lambda specs: [
+            spec['name'] for spec in specs]
+
+        results = self._create_ports_concurrently(mock_driver, 3)
+
+        self.assertEqual({0: 'port-0', 1: 'port-1', 2: 'port-2'}, results)
+        mock_driver.create_ports.assert_called_once_with([
+            {'network_id': 'net-id', 'name': 'port-0'},
+            {'network_id': 'net-id', 'name': 'port-1'},
+            {'network_id': 'net-id', 'name': 'port-2'}])
+        mock_driver.create_port.assert_not_called()
+
+    def test_create_port_batch_failed(self):
+        mock_driver = mock.MagicMock()
+        mock_driver.create_ports.side_effect = (
+            exceptions.OctaviaException('boom'))
+        mock_driver.create_port.side_effect = (
+            lambda network_id, name: name)
+
+        results = self._create_ports_concurrently(mock_driver, 2)
+
+        self.assertEqual({0: 'port-0', 1: 'port-1'}, results)
+        mock_driver.create_ports.assert_called_once()
+        mock_driver.create_port.assert_has_calls(
+            [mock.call('net-id', name='port-0'),
+             mock.call('net-id', name='port-1')], any_order=True)
+
+
+class TestGetFailoverCoordinator(base.TestCase):
+
+    def test_get_failover_coordinator(self):
+        coordinator = failover_coordinator.get_failover_coordinator()
+
+        self.assertIsInstance(coordinator,
+                              failover_coordinator.FailoverCoordinator)
+        self.assertIs(coordinator,
+                      failover_coordinator.get_failover_coordinator())
@@ -0,0 +1,161 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from oslo_utils import uuidutils
+from taskflow import engines
+from taskflow.patterns import linear_flow
+from taskflow import task
+
+from octavia.common import constants
+from octavia.controller.worker import lb_graph_snapshot
+import octavia.tests.unit.base as base
+
+LB_ID = uuidutils.generate_uuid()
+
+
+class _ReadTask(task.Task):
+    lb_graph_readonly = True
+
+    def execute(self, loadbalancer_id):
+        return lb_graph_snapshot.get_lb_graph_snapshots().get(
+            mock.MagicMock(), loadbalancer_id)
+
+
+class _WriteTask(task.Task):
+    def execute(self, loadbalancer_id):
+        pass
+
+
+class TestLoadBalancerGraphSnapshots(base.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.snapshots = lb_graph_snapshot.LoadBalancerGraphSnapshots()
+        self.mock_get = mock.patch.object(
+            self.snapshots.loadbalancer_repo, 'get',
+            side_effect=lambda session, id: mock.MagicMock(id=id)).start()
+        self.session = mock.MagicMock()
+
+    def test_get_without_flow(self):
+        self.snapshots.get(self.session, LB_ID)
+        self.snapshots.get(self.session, LB_ID)
+
+        self.assertEqual(2, self.mock_get.call_count)
+        self.mock_get.assert_called_with(self.session, id=LB_ID)
+
+    def test_get(self):
+        self.snapshots.start(LB_ID)
+
+        db_lb = self.snapshots.get(self.session, LB_ID)
+        self.assertIs(db_lb, self.snapshots.get(self.session, LB_ID))
+        self.mock_get.assert_called_once_with(self.session, id=LB_ID)
+
+        # Other load balancers are not affected
+        self.snapshots.get(self.session, 'other-lb')
+        self.snapshots.get(self.session, 'other-lb')
+        self.assertEqual(3, self.mock_get.call_count)
+
+        self.assertEqual((1, 1), self.snapshots.stop(LB_ID))
+
+        # The snapshot is dropped at the end of the flow
+        self.assertIsNot(db_lb, self.snapshots.get(self.session, LB_ID))
+
+    def test_get_concurrent_flows(self):
+        self.snapshots.start(LB_ID)
+        self.snapshots.start(LB_ID)
+
+        db_lb = self.snapshots.get(self.session, LB_ID)
+        self.snapshots.stop(LB_ID)
+
+        self.assertIs(db_lb, self.snapshots.get(self.session, LB_ID))
+        self.assertEqual((1, 1), self.snapshots.stop(LB_ID))
+
+    def test_start_invalidates(self):
+        self.snapshots.start(LB_ID)
+        db_lb = self.snapshots.get(self.session, LB_ID)
+
+        # The API may have updated the graph before the new flow
+        self.snapshots.start(LB_ID)
+
+        self.assertIsNot(db_lb, self.snapshots.get(self.session, LB_ID))
+        self.assertEqual(2, self.mock_get.call_count)
+
+    def test_invalidate(self):
+        self.snapshots.start(LB_ID)
+        db_lb = self.snapshots.get(self.session, LB_ID)
+
+        self.snapshots.invalidate(LB_ID)
+        self.snapshots.invalidate('other-lb')
+
+        self.assertIsNot(db_lb, self.snapshots.get(self.session, LB_ID))
+        self.assertEqual((2, 0), self.snapshots.stop(LB_ID))
+
+    def test_invalidate_during_get(self):
+        self.snapshots.start(LB_ID)
+
+        def _get(session, id):
+            # A task updated the database while the graph was loading
+            self.snapshots.invalidate(id)
+            return mock.MagicMock()
+
+        self.mock_get.side_effect = _get
+        self.snapshots.get(self.session, LB_ID)
+        self.snapshots.get(self.session, LB_ID)
+
+        self.assertEqual(2, self.mock_get.call_count)
+
+
+class TestLoadBalancerGraphSnapshotListener(base.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.snapshots = lb_graph_snapshot.get_lb_graph_snapshots()
+        self.mock_get = mock.patch.object(
+            self.snapshots.loadbalancer_repo, 'get',
+            side_effect=lambda session, id: mock.MagicMock(id=id)).start()
+
+    def _run(self, flow, store):
+        engine = engines.load(flow, store=store)
+        engine.compile()
+        engine.prepare()
+        with lb_graph_snapshot.LoadBalancerGraphSnapshotListener(engine):
+            engine.run()
+        return engine
+
+    def test_flow(self):
+        flow = linear_flow.Flow('test-flow')
+        flow.add(_ReadTask(name='read1', provides='lb1'),
+                 _ReadTask(name='read2', provides='lb2'),
+                 _WriteTask(name='write'),
+                 _ReadTask(name='read3', provides='lb3'))
+
+        engine = self._run(flow, {constants.LOADBALANCER_ID: LB_ID})
+
+        self.assertIs(engine.storage.fetch('lb1'),
+                      engine.storage.fetch('lb2'))
+        self.assertIsNot(engine.storage.fetch('lb2'),
+                         engine.storage.fetch('lb3'))
+        self.assertEqual(2, self.mock_get.call_count)
+        # The snapshots end with the flow
+        self.assertEqual({}, self.snapshots._scopes)
+
+    def test_flow_without_loadbalancer(self):
+        flow = linear_flow.Flow('test-flow')
+        flow.add(_ReadTask(name='read1', provides='lb1'),
+                 _ReadTask(name='read2', provides='lb2'))
+
+        self._run(flow, {'loadbalancer_id': None})
+
+        self.assertEqual(2, self.mock_get.call_count)
+        self.assertEqual({}, self.snapshots._scopes)
@@ -17,6 +17,7 @@ from unittest import mock
 from oslo_config import cfg
 from oslo_config import fixture as oslo_fixture
 from oslo_utils import uuidutils
+from taskflow.patterns import graph_flow
 from taskflow.patterns import linear_flow as flow
 
 from octavia.common import constants
@@ -91,7 +92,7 @@ class TestAmphoraFlows(base.TestCase):
         amp_flow = self.AmpFlow.get_amphora_for_lb_subflow(
             'SOMEPREFIX', constants.ROLE_STANDALONE)
 
-        self.assertIsInstance(amp_flow, flow.Flow)
+        self.assertIsInstance(amp_flow, graph_flow.Flow)
 
         self.assertIn(constants.FLAVOR, amp_flow.requires)
         self.assertIn(constants.AVAILABILITY_ZONE, amp_flow.requires)
@@ -114,7 +115,7 @@ class TestAmphoraFlows(base.TestCase):
         amp_flow = self.AmpFlow.get_amphora_for_lb_subflow(
             'SOMEPREFIX', constants.ROLE_STANDALONE)
 
-        self.assertIsInstance(amp_flow, flow.Flow)
+        self.assertIsInstance(amp_flow, graph_flow.Flow)
 
         self.assertIn(constants.FLAVOR, amp_flow.requires)
         self.assertIn(constants.AVAILABILITY_ZONE, amp_flow.requires)
@@ -138,7 +139,7 @@ class TestAmphoraFlows(base.TestCase):
         amp_flow = self.AmpFlow.get_amphora_for_lb_subflow(
             'SOMEPREFIX', constants.ROLE_MASTER)
 
-        self.assertIsInstance(amp_flow, flow.Flow)
+        self.assertIsInstance(amp_flow, graph_flow.Flow)
 
         self.assertIn(constants.FLAVOR, amp_flow.requires)
         self.assertIn(constants.AVAILABILITY_ZONE, amp_flow.requires)
@@ -163,7 +164,7 @@ class TestAmphoraFlows(base.TestCase):
         amp_flow = self.AmpFlow.get_amphora_for_lb_subflow(
             'SOMEPREFIX', constants.ROLE_MASTER)
 
-        self.assertIsInstance(amp_flow, flow.Flow)
+        self.assertIsInstance(amp_flow, graph_flow.Flow)
 
         self.assertIn(constants.FLAVOR, amp_flow.requires)
         self.assertIn(constants.AVAILABILITY_ZONE, amp_flow.requires)
@@ -188,7 +189,7 @@ class TestAmphoraFlows(base.TestCase):
         amp_flow = self.AmpFlow.get_amphora_for_lb_subflow(
             'SOMEPREFIX', constants.ROLE_BACKUP)
 
-        self.assertIsInstance(amp_flow, flow.Flow)
+        self.assertIsInstance(amp_flow, graph_flow.Flow)
 
         self.assertIn(constants.FLAVOR, amp_flow.requires)
         self.assertIn(constants.AVAILABILITY_ZONE, amp_flow.requires)
@@ -211,7 +212,7 @@ class TestAmphoraFlows(base.TestCase):
         amp_flow = self.AmpFlow.get_amphora_for_lb_subflow(
             'SOMEPREFIX', 'BOGUS_ROLE')
 
-        self.assertIsInstance(amp_flow, flow.Flow)
+        self.assertIsInstance(amp_flow, graph_flow.Flow)
 
         self.assertIn(constants.FLAVOR, amp_flow.requires)
         self.assertIn(constants.AVAILABILITY_ZONE, amp_flow.requires)
@@ -235,7 +236,7 @@ class TestAmphoraFlows(base.TestCase):
         amp_flow = self.AmpFlow.get_amphora_for_lb_subflow(
             'SOMEPREFIX', constants.ROLE_BACKUP)
 
-        self.assertIsInstance(amp_flow, flow.Flow)
+        self.assertIsInstance(amp_flow, graph_flow.Flow)
 
         self.assertIn(constants.FLAVOR, amp_flow.requires)
         self.assertIn(constants.AVAILABILITY_ZONE, amp_flow.requires)
@@ -253,6 +254,38 @@ class TestAmphoraFlows(base.TestCase):
         self.assertEqual(5, len(amp_flow.requires))
         self.conf.config(group="nova", enable_anti_affinity=False)
 
+    def test_get_post_map_lb_subflow(self, mock_get_net_driver):
+
+        amp_flow = self.AmpFlow._get_post_map_lb_subflow(
+            'SOMEPREFIX', constants.ROLE_MASTER)
+
+        self.assertIsInstance(amp_flow, flow.Flow)
+
+        self.assertIn(constants.AMPHORA_ID, amp_flow.requires)
+        self.assertIn(constants.FLAVOR, amp_flow.requires)
+        self.assertIn(constants.AMPHORA, amp_flow.provides)
+
+        self.assertEqual(1, len(amp_flow.provides))
+        self.assertEqual(2, len(amp_flow.requires))
+
+    def test_allocate_amp_to_data_decider(self, mock_get_net_driver):
+        history = mock.MagicMock()
+        values = mock.MagicMock(side_effect=[['TEST'], [None]])
+        history.values = values
+        result = self.AmpFlow._allocate_amp_to_data_decider(history)
+        self.assertTrue(result)
+        result = self.AmpFlow._allocate_amp_to_data_decider(history)
+        self.assertFalse(result)
+
+    def test_create_new_amp_for_lb_decider(self, mock_get_net_driver):
+        history = mock.MagicMock()
+        values = mock.MagicMock(side_effect=[[None], ['TEST']])
+        history.values = values
+        result = self.AmpFlow._create_new_amp_for_lb_decider(history)
+        self.assertTrue(result)
+        result = self.AmpFlow._create_new_amp_for_lb_decider(history)
+        self.assertFalse(result)
+
     def test_get_delete_amphora_flow(self, mock_get_net_driver):
 
         amp_flow = self.AmpFlow.get_delete_amphora_flow(self.amp4.to_dict())
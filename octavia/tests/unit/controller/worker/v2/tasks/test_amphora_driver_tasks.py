@@ -113,10 +113,14 @@ class TestAmphoraDriverTasks(base.TestCase):
 
         mock_driver.update_amphora_listeners.side_effect = Exception('boom')
 
-        amp_list_update_obj.execute(_LB_mock, _amphora_mock, self.timeout_dict)
+        with mock.patch.object(amp_list_update_obj.lb_graph_snapshots,
+                               'invalidate') as mock_invalidate:
+            amp_list_update_obj.execute(_LB_mock, _amphora_mock,
+                                        self.timeout_dict)
 
         mock_amphora_repo_update.assert_called_once_with(
             _session_mock, AMP_ID, status=constants.ERROR)
+        mock_invalidate.assert_called_once_with(LB_ID)
 
     @mock.patch('octavia.db.repositories.LoadBalancerRepository.get')
     def test_amp_index_listener_update(self,
@@ -12,6 +12,7 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 #
+from concurrent import futures
 from unittest import mock
 
 from cryptography import fernet
@@ -465,10 +466,66 @@ class TestComputeTasks(base.TestCase):
             COMPUTE_ID, az[constants.MANAGEMENT_NETWORK])
 
         # Test with deleted amp
+        self.conf.config(group='controller_worker',
+                         amp_active_batch_polling=False)
         _db_amphora_mock.status = constants.DELETED
         self.assertRaises(exceptions.ComputeWaitTimeoutException,
                           computewait.execute,
                           _amphora_mock, AMPHORA_ID, None)
+        mock_time_sleep.assert_called_once_with(
+            self.conf.conf.controller_worker.amp_active_wait_sec)
+
+    @mock.patch('octavia.controller.worker.compute_watcher.'
+                'get_compute_watcher')
+    @mock.patch('stevedore.driver.DriverManager.driver')
+    @mock.patch('time.sleep')
+    def test_compute_wait_batch_polling(self,
+                                        mock_time_sleep,
+                                        mock_driver,
+                                        mock_get_watcher):
+        build_amp = mock.MagicMock(status='BUILD')
+        active_amp = mock.MagicMock(status=constants.ACTIVE)
+        active_amp.to_dict.return_value = {'compute_id': COMPUTE_ID}
+        mock_driver.get_amphora.side_effect = [(build_amp, None),
+                                               (active_amp, None)]
+        mock_watcher = mock_get_watcher.return_value
+        mock_watcher.get_watch.return_value = None
+        mock_future = mock_watcher.watch.return_value
+        mock_future.result.return_value = constants.ACTIVE
+
+        computewait = compute_tasks.ComputeWait()
+        result = computewait.execute(COMPUTE_ID, AMPHORA_ID, None)
+
+        self.assertEqual({'compute_id': COMPUTE_ID}, result)
+        mock_watcher.watch.assert_called_once_with(COMPUTE_ID, mock.ANY)
+        mock_future.result.assert_called_once_with(
+            timeout=self.conf.conf.controller_worker.amp_active_wait_sec)
+        self.assertEqual(2, mock_driver.get_amphora.call_count)
+        mock_time_sleep.assert_not_called()
+
+        # Retry while the build is still being watched
+        mock_driver.reset_mock()
+        mock_watcher.reset_mock()
+        mock_future = mock.MagicMock()
+        mock_future.result.side_effect = futures.TimeoutError
+        mock_watcher.get_watch.return_value = mock_future
+
+        self.assertRaises(exceptions.ComputeWaitTimeoutException,
+                          computewait.execute,
+                          COMPUTE_ID, AMPHORA_ID, None)
+        mock_driver.get_amphora.assert_not_called()
+        mock_watcher.watch.assert_not_called()
+
+        # The build failed
+        mock_future.result.side_effect = None
+        mock_future.result.return_value = constants.ERROR
+        mock_driver.get_amphora.side_effect = None
+        mock_driver.get_amphora.return_value = (
+            mock.MagicMock(status=constants.ERROR), 'fault')
+
+        self.assertRaises(exceptions.ComputeBuildException,
+                          computewait.execute,
+                          COMPUTE_ID, AMPHORA_ID, None)
 
     @mock.patch('octavia.controller.worker.amphora_rate_limit'
                 '.AmphoraBuildRateLimit.remove_from_build_req_queue')
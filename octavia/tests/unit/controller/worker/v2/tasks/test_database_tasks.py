@@ -17,6 +17,8 @@ import random
 from unittest import mock
 
 from cryptography import fernet
+from oslo_config import cfg
+from oslo_config import fixture as oslo_fixture
 from oslo_db import exception as odb_exceptions
 from oslo_utils import uuidutils
 from sqlalchemy.orm import exc
@@ -250,6 +252,124 @@ class TestDatabaseTasks(base.TestCase):
             "in the database due to: "
             "%(except)s", {'amp': amp_id, 'except': err1_msg})
 
+    @mock.patch('octavia.db.repositories.AmphoraRepository.create',
+                return_value=_db_amphora_mock)
+    def test_create_amphora_in_db_spare(self,
+                                        mock_create,
+                                        mock_generate_uuid,
+                                        mock_LOG,
+                                        mock_get_session,
+                                        mock_loadbalancer_repo_update,
+                                        mock_listener_repo_update,
+                                        mock_amphora_repo_update,
+                                        mock_amphora_repo_delete):
+
+        create_amp_in_db = database_tasks.CreateAmphoraInDB()
+        amp_id = create_amp_in_db.execute(
+            flavor={constants.COMPUTE_FLAVOR: COMPUTE_FLAVOR},
+            availability_zone={constants.COMPUTE_ZONE: CACHED_ZONE})
+
+        mock_session = mock_get_session().begin().__enter__()
+
+        repo.AmphoraRepository.create.assert_called_once_with(
+            mock_session,
+            id=AMP_ID,
+            load_balancer_id=None,
+            status=constants.PENDING_CREATE,
+            cert_busy=False,
+            compute_flavor=COMPUTE_FLAVOR,
+            cached_zone=CACHED_ZONE)
+        self.assertEqual(_db_amphora_mock.id, amp_id)
+
+        # Test with the default compute flavor and no zone
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group="controller_worker", amp_flavor_id='default')
+        mock_create.reset_mock()
+        create_amp_in_db.execute(flavor={}, availability_zone={})
+
+        repo.AmphoraRepository.create.assert_called_once_with(
+            mock_session,
+            id=AMP_ID,
+            load_balancer_id=None,
+            status=constants.PENDING_CREATE,
+            cert_busy=False,
+            compute_flavor='default')
+
+    @mock.patch('octavia.db.repositories.AmphoraRepository.'
+                'allocate_and_associate')
+    def test_map_loadbalancer_to_amphora(self,
+                                         mock_allocate_and_associate,
+                                         mock_generate_uuid,
+                                         mock_LOG,
+                                         mock_get_session,
+                                         mock_loadbalancer_repo_update,
+                                         mock_listener_repo_update,
+                                         mock_amphora_repo_update,
+                                         mock_amphora_repo_delete):
+
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group="controller_worker", amp_flavor_id='default')
+        conf.config(group="controller_worker", amp_image_tag='amphora')
+        conf.config(group="house_keeping", spare_amphora_pool_size=0)
+        conf.config(group="house_keeping",
+                    spare_amphora_flavor_pool_sizes={COMPUTE_FLAVOR: '1'})
+        mock_session = mock_get_session().begin().__enter__()
+        map_lb_to_amp = database_tasks.MapLoadbalancerToAmphora()
+
+        # No spare pool for the default compute flavor
+        self.assertIsNone(map_lb_to_amp.execute(LB_ID))
+        self.assertIsNone(map_lb_to_amp.execute(
+            LB_ID, flavor={constants.COMPUTE_FLAVOR: 'other'}))
+        mock_allocate_and_associate.assert_not_called()
+
+        # The load balancer cannot use a spare amphora
+        flavor = {constants.COMPUTE_FLAVOR: COMPUTE_FLAVOR}
+        self.assertIsNone(map_lb_to_amp.execute(
+            LB_ID, server_group_id=SERVER_GROUP_ID, flavor=flavor))
+        self.assertIsNone(map_lb_to_amp.execute(
+            LB_ID, flavor={constants.COMPUTE_FLAVOR: COMPUTE_FLAVOR,
+                           constants.AMP_IMAGE_TAG: 'other'}))
+        self.assertIsNone(map_lb_to_amp.execute(
+            LB_ID, flavor=flavor,
+            availability_zone={constants.MANAGEMENT_NETWORK: 'net'}))
+        mock_allocate_and_associate.assert_not_called()
+
+        # Spare amphora allocated
+        mock_allocate_and_associate.return_value = _db_amphora_mock
+        amp_id = map_lb_to_amp.execute(
+            LB_ID, flavor=flavor,
+            availability_zone={constants.COMPUTE_ZONE: CACHED_ZONE})
+
+        self.assertEqual(AMP_ID, amp_id)
+        mock_allocate_and_associate.assert_called_once_with(
+            mock_session, LB_ID, availability_zone=CACHED_ZONE,
+            compute_flavor=COMPUTE_FLAVOR)
+
+        # No spare amphora available
+        mock_allocate_and_associate.reset_mock()
+        mock_allocate_and_associate.return_value = None
+        conf.config(group="house_keeping", spare_amphora_pool_size=2)
+        self.assertIsNone(map_lb_to_amp.execute(LB_ID))
+        mock_allocate_and_associate.assert_called_once_with(
+            mock_session, LB_ID, availability_zone=None,
+            compute_flavor='default')
+
+        # Test the revert
+        map_lb_to_amp.revert(None, LB_ID)
+        map_lb_to_amp.revert(_tf_failure_mock, LB_ID)
+        mock_amphora_repo_update.assert_not_called()
+
+        map_lb_to_amp.revert(AMP_ID, LB_ID)
+        mock_amphora_repo_update.assert_called_once_with(
+            mock_session, AMP_ID, status=constants.ERROR)
+
+        # Test the revert with exception
+        mock_amphora_repo_update.reset_mock()
+        mock_amphora_repo_update.side_effect = Exception('fail')
+        map_lb_to_amp.revert(AMP_ID, LB_ID)
+        mock_amphora_repo_update.assert_called_once_with(
+            mock_session, AMP_ID, status=constants.ERROR)
+
     @mock.patch('octavia.db.repositories.ListenerRepository.delete')
     def test_delete_listener_in_db(self,
                                    mock_listener_repo_delete,
@@ -494,6 +614,29 @@ class TestDatabaseTasks(base.TestCase):
 
         self.assertEqual(_db_amphora_mock.to_dict(), amp)
 
+    @mock.patch('octavia.db.repositories.AmphoraRepository.get',
+                return_value=_db_amphora_mock)
+    def test_get_amphora_by_id(self,
+                               mock_amp_get,
+                               mock_generate_uuid,
+                               mock_LOG,
+                               mock_get_session,
+                               mock_loadbalancer_repo_update,
+                               mock_listener_repo_update,
+                               mock_amphora_repo_update,
+                               mock_amphora_repo_delete):
+
+        get_amp = database_tasks.GetAmphoraByID()
+        amp = get_amp.execute(AMP_ID)
+
+        mock_session = mock_get_session().begin().__enter__()
+
+        repo.AmphoraRepository.get.assert_called_once_with(
+            mock_session,
+            id=AMP_ID)
+
+        self.assertEqual(_db_amphora_mock.to_dict(), amp)
+
     @mock.patch('octavia.db.repositories.LoadBalancerRepository.get',
                 return_value=_db_loadbalancer_mock)
     def test_reload_load_balancer(self,
@@ -1926,7 +2069,8 @@ class TestDatabaseTasks(base.TestCase):
         mock_lb_get.return_value = lb
 
         get_amps_from_lb_obj = database_tasks.GetAmphoraeFromLoadbalancer()
-        result = get_amps_from_lb_obj.execute(self.loadbalancer_mock)
+        result = get_amps_from_lb_obj.execute(
+            self.loadbalancer_mock[constants.LOADBALANCER_ID])
         self.assertEqual([_db_amphora_mock.to_dict()], result)
         self.assertEqual([_db_amphora_mock.to_dict()], result)
 
@@ -1381,7 +1381,7 @@ class TestNetworkTasks(base.TestCase):
         }
         lb = o_data_models.LoadBalancer()
         net_task = network_tasks.GetAmphoraeNetworkConfigs()
-        net_task.execute(self.load_balancer_mock)
+        net_task.execute(self.load_balancer_mock[constants.LOADBALANCER_ID])
         mock_driver.get_network_configs.assert_called_once_with(lb)
         amphora_config_mock.to_dict.assert_called_once_with(
             recurse=True, calling_classes=[o_data_models.LoadBalancer]
@@ -1722,6 +1722,46 @@ class TestNetworkTasks(base.TestCase):
 
         mock_driver.delete_port.assert_called_once_with(PORT_ID)
 
+    @mock.patch('octavia.controller.worker.failover_coordinator.'
+                'get_failover_coordinator')
+    def test_create_vip_base_port_failover(self, mock_get_coordinator,
+                                           mock_get_net_driver):
+        AMP_ID = uuidutils.generate_uuid()
+        VIP_NETWORK_ID = uuidutils.generate_uuid()
+        VIP_SUBNET_ID = uuidutils.generate_uuid()
+        mock_driver = mock.MagicMock()
+        mock_get_net_driver.return_value = mock_driver
+        mock_coordinator = mock_get_coordinator.return_value
+        vip_dict = {constants.IP_ADDRESS: '203.0.113.81',
+                    constants.NETWORK_ID: VIP_NETWORK_ID,
+                    constants.QOS_POLICY_ID: None,
+                    constants.SUBNET_ID: VIP_SUBNET_ID,
+                    constants.SG_IDS: []}
+        net_task = network_tasks.CreateVIPBasePort()
+
+        # The ports of the failovers are batched
+        result = net_task.execute(vip_dict, None, AMP_ID, [],
+                                  constants.LB_CREATE_FAILOVER_PRIORITY)
+
+        self.assertEqual(
+            mock_coordinator.create_port.return_value.to_dict.return_value,
+            result)
+        mock_coordinator.create_port.assert_called_once_with(
+            mock_driver, VIP_NETWORK_ID,
+            name=constants.AMP_BASE_PORT_PREFIX + AMP_ID,
+            fixed_ips=[{constants.SUBNET_ID: VIP_SUBNET_ID}],
+            secondary_ips=['203.0.113.81'], security_group_ids=[],
+            qos_policy_id=None)
+        mock_driver.create_port.assert_not_called()
+
+        # The ports of the load balancer creates are not
+        mock_coordinator.reset_mock()
+        net_task.execute(vip_dict, None, AMP_ID, [],
+                         constants.LB_CREATE_NORMAL_PRIORITY)
+
+        mock_coordinator.create_port.assert_not_called()
+        mock_driver.create_port.assert_called_once()
+
     @mock.patch('time.sleep')
     def test_admin_down_port(self, mock_sleep, mock_get_net_driver):
         PORT_ID = uuidutils.generate_uuid()
@@ -1793,6 +1833,8 @@ class TestNetworkTasks(base.TestCase):
         LB_ID = uuidutils.generate_uuid()
         SG_ID = uuidutils.generate_uuid()
         SG_NAME = 'fake_SG_name'
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group='controller_worker', failover_lookup_window=0)
         mock_driver = mock.MagicMock()
         mock_get_net_driver.return_value = mock_driver
         mock_get_sg_name.return_value = SG_NAME
@@ -1840,6 +1882,26 @@ class TestNetworkTasks(base.TestCase):
         mock_driver.get_security_group.assert_called_once_with(SG_NAME)
         mock_get_sg_name.assert_called_once_with(LB_ID)
 
+    @mock.patch('octavia.common.utils.get_vip_security_group_name')
+    def test_get_vip_security_group_id_shared(self, mock_get_sg_name,
+                                              mock_get_net_driver):
+        LB_ID = uuidutils.generate_uuid()
+        SG_ID = uuidutils.generate_uuid()
+        SG_NAME = 'fake_SG_name'
+        mock_driver = mock.MagicMock()
+        mock_get_net_driver.return_value = mock_driver
+        mock_get_sg_name.return_value = SG_NAME
+        mock_driver.get_security_group.return_value = (
+            data_models.SecurityGroup(id=SG_ID))
+
+        net_task = network_tasks.GetVIPSecurityGroupID()
+
+        # The amphorae of a load balancer share the lookup
+        self.assertEqual(SG_ID, net_task.execute(LB_ID))
+        self.assertEqual(SG_ID, net_task.execute(LB_ID))
+
+        mock_driver.get_security_group.assert_called_once_with(SG_NAME)
+
     @mock.patch('octavia.db.repositories.LoadBalancerRepository.get')
     @mock.patch('octavia.db.api.get_session', return_value=_session_mock)
     def test_create_SRIOV_base_port(self, mock_get_session, mock_lb_repo_get,
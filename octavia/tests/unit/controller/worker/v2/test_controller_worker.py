@@ -166,6 +166,49 @@ class TestControllerWorker(base.TestCase):
 
         super().setUp()
 
+    def test_create_amphora(self,
+                            mock_api_get_session,
+                            mock_dyn_log_listener,
+                            mock_taskflow_load,
+                            mock_pool_repo_get,
+                            mock_member_repo_get,
+                            mock_l7rule_repo_get,
+                            mock_l7policy_repo_get,
+                            mock_listener_repo_get,
+                            mock_lb_repo_get,
+                            mock_health_mon_repo_get,
+                            mock_amp_repo_get):
+
+        cw = controller_worker.ControllerWorker()
+        cw.services_controller.run_poster.reset_mock()
+        cw.create_amphora(availability_zone='az1', compute_flavor='flavor1')
+
+        (cw.services_controller.run_poster.
+            assert_called_once_with(
+                flow_utils.get_create_amphora_flow,
+                store={constants.BUILD_TYPE_PRIORITY:
+                       constants.LB_CREATE_SPARES_POOL_PRIORITY,
+                       constants.FLAVOR: {
+                           constants.COMPUTE_FLAVOR: 'flavor1'},
+                       constants.SERVER_GROUP_ID: None,
+                       constants.AVAILABILITY_ZONE: {
+                           constants.COMPUTE_ZONE: 'az1'}}))
+
+        # Test with the default compute flavor and no zone
+        self.conf.config(group="controller_worker", amp_flavor_id='default')
+        cw.services_controller.run_poster.reset_mock()
+        cw.create_amphora()
+
+        (cw.services_controller.run_poster.
+            assert_called_once_with(
+                flow_utils.get_create_amphora_flow,
+                store={constants.BUILD_TYPE_PRIORITY:
+                       constants.LB_CREATE_SPARES_POOL_PRIORITY,
+                       constants.FLAVOR: {
+                           constants.COMPUTE_FLAVOR: 'default'},
+                       constants.SERVER_GROUP_ID: None,
+                       constants.AVAILABILITY_ZONE: None}))
+
     @mock.patch('octavia.controller.worker.v2.flows.'
                 'amphora_flows.AmphoraFlows.get_delete_amphora_flow',
                 return_value='TEST')
@@ -1092,7 +1135,10 @@ class TestControllerWorker(base.TestCase):
                 return_value=_flow_mock)
     @mock.patch('octavia.db.repositories.AvailabilityZoneRepository.'
                 'get_availability_zone_metadata_dict')
+    @mock.patch('octavia.db.repositories.MemberRepository.'
+                'get_members_by_ids')
     def test_batch_update_members(self,
+                                  mock_get_members_by_ids,
                                   mock_get_az_metadata_dict,
                                   mock_get_batch_update_members_flow,
                                   mock_api_get_session,
@@ -1111,16 +1157,26 @@ class TestControllerWorker(base.TestCase):
         mock_get_az_metadata_dict.return_value = {}
         cw = controller_worker.ControllerWorker()
         old_member = mock.MagicMock()
+        old_member.id = 9
         old_member.to_dict.return_value = {'id': 9,
                                            constants.POOL_ID: 'testtest'}
         new_member = mock.MagicMock()
-        mock_member_repo_get.side_effect = [
-            new_member, _member_mock, old_member]
-        cw.batch_update_members([{constants.MEMBER_ID: 9,
+        updated_member = mock.MagicMock()
+        updated_member.id = 10
+        updated_member.to_dict.return_value = {'id': 10,
+                                               constants.POOL_ID: 'testtest'}
+        member_update = dict(MEMBER_UPDATE_DICT, id=10)
+        mock_get_members_by_ids.side_effect = [
+            [new_member], [old_member, updated_member]]
+        cw.batch_update_members([{constants.ID: 9,
                                   constants.POOL_ID: 'testtest'}],
                                 [{constants.MEMBER_ID: 11}],
-                                [MEMBER_UPDATE_DICT])
-        provider_m = provider_utils.db_member_to_provider_member(_member_mock)
+                                [member_update])
+        mock_get_members_by_ids.assert_has_calls(
+            [mock.call(mock.ANY, [11]), mock.call(mock.ANY, [10, 9])])
+        mock_member_repo_get.assert_not_called()
+        provider_m = provider_utils.db_member_to_provider_member(
+            updated_member)
         old_provider_m = provider_utils.db_member_to_provider_member(
             old_member).to_dict()
         provider_lb = provider_utils.db_loadbalancer_to_provider_loadbalancer(
@@ -1130,7 +1186,7 @@ class TestControllerWorker(base.TestCase):
                 flow_utils.get_batch_update_members_flow,
                 [old_provider_m],
                 [{'member_id': 11}],
-                [(provider_m.to_dict(), MEMBER_UPDATE_DICT)],
+                [(provider_m.to_dict(), member_update)],
                 store={constants.LISTENERS: [self.ref_listener_dict],
                        constants.LOADBALANCER_ID: LB_ID,
                        constants.LOADBALANCER: provider_lb,
@@ -2510,3 +2566,35 @@ class TestControllerWorker(base.TestCase):
                                  store={constants.AMPHORA:
                                         _db_amphora_mock.to_dict(),
                                         constants.FLAVOR: {}}))
+
+
+class TestControllerWorkerRunFlow(base.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        self.conf.config(group="task_flow", jobboard_enabled=False)
+
+    @mock.patch('octavia.common.base_taskflow.BaseTaskFlowEngine.'
+                'taskflow_load')
+    def test_run_flow(self, mock_taskflow_load):
+        mock_factory = mock.Mock()
+        mock_other_factory = mock.Mock()
+
+        with mock.patch.object(flow_utils, 'TEMPLATE_FLOWS',
+                               (mock_factory,)):
+            cw = controller_worker.ControllerWorker()
+
+        cw.run_flow(mock_factory, store={'a': 1})
+        cw.run_flow(mock_factory, store={'a': 2})
+        cw.run_flow(mock_other_factory, store={'a': 3})
+        cw.run_flow(mock_other_factory, store={'a': 4})
+
+        # The template flow is built once and reused
+        mock_factory.assert_called_once_with()
+        self.assertEqual(2, mock_other_factory.call_count)
+        flow = mock_factory.return_value
+        self.assertEqual([mock.call(flow, store={'a': 1}),
+                          mock.call(flow, store={'a': 2})],
+                         mock_taskflow_load.call_args_list[:2])
+        self.assertEqual(4, mock_taskflow_load.return_value.run.call_count)
@@ -0,0 +1,73 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from unittest import mock
+
+from oslo_config import cfg
+from oslo_config import fixture as oslo_fixture
+from oslo_utils import uuidutils
+
+from octavia.common import constants
+from octavia.common import data_models
+from octavia.db import repositories
+import octavia.tests.unit.base as base
+
+
+class TestRepositoriesQuota(base.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group='api_settings', auth_strategy=constants.TESTING)
+        self.repos = repositories.Repositories()
+        self.project_id = uuidutils.generate_uuid()
+        self.session = mock.MagicMock()
+
+    @mock.patch('octavia.db.repositories.LOG')
+    @mock.patch('octavia.db.repositories.Repositories._track_quota_usage')
+    @mock.patch('octavia.db.repositories.Repositories._execute_quota_update',
+                return_value=1)
+    def test__decrement_quota_optimistic(self, mock_execute, mock_track,
+                                         mock_log):
+        self.repos._decrement_quota_optimistic(
+            self.session, data_models.Pool, self.project_id, 3)
+
+        # The decrement only applies when the usage does not go negative
+        mock_execute.assert_called_once_with(self.project_id, mock.ANY)
+        statement = mock_execute.call_args[0][1][0].compile()
+        self.assertIn('SET in_use_pool=(quotas.in_use_pool - '
+                      ':in_use_pool_1)', str(statement))
+        self.assertIn('quotas.in_use_pool >= :in_use_pool_2',
+                      str(statement))
+        self.assertEqual({'in_use_pool_1': 3, 'in_use_pool_2': 3,
+                          'project_id_1': self.project_id},
+                         statement.params)
+        mock_track.assert_called_once_with(
+            self.session, data_models.Pool, self.project_id, -3)
+        mock_log.warning.assert_not_called()
+
+        # The usage is lower than the decrement, nothing is updated
+        mock_execute.return_value = 0
+        mock_track.reset_mock()
+
+        self.repos._decrement_quota_optimistic(
+            self.session, data_models.Pool, self.project_id, 3)
+
+        mock_track.assert_not_called()
+        mock_log.warning.assert_called_once()
+
+    @mock.patch('octavia.db.repositories.Repositories._execute_quota_update')
+    def test__decrement_quota_optimistic_non_quota_object(self,
+                                                          mock_execute):
+        self.repos._decrement_quota_optimistic(
+            self.session, data_models.SessionPersistence, self.project_id, 1)
+
+        mock_execute.assert_not_called()
@@ -14,6 +14,8 @@
 
 from unittest import mock
 
+from oslo_config import cfg
+from oslo_config import fixture as oslo_fixture
 from oslo_utils import uuidutils
 
 from octavia.common import exceptions
@@ -63,3 +65,32 @@ class TestGlanceClient(base.TestCase):
         self.manager.manager.list.return_value = images
         image_id = self.manager.get_image_id_by_tag('faketag', None)
         self.assertIn(image_id, [image['id'] for image in images])
+
+    def test_image_id_cached(self):
+        images = [{'id': uuidutils.generate_uuid(), 'tag': 'faketag'}]
+        self.manager.manager.list.return_value = images
+
+        image_id = self.manager.get_image_id_by_tag('faketag')
+        self.assertEqual(images[0]['id'], image_id)
+        image_id = self.manager.get_image_id_by_tag('faketag')
+        self.assertEqual(images[0]['id'], image_id)
+        self.manager.manager.list.assert_called_once()
+
+        # Other tags and owners are looked up separately
+        self.manager.get_image_id_by_tag('faketag', 'owner')
+        self.assertEqual(2, self.manager.manager.list.call_count)
+
+        self.manager.invalidate_image_id('faketag')
+        self.manager.get_image_id_by_tag('faketag', None)
+        self.assertEqual(3, self.manager.manager.list.call_count)
+
+    def test_image_id_cache_disabled(self):
+        conf = self.useFixture(oslo_fixture.Config(cfg.CONF))
+        conf.config(group='glance', image_id_cache_ttl=0)
+        images = [{'id': uuidutils.generate_uuid(), 'tag': 'faketag'}]
+        self.manager.manager.list.return_value = images
+
+        self.manager.get_image_id_by_tag('faketag', None)
+        self.manager.get_image_id_by_tag('faketag', None)
+
+        self.assertEqual(2, self.manager.manager.list.call_count)
@@ -367,6 +367,7 @@ class TestAllowedAddressPairsDriver(base.TestCase):
         test_driver._add_vip_security_group_to_port.reset_mock()
         test_driver._get_lb_security_group.reset_mock()
         test_driver._update_security_group_rules.reset_mock()
+        allowed_address_pairs._SEC_GRP_ID_CACHE.invalidate(LB_ID)
 
         result = test_driver.update_vip_sg(lb_mock, vip_mock)
 
@@ -426,6 +427,7 @@ class TestAllowedAddressPairsDriver(base.TestCase):
         test_driver._add_vip_security_group_to_port.reset_mock()
         test_driver._get_lb_security_group.reset_mock()
         test_driver._update_security_group_rules.reset_mock()
+        allowed_address_pairs._SEC_GRP_ID_CACHE.invalidate(LB_ID)
 
         test_driver.update_aap_port_sg(lb_mock, amp_mock, vip_mock)
 
@@ -1092,7 +1094,7 @@ class TestAllowedAddressPairsDriver(base.TestCase):
         list_rules = self.driver.network_proxy.security_group_rules
         list_rules.return_value = fake_rules
         delete_rule = self.driver.network_proxy.delete_security_group_rule
-        create_rule = self.driver.network_proxy.create_security_group_rule
+        create_rules = self.driver.network_proxy.create_security_group_rules
         self.driver.update_vip(lb)
         delete_rule.assert_called_once_with('rule-22')
         expected_create_rule_1 = {
@@ -1168,16 +1170,29 @@ class TestAllowedAddressPairsDriver(base.TestCase):
             'remote_ip_prefix': None
         }
 
-        create_rule.assert_has_calls([mock.call(**expected_create_rule_1),
-                                      mock.call(
-                                          **expected_create_rule_udp_peer),
-                                      mock.call(**expected_create_rule_2),
-                                      mock.call(**expected_create_rule_3),
-                                      mock.call(**expected_create_rule_4),
-                                      mock.call(**expected_create_rule_5),
-                                      mock.call(**expected_create_rule_udp_1),
-                                      mock.call(**expected_create_rule_udp_2)],
-                                     any_order=True)
+        expected_create_rules_ipv6_peer = [
+            {'security_group_id': 'secgrp-1',
+             'direction': 'ingress',
+             'protocol': 'tcp',
+             'port_range_min': peer_port,
+             'port_range_max': peer_port,
+             'ethertype': 'IPv6',
+             'remote_ip_prefix': None} for peer_port in (1024, 1025, 1026)]
+
+        # The rules are created with a single bulk request
+        create_rules.assert_called_once()
+        self.assertCountEqual([expected_create_rule_1,
+                               expected_create_rule_udp_peer,
+                               *expected_create_rules_ipv6_peer,
+                               expected_create_rule_2,
+                               expected_create_rule_3,
+                               expected_create_rule_4,
+                               expected_create_rule_5,
+                               expected_create_rule_udp_1,
+                               expected_create_rule_udp_2],
+                              create_rules.call_args[0][0])
+        create_rule = self.driver.network_proxy.create_security_group_rule
+        create_rule.assert_not_called()
 
     def test_update_vip_when_protocol_and_peer_ports_overlap(self):
         lc_1 = data_models.ListenerCidr('l1', '0.0.0.0/0')
@@ -1199,13 +1214,13 @@ class TestAllowedAddressPairsDriver(base.TestCase):
         list_rules = self.driver.network_proxy.security_group_rules
         list_rules.return_value = fake_rules
         delete_rule = self.driver.network_proxy.delete_security_group_rule
-        create_rule = self.driver.network_proxy.create_security_group_rule
+        create_rules = self.driver.network_proxy.create_security_group_rules
         self.driver.update_vip(lb)
         delete_rule.assert_called_once_with('rule-22')
 
-        # Create SG rule calls should be 4, each for port 1024/1025/1026/443
+        # Create SG rules should be 4, each for port 1024/1025/1026/443
         # No duplicate SG creation for overlap port 1025
-        self.assertEqual(4, create_rule.call_count)
+        self.assertEqual(4, len(create_rules.call_args[0][0]))
 
     def test_update_vip_when_listener_deleted(self):
         listeners = [data_models.Listener(protocol_port=80,
@@ -1229,11 +1244,11 @@ class TestAllowedAddressPairsDriver(base.TestCase):
         list_rules = self.driver.network_proxy.security_group_rules
         list_rules.return_value = fake_rules
         delete_rule = self.driver.network_proxy.delete_security_group_rule
-        create_rule = self.driver.network_proxy.create_security_group_rule
+        create_rules = self.driver.network_proxy.create_security_group_rules
         self.driver.update_vip(lb)
         delete_rule.assert_has_calls(
             [mock.call('rule-22'), mock.call('rule-udp-50')])
-        self.assertTrue(create_rule.called)
+        self.assertTrue(create_rules.called)
 
     def test_update_vip_when_no_listeners(self):
         listeners = []
@@ -1290,6 +1305,110 @@ class TestAllowedAddressPairsDriver(base.TestCase):
         self.driver.update_vip(lb, for_delete=True)
         update_rules.assert_not_called()
 
+    def test_update_vip_active_standby(self):
+        listeners = [data_models.Listener(protocol_port=80, peer_port=1024,
+                                          protocol=constants.PROTOCOL_TCP)]
+        vip = data_models.Vip(ip_address='10.0.0.2')
+        lb = data_models.LoadBalancer(
+            id='1', listeners=listeners, vip=vip,
+            topology=constants.TOPOLOGY_ACTIVE_STANDBY)
+        list_sec_grps = self.driver.network_proxy.find_security_group
+        list_sec_grps.return_value = {'id': 'secgrp-1'}
+        fake_rules = [
+            {'id': 'rule-80', 'port_range_max': 80, 'protocol': 'tcp',
+             'direction': 'ingress', 'ethertype': 'IPv4'},
+            {'id': 'rule-1024', 'port_range_max': 1024, 'protocol': 'tcp',
+             'direction': 'ingress', 'ethertype': 'IPv4'},
+            {'id': 'rule-vrrp', 'protocol': '112', 'direction': 'ingress',
+             'ethertype': 'IPv4'}
+        ]
+        list_rules = self.driver.network_proxy.security_group_rules
+        list_rules.return_value = fake_rules
+        delete_rule = self.driver.network_proxy.delete_security_group_rule
+        create_rules = self.driver.network_proxy.create_security_group_rules
+
+        self.driver.update_vip(lb)
+
+        # Only the missing authentication header rule is created
+        create_rules.assert_called_once_with([{
+            'security_group_id': 'secgrp-1',
+            'direction': 'ingress',
+            'protocol': constants.AUTH_HEADER_PROTOCOL_NUMBER,
+            'port_range_min': None,
+            'port_range_max': None,
+            'ethertype': 'IPv4',
+            'remote_ip_prefix': None
+        }])
+        delete_rule.assert_not_called()
+
+        # Nothing to do when the rules are up to date
+        create_rules.reset_mock()
+        fake_rules.append({'id': 'rule-ah', 'protocol': '51',
+                           'direction': 'ingress', 'ethertype': 'IPv4'})
+
+        self.driver.update_vip(lb)
+
+        create_rules.assert_not_called()
+        # The security group ID is cached
+        list_sec_grps.assert_called_once()
+
+    def test_update_vip_when_security_group_rule_exists(self):
+        listeners = [data_models.Listener(protocol_port=80, peer_port=1024,
+                                          protocol=constants.PROTOCOL_TCP),
+                     data_models.Listener(protocol_port=443, peer_port=1025,
+                                          protocol=constants.PROTOCOL_TCP)]
+        vip = data_models.Vip(ip_address='10.0.0.2')
+        lb = data_models.LoadBalancer(id='1', listeners=listeners, vip=vip)
+        list_sec_grps = self.driver.network_proxy.find_security_group
+        list_sec_grps.return_value = {'id': 'secgrp-1'}
+        list_rules = self.driver.network_proxy.security_group_rules
+        list_rules.return_value = []
+        create_rules = self.driver.network_proxy.create_security_group_rules
+        create_rules.side_effect = os_exceptions.ConflictException
+        create_rule = self.driver.network_proxy.create_security_group_rule
+        create_rule.side_effect = [os_exceptions.ConflictException,
+                                   None, None, None]
+
+        self.driver.update_vip(lb)
+
+        # The rules are created one by one after the bulk request conflict
+        rules = create_rules.call_args[0][0]
+        self.assertEqual(4, len(rules))
+        create_rule.assert_has_calls([mock.call(**rule) for rule in rules])
+
+    def test_update_vip_when_security_group_deleted(self):
+        listeners = [data_models.Listener(protocol_port=80,
+                                          protocol=constants.PROTOCOL_TCP)]
+        vip = data_models.Vip(ip_address='10.0.0.2')
+        lb = data_models.LoadBalancer(id='1', listeners=listeners, vip=vip)
+        list_sec_grps = self.driver.network_proxy.find_security_group
+        list_sec_grps.return_value = {'id': 'secgrp-1'}
+        list_rules = self.driver.network_proxy.security_group_rules
+        list_rules.return_value = []
+        create_rules = self.driver.network_proxy.create_security_group_rules
+        create_rules.side_effect = os_exceptions.ResourceNotFound
+
+        self.assertRaises(os_exceptions.ResourceNotFound,
+                          self.driver.update_vip, lb)
+
+        # The cached security group ID is dropped
+        list_sec_grps.return_value = None
+        self.assertRaises(exceptions.MissingVIPSecurityGroup,
+                          self.driver.update_vip, lb)
+        self.assertEqual(2, list_sec_grps.call_count)
+
+    def test_get_lb_security_group_id(self):
+        list_sec_grps = self.driver.network_proxy.find_security_group
+        list_sec_grps.side_effect = [None, {'id': 'secgrp-1'}]
+
+        # Missing security groups are not cached
+        self.assertIsNone(self.driver._get_lb_security_group_id('1'))
+        self.assertEqual('secgrp-1',
+                         self.driver._get_lb_security_group_id('1'))
+        self.assertEqual('secgrp-1',
+                         self.driver._get_lb_security_group_id('1'))
+        self.assertEqual(2, list_sec_grps.call_count)
+
     def test_failover_preparation(self):
         original_dns_integration_state = self.driver.dns_integration_enabled
         self.driver.dns_integration_enabled = False
@@ -1626,6 +1745,47 @@ class TestAllowedAddressPairsDriver(base.TestCase):
                           security_group_ids=[SECURITY_GROUP_ID],
                           admin_state_up=False, qos_policy_id=QOS_POLICY_ID)
 
+    def test_create_ports(self):
+        NETWORK_ID = uuidutils.generate_uuid()
+        SECURITY_GROUP_ID = uuidutils.generate_uuid()
+        SUBNET_ID = uuidutils.generate_uuid()
+        PORT1_ID = uuidutils.generate_uuid()
+        PORT2_ID = uuidutils.generate_uuid()
+
+        self.driver.network_proxy.create_ports.side_effect = [
+            iter([Port(id=PORT1_ID, network_id=NETWORK_ID, name='port1'),
+                  Port(id=PORT2_ID, network_id=NETWORK_ID, name='port2')]),
+            Exception('boom')]
+
+        # Test successful path
+        result = self.driver.create_ports([
+            {'network_id': NETWORK_ID, 'name': 'port1',
+             'fixed_ips': [{'subnet_id': SUBNET_ID}],
+             'secondary_ips': ['203.0.113.71'],
+             'security_group_ids': [SECURITY_GROUP_ID]},
+            {'network_id': NETWORK_ID, 'name': 'port2'}])
+
+        self.assertEqual([PORT1_ID, PORT2_ID], [port.id for port in result])
+        self.assertEqual(['port1', 'port2'], [port.name for port in result])
+        self.driver.network_proxy.create_ports.assert_called_once_with([
+            {'network_id': NETWORK_ID, 'admin_state_up': True,
+             'device_owner': constants.OCTAVIA_OWNER,
+             'allowed_address_pairs': [{'ip_address': '203.0.113.71'}],
+             'fixed_ips': [{'subnet_id': SUBNET_ID}],
+             'name': 'port1',
+             'security_groups': [SECURITY_GROUP_ID],
+             'binding_vnic_type': constants.VNIC_TYPE_NORMAL},
+            {'network_id': NETWORK_ID, 'admin_state_up': True,
+             'device_owner': constants.OCTAVIA_OWNER,
+             'name': 'port2',
+             'binding_vnic_type': constants.VNIC_TYPE_NORMAL}])
+        self.driver.network_proxy.create_port.assert_not_called()
+
+        # Test exception
+        self.assertRaises(network_base.CreatePortException,
+                          self.driver.create_ports,
+                          [{'network_id': NETWORK_ID}])
+
     def test_get_security_group(self):
 
         # Test the case of security groups disabled in neutron
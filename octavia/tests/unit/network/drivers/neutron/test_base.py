@@ -149,6 +149,25 @@ class TestBaseNeutronNetworkDriver(base.TestCase):
         self.driver.network_proxy.create_security_group_rule.assert_has_calls(
             [mock.call(**expected_sec_grp_rule_dict)])
 
+    def test__create_security_group_rules(self):
+        rules = [self.driver._get_security_group_rule_body(
+            t_constants.MOCK_SECURITY_GROUP_ID, 'tcp', port_min=port,
+            port_max=port, ethertype='IPv4') for port in (80, 443)]
+        create_rules = self.driver.network_proxy.create_security_group_rules
+        create_rules.return_value = iter(['rule-80', 'rule-443'])
+
+        self.driver._create_security_group_rules(rules)
+
+        create_rules.assert_called_once_with(rules)
+        self.assertEqual(
+            {'security_group_id': t_constants.MOCK_SECURITY_GROUP_ID,
+             'direction': 'ingress',
+             'protocol': 'tcp',
+             'port_range_min': 443,
+             'port_range_max': 443,
+             'ethertype': 'IPv4',
+             'remote_ip_prefix': None}, rules[1])
+
     def test__port_to_vip(self):
         lb = dmh.generate_load_balancer_tree()
         lb.vip.subnet_id = t_constants.MOCK_SUBNET_ID
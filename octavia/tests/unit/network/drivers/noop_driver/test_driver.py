@@ -351,6 +351,18 @@ class TestNoopNetworkDriver(base.TestCase):
         self.assertEqual(QOS_POLICY_ID, result.qos_policy_id)
         self.assertFalse(result.admin_state_up)
 
+    def test_create_ports(self):
+        NETWORK_ID = uuidutils.generate_uuid()
+
+        result = self.driver.create_ports([
+            {'network_id': NETWORK_ID, 'name': 'port1'},
+            {'network_id': NETWORK_ID, 'name': 'port2'}])
+
+        self.assertEqual(['port1', 'port2'], [port.name for port in result])
+        for port in result:
+            self.assertIsInstance(port, network_models.Port)
+            self.assertEqual(NETWORK_ID, port.network_id)
+
     def test_plug_fixed_ip(self):
         self.driver.plug_fixed_ip(self.port_id, self.subnet_id,
                                   self.ip_address)